@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..models.user import User
+from ..schemas.report import VoucherDetailsRequest
 from ..utils.dependencies import get_current_active_user as get_current_user
 from ..services.tally_service import tally_service
 
@@ -39,6 +40,16 @@ async def get_vouchers(
     return result
 
 
+@router.post("/vouchers/details")
+async def get_voucher_details_batch(
+    request: VoucherDetailsRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Get details of several vouchers in one request - proxies to TallyInsight"""
+    result = await tally_service.get_voucher_details_batch(request.guids)
+    return result
+
+
 @router.get("/vouchers/{guid}")
 async def get_voucher_details(
     guid: str,
@@ -106,10 +117,15 @@ async def get_outstanding_ledgerwise(
 async def get_outstanding_ageing(
     type: str = Query(default="receivable"),
     company: Optional[str] = None,
+    as_of: Optional[str] = None,
+    buckets: Optional[str] = None,
+    group_by: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
     """Get ageing analysis - proxies to TallyInsight"""
-    result = await tally_service.get_outstanding_ageing(type=type, company=company)
+    result = await tally_service.get_outstanding_ageing(
+        type=type, company=company, as_of=as_of, buckets=buckets, group_by=group_by
+    )
     return result
 
 
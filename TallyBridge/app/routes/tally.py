@@ -10,6 +10,7 @@ Endpoints:
 - /api/v1/tally/vouchers - Get vouchers
 - /api/v1/tally/stock-items - Get stock items
 - /api/v1/tally/reports/* - Get reports
+- /api/v1/tally/*/export - Stream CSV / NDJSON / XLSX exports
 - /api/v1/tally/webhook/sync-complete - Webhook for sync completion
 """
 
@@ -366,6 +367,34 @@ async def get_dashboard(
     return result
 
 
+@router.get("/reports/dashboard/cube")
+async def get_dashboard_cube(
+    company: Optional[str] = None,
+    group_by: str = Query("month", description="Comma separated: month, voucher_type, ledger, ledger_group"),
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    voucher_type: Optional[str] = None,
+    ledger: Optional[str] = None,
+    group: Optional[str] = None,
+    order_by: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+    current_user: User = Depends(get_current_user)
+):
+    """Get monthly totals for dashboard charts"""
+    result = await tally_service.get_dashboard_cube(
+        company=company,
+        group_by=group_by,
+        from_date=from_date,
+        to_date=to_date,
+        voucher_type=voucher_type,
+        ledger=ledger,
+        group=group,
+        order_by=order_by,
+        limit=limit
+    )
+    return result
+
+
 # ==================== DELETE OPERATIONS ====================
 
 @router.delete("/company/{company_name}")
@@ -423,3 +452,43 @@ async def get_ledger_report_pdf(
         to_date=to_date
     )
     return result
+
+
+# ==================== DATA EXPORT ====================
+
+@router.get("/vouchers/export")
+async def export_vouchers(
+    format: str = Query("csv", pattern="^(csv|ndjson|xlsx)$", description="csv, ndjson or xlsx"),
+    company: Optional[str] = None,
+    voucher_type: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Proxy to TallyInsight voucher export (streamed)"""
+    return await tally_service.export_vouchers(
+        format=format,
+        company=company,
+        voucher_type=voucher_type,
+        from_date=from_date,
+        to_date=to_date
+    )
+
+
+@router.get("/ledger-report/export")
+async def export_ledger_report(
+    ledger: str = Query(..., description="Ledger name"),
+    format: str = Query("csv", pattern="^(csv|ndjson|xlsx)$", description="csv, ndjson or xlsx"),
+    company: Optional[str] = None,
+    from_date: Optional[str] = Query(default=None, description="From date (YYYY-MM-DD)"),
+    to_date: Optional[str] = Query(default=None, description="To date (YYYY-MM-DD)"),
+    current_user: User = Depends(get_current_user)
+):
+    """Proxy to TallyInsight ledger report export (streamed)"""
+    return await tally_service.export_ledger_report(
+        ledger=ledger,
+        format=format,
+        company=company,
+        from_date=from_date,
+        to_date=to_date
+    )
@@ -8,3 +8,4 @@ from app.schemas.user import UserBase, UserCreate, UserUpdate, UserResponse
 from app.schemas.company import CompanyBase, CompanyCreate, CompanyUpdate, CompanyResponse
 from app.schemas.permission import PermissionBase, PermissionCreate, PermissionResponse
 from app.schemas.response import SuccessResponse, ErrorResponse, PaginatedResponse
+from app.schemas.report import VoucherDetailsRequest
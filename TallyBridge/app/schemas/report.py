@@ -0,0 +1,11 @@
+"""
+Report Schemas
+"""
+
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class VoucherDetailsRequest(BaseModel):
+    """Batch voucher details request"""
+    guids: List[str] = Field(..., min_length=1, max_length=1000, description="Voucher GUIDs")
@@ -6,6 +6,7 @@ Features:
 - Sync companies from Tally
 - Fetch ledgers, vouchers, stock items
 - Get reports (trial balance, P&L, balance sheet)
+- Stream CSV / NDJSON / XLSX exports through without buffering them
 - Health check for TallyInsight service
 """
 
@@ -342,6 +343,40 @@ class TallyService:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    async def get_dashboard_cube(
+        self,
+        company: str = None,
+        group_by: str = "month",
+        from_date: str = None,
+        to_date: str = None,
+        voucher_type: str = None,
+        ledger: str = None,
+        group: str = None,
+        order_by: str = None,
+        limit: int = None,
+        token: str = None
+    ) -> Dict[str, Any]:
+        """Get monthly cube totals for dashboard charts"""
+        try:
+            params = {"group_by": group_by}
+            optional = {"company": company, "from_date": from_date, "to_date": to_date,
+                        "voucher_type": voucher_type, "ledger": ledger, "group": group,
+                        "order_by": order_by, "limit": limit}
+            params.update({key: value for key, value in optional.items() if value})
+            
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.get(
+                    f"{self.base_url}/api/data/cube",
+                    params=params,
+                    headers=self._get_headers(token)
+                )
+                response.raise_for_status()
+                return {"success": True, "data": response.json()}
+        except httpx.HTTPStatusError as e:
+            return {"success": False, "error": f"HTTP {e.response.status_code}: {e.response.text}"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
     async def delete_company(
         self,
         company_name: str,
@@ -382,6 +417,26 @@ class TallyService:
         except Exception as e:
             return {"error": str(e)}
     
+    async def get_voucher_details_batch(
+        self,
+        guids: List[str],
+        token: str = None
+    ) -> Dict[str, Any]:
+        """Get details of several vouchers by GUID in one request"""
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.post(
+                    f"{self.base_url}/api/data/vouchers/details",
+                    json={"guids": guids},
+                    headers=self._get_headers(token)
+                )
+                response.raise_for_status()
+                return response.json()
+        except httpx.HTTPStatusError as e:
+            return {"error": f"HTTP {e.response.status_code}: {e.response.text}"}
+        except Exception as e:
+            return {"error": str(e)}
+    
     async def get_outstanding_billwise(
         self,
         type: str = "receivable",
@@ -450,6 +505,9 @@ class TallyService:
         self,
         type: str = "receivable",
         company: str = None,
+        as_of: str = None,
+        buckets: str = None,
+        group_by: str = None,
         token: str = None
     ) -> Dict[str, Any]:
         """Get ageing analysis"""
@@ -457,6 +515,12 @@ class TallyService:
             params = {"type": type}
             if company:
                 params["company"] = company
+            if as_of:
+                params["as_of"] = as_of
+            if buckets:
+                params["buckets"] = buckets
+            if group_by:
+                params["group_by"] = group_by
             
             async with httpx.AsyncClient(timeout=self.timeout) as client:
                 response = await client.get(
@@ -710,6 +774,81 @@ class TallyService:
             from fastapi import HTTPException
             raise HTTPException(status_code=500, detail=str(e))
 
+    
+    async def stream_export(
+        self,
+        path: str,
+        params: Dict[str, Any],
+        token: str = None
+    ):
+        """Pass a TallyInsight export download through chunk by chunk"""
+        from fastapi import HTTPException
+        from fastapi.responses import StreamingResponse
+        
+        # Long downloads: only connecting and the gap between chunks are limited
+        client = httpx.AsyncClient(timeout=httpx.Timeout(self.timeout, read=300.0))
+        try:
+            request = client.build_request(
+                "GET",
+                f"{self.base_url}{path}",
+                params={key: value for key, value in params.items() if value},
+                headers=self._get_headers(token)
+            )
+            response = await client.send(request, stream=True)
+        except Exception as e:
+            await client.aclose()
+            raise HTTPException(status_code=500, detail=str(e))
+        
+        if response.status_code >= 400:
+            detail = (await response.aread()).decode("utf-8", errors="replace")
+            await response.aclose()
+            await client.aclose()
+            raise HTTPException(status_code=response.status_code, detail=detail)
+        
+        async def body():
+            try:
+                async for chunk in response.aiter_bytes():
+                    yield chunk
+            finally:
+                await response.aclose()
+                await client.aclose()
+        
+        return StreamingResponse(
+            body(),
+            media_type=response.headers.get("Content-Type", "application/octet-stream"),
+            headers={"Content-Disposition": response.headers.get("Content-Disposition", "attachment")}
+        )
+    
+    async def export_vouchers(
+        self,
+        format: str = "csv",
+        company: str = None,
+        voucher_type: str = None,
+        from_date: str = None,
+        to_date: str = None,
+        token: str = None
+    ):
+        """Stream voucher export (CSV / NDJSON / XLSX) from TallyInsight"""
+        return await self.stream_export("/api/data/vouchers/export", {
+            "format": format, "company": company, "voucher_type": voucher_type,
+            "from_date": from_date, "to_date": to_date
+        }, token)
+    
+    async def export_ledger_report(
+        self,
+        ledger: str,
+        format: str = "csv",
+        company: str = None,
+        from_date: str = None,
+        to_date: str = None,
+        token: str = None
+    ):
+        """Stream ledger report export (CSV / NDJSON / XLSX) from TallyInsight"""
+        return await self.stream_export("/api/data/ledger-report/export", {
+            "ledger": ledger, "format": format, "company": company,
+            "from_date": from_date, "to_date": to_date
+        }, token)
+
 
 # Singleton instance
 tally_service = TallyService()
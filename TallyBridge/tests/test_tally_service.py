@@ -163,6 +163,27 @@ class TestTallyService:
             
             assert result["success"] is True
     
+    @pytest.mark.asyncio
+    async def test_get_voucher_details_batch(self, service):
+        """Test getting details of several vouchers in one POST"""
+        with patch('httpx.AsyncClient') as mock_client:
+            mock_response = MagicMock()
+            mock_response.status_code = 200
+            mock_response.json.return_value = {"vouchers": {"g1": {"voucher": {"guid": "g1"}}}, "missing": ["g2"]}
+            mock_response.raise_for_status = MagicMock()
+            
+            mock_client_instance = AsyncMock()
+            mock_client_instance.post = AsyncMock(return_value=mock_response)
+            mock_client_instance.__aenter__ = AsyncMock(return_value=mock_client_instance)
+            mock_client_instance.__aexit__ = AsyncMock(return_value=None)
+            mock_client.return_value = mock_client_instance
+            
+            result = await service.get_voucher_details_batch(["g1", "g2"])
+            
+            assert result["missing"] == ["g2"]
+            _, kwargs = mock_client_instance.post.call_args
+            assert kwargs["json"] == {"guids": ["g1", "g2"]}
+    
     @pytest.mark.asyncio
     async def test_get_trial_balance(self, service):
         """Test getting trial balance"""
@@ -185,6 +206,56 @@ class TestTallyService:
             
             assert result["success"] is True
     
+    @pytest.mark.asyncio
+    async def test_get_dashboard_cube(self, service):
+        """Test getting cube totals; unset filters are not sent"""
+        with patch('httpx.AsyncClient') as mock_client:
+            mock_response = MagicMock()
+            mock_response.status_code = 200
+            mock_response.json.return_value = {"group_by": ["month"], "data": [], "count": 0}
+            mock_response.raise_for_status = MagicMock()
+            
+            mock_client_instance = AsyncMock()
+            mock_client_instance.get = AsyncMock(return_value=mock_response)
+            mock_client_instance.__aenter__ = AsyncMock(return_value=mock_client_instance)
+            mock_client_instance.__aexit__ = AsyncMock(return_value=None)
+            mock_client.return_value = mock_client_instance
+            
+            result = await service.get_dashboard_cube(company="Test Co", voucher_type="Sales")
+            
+            assert result["success"] is True
+            _, kwargs = mock_client_instance.get.call_args
+            assert kwargs["params"] == {"group_by": "month", "company": "Test Co", "voucher_type": "Sales"}
+    
+    @pytest.mark.asyncio
+    async def test_export_vouchers_streams_through(self, service):
+        """Test export chunks are passed on as they arrive, with the download headers"""
+        async def chunks():
+            yield b"date,voucher_type\r\n"
+            yield b"2024-04-01,Sales\r\n"
+        
+        with patch('httpx.AsyncClient') as mock_client:
+            mock_response = MagicMock()
+            mock_response.status_code = 200
+            mock_response.headers = {"Content-Type": "text/csv; charset=utf-8",
+                                     "Content-Disposition": "attachment; filename=Vouchers.csv"}
+            mock_response.aiter_bytes = chunks
+            mock_response.aclose = AsyncMock()
+            
+            mock_client_instance = MagicMock()
+            mock_client_instance.send = AsyncMock(return_value=mock_response)
+            mock_client_instance.aclose = AsyncMock()
+            mock_client.return_value = mock_client_instance
+            
+            result = await service.export_vouchers(format="csv", company="Test Co")
+            body = [chunk async for chunk in result.body_iterator]
+            
+            assert body == [b"date,voucher_type\r\n", b"2024-04-01,Sales\r\n"]
+            assert result.headers["Content-Disposition"] == "attachment; filename=Vouchers.csv"
+            _, kwargs = mock_client_instance.build_request.call_args
+            assert kwargs["params"] == {"format": "csv", "company": "Test Co"}
+            mock_client_instance.aclose.assert_awaited()
+    
     @pytest.mark.asyncio
     async def test_error_handling(self, service):
         """Test error handling for failed requests"""
@@ -5,7 +5,7 @@ Loads and manages application configuration from config.yaml
 
 import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import yaml
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
@@ -23,6 +23,20 @@ class TallyConfig(BaseModel):
 class DatabaseConfig(BaseModel):
     """Database configuration"""
     path: str = "./tally.db"
+    read_pool_size: int = 4  # SQLite read-only connections (0 = share writer)
+    per_company_files: bool = False  # SQLite: one file per company + catalog at path
+    company_dir: str = ""  # Per-company files location (default: <path dir>/companies)
+    company_idle_timeout: int = 600  # Per-company files: close a company's connections after this many idle seconds (0 = never)
+    bulk_load_method: str = "insert"  # insert | copy (PostgreSQL COPY + merge) | load_data (MySQL LOAD DATA)
+    amount_storage: str = "real"  # real | paise (SQLite: exact integer amounts + debit/credit columns)
+    sqlite_profile: str = "balanced"  # balanced | read_heavy | low_memory (see sqlite_profiles.py)
+    sqlite_pragmas: Dict[str, Any] = {}  # Per-PRAGMA overrides of the profile, e.g. {mmap_size: 0}
+    page_size: int = 4096  # SQLite page size for newly created database files
+    maintenance_interval: int = 30  # Minutes between idle-time SQLite maintenance (0 = off)
+    analytics_mirror: bool = False  # Export company data to Parquet after sync; heavy reports run on DuckDB
+    analytics_dir: str = ""  # Parquet mirror location (default: <path dir>/analytics)
+    archive_keep_years: int = 0  # SQLite: financial years kept hot; older closed years are archived (0 = off)
+    archive_dir: str = ""  # Financial-year archive files (default: <path dir>/archive)
 
 
 class SyncConfig(BaseModel):
@@ -36,6 +50,9 @@ class ApiConfig(BaseModel):
     host: str = "0.0.0.0"
     port: int = 8000
     cors_origins: List[str] = ["http://localhost:3000"]
+    response_cache: bool = True  # Cache report responses until the next sync (see response_cache.py)
+    response_cache_mb: int = 64  # Size limit of cached response bodies
+    export_chunk_size: int = 5000  # Rows read per chunk by the streaming exports
 
 
 class DebugConfig(BaseModel):
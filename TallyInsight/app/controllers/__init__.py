@@ -12,6 +12,7 @@ from .voucher_controller import router as voucher_router
 from .outstanding_controller import router as outstanding_router
 from .ledger_controller import router as ledger_router
 from .dashboard_controller import router as dashboard_router
+from .statement_controller import router as statement_router
 
 __all__ = [
     "sync_router",
@@ -23,5 +24,6 @@ __all__ = [
     "voucher_router",
     "outstanding_router",
     "ledger_router",
-    "dashboard_router"
+    "dashboard_router",
+    "statement_router"
 ]
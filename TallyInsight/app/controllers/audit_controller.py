@@ -17,7 +17,9 @@ from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
 from ..services.audit_service import audit_service
 from ..services.database_service import database_service
+from ..services.response_cache import response_cache
 from ..utils.logger import logger
+from ..utils.pagination import CursorError
 import json
 
 router = APIRouter(prefix="/api/audit", tags=["Audit Trail"])
@@ -32,7 +34,8 @@ async def get_audit_history(
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     limit: int = Query(100, ge=1, le=1000, description="Max records to return"),
-    offset: int = Query(0, ge=0, description="Offset for pagination")
+    offset: int = Query(0, ge=0, description="Offset for pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page")
 ):
     """
     Get audit history with optional filters.
@@ -41,9 +44,10 @@ async def get_audit_history(
     - /api/audit/history?action=DELETE - All deletes
     - /api/audit/history?table_name=mst_ledger - All ledger changes
     - /api/audit/history?company=MyCompany&start_date=2026-01-01
+    - /api/audit/history?cursor=<next_cursor> - Next page
     """
     try:
-        records = await audit_service.get_audit_history(
+        page = await audit_service.get_audit_history(
             table_name=table_name,
             record_guid=record_guid,
             action=action,
@@ -51,8 +55,10 @@ async def get_audit_history(
             start_date=start_date,
             end_date=end_date,
             limit=limit,
-            offset=offset
+            offset=offset,
+            cursor=cursor
         )
+        records = page.rows
         
         # Parse JSON fields
         for record in records:
@@ -65,10 +71,14 @@ async def get_audit_history(
         
         return {
             "count": len(records),
+            "total": page.total,
             "limit": limit,
             "offset": offset,
-            "records": records
+            "records": records,
+            "next_cursor": page.next_cursor
         }
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting audit history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -135,7 +145,8 @@ async def get_deleted_records(
     company: Optional[str] = Query(None, description="Filter by company"),
     include_restored: bool = Query(False, description="Include already restored records"),
     limit: int = Query(100, ge=1, le=1000),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page")
 ):
     """
     Get deleted records that can be restored.
@@ -143,13 +154,15 @@ async def get_deleted_records(
     These records were deleted during sync because they no longer exist in Tally.
     """
     try:
-        records = await audit_service.get_deleted_records(
+        page = await audit_service.get_deleted_records(
             table_name=table_name,
             company=company,
             include_restored=include_restored,
             limit=limit,
-            offset=offset
+            offset=offset,
+            cursor=cursor
         )
+        records = page.rows
         
         # Parse JSON data
         for record in records:
@@ -158,8 +171,12 @@ async def get_deleted_records(
         
         return {
             "count": len(records),
-            "records": records
+            "total": page.total,
+            "records": records,
+            "next_cursor": page.next_cursor
         }
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting deleted records: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -215,6 +232,7 @@ async def restore_deleted_record(deleted_id: int):
         # Mark as restored
         update_query = "UPDATE deleted_records SET is_restored = 1, restored_at = CURRENT_TIMESTAMP WHERE id = ?"
         await database_service.execute(update_query, (deleted_id,))
+        response_cache.bump(record["company"])
         
         # Log the restore action
         await audit_service.log_insert(
@@ -15,6 +15,10 @@ BUSINESS LOGIC:
    - Returns row counts for all tables (master + transaction)
    - Used in: Dashboard page to show data overview
    - Parameter: company_name (required for filtering)
+   - Source: table_stats (refreshed at the end of every sync); GET never
+     counts, so a company not synced yet returns {}
+   - POST /counts/refresh: exact recount on demand
+   - GET /table-stats: rows, size estimate, last sync per table
    
 2. Synced Companies API (/synced-companies):
    - Returns list of companies synced to database
@@ -35,6 +39,14 @@ BUSINESS LOGIC:
    - Used in: Debug/admin tools
    - Security: Only SELECT queries allowed
 
+6. Cube API (/cube):
+   - Monthly totals for trend and top-N charts, from monthly_cube
+   - group_by: any of month, voucher_type, ledger, ledger_group
+   - Filters: from_date / to_date (month granularity), voucher_type,
+     ledger (comma separated), group (ledgers under a group, any depth)
+   - order_by: a measure, largest first (with limit: top N)
+   - Measures: voucher_count, entry_count, debit, credit, amount
+
 DASHBOARD METRICS:
 ------------------
 Master Tables: mst_group, mst_ledger, mst_vouchertype, mst_stock_item, etc.
@@ -45,24 +57,38 @@ IMPORTANT:
 - company_name parameter is REQUIRED for counts API
 - Delete operation removes data from ALL tables for that company
 - Query API is for debugging only, not for production use
+- Cube voucher_count: exact when not split or filtered by ledger / group;
+  otherwise vouchers per ledger, summed (a voucher can hit several ledgers)
 
 DEPENDENCIES:
 -------------
 - sync_companies: Tracks synced company metadata
-- All mst_* and trn_* tables for counts
+- table_stats: Per-table, per-company row counts maintained by sync
+- monthly_cube: month x voucher type x ledger totals rebuilt by sync
+  (services/database/monthly_cube.py)
+- All mst_* and trn_* tables for recounts
 ================================================================================
 """
 
 from fastapi import APIRouter, Query, HTTPException
-from typing import Optional
+from typing import List, Optional
 
 from ..services.database_service import database_service
+from ..services.analytics_service import analytics_service
+from ..services.response_cache import response_cache
 from ..services.tally_service import tally_service
+from ..services.database.group_closure import under_condition
+from ..services.database.monthly_cube import CUBE_DIMENSIONS, CUBE_MEASURES, MONTHLY_CUBE_TABLE
 from ..utils.logger import logger
 
 router = APIRouter()
 
 
+def _split(values: Optional[str]) -> List[str]:
+    """Comma separated query parameter -> list of non-empty values"""
+    return [value.strip() for value in (values or "").split(",") if value.strip()]
+
+
 @router.post("/query")
 async def execute_query(query_request: dict):
     """Execute custom SQL query (SELECT only)"""
@@ -91,13 +117,115 @@ async def get_table_counts(company: Optional[str] = None):
     """Get row counts for all tables, optionally filtered by company"""
     try:
         await database_service.connect()
-        counts = await database_service.get_all_table_counts(company_name=company)
+        counts = await database_service.get_cached_table_counts(company_name=company)
         return counts
     except Exception as e:
         logger.error(f"Failed to get counts: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/counts/refresh")
+async def refresh_table_counts(company: Optional[str] = None):
+    """Recount all tables exactly and update table_stats"""
+    try:
+        await database_service.connect()
+        counts = await database_service.refresh_table_stats(company_name=company)
+        return counts
+    except Exception as e:
+        logger.error(f"Failed to refresh counts: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/table-stats")
+async def get_table_stats(company: Optional[str] = None):
+    """Get stored per-table statistics (rows, size estimate, last sync)"""
+    try:
+        await database_service.connect()
+        # Stored at sync; empty until then (POST /counts/refresh recounts)
+        stats = await database_service.get_table_stats(company_name=company)
+        return {"company": company or "", "tables": stats, "count": len(stats)}
+    except Exception as e:
+        logger.error(f"Failed to get table stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cube")
+async def get_cube(
+    company: Optional[str] = None,
+    group_by: str = Query(default="month", description="Comma separated: month, voucher_type, ledger, ledger_group"),
+    from_date: Optional[str] = Query(default=None, description="From date (YYYY-MM-DD, month granularity)"),
+    to_date: Optional[str] = Query(default=None, description="To date (YYYY-MM-DD, month granularity)"),
+    voucher_type: Optional[str] = Query(default=None, description="Comma separated voucher types"),
+    ledger: Optional[str] = Query(default=None, description="Comma separated ledgers"),
+    group: Optional[str] = Query(default=None, description="Only ledgers under this group"),
+    order_by: Optional[str] = Query(default=None, pattern="^(voucher_count|entry_count|debit|credit|amount)$",
+                                    description="Measure to sort by, largest first"),
+    limit: Optional[int] = Query(default=None, ge=1, le=10000, description="Maximum rows")
+):
+    """Get monthly cube totals rolled up by the requested dimensions"""
+    try:
+        await database_service.connect()
+        if not database_service.supports_sql:
+            raise HTTPException(status_code=501, detail="The cube requires a SQL database")
+        
+        dimensions = _split(group_by)
+        unknown = [d for d in dimensions if d not in CUBE_DIMENSIONS]
+        if unknown or len(set(dimensions)) != len(dimensions):
+            raise HTTPException(status_code=400, detail=f"Invalid group_by: {group_by}")
+        
+        conditions, params = [], []
+        if company:
+            conditions.append("c._company = ?")
+            params.append(company)
+        if from_date:
+            conditions.append("c.month >= ?")
+            params.append(from_date[:7])
+        if to_date:
+            conditions.append("c.month <= ?")
+            params.append(to_date[:7])
+        for column, values in (("c.voucher_type", _split(voucher_type)), ("c.ledger", _split(ledger))):
+            if values:
+                conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+        if group:
+            conditions.append(under_condition("group", "c.ledger_group", "c._company"))
+            params.append(group)
+        
+        # primary_count counts each voucher once across ledgers
+        per_ledger = bool(ledger or group or {"ledger", "ledger_group"} & set(dimensions))
+        voucher_count = "c.voucher_count" if per_ledger else "c.primary_count"
+        
+        select = [f"{CUBE_DIMENSIONS[d]} as {d}" for d in dimensions]
+        select.append(f"SUM({voucher_count}) as voucher_count")
+        select.extend(f"SUM(c.{measure}) as {measure}" for measure in CUBE_MEASURES)
+        
+        query = f"SELECT {', '.join(select)} FROM {MONTHLY_CUBE_TABLE} c"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        if dimensions:
+            query += " GROUP BY " + ", ".join(CUBE_DIMENSIONS[d] for d in dimensions)
+        order = [f"{order_by} DESC"] if order_by else []
+        order.extend(dimensions)
+        if order:
+            query += " ORDER BY " + ", ".join(order)
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        data = await database_service.fetch_all(query, tuple(params))
+        
+        return {
+            "group_by": dimensions,
+            "data": data,
+            "count": len(data)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get cube: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/synced-companies")
 async def get_synced_companies():
     """Get list of synced companies from company_config table"""
@@ -143,6 +271,8 @@ async def delete_company(company_name: str):
     try:
         await database_service.connect()
         deleted_count = await database_service.delete_company_data(company_name)
+        analytics_service.remove_company(company_name)
+        response_cache.bump(company_name)
         logger.info(f"Deleted company '{company_name}': {deleted_count} rows removed")
         return {
             "success": True,
@@ -6,6 +6,7 @@ Handles health check API endpoints
 from fastapi import APIRouter
 
 from ..services.health_service import health_service
+from ..services.response_cache import response_cache
 from ..utils.logger import logger
 
 router = APIRouter()
@@ -27,3 +28,9 @@ async def tally_health():
 async def database_health():
     """Database health check"""
     return await health_service.check_database()
+
+
+@router.get("/cache")
+async def cache_stats():
+    """Report response cache metrics (hits, misses, size)"""
+    return response_cache.stats()
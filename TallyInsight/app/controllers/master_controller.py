@@ -16,7 +16,7 @@ BUSINESS LOGIC:
    - Used in: Dropdown filters, Group-wise reports
    
 2. Ledgers API (/ledgers):
-   - Returns ledgers with pagination (limit/offset)
+   - Returns ledgers with pagination (limit + cursor, or legacy offset)
    - Returns both 'data' array and 'ledgers' array for compatibility
    - 'data' array: Full ledger objects for tables
    - 'ledgers' array: Just names for dropdowns
@@ -26,9 +26,24 @@ BUSINESS LOGIC:
    - Returns all stock items from mst_stock_item table
    - Used in: Inventory reports, Stock dropdowns
 
+4. Search API (/search):
+   - Type-ahead over ledger and stock item names, aliases, GSTIN and
+     mobile numbers of one company, best matches first
+   - Matches word prefixes: "gan" and "ganesh tr" find "Shree Ganesh Traders"
+   - Used in: Global search box, party / item pickers
+
 IMPORTANT:
 ----------
 - All APIs require 'company' parameter for multi-company support
+- `search` on /ledgers and /stock-items uses the master_search index
+  (word prefixes of name, alias, GSTIN, mobile) once it holds the
+  company's terms; before that, and on MongoDB, it falls back to a name
+  substring match (so does /search, without the MongoDB case)
+- `parent` matches the direct parent only; `under` also matches every
+  sub-group below it (group_closure table rebuilt at sync)
+- Lists page by keyset (utils/pagination.py): pass the returned
+  next_cursor as `cursor` for the next page; total comes from table_stats
+  when only the company is filtered, else from a window in the same query
 - Database service is loaded via factory pattern (get_database_service)
 - Response format must maintain backward compatibility with frontend
 
@@ -36,6 +51,11 @@ DEPENDENCIES:
 -------------
 - SQLiteDatabaseService from services/database/sqlite_adapter.py
 - Factory from services/database/factory.py
+- group_closure from services/database/group_closure.py (`under` filter)
+- master_search from services/database/master_search.py (search index,
+  rebuilt at sync)
+- response_cache: GET responses are cached until the next sync
+  (services/response_cache.py)
 ================================================================================
 """
 
@@ -43,42 +63,92 @@ from fastapi import APIRouter, Query, HTTPException
 from typing import Optional
 
 from ..services.database_service import database_service
+from ..services.response_cache import CachedRoute
+from ..services.database.group_closure import under_condition
+from ..services.database.master_search import (
+    MASTER_SEARCH_TABLE, SEARCH_SOURCES, like_query, match_condition, search_query, term_range
+)
 from ..utils.logger import logger
+from ..utils.pagination import CursorError, KeysetPaginator, SortKey
+
+router = APIRouter(route_class=CachedRoute)
+
+# Masters are listed by name; names are unique per company
+NAME_ORDER = [SortKey("name"), SortKey("_company")]
+
+
+async def _search_index_ready(company: Optional[str]) -> bool:
+    """Whether master_search holds terms of the company (any company when None).
+    
+    The table can exist but be empty for a company (synced before the index,
+    or its last rebuild failed); searching it would then find nothing.
+    """
+    if not database_service.supports_sql or not await database_service.table_exists(MASTER_SEARCH_TABLE):
+        return False
+    if company:
+        row = await database_service.fetch_one(
+            f"SELECT 1 AS found FROM {MASTER_SEARCH_TABLE} WHERE _company = ? LIMIT 1", (company,)
+        )
+    else:
+        row = await database_service.fetch_one(f"SELECT 1 AS found FROM {MASTER_SEARCH_TABLE} LIMIT 1")
+    return row is not None
 
-router = APIRouter()
+
+async def _search_condition(kind: str, search: str, company: Optional[str]) -> tuple:
+    """(condition, params) matching a search text; LIKE until the company's search index is built"""
+    if await _search_index_ready(company):
+        bounds = term_range(search)
+        if bounds is None:
+            return "1 = 0", []
+        return match_condition(kind, bool(company)), list(bounds) + ([company] if company else [])
+    return "name LIKE ?", [f"%{search}%"]
 
 
 @router.get("/groups")
 async def get_groups(
     parent: Optional[str] = None,
+    under: Optional[str] = Query(default=None, description="Group; lists every group below it"),
     search: Optional[str] = None,
     limit: int = Query(default=100, le=1000),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page")
 ):
     """Get all groups"""
     try:
         await database_service.connect()
         
-        query = "SELECT * FROM mst_group"
         params = []
         conditions = []
         
         if parent:
             conditions.append("parent = ?")
             params.append(parent)
+        if under:
+            conditions.append(under_condition("group", "mst_group.parent", "mst_group._company"))
+            params.append(under)
         if search:
             conditions.append("name LIKE ?")
             params.append(f"%{search}%")
         
+        total = None
+        if not conditions:
+            total = (await database_service.get_cached_table_counts()).get("mst_group")
+        
+        paginator = KeysetPaginator(NAME_ORDER, limit, cursor, offset, total=total)
+        keyset, keyset_params = paginator.condition()
+        if keyset:
+            conditions.append(keyset)
+            params.extend(keyset_params)
+        
+        query = f"SELECT *{paginator.window_columns()} FROM mst_group"
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
         
-        query += f" LIMIT {limit} OFFSET {offset}"
-        
-        data = await database_service.fetch_all(query, tuple(params))
-        total = await database_service.fetch_scalar("SELECT COUNT(*) FROM mst_group")
+        page = await paginator.fetch(database_service, query, params)
         
-        return {"total": total, "data": data}
+        return {"total": page.total, "data": page.rows, "next_cursor": page.next_cursor}
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get groups: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -88,15 +158,16 @@ async def get_groups(
 async def get_ledgers(
     company: Optional[str] = None,
     parent: Optional[str] = None,
+    under: Optional[str] = Query(default=None, description="Group; lists ledgers in it and its sub-groups"),
     search: Optional[str] = None,
     limit: int = Query(default=10000, le=50000),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page")
 ):
     """Get all ledgers for a company"""
     try:
         await database_service.connect()
         
-        query = "SELECT * FROM mst_ledger"
         params = []
         conditions = []
         
@@ -106,30 +177,40 @@ async def get_ledgers(
         if parent:
             conditions.append("parent = ?")
             params.append(parent)
+        if under:
+            conditions.append(under_condition("group", "mst_ledger.parent", "mst_ledger._company"))
+            params.append(under)
         if search:
-            conditions.append("name LIKE ?")
-            params.append(f"%{search}%")
-        
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
+            condition, search_params = await _search_condition("ledger", search, company)
+            conditions.append(condition)
+            params.extend(search_params)
         
-        query += " ORDER BY name"
-        query += f" LIMIT {limit} OFFSET {offset}"
+        # Only the company filtered: total from table_stats
+        total = None
+        if not parent and not under and not search:
+            total = (await database_service.get_cached_table_counts(company)).get("mst_ledger")
         
-        data = await database_service.fetch_all(query, tuple(params))
+        paginator = KeysetPaginator(NAME_ORDER, limit, cursor, offset, total=total)
+        keyset, keyset_params = paginator.condition()
+        if keyset:
+            conditions.append(keyset)
+            params.extend(keyset_params)
         
-        # Get total count
-        count_query = "SELECT COUNT(*) FROM mst_ledger"
+        query = f"SELECT *{paginator.window_columns()} FROM mst_ledger"
         if conditions:
-            count_query += " WHERE " + " AND ".join(conditions)
-        total = await database_service.fetch_scalar(count_query, tuple(params))
+            query += " WHERE " + " AND ".join(conditions)
+        
+        page = await paginator.fetch(database_service, query, params)
         
         # Return both formats - data for dashboard, ledgers for dropdown
         return {
-            "total": total,
-            "data": data,
-            "ledgers": [row['name'] for row in data]
+            "total": page.total,
+            "data": page.rows,
+            "ledgers": [row['name'] for row in page.rows],
+            "next_cursor": page.next_cursor
         }
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get ledgers: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -137,35 +218,95 @@ async def get_ledgers(
 
 @router.get("/stock-items")
 async def get_stock_items(
+    company: Optional[str] = None,
     parent: Optional[str] = None,
+    under: Optional[str] = Query(default=None, description="Stock group; lists items in it and its sub-groups"),
     search: Optional[str] = None,
     limit: int = Query(default=100, le=1000),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page")
 ):
     """Get all stock items"""
     try:
         await database_service.connect()
         
-        query = "SELECT * FROM mst_stock_item"
         params = []
         conditions = []
         
+        if company:
+            conditions.append("_company = ?")
+            params.append(company)
         if parent:
             conditions.append("parent = ?")
             params.append(parent)
+        if under:
+            conditions.append(under_condition("stock_group", "mst_stock_item.parent", "mst_stock_item._company"))
+            params.append(under)
         if search:
-            conditions.append("name LIKE ?")
-            params.append(f"%{search}%")
+            condition, search_params = await _search_condition("stock_item", search, company)
+            conditions.append(condition)
+            params.extend(search_params)
+        
+        # Only the company filtered: total from table_stats
+        total = None
+        if not parent and not under and not search:
+            total = (await database_service.get_cached_table_counts(company)).get("mst_stock_item")
         
+        paginator = KeysetPaginator(NAME_ORDER, limit, cursor, offset, total=total)
+        keyset, keyset_params = paginator.condition()
+        if keyset:
+            conditions.append(keyset)
+            params.extend(keyset_params)
+        
+        query = f"SELECT *{paginator.window_columns()} FROM mst_stock_item"
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
         
-        query += f" LIMIT {limit} OFFSET {offset}"
-        
-        data = await database_service.fetch_all(query, tuple(params))
-        total = await database_service.fetch_scalar("SELECT COUNT(*) FROM mst_stock_item")
+        page = await paginator.fetch(database_service, query, params)
         
-        return {"total": total, "data": data}
+        return {"total": page.total, "data": page.rows, "next_cursor": page.next_cursor}
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get stock items: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/search")
+async def search_masters(
+    q: str = Query(..., description="Search text (start of any word)"),
+    company: str = Query(..., description="Company name"),
+    kinds: str = Query(default="ledger,stock_item", description="Comma-separated: ledger, stock_item"),
+    limit: int = Query(default=20, ge=1, le=200)
+):
+    """Type-ahead search of ledgers and stock items"""
+    try:
+        await database_service.connect()
+        if not database_service.supports_sql:
+            raise HTTPException(status_code=501, detail="Master search requires a SQL database")
+        
+        kind_list = [kind.strip() for kind in kinds.split(",") if kind.strip()]
+        unknown = [kind for kind in kind_list if kind not in SEARCH_SOURCES]
+        if unknown or not kind_list:
+            raise ValueError(f"Unknown kinds: {', '.join(unknown) or kinds!r}; use {', '.join(SEARCH_SOURCES)}")
+        
+        bounds = term_range(q)
+        rows = []
+        if bounds is None:
+            pass
+        elif await _search_index_ready(company):
+            rows = await database_service.fetch_all(
+                search_query(kind_list), (bounds[0], company) + bounds + tuple(kind_list) + (limit,)
+            )
+        else:
+            like_params = tuple(value for _ in kind_list for value in (company, f"%{q.strip()}%"))
+            rows = await database_service.fetch_all(like_query(kind_list), like_params + (limit,))
+        
+        return {"query": q, "count": len(rows), "data": rows}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to search masters: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
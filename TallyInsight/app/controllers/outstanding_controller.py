@@ -18,7 +18,7 @@ BUSINESS LOGIC:
    
 2. Bill-wise Outstanding (/outstanding/billwise):
    - Shows individual pending bills
-   - Source: trn_bill table (bill allocations)
+   - Source: bill_outstanding (per-bill balances rebuilt at sync)
    - Columns: bill_name, bill_date, opening, pending
    
 3. Ledger-wise Outstanding (/outstanding/ledgerwise):
@@ -26,8 +26,13 @@ BUSINESS LOGIC:
    - Shows: ledger_name, total_pending, bill_count
    
 4. Ageing Report (/outstanding/ageing):
-   - Buckets: 0-30, 30-60, 60-90, 90+ days
-   - Calculated from bill_date vs current_date
+   - Buckets: caller-supplied upper bounds (default 30,60,90 -> 0-30,
+     30-60, 60-90, 90+ days)
+   - Calculated from bill_date vs as_of (default today); bills after
+     as_of are ignored
+   - An as_of inside an archived financial year also reads that year's
+     archive file (fy_archive.py)
+   - Grouped by party or by the party's ledger group, in SQL
    
 5. Group Outstanding (/outstanding/group):
    - Groups by parent group (e.g., all Sundry Debtors)
@@ -36,6 +41,7 @@ TALLY CONCEPTS:
 ---------------
 - Sundry Debtors: Customers who owe money (Receivable)
 - Sundry Creditors: Suppliers we owe money (Payable)
+- Parties in sub-groups (e.g. Sundry Debtors > Export Debtors) are included
 - Bill: Invoice reference for tracking payments
 - Opening: Original bill amount
 - Pending: Remaining unpaid amount
@@ -50,16 +56,67 @@ DEPENDENCIES:
 -------------
 - trn_bill: Bill allocations from vouchers
 - mst_ledger: Ledger master for party details
+- bill_outstanding: per-bill balances for billwise / ledgerwise, rebuilt
+  after each sync (services/database/bill_outstanding.py)
+- group_closure: group tree for "ledgers under group X" filters
+  (services/database/group_closure.py)
+- analytics_service: ageing / group queries run on
+  the DuckDB Parquet mirror of a company when it is enabled and current
+- response_cache: GET responses are cached until the next sync
+  (services/response_cache.py)
 ================================================================================
 """
 
+from datetime import date
 from fastapi import APIRouter, Query, HTTPException
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from ..services.database_service import database_service
+from ..services.response_cache import CachedRoute
+from ..services.analytics_service import analytics_service
+from ..services.database.group_closure import under_condition
+from ..services.database.mongo_queries import outstanding_pipeline
 from ..utils.logger import logger
+from ..utils.pagination import CursorError, KeysetPaginator, SortKey
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+# Party ledger groups; ledgers in their sub-groups count too (group_closure)
+PARTY_GROUPS = ("Sundry Debtors", "Sundry Creditors")
+
+# Ageing: default bucket upper bounds in days (last bucket is open-ended)
+DEFAULT_AGEING_BUCKETS = "30,60,90"
+MAX_AGEING_BUCKETS = 12
+
+# Bill-wise page order: earliest due date first (no due date last), then party;
+# bill number and company make it unique
+BILLWISE_ORDER = [
+    SortKey("due_date", null_value="9999-12-31"),
+    SortKey("party_name"),
+    SortKey("bill_no"),
+    SortKey("_company"),
+]
+
+
+def ageing_bounds(spec: str) -> List[int]:
+    """Parse bucket upper bounds ("30,60,90") into ascending day counts"""
+    try:
+        bounds = [int(part) for part in spec.split(",") if part.strip()]
+    except ValueError:
+        raise ValueError(f"Invalid ageing buckets: {spec}")
+    if not bounds or len(bounds) > MAX_AGEING_BUCKETS:
+        raise ValueError(f"Give 1 to {MAX_AGEING_BUCKETS} bucket bounds")
+    if bounds[0] <= 0 or any(a >= b for a, b in zip(bounds, bounds[1:])):
+        raise ValueError("Bucket bounds must be positive and ascending")
+    return bounds
+
+
+def ageing_buckets(bounds: List[int]) -> List[Tuple[str, int, Optional[int]]]:
+    """(column, low, high) per bucket: days_0_30, days_30_60, ..., days_90_plus"""
+    lows = [0] + bounds
+    buckets = [(f"days_{low}_{high}", low, high) for low, high in zip(lows, bounds)]
+    buckets.append((f"days_{bounds[-1]}_plus", bounds[-1], None))
+    return buckets
 
 
 @router.get("/outstanding")
@@ -73,21 +130,27 @@ async def get_outstanding(
         
         parent_group = "Sundry Debtors" if type == "receivable" else "Sundry Creditors"
         
-        # Use pre-computed summary table for fast queries
-        query = """
-            SELECT ledger_name, opening_balance as opening, debit, credit, closing
-            FROM ledger_balance_summary
-            WHERE parent = ?
-        """
-        params = [parent_group]
-        
-        if company:
-            query += " AND _company = ?"
-            params.append(company)
-        
-        query += " ORDER BY ledger_name"
-        
-        data = await database_service.fetch_all(query, tuple(params))
+        if not database_service.supports_sql:
+            data = await database_service.aggregate(
+                "mst_ledger", outstanding_pipeline(parent_group, company)
+            )
+        else:
+            # Use pre-computed summary table for fast queries; ledgers in
+            # sub-groups of the party group count too (group_closure)
+            query = f"""
+                SELECT ledger_name, opening_balance as opening, debit, credit, closing
+                FROM ledger_balance_summary
+                WHERE {under_condition("group", "ledger_balance_summary.parent", "ledger_balance_summary._company")}
+            """
+            params = [parent_group]
+            
+            if company:
+                query += " AND _company = ?"
+                params.append(company)
+            
+            query += " ORDER BY ledger_name"
+            
+            data = await database_service.fetch_all(query, tuple(params))
         
         # Calculate totals
         total_opening = sum(row.get('opening', 0) or 0 for row in data)
@@ -118,7 +181,8 @@ async def get_billwise_outstanding(
     from_date: Optional[str] = Query(default=None, description="Period start date (YYYY-MM-DD)"),
     to_date: Optional[str] = Query(default=None, description="Period end date (YYYY-MM-DD)"),
     page: int = Query(default=1, ge=1, description="Page number"),
-    page_size: int = Query(default=50, ge=10, le=100, description="Items per page")
+    page_size: int = Query(default=50, ge=10, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page (replaces page)")
 ):
     """Get bill-wise outstanding with pagination - includes opening bill allocations
     
@@ -132,123 +196,73 @@ async def get_billwise_outstanding(
         await database_service.connect()
         
         # Use to_date as reference date for overdue calculation, default to today
-        ref_date = to_date if to_date else "date('now')"
         ref_date_sql = f"'{to_date}'" if to_date else "date('now')"
         
-        # Include both Sundry Debtors and Sundry Creditors
-        # Filter by balance type: Receivable = Debit (positive), Payable = Credit (negative)
-        base_query = f"""
-            WITH all_bills AS (
-                -- Opening bill allocations from both Debtors and Creditors
-                -- For Creditors: positive = Cr (Payable), negative = Dr (Receivable) - reverse sign
-                -- For Debtors: positive = Dr (Receivable), negative = Cr (Payable) - keep sign
-                SELECT 
-                    o.ledger as party_name,
-                    o.name as bill_no,
-                    o.bill_date,
-                    CASE WHEN o.bill_credit_period > 0 THEN o.bill_credit_period ELSE 1 END as bill_credit_period,
-                    CASE WHEN l.parent = 'Sundry Creditors' THEN -o.opening_balance ELSE o.opening_balance END as amount,
-                    'Opening' as source,
-                    o._company
-                FROM mst_opening_bill_allocation o
-                JOIN mst_ledger l ON o.ledger = l.name AND o._company = l._company
-                WHERE l.parent IN ('Sundry Debtors', 'Sundry Creditors') AND o.name != ''
-                
-                UNION ALL
-                
-                -- Transaction bills (New Ref and Agst Ref) from both Debtors and Creditors
-                SELECT 
-                    b.ledger as party_name,
-                    b.name as bill_no,
-                    v.date as bill_date,
-                    CASE WHEN b.bill_credit_period > 0 THEN b.bill_credit_period ELSE 1 END as bill_credit_period,
-                    CASE 
-                        WHEN b.billtype = 'New Ref' THEN ABS(b.amount)
-                        WHEN b.billtype = 'Agst Ref' THEN -ABS(b.amount)
-                        ELSE 0 
-                    END as amount,
-                    v.voucher_type as source,
-                    b._company
-                FROM trn_bill b
-                JOIN trn_voucher v ON b.guid = v.guid
-                JOIN mst_ledger l ON b.ledger = l.name AND b._company = l._company
-                WHERE l.parent IN ('Sundry Debtors', 'Sundry Creditors') AND b.name != '' AND b.billtype IN ('New Ref', 'Agst Ref')
-            )
-            SELECT 
-                party_name,
-                bill_no,
-                MIN(bill_date) as bill_date,
-                MAX(bill_credit_period) as bill_credit_period,
-                date(MIN(bill_date), '+' || MAX(bill_credit_period) || ' days') as due_date,
-                SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END) as bill_amount,
-                SUM(CASE WHEN amount < 0 THEN ABS(amount) ELSE 0 END) as paid_amount,
-                SUM(amount) as pending_amount,
-                CAST(julianday({ref_date_sql}) - julianday(date(MIN(bill_date), '+' || MAX(bill_credit_period) || ' days')) AS INTEGER) as overdue_days,
-                GROUP_CONCAT(DISTINCT source) as source
-            FROM all_bills
-            WHERE 1=1
-        """
-        params = []
+        # Per-bill balances are materialized in bill_outstanding at sync time
+        # (bill_outstanding.py): opening allocations + New Ref / Agst Ref,
+        # Sundry Creditors opening reversed. Include both Debtors and Creditors;
+        # Receivable = Debit (positive pending), Payable = Credit (negative)
+        where = under_condition("group", "bill_outstanding.parent", "bill_outstanding._company", groups=2)
+        where += " AND pending > 0" if type == "receivable" else " AND pending < 0"
+        params = list(PARTY_GROUPS)
         
         if company:
-            base_query += " AND _company = ?"
+            where += " AND _company = ?"
             params.append(company)
         
-        # Filter by balance type: Receivable = positive (Debit), Payable = negative (Credit)
-        if type == "receivable":
-            base_query += """
-                GROUP BY party_name, bill_no
-                HAVING pending_amount > 0
-            """
-        else:
-            base_query += """
-                GROUP BY party_name, bill_no
-                HAVING pending_amount < 0
-            """
-        
-        # Count query for total records
-        count_query = f"SELECT COUNT(*) as total FROM ({base_query}) sub"
-        count_result = await database_service.fetch_all(count_query, tuple(params))
-        total_count = count_result[0]['total'] if count_result else 0
-        
-        # Totals query (sum of all, not just current page)
-        totals_query = f"""
+        # Most overdue first = earliest due date first; count and totals come
+        # from window columns of the first page and travel in the cursor
+        paginator = KeysetPaginator(BILLWISE_ORDER, page_size, cursor, (page - 1) * page_size,
+                                    sums={"bill_amount": "billed", "paid_amount": "paid",
+                                          "pending_amount": "pending"})
+        keyset, keyset_params = paginator.condition()
+        if keyset:
+            where += f" AND {keyset}"
+            params.extend(keyset_params)
+        
+        data_query = f"""
             SELECT 
-                SUM(bill_amount) as total_bill,
-                SUM(paid_amount) as total_paid,
-                SUM(pending_amount) as total_pending
-            FROM ({base_query}) sub
+                party_name,
+                bill_no,
+                bill_date,
+                bill_credit_period,
+                due_date,
+                billed as bill_amount,
+                paid as paid_amount,
+                pending as pending_amount,
+                CAST(julianday({ref_date_sql}) - julianday(due_date) AS INTEGER) as overdue_days,
+                source,
+                _company
+                {paginator.window_columns()}
+            FROM bill_outstanding
+            WHERE {where}
         """
-        totals_result = await database_service.fetch_all(totals_query, tuple(params))
-        totals = totals_result[0] if totals_result else {}
-        
-        # Paginated data query
-        offset = (page - 1) * page_size
-        data_query = f"{base_query} ORDER BY overdue_days DESC, party_name LIMIT ? OFFSET ?"
-        data_params = list(params) + [page_size, offset]
-        
-        data = await database_service.fetch_all(data_query, tuple(data_params))
+        result = await paginator.fetch(database_service, data_query, params)
         
+        total_count = result.total
         total_pages = (total_count + page_size - 1) // page_size
         
         return {
             "type": type,
             "report_type": "billwise",
-            "data": data,
+            "data": result.rows,
             "pagination": {
                 "page": page,
                 "page_size": page_size,
                 "total_count": total_count,
                 "total_pages": total_pages,
-                "has_next": page < total_pages,
-                "has_prev": page > 1
+                "has_next": result.next_cursor is not None,
+                "has_prev": page > 1 or cursor is not None,
+                "next_cursor": result.next_cursor
             },
             "totals": {
-                "bill_amount": totals.get('total_bill', 0) or 0,
-                "paid_amount": totals.get('total_paid', 0) or 0,
-                "pending_amount": totals.get('total_pending', 0) or 0
+                "bill_amount": result.totals.get('bill_amount', 0),
+                "paid_amount": result.totals.get('paid_amount', 0),
+                "pending_amount": result.totals.get('pending_amount', 0)
             }
         }
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get billwise outstanding: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -310,107 +324,35 @@ async def get_ledgerwise_outstanding(
         else:
             balance_filter = "> 0"  # Cr bills (positive after processing)
         
-        # Single query: Fetch all bills and filter by individual bill balance
-        base_query = f"""
-            WITH all_bills AS (
-                -- Opening bills
-                -- Use opening_balance as-is
-                -- Database: negative=Dr bill, positive=Cr bill (matches Tally bill-wise breakup)
-                SELECT 
-                    o.ledger as party_name,
-                    o.name as bill_no,
-                    o.bill_date,
-                    CASE WHEN o.bill_credit_period > 0 THEN o.bill_credit_period ELSE 1 END as bill_credit_period,
-                    o.opening_balance as amount,
-                    'Opening' as source,
-                    o._company,
-                    0 as alterid,
-                    'Opening' as billtype
-                FROM mst_opening_bill_allocation o
-                JOIN mst_ledger l ON o.ledger = l.name AND o._company = l._company
-                WHERE l.parent IN ('Sundry Debtors', 'Sundry Creditors') AND o.name != ''
-                
-                UNION ALL
-                
-                -- Transaction bills
-                -- CRITICAL: Transaction bills stored with SAME sign convention as opening
-                -- Database: negative=Dr bill, positive=Cr bill
-                -- Use as-is (NO negation needed - both use same convention)
-                SELECT 
-                    b.ledger as party_name,
-                    b.name as bill_no,
-                    v.date as bill_date,
-                    CASE WHEN b.bill_credit_period > 0 THEN b.bill_credit_period ELSE 1 END as bill_credit_period,
-                    b.amount as amount,  -- Use as-is (same sign convention as opening)
-                    v.voucher_type as source,
-                    b._company,
-                    b.alterid,
-                    b.billtype
-                FROM trn_bill b
-                JOIN trn_voucher v ON b.guid = v.guid
-                JOIN mst_ledger l ON b.ledger = l.name AND b._company = l._company
-                WHERE l.parent IN ('Sundry Debtors', 'Sundry Creditors')
-                  AND b.name != '' 
-                  AND b.billtype IN ('New Ref', 'Agst Ref', 'Advance')
-            ),
-            deduped_bills AS (
-                -- Remove duplicates by keeping only latest alterid for each entry
-                -- CRITICAL: Partition by party, bill_no, billtype, date, amount to handle:
-                -- - Same bill with multiple sources (Receipt, Sales) → sum together
-                -- - Same bill with same date/amount but different billtype (New Ref vs Agst Ref) → keep separate
-                SELECT 
-                    party_name,
-                    bill_no,
-                    bill_date,
-                    bill_credit_period,
-                    amount,
-                    source,
-                    _company,
-                    alterid,
-                    billtype,
-                    ROW_NUMBER() OVER (PARTITION BY party_name, bill_no, billtype, bill_date, amount ORDER BY alterid DESC) as rn
-                FROM all_bills
-            ),
-            bill_totals AS (
-                -- Group by bill and calculate total (handles multiple entries for same bill)
-                -- CRITICAL: Tally checks total Dr vs total Cr for each bill
-                -- Bills with net = 0 (fully settled) are excluded by HAVING clause
-                -- Includes all bill types: New Ref, Agst Ref, Advance, Opening balance
-                SELECT 
-                    d.party_name,
-                    d.bill_no,
-                    MIN(d.bill_date) as bill_date,
-                    MAX(d.bill_credit_period) as bill_credit_period,
-                    SUM(d.amount) as pending_amount,
-                    GROUP_CONCAT(DISTINCT d.source) as source,
-                    d._company
-                FROM deduped_bills d
-                WHERE d.rn = 1 AND 1=1
-        """
-        
-        params = []
-        if company:
-            base_query += " AND d._company = ?"
-            params.append(company)
-        
+        # Per-bill balances are materialized in bill_outstanding at sync time
+        # (bill_outstanding.py, net_* columns):
+        # - Opening and transaction bills use their stored sign
+        # - New Ref, Agst Ref, Advance and Opening balance all count
+        # - Duplicate entries keep only the latest alterid per
+        #   party, bill_no, billtype, date, amount
         # Filter by balance (Dr/Cr) AND exclude fully settled bills (net = 0)
         # CRITICAL: Bills with net = 0 should not appear in Outstanding Reports
-        base_query += f"""
-                GROUP BY d.party_name, d.bill_no, d._company
-                HAVING pending_amount {balance_filter} AND ABS(pending_amount) > 0.01
-            )
+        base_query = f"""
             SELECT 
                 party_name,
                 bill_no,
-                bill_date,
-                date(bill_date, '+' || bill_credit_period || ' days') as due_date,
-                pending_amount,
-                CAST(julianday({ref_date_sql}) - julianday(date(bill_date, '+' || bill_credit_period || ' days')) AS INTEGER) as overdue_days,
-                source
-            FROM bill_totals
-            ORDER BY party_name, bill_date
+                net_bill_date as bill_date,
+                net_due_date as due_date,
+                net_pending as pending_amount,
+                CAST(julianday({ref_date_sql}) - julianday(net_due_date) AS INTEGER) as overdue_days,
+                net_source as source
+            FROM bill_outstanding
+            WHERE {under_condition("group", "bill_outstanding.parent", "bill_outstanding._company", groups=2)}
+              AND net_pending {balance_filter} AND ABS(net_pending) > 0.01
         """
         
+        params = list(PARTY_GROUPS)
+        if company:
+            base_query += " AND _company = ?"
+            params.append(company)
+        
+        base_query += " ORDER BY party_name, net_bill_date"
+        
         bills = await database_service.fetch_all(base_query, tuple(params))
         
         # Group bills by party with subtotals
@@ -477,79 +419,96 @@ async def get_ledgerwise_outstanding(
 @router.get("/outstanding/ageing")
 async def get_ageing_analysis(
     type: str = Query(default="receivable", description="receivable or payable"),
-    company: Optional[str] = None
+    company: Optional[str] = None,
+    as_of: Optional[str] = Query(default=None, description="Age bills as of this date (YYYY-MM-DD), default today"),
+    buckets: str = Query(default=DEFAULT_AGEING_BUCKETS, description="Bucket upper bounds in days, e.g. 30,60,90"),
+    group_by: str = Query(default="party", pattern="^(party|group)$", description="party or group")
 ):
-    """Get ageing analysis - 0-30, 30-60, 60-90, 90+ days"""
+    """Get ageing analysis - pending bills per age bucket (default 0-30, 30-60, 60-90, 90+ days)"""
     try:
         await database_service.connect()
         
         parent_group = "Sundry Debtors" if type == "receivable" else "Sundry Creditors"
+        bounds = ageing_bounds(buckets)
+        as_of = as_of or date.today().isoformat()
+        date.fromisoformat(as_of)
         
-        # Query to get bill-wise data with age buckets
-        query = """
+        # Pending amount and age of each bill as of the date
+        bills_query = f"""
             SELECT 
                 b.ledger as party_name,
+                l.parent as group_name,
                 SUM(CASE WHEN b.billtype = 'New Ref' THEN ABS(b.amount) ELSE 0 END) - 
                 SUM(CASE WHEN b.billtype = 'Agst Ref' THEN ABS(b.amount) ELSE 0 END) as pending_amount,
-                CAST(julianday('now') - julianday(MIN(v.date)) AS INTEGER) as days_old
+                CAST(julianday(?) - julianday(MIN(v.date)) AS INTEGER) as days_old
             FROM trn_bill b
-            JOIN trn_voucher v ON b.guid = v.guid
-            JOIN mst_ledger l ON b.ledger = l.name
-            WHERE l.parent = ? AND b.name != '' AND b.billtype IN ('New Ref', 'Agst Ref')
+            JOIN trn_voucher v ON v._voucher_id = b._voucher_id
+            JOIN mst_ledger l ON l._company = b._company AND l.name = b.ledger
+            WHERE {under_condition("group", "l.parent", "l._company")}
+              AND b.name != '' AND b.billtype IN ('New Ref', 'Agst Ref')
+              AND v.date <= ?
         """
-        params = [parent_group]
+        params = [as_of, parent_group, as_of]
         
         if company:
-            query += " AND b._company = ?"
+            bills_query += " AND b._company = ?"
             params.append(company)
         
-        query += """
-            GROUP BY b.ledger, b.name
+        bills_query += """
+            GROUP BY b._company, b.ledger, b.name
             HAVING pending_amount > 0
         """
         
-        bills = await database_service.fetch_all(query, tuple(params))
-        
-        # Aggregate by party with age buckets
-        party_ageing = {}
-        for bill in bills:
-            party = bill['party_name']
-            amount = bill['pending_amount'] or 0
-            days = bill['days_old'] or 0
-            
-            if party not in party_ageing:
-                party_ageing[party] = {'party_name': party, 'days_0_30': 0, 'days_30_60': 0, 'days_60_90': 0, 'days_90_plus': 0, 'total': 0}
-            
-            if days <= 30:
-                party_ageing[party]['days_0_30'] += amount
-            elif days <= 60:
-                party_ageing[party]['days_30_60'] += amount
-            elif days <= 90:
-                party_ageing[party]['days_60_90'] += amount
+        # One SUM per bucket; only the per-party (or per-group) rows come back.
+        # Bills dated on as_of (age 0) land in the first bucket.
+        columns, bucket_params, bucket_keys = [], [], []
+        for bucket, low, high in ageing_buckets(bounds):
+            if high is None:
+                condition, limits = "days_old > ?", [low]
+            elif low == 0:
+                condition, limits = "days_old <= ?", [high]
             else:
-                party_ageing[party]['days_90_plus'] += amount
-            
-            party_ageing[party]['total'] += amount
+                condition, limits = "days_old > ? AND days_old <= ?", [low, high]
+            columns.append(f"SUM(CASE WHEN {condition} THEN pending_amount ELSE 0 END) as {bucket}")
+            bucket_params.extend(limits)
+            bucket_keys.append(bucket)
+        
+        key = "party_name" if group_by == "party" else "group_name"
+        query = f"""
+            SELECT 
+                {key},
+                {", ".join(columns)},
+                SUM(pending_amount) as total,
+                COUNT(*) as bill_count
+            FROM ({bills_query}) bills
+            GROUP BY {key}
+            ORDER BY total DESC, {key}
+        """
         
-        data = list(party_ageing.values())
-        data.sort(key=lambda x: x['total'], reverse=True)
+        # Bills of earlier archived years were settled within their year; a
+        # date inside an archived year needs that year's rows as well
+        if await database_service.get_archived_years_between(as_of, as_of, company):
+            data = await database_service.fetch_all_archived(query, tuple(bucket_params + params),
+                                                             as_of, as_of, company)
+        else:
+            data = await analytics_service.fetch_all(company, query, tuple(bucket_params + params))
         
         # Calculate totals
-        totals = {
-            'days_0_30': sum(p['days_0_30'] for p in data),
-            'days_30_60': sum(p['days_30_60'] for p in data),
-            'days_60_90': sum(p['days_60_90'] for p in data),
-            'days_90_plus': sum(p['days_90_plus'] for p in data),
-            'total': sum(p['total'] for p in data)
-        }
+        totals = {bucket: sum(row[bucket] or 0 for row in data) for bucket in bucket_keys}
+        totals['total'] = sum(row['total'] or 0 for row in data)
         
         return {
             "type": type,
             "report_type": "ageing",
+            "as_of": as_of,
+            "group_by": group_by,
+            "buckets": bucket_keys,
             "data": data,
             "count": len(data),
             "totals": totals
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get ageing analysis: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -566,17 +525,26 @@ async def get_group_outstanding(
         
         parent_group = "Sundry Debtors" if type == "receivable" else "Sundry Creditors"
         
+        # Movement of archived financial years, added to the hot totals
+        archived = {"debit": "", "credit": "", "amount": ""}
+        if database_service.supports_archives:
+            archived = {
+                column: f" + COALESCE((SELECT SUM(ab.{column}) FROM archive_ledger_balance ab "
+                        f"WHERE ab.ledger = l.name AND ab._company = l._company), 0)"
+                for column in archived
+            }
+        
         # Query to get group summary
-        query = """
+        query = f"""
             SELECT 
                 ? as group_name,
                 COUNT(DISTINCT l.name) as party_count,
                 SUM(l.opening_balance) as opening,
-                SUM(COALESCE((SELECT SUM(CASE WHEN a.amount > 0 THEN a.amount ELSE 0 END) FROM trn_accounting a WHERE a.ledger = l.name), 0)) as debit,
-                SUM(COALESCE((SELECT SUM(CASE WHEN a.amount < 0 THEN ABS(a.amount) ELSE 0 END) FROM trn_accounting a WHERE a.ledger = l.name), 0)) as credit,
-                SUM(l.opening_balance) + SUM(COALESCE((SELECT SUM(a.amount) FROM trn_accounting a WHERE a.ledger = l.name), 0)) as closing
+                SUM(COALESCE((SELECT SUM(CASE WHEN a.amount > 0 THEN a.amount ELSE 0 END) FROM trn_accounting a WHERE a.ledger = l.name), 0){archived['debit']}) as debit,
+                SUM(COALESCE((SELECT SUM(CASE WHEN a.amount < 0 THEN ABS(a.amount) ELSE 0 END) FROM trn_accounting a WHERE a.ledger = l.name), 0){archived['credit']}) as credit,
+                SUM(l.opening_balance) + SUM(COALESCE((SELECT SUM(a.amount) FROM trn_accounting a WHERE a.ledger = l.name), 0){archived['amount']}) as closing
             FROM mst_ledger l
-            WHERE l.parent = ?
+            WHERE {under_condition("group", "l.parent", "l._company")}
         """
         params = [parent_group, parent_group]
         
@@ -584,7 +552,7 @@ async def get_group_outstanding(
             query += " AND l._company = ?"
             params.append(company)
         
-        data = await database_service.fetch_all(query, tuple(params))
+        data = await analytics_service.fetch_all(company, query, tuple(params))
         
         return {
             "type": type,
@@ -17,6 +17,7 @@ from ..middleware.auth import (
     CurrentUser,
     require_role
 )
+from ..services.database.company_routing import company_scope
 from ..services.database_service import database_service
 from ..utils.logger import logger
 
@@ -69,8 +70,6 @@ async def get_user_companies(
     except Exception as e:
         logger.error(f"Error fetching companies: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        await database_service.disconnect()
 
 
 @router.get("/company/{company_name}/summary")
@@ -84,51 +83,51 @@ async def get_company_summary(
     Requires: Valid JWT token
     """
     try:
-        await database_service.connect()
-        
-        # Get company config
-        company_query = "SELECT * FROM company_config WHERE company_name = ?"
-        company = await database_service.fetch_one(company_query, [company_name])
-        
-        if not company:
-            raise HTTPException(status_code=404, detail=f"Company '{company_name}' not found")
-        
-        # Get counts
-        ledger_count = await database_service.fetch_one(
-            "SELECT COUNT(*) as count FROM mst_ledger WHERE company_name = ?",
-            [company_name]
-        )
-        
-        voucher_count = await database_service.fetch_one(
-            "SELECT COUNT(*) as count FROM trn_voucher WHERE company_name = ?",
-            [company_name]
-        )
-        
-        stock_count = await database_service.fetch_one(
-            "SELECT COUNT(*) as count FROM mst_stock_item WHERE company_name = ?",
-            [company_name]
-        )
-        
-        return {
-            "success": True,
-            "company": dict(company),
-            "summary": {
-                "ledgers": ledger_count["count"] if ledger_count else 0,
-                "vouchers": voucher_count["count"] if voucher_count else 0,
-                "stock_items": stock_count["count"] if stock_count else 0
-            },
-            "accessed_by": {
-                "user_id": current_user.id,
-                "email": current_user.email
+        # Company comes from the path, not the query string the middleware routes by
+        with company_scope(company_name):
+            await database_service.connect()
+            
+            # Get company config
+            company_query = "SELECT * FROM company_config WHERE company_name = ?"
+            company = await database_service.fetch_one(company_query, [company_name])
+            
+            if not company:
+                raise HTTPException(status_code=404, detail=f"Company '{company_name}' not found")
+            
+            # Get counts
+            ledger_count = await database_service.fetch_one(
+                "SELECT COUNT(*) as count FROM mst_ledger WHERE _company = ?",
+                [company_name]
+            )
+            
+            voucher_count = await database_service.fetch_one(
+                "SELECT COUNT(*) as count FROM trn_voucher WHERE _company = ?",
+                [company_name]
+            )
+            
+            stock_count = await database_service.fetch_one(
+                "SELECT COUNT(*) as count FROM mst_stock_item WHERE _company = ?",
+                [company_name]
+            )
+            
+            return {
+                "success": True,
+                "company": dict(company),
+                "summary": {
+                    "ledgers": ledger_count["count"] if ledger_count else 0,
+                    "vouchers": voucher_count["count"] if voucher_count else 0,
+                    "stock_items": stock_count["count"] if stock_count else 0
+                },
+                "accessed_by": {
+                    "user_id": current_user.id,
+                    "email": current_user.email
+                }
             }
-        }
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error fetching company summary: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        await database_service.disconnect()
 
 
 @router.get("/admin/stats")
@@ -169,5 +168,3 @@ async def get_admin_stats(
     except Exception as e:
         logger.error(f"Error fetching admin stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        await database_service.disconnect()
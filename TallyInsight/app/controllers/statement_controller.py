@@ -0,0 +1,156 @@
+"""
+Statement Controller
+Handles financial statement API endpoints (Trial Balance, Profit & Loss, Balance Sheet)
+
+================================================================================
+DEVELOPER NOTES
+================================================================================
+File: statement_controller.py
+Purpose: Financial statements of a company for any date range
+Prefix: /api/data
+
+BUSINESS LOGIC:
+---------------
+1. Trial Balance (/trial-balance):
+   - Per group (every level) and per ledger: opening, period debit /
+     credit, closing with its Dr / Cr split
+   - total_debit / total_credit: closing Dr / Cr totals (equal when the
+     books balance; `difference` shows the gap)
+   - as_on_date: alias of to_date (TallyBridge sends it)
+   - ledgers=false returns groups only
+
+2. Profit & Loss (/profit-loss):
+   - Movement of income / expense (is_revenue) groups in the period
+   - gross_profit: groups that affect gross profit (trading account)
+   - net_profit: all revenue groups; negative = loss
+
+3. Balance Sheet (/balance-sheet):
+   - Closing balances of the primary non-revenue groups as on a date
+   - Liabilities side includes the accumulated Profit & Loss A/c
+
+Default period: start of the financial year of to_date (April) to to_date;
+to_date defaults to today.
+
+TALLY CONCEPTS:
+---------------
+- Negative amount = Dr, positive amount = Cr (statement rows keep the sign)
+- IsDeemedPositive groups (assets) are shown Dr-positive on the balance sheet
+- Income / expense ledgers start each financial year at zero; earlier years
+  are carried in the "Profit & Loss A/c" line of the trial balance
+
+IMPORTANT:
+----------
+- company defaults to tally.company (ledger names are per company;
+  TallyBridge only sends it when the caller names one)
+- Stock valuation (opening / closing stock) is not included
+- SQL databases only (statements use the sync-built snapshot tables)
+
+DEPENDENCIES:
+-------------
+- statement_service: balance calculation and group rollup
+  (services/statement_service.py)
+- ledger_balance_snapshot: monthly per-ledger balances
+  (services/database/ledger_snapshots.py)
+- group_closure: group tree (services/database/group_closure.py)
+- mst_group / mst_ledger: group flags, ledger opening balances
+- response_cache: GET responses are cached until the next sync
+  (services/response_cache.py)
+================================================================================
+"""
+
+from datetime import date
+from fastapi import APIRouter, Query, HTTPException
+from typing import Optional
+
+from ..config import config
+from ..services.database_service import database_service
+from ..services.response_cache import CachedRoute
+from ..services.statement_service import statement_service
+from ..services.database.fy_archive import financial_year, financial_year_range
+from ..utils.logger import logger
+
+router = APIRouter(route_class=CachedRoute)
+
+
+def _period(from_date: Optional[str], to_date: Optional[str]) -> tuple:
+    """Fill in the default period: financial year start of to_date .. today"""
+    to_date = to_date or date.today().isoformat()
+    from_date = from_date or financial_year_range(financial_year(to_date))[0]
+    if from_date > to_date:
+        raise ValueError("from_date is after to_date")
+    return from_date, to_date
+
+
+def _company(company: Optional[str]) -> str:
+    """Requested company, else the configured one"""
+    company = company or config.tally.company
+    if not company:
+        raise ValueError("company is required (no tally.company configured)")
+    return company
+
+
+async def _connect() -> None:
+    await database_service.connect()
+    if not database_service.supports_sql:
+        raise HTTPException(status_code=501, detail="Financial statements require a SQL database")
+
+
+@router.get("/trial-balance")
+async def get_trial_balance(
+    company: Optional[str] = Query(default=None, description="Company name (default: tally.company)"),
+    from_date: Optional[str] = Query(default=None, description="From date (YYYY-MM-DD)"),
+    to_date: Optional[str] = Query(default=None, description="To date (YYYY-MM-DD)"),
+    as_on_date: Optional[str] = Query(default=None, description="Alias of to_date"),
+    ledgers: bool = Query(default=True, description="Include ledger rows")
+):
+    """Get trial balance by group and ledger"""
+    try:
+        await _connect()
+        from_date, to_date = _period(from_date, to_date or as_on_date)
+        return await statement_service.trial_balance(_company(company), from_date, to_date, include_ledgers=ledgers)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to get trial balance: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/profit-loss")
+async def get_profit_loss(
+    company: Optional[str] = Query(default=None, description="Company name (default: tally.company)"),
+    from_date: Optional[str] = Query(default=None, description="From date (YYYY-MM-DD)"),
+    to_date: Optional[str] = Query(default=None, description="To date (YYYY-MM-DD)")
+):
+    """Get profit & loss statement for a period"""
+    try:
+        await _connect()
+        from_date, to_date = _period(from_date, to_date)
+        return await statement_service.profit_and_loss(_company(company), from_date, to_date)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to get profit & loss: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/balance-sheet")
+async def get_balance_sheet(
+    company: Optional[str] = Query(default=None, description="Company name (default: tally.company)"),
+    as_on_date: Optional[str] = Query(default=None, description="Balance sheet date (YYYY-MM-DD)")
+):
+    """Get balance sheet as on a date"""
+    try:
+        await _connect()
+        _, as_on_date = _period(None, as_on_date)
+        return await statement_service.balance_sheet(_company(company), as_on_date)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to get balance sheet: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
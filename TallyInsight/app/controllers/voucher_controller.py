@@ -12,8 +12,11 @@ Prefix: /api/data
 BUSINESS LOGIC:
 ---------------
 1. Vouchers API (/vouchers):
-   - Returns vouchers from trn_voucher table
-   - Filters: voucher_type, date range, company
+   - Returns vouchers from trn_voucher table, newest first
+   - Filters: voucher_type, date range, company, amount range
+   - Sort: date (default) or amount, both descending
+   - Amount: party ledger's entries, else total debit (voucher_totals)
+   - Pages by keyset: pass the returned next_cursor as `cursor`
    - Used in: Voucher list, Transaction reports
    
 2. Voucher Details API (/vouchers/{guid}/details):
@@ -21,6 +24,16 @@ BUSINESS LOGIC:
    - Joins: trn_accounting (ledger entries), trn_inventory (stock entries)
    - Used in: Voucher detail popup/page
 
+3. Voucher Export (/vouchers/export):
+   - Same filters as /vouchers, oldest first, as a CSV / NDJSON / XLSX
+     download (`format`); rows are streamed in chunks, not paged
+   - Used in: "Export to Excel" of the voucher list
+
+4. Batch Voucher Details API (POST /vouchers/details):
+   - Body: {"guids": [...], "company": optional} (up to 1000)
+   - Returns {"vouchers": {guid: same shape as /details}, "missing": [...]}
+   - One IN-list query per section instead of five queries per voucher
+
 TALLY VOUCHER TYPES:
 --------------------
 - Sales, Purchase, Receipt, Payment, Journal
@@ -32,22 +45,43 @@ IMPORTANT:
 - GUID is unique identifier for each voucher
 - Date format: YYYY-MM-DD
 - Amount: Positive for debit, Negative for credit
+- Date ranges reaching archived financial years (fy_archive.py) read the
+  archive files too; voucher details read only the rows of `company`
+  when given (its own file with per-company storage) and look in its
+  archives (default: the configured company) for guids not found hot
 
 DEPENDENCIES:
 -------------
 - trn_voucher: Voucher headers
 - trn_accounting: Accounting entries (ledger-wise)
+- voucher_totals: Per-voucher debit/credit/party totals, rebuilt by sync (voucher_totals.py)
 - trn_inventory: Inventory entries (item-wise)
+- trn_bill / trn_bank: Bill allocations and bank details (voucher details)
+- response_cache: GET responses are cached until the next sync
+  (services/response_cache.py)
+- export_service: CSV / NDJSON / XLSX streaming (services/export_service.py)
 ================================================================================
 """
 
 from fastapi import APIRouter, Query, HTTPException
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 
 from ..services.database_service import database_service
+from ..services.export_service import export_service
+from ..services.response_cache import CachedRoute
+from ..services.database.company_routing import company_scope, get_active_company
+from ..services.database.fy_archive import ArchivedReader, financial_year_range
+from ..services.database.mongo_queries import voucher_filter, voucher_list_pipeline
 from ..utils.logger import logger
+from ..utils.pagination import CursorError, KeysetPaginator, SortKey
+
+router = APIRouter(route_class=CachedRoute)
 
-router = APIRouter()
+# Newest first / largest first; guid makes the order unique
+VOUCHER_ORDER = [SortKey("date", "v.date", desc=True), SortKey("guid", "v.guid", desc=True)]
+VOUCHER_AMOUNT_ORDER = [SortKey("amount", "t.amount", desc=True, null_value=0),
+                        SortKey("guid", "v.guid", desc=True)]
 
 
 @router.get("/vouchers")
@@ -56,19 +90,23 @@ async def get_vouchers(
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
     company: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    sort: str = Query(default="date", pattern="^(date|amount)$", description="date or amount (descending)"),
     limit: int = Query(default=100, le=1000),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page")
 ):
     """Get vouchers with filters and calculated amounts"""
     try:
         await database_service.connect()
         
-        # Query with amount calculated from trn_accounting (debit side = negative amounts, take first one)
-        query = """
-            SELECT v.*, 
-                   COALESCE((SELECT ABS(a.amount) FROM trn_accounting a WHERE a.guid = v.guid AND a.amount < 0 LIMIT 1), 0) as amount
-            FROM trn_voucher v
-        """
+        if not database_service.supports_sql:
+            mongo_filter = voucher_filter(company, voucher_type, from_date, to_date)
+            data = await database_service.aggregate("trn_voucher", voucher_list_pipeline(mongo_filter, limit, offset))
+            total = await database_service.count("trn_voucher", mongo_filter)
+            return {"total": total, "data": data}
+        
         params = []
         conditions = []
         
@@ -84,75 +122,218 @@ async def get_vouchers(
         if to_date:
             conditions.append("v.date <= ?")
             params.append(to_date)
+        if min_amount is not None:
+            conditions.append("COALESCE(t.amount, 0) >= ?")
+            params.append(min_amount)
+        if max_amount is not None:
+            conditions.append("COALESCE(t.amount, 0) <= ?")
+            params.append(max_amount)
+        
+        # Only the company filtered: total from table_stats (hot vouchers only)
+        archived_years = await database_service.get_archived_years_between(from_date, to_date, company)
+        total = None
+        if not (voucher_type or from_date or to_date or min_amount is not None or max_amount is not None
+                or archived_years):
+            total = (await database_service.get_cached_table_counts(company)).get("trn_voucher")
+        
+        order = VOUCHER_AMOUNT_ORDER if sort == "amount" else VOUCHER_ORDER
+        paginator = KeysetPaginator(order, limit, cursor, offset, total=total)
+        keyset, keyset_params = paginator.condition()
+        if keyset:
+            conditions.append(keyset)
+            params.extend(keyset_params)
         
+        # Amount and totals precomputed per voucher during sync
+        query = f"""
+            SELECT v.*, 
+                   COALESCE(t.amount, 0) as amount,
+                   COALESCE(t.debit_total, 0) as debit_total,
+                   COALESCE(t.credit_total, 0) as credit_total,
+                   COALESCE(t.line_count, 0) as line_count
+                   {paginator.window_columns()}
+            FROM trn_voucher v
+            LEFT JOIN voucher_totals t ON t._voucher_id = v._voucher_id
+        """
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
         
-        query += f" ORDER BY v.date DESC LIMIT {limit} OFFSET {offset}"
+        reader = ArchivedReader(database_service, from_date, to_date, company) if archived_years else database_service
+        page = await paginator.fetch(reader, query, params)
+        
+        return {"total": page.total, "data": page.rows, "next_cursor": page.next_cursor}
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to get vouchers: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Columns of /vouchers/export
+EXPORT_COLUMNS = ["date", "voucher_type", "voucher_number", "reference_number", "party_name",
+                  "amount", "debit_total", "credit_total", "narration", "guid"]
+
+
+@router.get("/vouchers/export")
+async def export_vouchers(
+    fmt: str = Query(default="csv", alias="format", description="csv, ndjson or xlsx"),
+    voucher_type: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    company: Optional[str] = None
+):
+    """Download vouchers as CSV / NDJSON / XLSX, streamed in chunks"""
+    try:
+        await database_service.connect()
+        if not database_service.supports_sql:
+            raise HTTPException(status_code=501, detail="Voucher export requires a SQL database")
+        fmt = export_service.check_format(fmt)
         
-        data = await database_service.fetch_all(query, tuple(params))
+        params = []
+        conditions = []
         
-        # Get total count with same filters
-        count_query = "SELECT COUNT(*) FROM trn_voucher v"
+        if company:
+            conditions.append("v._company = ?")
+            params.append(company)
+        if voucher_type:
+            conditions.append("v.voucher_type = ?")
+            params.append(voucher_type)
+        if from_date:
+            conditions.append("v.date >= ?")
+            params.append(from_date)
+        if to_date:
+            conditions.append("v.date <= ?")
+            params.append(to_date)
+        
+        query = """
+            SELECT v.date, v.voucher_type, v.voucher_number, v.reference_number, v.party_name,
+                   COALESCE(t.amount, 0) as amount,
+                   COALESCE(t.debit_total, 0) as debit_total,
+                   COALESCE(t.credit_total, 0) as credit_total,
+                   v.narration, v.guid
+            FROM trn_voucher v
+            LEFT JOIN voucher_totals t ON t._voucher_id = v._voucher_id
+        """
         if conditions:
-            count_query += " WHERE " + " AND ".join(conditions)
-        total = await database_service.fetch_scalar(count_query, tuple(params))
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY v.date, v.guid"
         
-        return {"total": total, "data": data}
+        chunks = database_service.fetch_chunks_archived(query, tuple(params), from_date, to_date, company,
+                                                        chunk_size=export_service.chunk_size)
+        filename = f"Vouchers_{company or 'all'}_{from_date or 'all'}_{to_date or 'dates'}"
+        return await export_service.response(chunks, fmt, EXPORT_COLUMNS, filename, sheet_name="Vouchers")
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Failed to get vouchers: {e}")
+        logger.error(f"Failed to export vouchers: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Largest IN list per query (SQLite allows 999 parameters by default)
+DETAILS_CHUNK_SIZE = 500
+
+# Detail sections: (key, table, columns), DISTINCT to avoid duplicates
+DETAIL_SECTIONS = [
+    ("entries", "trn_accounting", "guid, ledger, amount, amount_forex, currency"),
+    ("inventory", "trn_inventory", "guid, item, quantity, rate, amount, godown"),
+    ("bills", "trn_bill", "guid, ledger, name, amount, billtype"),
+    ("bank", "trn_bank", "*"),
+]
+
+
+class VoucherDetailsRequest(BaseModel):
+    guids: List[str] = Field(..., min_length=1, max_length=1000)
+    company: Optional[str] = None
+
+
+async def _read_details(reader, guids: List[str], details: Dict[str, Dict[str, Any]],
+                        company: Optional[str] = None) -> None:
+    """Add the vouchers of `company` (any if None) found through `reader` to details"""
+    company_filter = " AND _company = ?" if company else ""
+    for start in range(0, len(guids), DETAILS_CHUNK_SIZE):
+        chunk = tuple(guids[start:start + DETAILS_CHUNK_SIZE])
+        in_list = ", ".join("?" for _ in chunk)
+        params = chunk + ((company,) if company else ())
+        
+        # Get voucher headers
+        found = set()
+        for voucher in await reader.fetch_all(
+            f"SELECT * FROM trn_voucher WHERE guid IN ({in_list}){company_filter}", params
+        ):
+            details[voucher['guid']] = {"voucher": voucher, **{key: [] for key, _, _ in DETAIL_SECTIONS}}
+            found.add(voucher['guid'])
+        
+        for key, table, columns in DETAIL_SECTIONS:
+            for row in await reader.fetch_all(
+                f"SELECT DISTINCT {columns} FROM {table} WHERE guid IN ({in_list}){company_filter}", params
+            ):
+                if row['guid'] in found:
+                    details[row['guid']][key].append(row)
+
+
+async def _fetch_voucher_details(guids: List[str], company: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Header, entries, inventory, bills and bank rows of several vouchers.
+    
+    One IN-list query per section (and chunk), grouped back by guid.
+    Vouchers not in the hot tables are looked up in the company's archived
+    years, newest first; vouchers that do not exist are left out.
+    """
+    if company and get_active_company() != company:
+        # Company named in the body (POST): read its own database file
+        with company_scope(company):
+            return await _fetch_voucher_details(guids, company)
+    
+    guids = list(dict.fromkeys(guids))
+    details: Dict[str, Dict[str, Any]] = {}
+    
+    await _read_details(database_service, guids, details, company)
+    for year in reversed(await database_service.get_archived_years_between(company_name=company)):
+        missing = [guid for guid in guids if guid not in details]
+        if not missing:
+            break
+        fy_start, fy_end = financial_year_range(year)
+        await _read_details(ArchivedReader(database_service, fy_start, fy_end, company), missing, details, company)
+    
+    # Calculate totals
+    for detail in details.values():
+        entries = detail["entries"]
+        detail["total_dr"] = sum(abs(float(e.get('amount', 0))) for e in entries if float(e.get('amount', 0)) < 0)
+        detail["total_cr"] = sum(float(e.get('amount', 0)) for e in entries if float(e.get('amount', 0)) >= 0)
+    
+    return details
+
+
 @router.get("/vouchers/{guid}/details")
-async def get_voucher_details(guid: str):
+async def get_voucher_details(guid: str, company: Optional[str] = None):
     """Get voucher details including accounting entries, inventory, bills, and bank details"""
     try:
         await database_service.connect()
         
-        # Get voucher header
-        voucher = await database_service.fetch_one(
-            "SELECT * FROM trn_voucher WHERE guid = ?", (guid,)
-        )
-        
-        if not voucher:
+        details = await _fetch_voucher_details([guid], company)
+        if guid not in details:
             raise HTTPException(status_code=404, detail="Voucher not found")
         
-        # Get accounting entries (DISTINCT to avoid duplicates)
-        entries = await database_service.fetch_all(
-            "SELECT DISTINCT guid, ledger, amount, amount_forex, currency FROM trn_accounting WHERE guid = ?", (guid,)
-        )
-        
-        # Get inventory items (DISTINCT to avoid duplicates)
-        inventory = await database_service.fetch_all(
-            "SELECT DISTINCT guid, item, quantity, rate, amount, godown FROM trn_inventory WHERE guid = ?", (guid,)
-        )
-        
-        # Get bill allocations (DISTINCT to avoid duplicates)
-        bills = await database_service.fetch_all(
-            "SELECT DISTINCT guid, ledger, name, amount, billtype FROM trn_bill WHERE guid = ?", (guid,)
-        )
-        
-        # Get bank details (DISTINCT to avoid duplicates)
-        bank = await database_service.fetch_all(
-            "SELECT DISTINCT * FROM trn_bank WHERE guid = ?", (guid,)
-        )
+        return details[guid]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get voucher details: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/vouchers/details")
+async def get_voucher_details_batch(request: VoucherDetailsRequest):
+    """Get details of several vouchers in one round trip"""
+    try:
+        await database_service.connect()
         
-        # Calculate totals
-        total_dr = sum(abs(float(e.get('amount', 0))) for e in entries if float(e.get('amount', 0)) < 0)
-        total_cr = sum(float(e.get('amount', 0)) for e in entries if float(e.get('amount', 0)) >= 0)
+        details = await _fetch_voucher_details(request.guids, request.company)
         
         return {
-            "voucher": voucher,
-            "entries": entries,
-            "inventory": inventory,
-            "bills": bills,
-            "bank": bank,
-            "total_dr": total_dr,
-            "total_cr": total_cr
+            "vouchers": details,
+            "missing": [guid for guid in dict.fromkeys(request.guids) if guid not in details]
         }
-    except HTTPException:
-        raise
     except Exception as e:
         logger.error(f"Failed to get voucher details: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -4,7 +4,7 @@ Main Application Entry Point
 """
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
@@ -12,6 +12,7 @@ from pathlib import Path
 
 from .config import config
 from .utils.logger import setup_logger, logger
+from .services.database.company_routing import company_scope, set_active_company, reset_active_company
 from .controllers.sync_controller import router as sync_router
 from .controllers.config_controller import router as config_router
 from .controllers.health_controller import router as health_router
@@ -24,6 +25,7 @@ from .controllers.voucher_controller import router as voucher_router
 from .controllers.outstanding_controller import router as outstanding_router
 from .controllers.ledger_controller import router as ledger_router
 from .controllers.dashboard_controller import router as dashboard_router
+from .controllers.statement_controller import router as statement_router
 # Protected routes (JWT auth required)
 from .controllers.protected_controller import router as protected_router
 
@@ -49,10 +51,38 @@ async def lifespan(app: FastAPI):
     from .services.database_service import database_service
     await database_service.connect()
     await database_service.ensure_company_config_table()
-    await database_service.disconnect()
+    
+    # Backfill integer join keys and paise amounts for databases synced before they existed
+    try:
+        for company in await database_service.get_synced_companies():
+            with company_scope(company['company_name']):
+                await database_service.ensure_surrogate_key_schema()
+                await database_service.assign_surrogate_keys(company['company_name'])
+                await database_service.ensure_paise_columns()
+    except Exception as e:
+        logger.warning(f"Could not backfill integer columns: {e}")
+    
+    # Build report tables for companies synced before they existed
+    try:
+        from .services.database.derived_tables import DERIVED_TABLES
+        for company in await database_service.get_synced_companies():
+            name = company['company_name']
+            with company_scope(name):
+                for table in DERIVED_TABLES:
+                    if (not await database_service.table_exists(table) or
+                            not await database_service.fetch_scalar(
+                                f"SELECT COUNT(*) FROM {table} WHERE _company = ?", (name,))):
+                        await database_service.refresh_derived_table(table, name)
+    except Exception as e:
+        logger.warning(f"Could not build report tables: {e}")
+    
+    # Idle-time database maintenance (optimize, free pages, WAL checkpoint)
+    from .services.scheduler_service import scheduler_service
+    scheduler_service.start_maintenance(config.database.maintenance_interval)
     
     yield
     logger.info("TallyInsight shutting down...")
+    await database_service.disconnect()
 
 
 # Create FastAPI application
@@ -72,6 +102,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def route_company_database(request: Request, call_next):
+    """Route database calls to the company named in the query string
+    
+    Handlers taking the company from the body or the path use company_scope().
+    """
+    company = request.query_params.get("company")
+    if not company:
+        return await call_next(request)
+    
+    token = set_active_company(company)
+    try:
+        return await call_next(request)
+    finally:
+        reset_active_company(token)
+
+
 # Mount static files (includes voucher-report subfolder)
 static_path = Path(__file__).parent.parent / "static"
 if static_path.exists():
@@ -90,6 +137,7 @@ app.include_router(voucher_router, prefix="/api/data", tags=["Vouchers"])
 app.include_router(outstanding_router, prefix="/api/data", tags=["Outstanding"])
 app.include_router(ledger_router, prefix="/api/data", tags=["Ledger Reports"])
 app.include_router(dashboard_router, prefix="/api/data", tags=["Dashboard"])
+app.include_router(statement_router, prefix="/api/data", tags=["Statements"])
 # Protected routes (require JWT auth from TallyBridge)
 app.include_router(protected_router, prefix="/api/protected", tags=["Protected (Auth Required)"])
 
@@ -272,10 +320,19 @@ async def restore_backup(request: dict):
             shutil.copy2(db_path, pre_restore_backup)
             logger.info(f"Pre-restore backup created: {pre_restore_backup}")
         
+        # Close pooled connections before replacing the file
+        from .services.database_service import database_service
+        await database_service.disconnect()
+        
         # Restore the backup
         shutil.copy2(backup_path, db_path)
         logger.info(f"Database restored from: {backup_path}")
         
+        # Every company's cached report responses are stale now
+        from .services.response_cache import response_cache
+        response_cache.bump()
+        response_cache.clear()
+        
         return {
             "status": "success",
             "message": f"Database restored from {filename}",
@@ -307,6 +364,55 @@ async def run_scheduled_sync():
     return scheduler_service.run_now()
 
 
+@app.post("/api/schedule/maintenance")
+async def run_database_maintenance():
+    """Run database maintenance now (skipped while a sync is running)"""
+    return await scheduler_service.run_maintenance()
+
+
+# ============== Financial-Year Archive API ==============
+
+@app.get("/api/archives")
+async def list_archives(company: str = None):
+    """List archived financial years of a company"""
+    from .services.database_service import database_service
+    company = company or config.tally.company
+    years = await database_service.get_archived_years(company)
+    return {"company": company, "years": years, "count": len(years)}
+
+
+@app.post("/api/archives/run")
+async def run_archival(request: dict):
+    """Archive closed financial years now (keep_years default: database.archive_keep_years)"""
+    from .services.database_service import database_service
+    from .services.response_cache import response_cache
+    from .services.sync_service import sync_service
+    from .utils.constants import SyncStatus
+    
+    company = request.get("company") or config.tally.company
+    keep_years = int(request.get("keep_years") or config.database.archive_keep_years)
+    if not database_service.supports_archives:
+        return {"status": "error", "message": "Financial-year archives require the SQLite database"}
+    if keep_years <= 0:
+        return {"status": "error", "message": "keep_years must be at least 1"}
+    if sync_service.status == SyncStatus.RUNNING:
+        return {"status": "error", "message": "Sync in progress"}
+    
+    try:
+        with company_scope(company):
+            archived = await database_service.archive_closed_years(company, keep_years)
+            if archived:
+                # Snapshots and totals still hold the archived years
+                await sync_service.refresh_report_tables(company)
+        return {"status": "success", "company": company, "keep_years": keep_years, "archived": archived}
+    except Exception as e:
+        logger.error(f"Archival failed: {e}")
+        return {"status": "error", "message": str(e)}
+    finally:
+        # Cached report responses of this company are stale (also after a partial run)
+        response_cache.bump(company)
+
+
 # ============== Crash Recovery API ==============
 from .services.sync_service import sync_service as sync_svc
 
@@ -437,7 +543,6 @@ async def get_synced_companies():
         except:
             pass  # Column might not exist yet
         
-        await database_service.disconnect()
         return {"synced_companies": companies}
     except Exception as e:
         return {"synced_companies": [], "error": str(e)}
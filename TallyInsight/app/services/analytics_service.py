@@ -0,0 +1,323 @@
+"""
+Analytics Service Module
+Optional Parquet mirror of company data with an in-process DuckDB engine
+for heavy aggregate reports.
+
+After each sync the mst_* / trn_* rows of the synced company are exported
+to one Parquet file per table:
+
+    <analytics_dir>/<company slug>/<table>.parquet
+    <analytics_dir>/<company slug>/manifest.json
+
+The manifest records company_config.last_sync_at of the exported data.
+Report controllers call analytics_service.fetch_all() instead of
+database_service.fetch_all(); the query runs on DuckDB (vectorised,
+multi-threaded) while the mirror matches the last completed sync and on
+the primary database otherwise, or when DuckDB fails on the query.
+
+Report SQL is written for SQLite. to_duckdb_sql() rewrites the SQLite-only
+date functions the reports use (date(), julianday(), GROUP_CONCAT).
+
+Requires the optional `duckdb` package. Configuration (config.yaml):
+    database:
+      analytics_mirror: true
+      analytics_dir: ./analytics     # default: <path dir>/analytics
+"""
+
+import asyncio
+import csv
+import json
+import re
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..config import config
+from ..utils.constants import ALL_TABLES
+from ..utils.logger import logger
+from .database_service import database_service
+from .database.company_routing import company_scope, company_slug
+from .database.group_closure import GROUP_CLOSURE_TABLE
+
+MANIFEST_FILE = "manifest.json"
+
+# Sync-built tables that mirrored report queries join as well
+MIRROR_REPORT_TABLES = [GROUP_CLOSURE_TABLE]
+
+# CSV null marker for the Parquet staging files ('' stays an empty string)
+_NULL = "\\N"
+
+# Rows read per chunk while staging a table: the export holds one chunk,
+# not the table
+EXPORT_CHUNK_SIZE = 5000
+
+_FUNCTION = re.compile(r"\b(julianday|date|group_concat)\s*\(", re.IGNORECASE)
+
+
+def _split_args(text: str) -> List[str]:
+    """Split a function argument list on top-level commas"""
+    args, depth, quote, start = [], 0, False, 0
+    for i, ch in enumerate(text):
+        if ch == "'":
+            quote = not quote
+        elif quote:
+            continue
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            args.append(text[start:i].strip())
+            start = i + 1
+    args.append(text[start:].strip())
+    return args
+
+
+def _closing_paren(sql: str, start: int) -> int:
+    """Index of the parenthesis closing the one before `start`"""
+    depth, quote = 1, False
+    for i in range(start, len(sql)):
+        ch = sql[i]
+        if ch == "'":
+            quote = not quote
+        elif quote:
+            continue
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    raise ValueError("Unbalanced parentheses in report SQL")
+
+
+def _as_date(arg: str) -> str:
+    """DuckDB DATE expression for a SQLite date argument"""
+    if arg.lower() == "'now'":
+        return "current_date"
+    return f"CAST({arg} AS DATE)"
+
+
+def _rewrite(name: str, args: List[str]) -> str:
+    """DuckDB expression for one SQLite function call"""
+    name = name.lower()
+    if name == "julianday" and len(args) == 1:
+        return f"julian({_as_date(args[0])})"
+    if name == "date" and len(args) == 1:
+        return f"CAST({_as_date(args[0])} AS VARCHAR)"
+    if name == "date" and len(args) == 2:
+        # '+' || n || ' days'  ->  + n
+        days = re.fullmatch(r"'\+'\s*\|\|\s*(.+?)\s*\|\|\s*' days'", args[1], re.DOTALL)
+        if days:
+            return f"CAST({_as_date(args[0])} + CAST({days.group(1)} AS INTEGER) AS VARCHAR)"
+    if name == "group_concat" and len(args) == 1:
+        return f"STRING_AGG({args[0]}, ',')"
+    raise ValueError(f"No DuckDB equivalent for {name}({', '.join(args)})")
+
+
+def to_duckdb_sql(sql: str) -> str:
+    """Rewrite SQLite date / string-aggregate functions for DuckDB"""
+    out, pos, quote = [], 0, False
+    i = 0
+    while i < len(sql):
+        ch = sql[i]
+        if ch == "'":
+            quote = not quote
+            i += 1
+            continue
+        match = None if quote else _FUNCTION.match(sql, i)
+        if match and (i == 0 or sql[i - 1] not in "._"):
+            end = _closing_paren(sql, match.end())
+            args = [to_duckdb_sql(arg) for arg in _split_args(sql[match.end():end])]
+            out.append(sql[pos:i])
+            out.append(_rewrite(match.group(1), args))
+            pos = i = end + 1
+            continue
+        i += 1
+    out.append(sql[pos:])
+    return "".join(out)
+
+
+def _kinds_type(kinds: Set[type]) -> str:
+    """Column type from the Python types of its non-null values"""
+    if kinds and kinds <= {int}:
+        return "BIGINT"
+    if kinds and kinds <= {int, float}:
+        return "DOUBLE"
+    return "VARCHAR"
+
+
+def _duckdb_type(values: List[Any]) -> str:
+    """Column type from the Python values SQLite returned"""
+    return _kinds_type({type(value) for value in values if value is not None})
+
+
+class AnalyticsService:
+    """Parquet mirror export and DuckDB report queries"""
+
+    def __init__(self):
+        self._manifests: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """True when the mirror is switched on in config"""
+        return bool(getattr(config.database, 'analytics_mirror', False))
+
+    def get_analytics_dir(self) -> Path:
+        """Directory holding the per-company Parquet mirrors"""
+        analytics_dir = getattr(config.database, 'analytics_dir', '')
+        if analytics_dir:
+            return Path(analytics_dir)
+        return Path(config.database.path).parent / "analytics"
+
+    def company_dir(self, company: str) -> Path:
+        """Mirror directory of a company"""
+        return self.get_analytics_dir() / company_slug(company)
+
+    # ==================== EXPORT ====================
+
+    async def export_company(self, company: str) -> Dict[str, int]:
+        """Write the company's mst_* / trn_* (and group_closure) tables to Parquet
+
+        Returns:
+            Rows exported per table
+        """
+        import duckdb  # optional dependency
+
+        company_config = await database_service.get_company_config(company) or {}
+        target = self.company_dir(company)
+        staging = target.with_name(target.name + ".tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+
+        tables = {}
+        conn = duckdb.connect()
+        try:
+            with company_scope(company):
+                for table in ALL_TABLES + MIRROR_REPORT_TABLES:
+                    if not await database_service.table_exists(table):
+                        continue
+                    csv_path = staging / f"{table}.csv"
+                    try:
+                        tables[table], types = await self.stage_csv(table, company, csv_path)
+                        await asyncio.to_thread(
+                            self._write_parquet, conn, csv_path, staging / f"{table}.parquet", types
+                        )
+                    finally:
+                        csv_path.unlink(missing_ok=True)
+        finally:
+            conn.close()
+
+        manifest = {
+            "company": company,
+            "last_sync_at": company_config.get("last_sync_at"),
+            "exported_at": datetime.now().isoformat(),
+            "tables": tables,
+        }
+        (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+        # Swap the complete mirror in place of the previous one
+        previous = target.with_name(target.name + ".old")
+        shutil.rmtree(previous, ignore_errors=True)
+        if target.exists():
+            target.rename(previous)
+        staging.rename(target)
+        shutil.rmtree(previous, ignore_errors=True)
+
+        self._manifests[company] = manifest
+        logger.info(f"Analytics mirror exported for {company}: {sum(tables.values())} rows in {len(tables)} tables")
+        return tables
+
+    @staticmethod
+    async def stage_csv(table: str, company: str, csv_path: Path,
+                        chunk_size: int = EXPORT_CHUNK_SIZE) -> Tuple[int, Dict[str, str]]:
+        """Write a company's rows of a table to a CSV staging file, chunk by chunk
+
+        Returns:
+            (rows written, DuckDB type per column)
+        """
+        columns = await database_service.get_table_columns(table)
+        kinds: Dict[str, Set[type]] = {column: set() for column in columns}
+        count = 0
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            async for rows in database_service.fetch_chunks(
+                f"SELECT * FROM {table} WHERE _company = ?", (company,), chunk_size
+            ):
+                for row in rows:
+                    values = [row.get(column) for column in columns]
+                    for column, value in zip(columns, values):
+                        if value is not None:
+                            kinds[column].add(type(value))
+                    writer.writerow([_NULL if value is None else value for value in values])
+                count += len(rows)
+        return count, {column: _kinds_type(kinds[column]) for column in columns}
+
+    @staticmethod
+    def _write_parquet(conn, csv_path: Path, path: Path, types: Dict[str, str]) -> None:
+        """Convert a CSV staging file to a typed Parquet file"""
+        column_spec = ", ".join(f"'{c}': '{t}'" for c, t in types.items())
+        conn.execute(
+            f"COPY (SELECT * FROM read_csv('{csv_path.as_posix()}', header = true, "
+            f"delim = ',', quote = '\"', escape = '\"', nullstr = '\\N', "
+            f"columns = {{{column_spec}}})) "
+            f"TO '{path.as_posix()}' (FORMAT PARQUET)"
+        )
+
+    def remove_company(self, company: str) -> None:
+        """Delete a company's mirror"""
+        self._manifests.pop(company, None)
+        shutil.rmtree(self.company_dir(company), ignore_errors=True)
+
+    # ==================== QUERIES ====================
+
+    def get_manifest(self, company: str) -> Optional[Dict[str, Any]]:
+        """Manifest of the company's mirror, None if there is none"""
+        if company not in self._manifests:
+            path = self.company_dir(company) / MANIFEST_FILE
+            if not path.exists():
+                return None
+            self._manifests[company] = json.loads(path.read_text(encoding="utf-8"))
+        return self._manifests[company]
+
+    async def is_fresh(self, company: str) -> bool:
+        """True when the mirror holds the company's last completed sync"""
+        if not self.enabled or not company:
+            return False
+        manifest = self.get_manifest(company)
+        if not manifest:
+            return False
+        company_config = await database_service.get_company_config(company) or {}
+        return manifest.get("last_sync_at") == company_config.get("last_sync_at")
+
+    async def fetch_all(self, company: Optional[str], query: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        """Run a report query on the mirror when fresh, else on the database"""
+        if company and await self.is_fresh(company):
+            try:
+                return await asyncio.to_thread(self._query, company, to_duckdb_sql(query), params)
+            except Exception as e:
+                logger.warning(f"Analytics mirror query failed, using database: {e}")
+        return await database_service.fetch_all(query, params)
+
+    def _query(self, company: str, query: str, params: Tuple) -> List[Dict[str, Any]]:
+        """Run a DuckDB query with views over the company's Parquet files"""
+        import duckdb  # optional dependency
+
+        folder = self.company_dir(company)
+        conn = duckdb.connect()
+        try:
+            for table in self.get_manifest(company).get("tables", {}):
+                conn.execute(
+                    f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{(folder / table).as_posix()}.parquet')"
+                )
+            cursor = conn.execute(query, list(params))
+            names = [d[0] for d in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+
+# Global service instance
+analytics_service = AnalyticsService()
@@ -32,6 +32,11 @@ from uuid import uuid4
 
 from .database_service import database_service
 from ..utils.logger import logger
+from ..utils.pagination import KeysetPaginator, Page, SortKey
+
+# Newest first; id makes the order unique
+AUDIT_ORDER = [SortKey("created_at", desc=True), SortKey("id", desc=True)]
+DELETED_ORDER = [SortKey("deleted_at", desc=True), SortKey("id", desc=True)]
 
 
 class AuditService:
@@ -219,10 +224,12 @@ class AuditService:
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         limit: int = 100,
-        offset: int = 0
-    ) -> List[Dict]:
-        """Get audit history with filters"""
-        query = "SELECT * FROM audit_log WHERE 1=1"
+        offset: int = 0,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """Get one page of audit history with filters"""
+        paginator = KeysetPaginator(AUDIT_ORDER, limit, cursor, offset)
+        query = f"SELECT *{paginator.window_columns()} FROM audit_log WHERE 1=1"
         params = []
         
         if table_name:
@@ -249,10 +256,12 @@ class AuditService:
             query += " AND created_at <= ?"
             params.append(end_date)
         
-        query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+        keyset, keyset_params = paginator.condition()
+        if keyset:
+            query += f" AND {keyset}"
+            params.extend(keyset_params)
         
-        return await database_service.fetch_all(query, tuple(params))
+        return await paginator.fetch(database_service, query, params)
     
     async def get_deleted_records(
         self,
@@ -260,10 +269,12 @@ class AuditService:
         company: Optional[str] = None,
         include_restored: bool = False,
         limit: int = 100,
-        offset: int = 0
-    ) -> List[Dict]:
-        """Get deleted records for potential recovery"""
-        query = "SELECT * FROM deleted_records WHERE 1=1"
+        offset: int = 0,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """Get one page of deleted records for potential recovery"""
+        paginator = KeysetPaginator(DELETED_ORDER, limit, cursor, offset)
+        query = f"SELECT *{paginator.window_columns()} FROM deleted_records WHERE 1=1"
         params = []
         
         if not include_restored:
@@ -277,10 +288,12 @@ class AuditService:
             query += " AND company = ?"
             params.append(company)
         
-        query += " ORDER BY deleted_at DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+        keyset, keyset_params = paginator.condition()
+        if keyset:
+            query += f" AND {keyset}"
+            params.extend(keyset_params)
         
-        return await database_service.fetch_all(query, tuple(params))
+        return await paginator.fetch(database_service, query, params)
     
     async def get_record_history(self, table_name: str, record_guid: str) -> List[Dict]:
         """Get complete history of a specific record"""
@@ -0,0 +1,89 @@
+"""
+Amount Storage
+==============
+Optional exact storage of money amounts as integer paise.
+
+Amounts are parsed from Tally as float and stored as REAL, so every
+outstanding and ledger total is a float sum that can drift by a paisa.
+With `database.amount_storage: paise` (SQLite) the loader also writes
+scaled integer columns next to the REAL ones:
+
+    trn_accounting / trn_bill   amount_paise, debit_paise, credit_paise
+    mst_ledger                  opening_balance_paise, closing_balance_paise
+    mst_opening_bill_allocation opening_balance_paise
+
+Tally stores debits as negative amounts, so debit_paise = -amount_paise
+for negative rows and credit_paise = amount_paise for positive rows;
+both are 0 otherwise. Report aggregations sum the integer columns and
+convert to rupees only in the final SELECT (`/ 100.0`).
+
+The REAL columns are kept so existing queries, exports and other
+adapters keep working unchanged.
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Any, Dict, List
+
+# Amount columns stored as integer paise, per table
+PAISE_COLUMNS: Dict[str, List[str]] = {
+    "trn_accounting": ["amount"],
+    "trn_bill": ["amount"],
+    "mst_ledger": ["opening_balance", "closing_balance"],
+    "mst_opening_bill_allocation": ["opening_balance"],
+}
+
+# Tables that also get precomputed debit_paise / credit_paise
+SPLIT_TABLES = ("trn_accounting", "trn_bill")
+
+_PAISA = Decimal("0.01")
+
+
+def to_paise(value: Any) -> int:
+    """Exact integer paise for an amount (float, str or Decimal)"""
+    if value is None or value == "":
+        return 0
+    try:
+        # str() of a float is its shortest round-trip form, i.e. the value Tally sent
+        return int((Decimal(str(value)).quantize(_PAISA, rounding=ROUND_HALF_UP) * 100))
+    except InvalidOperation:
+        return 0
+
+
+def paise_columns(table_name: str) -> List[str]:
+    """Integer columns a table carries in paise storage"""
+    columns = [f"{column}_paise" for column in PAISE_COLUMNS.get(table_name, [])]
+    if table_name in SPLIT_TABLES:
+        columns += ["debit_paise", "credit_paise"]
+    return columns
+
+
+def add_paise_values(table_name: str, rows: List[Dict[str, Any]]) -> None:
+    """Add paise columns to extracted rows in place"""
+    columns = PAISE_COLUMNS.get(table_name)
+    if not columns:
+        return
+    split = table_name in SPLIT_TABLES
+    for row in rows:
+        for column in columns:
+            row[f"{column}_paise"] = to_paise(row.get(column))
+        if split:
+            paise = row["amount_paise"]
+            row["debit_paise"] = -paise if paise < 0 else 0
+            row["credit_paise"] = paise if paise > 0 else 0
+
+
+def backfill_statements(table_name: str) -> List[str]:
+    """UPDATE statements that derive missing paise values from the REAL columns"""
+    statements = [
+        f"UPDATE {table_name} SET {column}_paise = CAST(ROUND({column} * 100) AS INTEGER) "
+        f"WHERE {column}_paise IS NULL"
+        for column in PAISE_COLUMNS.get(table_name, [])
+    ]
+    if table_name in SPLIT_TABLES:
+        statements.append(
+            f"UPDATE {table_name} SET "
+            f"debit_paise = CASE WHEN amount_paise < 0 THEN -amount_paise ELSE 0 END, "
+            f"credit_paise = CASE WHEN amount_paise > 0 THEN amount_paise ELSE 0 END "
+            f"WHERE debit_paise IS NULL"
+        )
+    return statements
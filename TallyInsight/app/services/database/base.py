@@ -8,12 +8,34 @@ and implement all abstract methods.
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from ...utils.constants import ALL_TABLES
+from ...utils.logger import logger
+from .surrogate_keys import KEY_DICTIONARY_TABLE, KEY_REFERENCES
+from .fy_archive import ARCHIVE_BALANCE_TABLE, financial_year, overlapping_years
+from . import ledger_snapshots
+from .ledger_snapshots import LEDGER_SNAPSHOT_TABLE
+from .derived_tables import DERIVED_TABLES
 
 
 class BaseDatabaseService(ABC):
     """Abstract base class for database services"""
     
+    # False for document stores: joined report SQL is not available and
+    # controllers use the adapter's aggregate() pipelines instead
+    supports_sql: bool = True
+    
+    # True when amounts are also stored as integer paise (amount_storage.py)
+    paise_amounts: bool = False
+    
+    # True when closed financial years can move to archive files (fy_archive.py)
+    supports_archives: bool = False
+    
+    # Column identifying a row within its table (last key of keyset sort orders)
+    row_id_column: str = "id"
+    
     @abstractmethod
     async def connect(self) -> None:
         """Open database connection"""
@@ -34,6 +56,14 @@ class BaseDatabaseService(ABC):
         """Execute a query without returning results"""
         pass
     
+    async def execute_insert(self, query: str, params: Tuple = ()) -> int:
+        """Execute an INSERT and return the generated `id` of the new row.
+        
+        Adapters without generated ids return 0.
+        """
+        await self.execute(query, params)
+        return 0
+    
     @abstractmethod
     async def fetch_one(self, query: str, params: Tuple = ()) -> Optional[Dict[str, Any]]:
         """Fetch a single row"""
@@ -49,6 +79,17 @@ class BaseDatabaseService(ABC):
         """Fetch a single value"""
         pass
     
+    async def fetch_chunks(self, query: str, params: Tuple = (),
+                           chunk_size: int = 5000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield the rows of a query in chunks of up to chunk_size.
+        
+        Adapters with a server-side cursor override this so only one chunk
+        is held in memory; this default fetches all rows first.
+        """
+        rows = await self.fetch_all(query, params)
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start:start + chunk_size]
+    
     @abstractmethod
     async def bulk_insert(self, table_name: str, rows: List[Dict[str, Any]], 
                           company_name: str = None) -> int:
@@ -120,6 +161,392 @@ class BaseDatabaseService(ABC):
         """Delete all data for a specific company"""
         pass
     
+    async def ensure_indexes(self) -> int:
+        """Create secondary indexes from the index specification.
+        
+        Adapters without index management return 0.
+        """
+        return 0
+    
+    async def verify_indexes(self) -> List[str]:
+        """Return names of specified indexes missing from the database"""
+        return []
+    
+    async def begin_bulk_load(self) -> None:
+        """Switch to load-optimized settings for a full sync (no-op by default)"""
+        pass
+    
+    async def end_bulk_load(self) -> None:
+        """Restore normal settings after a full sync load (no-op by default)"""
+        pass
+    
+    async def run_maintenance(self) -> Dict[str, Any]:
+        """Idle-time housekeeping (statistics, free space, logs).
+        
+        Adapters without maintenance return an empty result.
+        """
+        return {}
+    
+    # ==================== SURROGATE KEYS ====================
+    # Integer ids for ledger / item / voucher / company text keys, used by
+    # report joins. See surrogate_keys.py for the column layout.
+    
+    async def ensure_surrogate_key_schema(self) -> None:
+        """Create key_dictionary and the integer id columns.
+        
+        Adapters without surrogate key support do nothing.
+        """
+        pass
+    
+    async def assign_surrogate_keys(self, company_name: str = None) -> int:
+        """Allocate ids for new keys and fill the id columns.
+        
+        Args:
+            company_name: Company to assign ('' / None = all companies)
+        
+        Returns:
+            Number of entries in key_dictionary
+        """
+        if not self.supports_sql:
+            return 0
+        
+        company_filter = " AND _company = ?" if company_name else ""
+        params = (company_name,) if company_name else ()
+        
+        for ref in KEY_REFERENCES:
+            if not await self.table_exists(ref.table):
+                continue
+            pending = "" if ref.refresh else f" AND {ref.id_column} IS NULL"
+            await self.execute(
+                f"INSERT INTO {KEY_DICTIONARY_TABLE} (kind, company_name, key_value) "
+                f"SELECT DISTINCT '{ref.kind}', t._company, t.{ref.column} FROM {ref.table} t "
+                f"WHERE t.{ref.column} IS NOT NULL{pending}{company_filter} "
+                f"AND NOT EXISTS (SELECT 1 FROM {KEY_DICTIONARY_TABLE} d WHERE d.kind = '{ref.kind}' "
+                f"AND d.company_name = t._company AND d.key_value = t.{ref.column})",
+                params
+            )
+            await self.execute(
+                f"UPDATE {ref.table} SET {ref.id_column} = ("
+                f"SELECT d.id FROM {KEY_DICTIONARY_TABLE} d WHERE d.kind = '{ref.kind}' "
+                f"AND d.company_name = {ref.table}._company AND d.key_value = {ref.table}.{ref.column}) "
+                f"WHERE {ref.column} IS NOT NULL{pending}{company_filter}",
+                params
+            )
+        
+        return await self.fetch_scalar(f"SELECT COUNT(*) FROM {KEY_DICTIONARY_TABLE}") or 0
+    
+    async def clear_surrogate_keys(self, company_name: str) -> None:
+        """Drop a company's dictionary entries"""
+        try:
+            await self.execute(
+                f"DELETE FROM {KEY_DICTIONARY_TABLE} WHERE company_name = ?", (company_name,)
+            )
+        except Exception as e:
+            logger.debug(f"Could not clear {KEY_DICTIONARY_TABLE}: {e}")
+    
+    async def ensure_paise_columns(self) -> None:
+        """Create and backfill the integer paise amount columns.
+        
+        Adapters without paise storage do nothing.
+        """
+        pass
+    
+    # ==================== FINANCIAL-YEAR ARCHIVES ====================
+    # Closed financial years moved out of the hot trn_* tables. See
+    # fy_archive.py; adapters without archives keep every year hot.
+    
+    async def archive_closed_years(self, company_name: str, keep_years: int,
+                                   replace: bool = False) -> Dict[int, int]:
+        """Archive closed financial years older than the last keep_years.
+        
+        Returns:
+            Vouchers archived per financial year (empty without archive support)
+        """
+        return {}
+    
+    async def get_archived_years(self, company_name: str) -> List[int]:
+        """Financial years of a company held in archive files"""
+        return []
+    
+    async def get_archived_years_between(self, from_date: str = None, to_date: str = None,
+                                         company_name: str = None) -> List[int]:
+        """Archived financial years of a company overlapping [from_date, to_date]"""
+        if not self.supports_archives:
+            return []
+        return overlapping_years(await self.get_archived_years(company_name), from_date, to_date)
+    
+    async def fetch_all_archived(self, query: str, params: Tuple = (), from_date: str = None,
+                                 to_date: str = None, company_name: str = None) -> List[Dict[str, Any]]:
+        """Fetch rows including archived years that overlap [from_date, to_date]"""
+        return await self.fetch_all(query, params)
+    
+    async def fetch_chunks_archived(self, query: str, params: Tuple = (), from_date: str = None,
+                                    to_date: str = None, company_name: str = None,
+                                    chunk_size: int = 5000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """fetch_chunks() including archived years that overlap [from_date, to_date]"""
+        async for rows in self.fetch_chunks(query, params, chunk_size):
+            yield rows
+    
+    async def get_archived_balance(self, ledger: str, company_name: str = None,
+                                   before: str = None) -> float:
+        """Archived movement of a ledger in years ending before a date (all years if None)"""
+        if not self.supports_archives:
+            return 0
+        total = "COALESCE(SUM(amount_paise), 0) / 100.0" if self.paise_amounts else "COALESCE(SUM(amount), 0)"
+        query = f"SELECT {total} FROM {ARCHIVE_BALANCE_TABLE} WHERE ledger = ?"
+        params = [ledger]
+        if company_name:
+            query += " AND _company = ?"
+            params.append(company_name)
+        if before:
+            query += " AND fy_end < ?"
+            params.append(before)
+        return await self.fetch_scalar(query, tuple(params)) or 0
+    
+    # ==================== DERIVED TABLES ====================
+    # Report tables rebuilt from the synced rows after each sync. See
+    # derived_tables.py for the list; every rebuild goes through here.
+    
+    async def execute_transaction(self, statements: List[Tuple[str, Any]]) -> None:
+        """Run write statements in one transaction: all of them commit or none.
+        
+        Each statement is (query, params); a list of param tuples runs the
+        query once per tuple.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support transactions")
+    
+    async def refresh_derived_table(self, table_name: str, company_name: str = None) -> int:
+        """Rebuild a derived table's rows of a company ('' / None = all companies).
+        
+        The old rows are replaced in one transaction, so readers never see
+        the table half-built and a failed rebuild keeps the old rows.
+        
+        Returns:
+            Number of rows stored for the company
+        """
+        if not self.supports_sql:
+            return 0
+        
+        table = DERIVED_TABLES[table_name]
+        statements = await table.build(self, company_name or None)
+        await self.execute(table.ddl)
+        for index_sql in table.indexes:
+            await self.execute(index_sql)
+        await self.execute_transaction(statements)
+        
+        if company_name:
+            return await self.fetch_scalar(
+                f"SELECT COUNT(*) FROM {table_name} WHERE _company = ?", (company_name,)
+            ) or 0
+        return await self.fetch_scalar(f"SELECT COUNT(*) FROM {table_name}") or 0
+    
+    async def clear_derived_tables(self, company_name: str) -> None:
+        """Drop a company's rows from every derived table"""
+        for table_name in DERIVED_TABLES:
+            try:
+                if await self.table_exists(table_name):
+                    await self.execute(f"DELETE FROM {table_name} WHERE _company = ?", (company_name,))
+            except Exception as e:
+                logger.debug(f"Could not clear {table_name}: {e}")
+    
+    # ==================== LEDGER BALANCE SNAPSHOTS ====================
+    # Opening balances read from the monthly snapshots (ledger_snapshots.py).
+    
+    async def get_ledger_movement_before(self, ledger: str, company_name: str = None,
+                                         before: str = None) -> float:
+        """Sum of a ledger's transaction amounts dated before a date.
+        
+        Uses the monthly snapshots when they exist, else sums every earlier
+        transaction. Archived financial years are included either way.
+        """
+        archived_years = []
+        if self.supports_archives and company_name:
+            archived_years = await self.get_archived_years(company_name)
+        
+        if financial_year(before) not in archived_years and await self.table_exists(LEDGER_SNAPSHOT_TABLE):
+            query, params = ledger_snapshots.movement_before_query(
+                ledger, company_name, before, self.paise_amounts
+            )
+            hot = await self.fetch_scalar(query, params)
+        else:
+            # The archived year containing `before` is unioned in
+            query, params = ledger_snapshots.full_movement_query(
+                ledger, company_name, before, self.paise_amounts
+            )
+            rows = await self.fetch_all_archived(query, params, before, before, company_name)
+            hot = rows[0]['pre_total'] if rows else 0
+        
+        # Earlier archived years contribute their carried-forward totals
+        return (hot or 0) + await self.get_archived_balance(ledger, company_name, before)
+    
+    async def get_ledger_balances_before(self, company_name: str,
+                                         before: str) -> Dict[str, Dict[str, float]]:
+        """Movement of every ledger of a company dated before a date.
+        
+        Same sources as get_ledger_movement_before(), one query for all ledgers.
+        
+        Returns:
+            {ledger: {"amount": net, "debit": Dr total, "credit": Cr total}}
+            (Tally signs: Dr entries are negative amounts, totals positive)
+        """
+        archived_years = []
+        if self.supports_archives:
+            archived_years = await self.get_archived_years(company_name)
+        
+        if financial_year(before) not in archived_years and await self.table_exists(LEDGER_SNAPSHOT_TABLE):
+            query, params = ledger_snapshots.balances_before_query(company_name, before, self.paise_amounts)
+            rows = await self.fetch_all(query, params)
+        else:
+            query, params = ledger_snapshots.full_balances_before_query(company_name, before, self.paise_amounts)
+            rows = await self.fetch_all_archived(query, params, before, before, company_name)
+        
+        if archived_years:
+            # archive_ledger_balance.debit holds the positive amounts: swap sides
+            amount = "SUM(amount_paise) / 100.0" if self.paise_amounts else "SUM(amount)"
+            rows += await self.fetch_all(
+                f"SELECT ledger, {amount} AS amount, SUM(credit) AS debit, SUM(debit) AS credit "
+                f"FROM {ARCHIVE_BALANCE_TABLE} WHERE _company = ? AND fy_end < ? GROUP BY ledger",
+                (company_name, before)
+            )
+        
+        balances: Dict[str, Dict[str, float]] = {}
+        for row in rows:
+            totals = balances.setdefault(row['ledger'], {"amount": 0.0, "debit": 0.0, "credit": 0.0})
+            for key in totals:
+                totals[key] += row[key] or 0
+        return balances
+    
+    async def get_table_columns(self, table_name: str) -> List[str]:
+        """Column names of a table in definition order"""
+        rows = await self.fetch_all(
+            "SELECT column_name AS column_name FROM information_schema.columns "
+            "WHERE table_name = ? ORDER BY ordinal_position",
+            (table_name,)
+        )
+        return [row['column_name'] for row in rows]
+    
+    # ==================== TABLE STATISTICS ====================
+    # table_stats keeps per-table, per-company row counts so the dashboard
+    # does not run COUNT(*) over every table on each page load. Sync refreshes
+    # the rows of the synced company; company_name '' holds all-company totals.
+    
+    async def get_table_stats(self, company_name: str = None) -> List[Dict[str, Any]]:
+        """Get stored statistics rows for a company ('' = all companies)"""
+        try:
+            return await self.fetch_all(
+                "SELECT table_name, row_count, bytes_estimate, last_sync_at, counted_at "
+                "FROM table_stats WHERE company_name = ? ORDER BY table_name",
+                (company_name or '',)
+            )
+        except Exception as e:
+            logger.debug(f"Could not read table_stats: {e}")
+            return []
+    
+    def _table_stats_statements(self, company_name: str,
+                                stats: List[Dict[str, Any]]) -> List[Tuple[str, Any]]:
+        """Statements replacing a company's statistics rows.
+        
+        For a company ('' = all companies) the all-company rows are then
+        recomputed from the stored company rows, in the same transaction.
+        """
+        statements = [("DELETE FROM table_stats WHERE company_name = ?", (company_name or '',))]
+        if stats:
+            statements.append((
+                "INSERT INTO table_stats (table_name, company_name, row_count, bytes_estimate, "
+                "last_sync_at, counted_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(row['table_name'], company_name or '', row['row_count'], row['bytes_estimate'],
+                  row['last_sync_at'], row['counted_at']) for row in stats]
+            ))
+        if company_name:
+            statements += [
+                ("DELETE FROM table_stats WHERE company_name = ''", ()),
+                ("INSERT INTO table_stats (table_name, company_name, row_count, bytes_estimate, "
+                 "last_sync_at, counted_at) "
+                 "SELECT table_name, '', SUM(row_count), SUM(bytes_estimate), MAX(last_sync_at), MAX(counted_at) "
+                 "FROM table_stats WHERE company_name <> '' GROUP BY table_name", ()),
+            ]
+        return statements
+    
+    async def save_table_stats(self, company_name: str, stats: List[Dict[str, Any]]) -> None:
+        """Replace stored statistics rows for a company and update the all-company totals"""
+        await self.execute_transaction(self._table_stats_statements(company_name, stats))
+    
+    async def clear_table_stats(self, company_name: str = None) -> None:
+        """Drop stored statistics of a company; the all-company totals no longer include it"""
+        try:
+            await self.execute_transaction(self._table_stats_statements(company_name, []))
+        except Exception as e:
+            logger.debug(f"Could not clear table_stats: {e}")
+    
+    async def refresh_table_stats(self, company_name: str = None,
+                                  last_sync_at: str = None) -> Dict[str, int]:
+        """Recount every table exactly and store the result.
+        
+        Args:
+            company_name: Company to count ('' / None = all companies)
+            last_sync_at: Sync completion time; None keeps the stored value
+        """
+        if last_sync_at is None:
+            previous = await self.get_table_stats(company_name)
+            last_sync_at = previous[0]['last_sync_at'] if previous else None
+        
+        counted_at = datetime.now().isoformat()
+        counts: Dict[str, int] = {}
+        stats = []
+        for table in ALL_TABLES:
+            row_count = await self.get_table_count(table, company_name)
+            counts[table] = row_count
+            try:
+                bytes_estimate = await self._estimate_table_bytes(table, row_count, company_name)
+            except Exception as e:
+                logger.debug(f"Could not estimate size of {table}: {e}")
+                bytes_estimate = 0
+            stats.append({
+                'table_name': table,
+                'row_count': row_count,
+                'bytes_estimate': bytes_estimate,
+                'last_sync_at': last_sync_at,
+                'counted_at': counted_at,
+            })
+        
+        try:
+            await self.save_table_stats(company_name, stats)
+        except Exception as e:
+            logger.warning(f"Could not save table_stats: {e}")
+        return counts
+    
+    async def get_cached_table_counts(self, company_name: str = None) -> Dict[str, int]:
+        """Row counts stored in table_stats.
+        
+        Never counts: empty until the company's first sync (or a recount),
+        and callers treat a missing count as unknown.
+        """
+        stats = await self.get_table_stats(company_name)
+        if not stats:
+            return {}
+        
+        counts = {table: 0 for table in ALL_TABLES}
+        counts.update({row['table_name']: row['row_count'] or 0 for row in stats})
+        return counts
+    
+    async def _estimate_table_bytes(self, table_name: str, row_count: int,
+                                    company_name: str = None) -> int:
+        """Estimated storage bytes of a company's rows in a table.
+        
+        Adapters without size information return 0.
+        """
+        return 0
+    
+    async def _company_share(self, table_name: str, table_bytes: int, row_count: int,
+                             company_name: str = None) -> int:
+        """Scale a whole-table size down to one company's share of its rows"""
+        if not company_name or not table_bytes:
+            return table_bytes
+        total_rows = await self.get_table_count(table_name)
+        if not total_rows:
+            return 0
+        return table_bytes * row_count // total_rows
+    
     def get_placeholder(self) -> str:
         """Get parameter placeholder for this database type"""
         return '?'
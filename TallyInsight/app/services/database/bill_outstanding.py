@@ -0,0 +1,185 @@
+"""
+Bill Outstanding
+================
+Materialized per-bill balances for the outstanding and pending-bill reports.
+
+/outstanding/billwise, /outstanding/ledgerwise and /ledger-billwise each
+aggregate opening bill allocations and trn_bill rows per bill. The sync
+rebuilds the synced company's rows of `bill_outstanding` once, and the
+endpoints read it with indexed range scans.
+
+One row per (company, party ledger, bill). The reports use different sign
+conventions, so each has its own columns:
+
+    billwise        bill_date, bill_credit_period, due_date, billed, paid, pending
+                    (opening of ledgers under Sundry Creditors negated, New Ref +,
+                    Agst Ref -; group tree from group_closure.py)
+    ledgerwise      net_bill_date, net_credit_period, net_due_date, net_pending,
+                    net_source (signed amounts as stored, Advance included, duplicate
+                    rows of older alterids dropped)
+    ledger-billwise credit_period_raw, ledger_due_date, opening_amount,
+                    ledger_pending (opening as stored, New Ref +, Agst Ref -;
+                    due date from "45 Days" or "31-May-22" credit periods)
+
+Due dates are stored; overdue days depend on the report date and stay
+computed at query time.
+"""
+
+from typing import List, Tuple
+
+from .group_closure import GROUP_CLOSURE_TABLE
+
+BILL_OUTSTANDING_TABLE = "bill_outstanding"
+
+BILL_OUTSTANDING_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {BILL_OUTSTANDING_TABLE} (
+        _company TEXT NOT NULL DEFAULT '',
+        party_name TEXT NOT NULL,
+        bill_no TEXT NOT NULL,
+        parent TEXT,
+        bill_date TEXT,
+        bill_credit_period INTEGER,
+        due_date TEXT,
+        billed REAL,
+        paid REAL,
+        pending REAL,
+        source TEXT,
+        net_bill_date TEXT,
+        net_credit_period INTEGER,
+        net_due_date TEXT,
+        net_pending REAL,
+        net_source TEXT,
+        credit_period_raw INTEGER,
+        ledger_due_date TEXT,
+        opening_amount REAL,
+        ledger_pending REAL
+    )
+"""
+
+BILL_OUTSTANDING_INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS idx_bill_outstanding_due ON {BILL_OUTSTANDING_TABLE}(_company, due_date, party_name)",
+    f"CREATE INDEX IF NOT EXISTS idx_bill_outstanding_party ON {BILL_OUTSTANDING_TABLE}(_company, party_name, net_bill_date)",
+    f"CREATE INDEX IF NOT EXISTS idx_bill_outstanding_ledger ON {BILL_OUTSTANDING_TABLE}(party_name, _company, bill_date)",
+]
+
+# Per-bill aggregation of opening allocations and New Ref / Agst Ref / Advance rows
+_REFRESH_SQL = f"""
+    INSERT INTO {BILL_OUTSTANDING_TABLE} (
+        _company, party_name, bill_no, parent, bill_date, bill_credit_period, due_date,
+        billed, paid, pending, source, net_bill_date, net_credit_period, net_due_date,
+        net_pending, net_source, credit_period_raw, ledger_due_date, opening_amount, ledger_pending
+    )
+    WITH bill_rows AS (
+        SELECT o._company, o.ledger AS party_name, o.name AS bill_no, l.parent,
+               o.bill_date, o.bill_credit_period, 'Opening' AS billtype, 'Opening' AS source,
+               0 AS alterid, o.opening_balance AS amount
+        FROM mst_opening_bill_allocation o
+        LEFT JOIN mst_ledger l ON o.ledger = l.name AND o._company = l._company
+        WHERE o.name != ''{{company_filter_o}}
+
+        UNION ALL
+
+        SELECT b._company, b.ledger, b.name, l.parent,
+               v.date, b.bill_credit_period, b.billtype, v.voucher_type,
+               b.alterid, b.amount
+        FROM trn_bill b
+        JOIN trn_voucher v ON v._voucher_id = b._voucher_id
+        LEFT JOIN mst_ledger l ON b.ledger = l.name AND b._company = l._company
+        WHERE b.name != '' AND b.billtype IN ('New Ref', 'Agst Ref', 'Advance'){{company_filter_b}}
+    ),
+    amounts AS (
+        SELECT *,
+            CASE WHEN billtype = 'Opening' AND EXISTS (
+                     SELECT 1 FROM {GROUP_CLOSURE_TABLE} gc
+                     WHERE gc._company = bill_rows._company AND gc.kind = 'group'
+                       AND gc.ancestor = 'Sundry Creditors' AND gc.descendant = bill_rows.parent
+                 ) THEN -amount
+                 WHEN billtype = 'Opening' THEN amount
+                 WHEN billtype = 'New Ref' THEN ABS(amount)
+                 WHEN billtype = 'Agst Ref' THEN -ABS(amount)
+            END AS billwise_amount,
+            CASE WHEN billtype = 'Opening' THEN amount
+                 WHEN billtype = 'New Ref' THEN ABS(amount)
+                 WHEN billtype = 'Agst Ref' THEN -ABS(amount)
+            END AS ledger_amount,
+            CASE WHEN bill_credit_period > 0 THEN bill_credit_period ELSE 1 END AS credit_period
+        FROM bill_rows
+    ),
+    bills AS (
+        -- billwise and ledger-billwise columns (Advance rows excluded)
+        SELECT
+            _company, party_name, bill_no, MAX(parent) AS parent,
+            MIN(CASE WHEN billtype != 'Advance' THEN bill_date END) AS bill_date,
+            MAX(CASE WHEN billtype != 'Advance' THEN credit_period END) AS bill_credit_period,
+            SUM(CASE WHEN billwise_amount > 0 THEN billwise_amount ELSE 0 END) AS billed,
+            SUM(CASE WHEN billwise_amount < 0 THEN ABS(billwise_amount) ELSE 0 END) AS paid,
+            SUM(billwise_amount) AS pending,
+            GROUP_CONCAT(DISTINCT CASE WHEN billtype != 'Advance' THEN source END) AS source,
+            MAX(CASE WHEN billtype != 'Advance' THEN bill_credit_period END) AS credit_period_raw,
+            SUM(CASE WHEN billtype = 'Opening' THEN amount
+                     WHEN billtype = 'New Ref' THEN ABS(amount) ELSE 0 END) AS opening_amount,
+            SUM(ledger_amount) AS ledger_pending
+        FROM amounts
+        GROUP BY _company, party_name, bill_no
+    ),
+    ranked AS (
+        -- ledgerwise: keep the latest alterid of duplicate entries
+        SELECT *,
+            ROW_NUMBER() OVER (
+                PARTITION BY _company, party_name, bill_no, billtype, bill_date, amount
+                ORDER BY alterid DESC
+            ) AS rn
+        FROM amounts
+    ),
+    net AS (
+        SELECT
+            _company, party_name, bill_no,
+            MIN(bill_date) AS net_bill_date,
+            MAX(credit_period) AS net_credit_period,
+            SUM(amount) AS net_pending,
+            GROUP_CONCAT(DISTINCT source) AS net_source
+        FROM ranked
+        WHERE rn = 1
+        GROUP BY _company, party_name, bill_no
+    )
+    SELECT
+        _company, party_name, bill_no, parent, bill_date, bill_credit_period,
+        date(bill_date, '+' || bill_credit_period || ' days') AS due_date,
+        billed, paid, pending, source, net_bill_date, net_credit_period,
+        date(net_bill_date, '+' || net_credit_period || ' days') AS net_due_date,
+        net_pending, net_source, credit_period_raw,
+        -- "45 Days" -> bill date + 45; "31-May-22" -> 2022-05-31; else the bill date
+        CASE
+            WHEN credit_period_raw LIKE '%Days%' THEN
+                date(bill_date, '+' || CAST(REPLACE(REPLACE(credit_period_raw, ' Days', ''), ' ', '') AS INTEGER) || ' days')
+            WHEN credit_period_raw LIKE '%-%' THEN
+                date(
+                    '20' || SUBSTR(credit_period_raw, -2) || '-' ||
+                    CASE SUBSTR(credit_period_raw, INSTR(credit_period_raw, '-') + 1, 3)
+                        WHEN 'Jan' THEN '01' WHEN 'Feb' THEN '02' WHEN 'Mar' THEN '03'
+                        WHEN 'Apr' THEN '04' WHEN 'May' THEN '05' WHEN 'Jun' THEN '06'
+                        WHEN 'Jul' THEN '07' WHEN 'Aug' THEN '08' WHEN 'Sep' THEN '09'
+                        WHEN 'Oct' THEN '10' WHEN 'Nov' THEN '11' WHEN 'Dec' THEN '12'
+                        ELSE '01'
+                    END || '-' ||
+                    SUBSTR('0' || SUBSTR(credit_period_raw, 1, INSTR(credit_period_raw, '-') - 1), -2)
+                )
+            ELSE bill_date
+        END AS ledger_due_date,
+        opening_amount, ledger_pending
+    FROM bills
+    LEFT JOIN net USING (_company, party_name, bill_no)
+"""
+
+
+def refresh_statements(company_name: str = None) -> List[Tuple[str, Tuple]]:
+    """DELETE + INSERT statements rebuilding one company's rows (all if None)"""
+    if company_name:
+        insert = _REFRESH_SQL.format(company_filter_o=" AND o._company = ?",
+                                     company_filter_b=" AND b._company = ?")
+        return [
+            (f"DELETE FROM {BILL_OUTSTANDING_TABLE} WHERE _company = ?", (company_name,)),
+            (insert, (company_name, company_name)),
+        ]
+    insert = _REFRESH_SQL.format(company_filter_o="", company_filter_b="")
+    return [(f"DELETE FROM {BILL_OUTSTANDING_TABLE}", ()), (insert, ())]
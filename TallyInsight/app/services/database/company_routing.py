@@ -0,0 +1,130 @@
+"""
+Company Routing
+===============
+Optional per-company SQLite storage layout.
+
+When `database.per_company_files` is enabled, `database.path` becomes a
+small catalog database (company_config, sync_history, table_stats, audit
+tables) and every company's Tally data (config, mst_*, trn_*, derived
+tables) lives in its own file under `database.company_dir`.
+
+The SQLite adapter opens the catalog and ATTACHes the company file as the
+`company` schema. Unqualified table names resolve main -> company, so the
+existing report SQL runs unchanged against the routed company. Deleting or
+resyncing a company is a file-level operation.
+
+ROUTING:
+--------
+The active company comes from a context variable:
+- API requests: set from the `company` query parameter (middleware in main.py)
+- Sync: set for the duration of full_sync / incremental_sync
+- Adapter methods taking an explicit company use company_scope()
+
+Without an active company, config.tally.company is used.
+
+Configuration (config.yaml):
+    database:
+      path: ./tally.db
+      per_company_files: true
+      company_dir: ./companies      # default: <path dir>/companies
+"""
+
+import hashlib
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from pathlib import Path
+from typing import Iterator
+
+from ...config import config
+
+# Schema alias of the attached company file
+COMPANY_SCHEMA = "company"
+
+# Tables that always stay in the catalog database
+CATALOG_TABLES = {
+    "company_config",
+    "sync_history",
+    "app_logs",
+    "table_stats",
+    "audit_log",
+    "deleted_records",
+    "_diff",
+    "_delete",
+    "archive_registry",
+}
+
+_active_company: ContextVar[str] = ContextVar("active_company", default="")
+
+_COMMENTS = r'(?:\s*--[^\n]*\n)*'
+_CREATE_TABLE = re.compile(
+    rf'^({_COMMENTS}\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?)(\w+)\b(?!\.)',
+    re.IGNORECASE
+)
+_CREATE_INDEX = re.compile(
+    rf'^({_COMMENTS}\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?)(\w+)\b(?!\.)(\s+ON\s+)(\w+)',
+    re.IGNORECASE
+)
+
+
+def get_active_company() -> str:
+    """Company the current request/sync is routed to ('' if none)"""
+    return _active_company.get()
+
+
+def set_active_company(company: str) -> Token:
+    """Route subsequent database calls in this context to a company"""
+    return _active_company.set(company or "")
+
+
+def reset_active_company(token: Token) -> None:
+    """Restore the previous routing"""
+    _active_company.reset(token)
+
+
+@contextmanager
+def company_scope(company: str) -> Iterator[None]:
+    """Temporarily route database calls to a company"""
+    token = set_active_company(company)
+    try:
+        yield
+    finally:
+        reset_active_company(token)
+
+
+def get_company_dir() -> Path:
+    """Directory holding per-company database files"""
+    company_dir = getattr(config.database, 'company_dir', '')
+    if company_dir:
+        return Path(company_dir)
+    return Path(config.database.path).parent / "companies"
+
+
+def company_slug(company: str) -> str:
+    """File-system safe name for a company (readable slug + short hash for uniqueness)"""
+    slug = re.sub(r'[^A-Za-z0-9._-]+', '_', company).strip('_.') or "company"
+    digest = hashlib.sha1(company.encode("utf-8")).hexdigest()[:8]
+    return f"{slug[:64]}_{digest}"
+
+
+def company_file_path(company: str) -> Path:
+    """Database file for a company"""
+    return get_company_dir() / f"{company_slug(company)}.db"
+
+
+def qualify_ddl(query: str) -> str:
+    """Place CREATE TABLE / CREATE INDEX for company data in the company schema"""
+    match = _CREATE_TABLE.match(query)
+    if match:
+        if match.group(2).lower() in CATALOG_TABLES:
+            return query
+        return f"{match.group(1)}{COMPANY_SCHEMA}.{match.group(2)}{query[match.end():]}"
+
+    match = _CREATE_INDEX.match(query)
+    if match:
+        if match.group(4).lower() in CATALOG_TABLES:
+            return query
+        return (f"{match.group(1)}{COMPANY_SCHEMA}.{match.group(2)}"
+                f"{match.group(3)}{match.group(4)}{query[match.end():]}")
+
+    return query
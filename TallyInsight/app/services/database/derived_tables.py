@@ -0,0 +1,100 @@
+"""
+Derived Tables
+==============
+Report tables the sync rebuilds from the synced rows, in build order:
+
+    group_closure            group_closure.py     ancestor / descendant pairs of the group trees
+    bill_outstanding         bill_outstanding.py  per-bill balances (reads group_closure)
+    ledger_balance_snapshot  ledger_snapshots.py  monthly running totals per ledger
+    voucher_totals           voucher_totals.py    per-voucher debit / credit / party totals
+    monthly_cube             monthly_cube.py      entries by month x voucher type x ledger
+    master_search            master_search.py     type-ahead terms of ledgers and stock items
+
+Each entry names the table, its DDL and indexes, and `build`: a coroutine
+making any schema fixes the rebuild needs and returning the statements
+that replace one company's rows (all companies for None).
+
+BaseDatabaseService.refresh_derived_table() runs those statements with
+execute_transaction(): readers see the previous rows until the new ones
+commit, and a failed rebuild leaves the previous rows in place. The sync,
+the startup backfill and delete_company_data() all go through
+DERIVED_TABLES, so a new report table is one module plus one entry here.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from . import bill_outstanding, group_closure, ledger_snapshots, master_search, monthly_cube, voucher_totals
+
+# (query, params); params is a list of tuples to run the query once per row
+Statement = Tuple[str, Any]
+
+
+class DerivedTable(NamedTuple):
+    name: str
+    ddl: str
+    indexes: List[str]
+    build: Callable[[Any, Optional[str]], Awaitable[List[Statement]]]
+
+
+async def _group_closure(db, company_name: str = None) -> List[Statement]:
+    return group_closure.refresh_statements(company_name)
+
+
+async def _bill_outstanding(db, company_name: str = None) -> List[Statement]:
+    # Creditor openings are found through the group tree
+    await db.execute(group_closure.GROUP_CLOSURE_DDL)
+    # trn_bill.alterid only exists once an incremental sync added it
+    await db.ensure_alterid_column_exists()
+    return bill_outstanding.refresh_statements(company_name)
+
+
+async def _ledger_snapshots(db, company_name: str = None) -> List[Statement]:
+    table = ledger_snapshots.LEDGER_SNAPSHOT_TABLE
+    if await db.table_exists(table):
+        try:
+            await db.fetch_all(f"SELECT cumulative_debit FROM {table} LIMIT 0")
+        except Exception:
+            # Created before the debit / credit split; derived data, rebuilt from scratch
+            await db.execute(f"DROP TABLE {table}")
+    return ledger_snapshots.refresh_statements(company_name, db.paise_amounts)
+
+
+async def _voucher_totals(db, company_name: str = None) -> List[Statement]:
+    archived = db.supports_archives and await db.table_exists(voucher_totals.ARCHIVED_TOTALS_TABLE)
+    return voucher_totals.refresh_statements(company_name, db.paise_amounts, archived)
+
+
+async def _monthly_cube(db, company_name: str = None) -> List[Statement]:
+    archived = db.supports_archives and await db.table_exists(monthly_cube.ARCHIVED_CUBE_TABLE)
+    return monthly_cube.refresh_statements(company_name, db.paise_amounts, archived)
+
+
+async def _master_search(db, company_name: str = None) -> List[Statement]:
+    # Terms are built here: splitting text into words is not portable SQL
+    company_filter = " WHERE _company = ?" if company_name else ""
+    params = (company_name,) if company_name else ()
+    rows = []
+    for kind, (table, fields) in master_search.SEARCH_SOURCES.items():
+        columns = master_search.source_columns(fields, await db.get_table_columns(table))
+        for master in await db.fetch_all(f"SELECT {columns} FROM {table}{company_filter}", params):
+            company = master['_company'] or ''
+            rows.extend(dict(row, _company=company) for row in master_search.search_rows(kind, master))
+    return master_search.refresh_statements(company_name, rows)
+
+
+DERIVED_TABLES: Dict[str, DerivedTable] = {
+    table.name: table for table in (
+        DerivedTable(group_closure.GROUP_CLOSURE_TABLE, group_closure.GROUP_CLOSURE_DDL,
+                     group_closure.GROUP_CLOSURE_INDEXES, _group_closure),
+        DerivedTable(bill_outstanding.BILL_OUTSTANDING_TABLE, bill_outstanding.BILL_OUTSTANDING_DDL,
+                     bill_outstanding.BILL_OUTSTANDING_INDEXES, _bill_outstanding),
+        DerivedTable(ledger_snapshots.LEDGER_SNAPSHOT_TABLE, ledger_snapshots.LEDGER_SNAPSHOT_DDL,
+                     ledger_snapshots.LEDGER_SNAPSHOT_INDEXES, _ledger_snapshots),
+        DerivedTable(voucher_totals.VOUCHER_TOTALS_TABLE, voucher_totals.VOUCHER_TOTALS_DDL,
+                     voucher_totals.VOUCHER_TOTALS_INDEXES, _voucher_totals),
+        DerivedTable(monthly_cube.MONTHLY_CUBE_TABLE, monthly_cube.MONTHLY_CUBE_DDL,
+                     monthly_cube.MONTHLY_CUBE_INDEXES, _monthly_cube),
+        DerivedTable(master_search.MASTER_SEARCH_TABLE, master_search.MASTER_SEARCH_DDL,
+                     master_search.MASTER_SEARCH_INDEXES, _master_search),
+    )
+}
@@ -0,0 +1,131 @@
+"""
+Financial-Year Archives
+=======================
+Optional cold storage for closed financial years (SQLite).
+
+With `database.archive_keep_years: N` the sync moves transaction rows of
+financial years (April-March) older than the last N years out of the hot
+trn_* tables into one compact database file per year:
+
+    <archive_dir>/<company slug>/fy_2019.db     (2019-04-01 .. 2020-03-31)
+
+A voucher is archived with all its trn_* rows. Vouchers that allocate to
+a bill which is still open, or whose New Ref / Agst Ref rows are not all
+in the year (an invoice settled in a later year), stay hot, so a bill is
+always either wholly hot or wholly archived and outstanding reports never
+need the archives.
+
+Per year and ledger the archived movement (amount / debit / credit) is
+kept in the hot `archive_ledger_balance` table. Opening and closing
+balances add it instead of scanning archived rows; ledger_balance_summary
+includes it as well.
+
+Queries over a date range that reaches into an archived year are run by
+`fetch_all_archived()`, which attaches the needed year files and shadows
+each trn_* table with a TEMP view over hot UNION ALL archived rows, so the
+report SQL itself is unchanged. Queries that stay in hot years use the
+normal reader pool. Reports reading trn_* rows go through it: the ledger
+report, /vouchers and its export, voucher details and the ageing report.
+Derived tables keep archived vouchers through per-year tables filled by
+the archive run (archive_voucher_totals, archive_monthly_cube); the bill
+tables never need them, since a bill is archived only once settled.
+
+Configuration (config.yaml):
+    database:
+      archive_keep_years: 2       # current + previous year stay hot (0 = off)
+      archive_dir: ./archive      # default: <path dir>/archive
+"""
+
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ...config import config
+from ...utils.constants import TRANSACTION_TABLES
+from .company_routing import company_slug
+
+# Catalog table listing the archive files per company
+ARCHIVE_REGISTRY_TABLE = "archive_registry"
+
+# Hot table with the archived movement per company, year and ledger
+ARCHIVE_BALANCE_TABLE = "archive_ledger_balance"
+
+# Tables moved to the archive, keyed by voucher guid (closing stock rows
+# are dated snapshots without a voucher and stay hot)
+ARCHIVE_TABLES = [table for table in TRANSACTION_TABLES if table != "trn_closingstock_ledger"]
+
+# Archived views of these tables keep a `rowid` column (each file's own
+# rowids), so ledger statement pages can order the entries of one voucher
+ROW_ID_TABLES = ["trn_accounting"]
+
+# First month of the financial year
+FY_START_MONTH = 4
+
+# SQLite allows 10 attached databases: main + company file + archives
+MAX_ATTACHED_ARCHIVES = 8
+
+
+def financial_year(day: str) -> int:
+    """Starting calendar year of the financial year containing a YYYY-MM-DD date"""
+    year, month = int(day[:4]), int(day[5:7])
+    return year if month >= FY_START_MONTH else year - 1
+
+
+def financial_year_range(year: int) -> Tuple[str, str]:
+    """First and last date of a financial year"""
+    start = date(year, FY_START_MONTH, 1)
+    end = date(year + 1, FY_START_MONTH, 1).toordinal() - 1
+    return start.isoformat(), date.fromordinal(end).isoformat()
+
+
+def archivable_years(first_date: str, keep_years: int, today: Optional[date] = None) -> List[int]:
+    """Closed financial years older than the last `keep_years` years"""
+    if keep_years <= 0 or not first_date:
+        return []
+    current = financial_year((today or date.today()).isoformat())
+    return list(range(financial_year(first_date), current - keep_years + 1))
+
+
+def overlapping_years(years: List[int], from_date: Optional[str], to_date: Optional[str]) -> List[int]:
+    """Archived years with dates inside [from_date, to_date] (open-ended if None)"""
+    selected = []
+    for year in years:
+        start, end = financial_year_range(year)
+        if (to_date is None or start <= to_date) and (from_date is None or end >= from_date):
+            selected.append(year)
+    return selected
+
+
+def get_archive_dir() -> Path:
+    """Directory holding the archive files"""
+    archive_dir = getattr(config.database, 'archive_dir', '')
+    if archive_dir:
+        return Path(archive_dir)
+    return Path(config.database.path).parent / "archive"
+
+
+def company_archive_dir(company: str) -> Path:
+    """Directory holding one company's archive files"""
+    return get_archive_dir() / company_slug(company)
+
+
+def archive_file_path(company: str, year: int) -> Path:
+    """Archive database file of one company and financial year"""
+    return company_archive_dir(company) / f"fy_{year}.db"
+
+
+class ArchivedReader:
+    """fetch_all() over hot and archived rows of one date range.
+    
+    Hands a database service's fetch_all_archived() to code that only calls
+    fetch_all(), such as KeysetPaginator.fetch().
+    """
+    
+    def __init__(self, db, from_date: Optional[str], to_date: Optional[str], company_name: Optional[str]):
+        self.db = db
+        self.from_date = from_date
+        self.to_date = to_date
+        self.company_name = company_name
+    
+    async def fetch_all(self, query: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        return await self.db.fetch_all_archived(query, params, self.from_date, self.to_date, self.company_name)
@@ -0,0 +1,102 @@
+"""
+Group Closure
+=============
+Ancestor / descendant pairs of the Tally group trees, for "everything
+under group X" filters.
+
+Ledgers, stock items and cost centres point to their direct parent only,
+so reports that filtered `parent = 'Sundry Debtors'` missed parties in
+sub-groups, and rolling up the tree meant a recursive query per request.
+The sync rebuilds, per company, one row per (ancestor, descendant) pair of
+each tree, including every node paired with itself at depth 0:
+
+    group_closure(_company, kind, ancestor, descendant, depth)
+
+    kind          source table
+    group         mst_group          (ledger groups)
+    stock_group   mst_stock_group    (stock item groups)
+    cost_centre   mst_cost_centre
+
+"Ledgers under Sundry Debtors" is then an indexed lookup on the primary
+key: see under_condition().
+"""
+
+from typing import List, Tuple
+
+GROUP_CLOSURE_TABLE = "group_closure"
+
+# kind -> master table holding name / parent
+CLOSURE_SOURCES = {
+    "group": "mst_group",
+    "stock_group": "mst_stock_group",
+    "cost_centre": "mst_cost_centre",
+}
+
+# Deepest tree walked (guards against parent cycles)
+MAX_DEPTH = 32
+
+GROUP_CLOSURE_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {GROUP_CLOSURE_TABLE} (
+        _company TEXT NOT NULL DEFAULT '',
+        kind TEXT NOT NULL,
+        ancestor TEXT NOT NULL,
+        descendant TEXT NOT NULL,
+        depth INTEGER DEFAULT 0,
+        PRIMARY KEY (_company, kind, ancestor, descendant)
+    )
+"""
+
+GROUP_CLOSURE_INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS idx_group_closure_descendant ON {GROUP_CLOSURE_TABLE}(_company, kind, descendant)",
+]
+
+# Walk each node up to the root; a node reached twice keeps its shortest depth
+_REFRESH_SQL = f"""
+    INSERT INTO {GROUP_CLOSURE_TABLE} (_company, kind, ancestor, descendant, depth)
+    WITH RECURSIVE tree(_company, ancestor, descendant, depth) AS (
+        SELECT _company, name, name, 0
+        FROM {{table}}
+        WHERE name != ''{{company_filter}}
+
+        UNION ALL
+
+        SELECT t._company, p.parent, t.descendant, t.depth + 1
+        FROM tree t
+        JOIN {{table}} p ON p._company = t._company AND p.name = t.ancestor
+        WHERE p.parent != '' AND p.parent != p.name AND t.depth < {MAX_DEPTH}
+    )
+    SELECT _company, '{{kind}}', ancestor, descendant, MIN(depth)
+    FROM tree
+    GROUP BY _company, ancestor, descendant
+"""
+
+
+def refresh_statements(company_name: str = None) -> List[Tuple[str, Tuple]]:
+    """DELETE + INSERT statements rebuilding one company's closure rows (all if None)"""
+    if company_name:
+        statements = [(f"DELETE FROM {GROUP_CLOSURE_TABLE} WHERE _company = ?", (company_name,))]
+        company_filter, params = " AND _company = ?", (company_name,)
+    else:
+        statements = [(f"DELETE FROM {GROUP_CLOSURE_TABLE}", ())]
+        company_filter, params = "", ()
+    for kind, table in CLOSURE_SOURCES.items():
+        statements.append((_REFRESH_SQL.format(table=table, kind=kind, company_filter=company_filter), params))
+    return statements
+
+
+def under_condition(kind: str, parent_column: str, company_column: str, groups: int = 1) -> str:
+    """Predicate: the row's parent is one of `groups` groups (? placeholders) or below them.
+
+    Example:
+        under_condition("group", "l.parent", "l._company")
+        -> EXISTS (SELECT 1 FROM group_closure gc WHERE gc._company = l._company
+                   AND gc.kind = 'group' AND gc.ancestor = ? AND gc.descendant = l.parent)
+    """
+    if kind not in CLOSURE_SOURCES:
+        raise ValueError(f"Unknown closure kind: {kind}")
+    ancestor = "gc.ancestor = ?" if groups == 1 else f"gc.ancestor IN ({', '.join('?' for _ in range(groups))})"
+    return (
+        f"EXISTS (SELECT 1 FROM {GROUP_CLOSURE_TABLE} gc "
+        f"WHERE gc._company = {company_column} AND gc.kind = '{kind}' "
+        f"AND {ancestor} AND gc.descendant = {parent_column})"
+    )
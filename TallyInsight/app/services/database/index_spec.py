@@ -0,0 +1,100 @@
+"""
+Index Specification
+===================
+Declarative list of secondary indexes used by report and sync access paths.
+
+The SQL schema files only define primary keys, so every ledger report,
+bill-wise outstanding query and cascade delete would otherwise be a full
+table scan. Adapters apply this list after creating tables
+(`ensure_indexes`) and can report which entries are missing
+(`verify_indexes`).
+
+An index is only created when its table and all its columns exist, so the
+same list works for both the full and incremental schema files (the
+incremental schema adds `_ledger` / `_item` reference columns).
+
+ACCESS PATHS:
+-------------
+- trn_accounting(ledger, _company)       ledger report, outstanding
+- trn_bill(ledger, name, billtype)       bill-wise outstanding
+- trn_voucher(date, _company, type)      voucher list, date range filters
+- mst_ledger(parent, _company)           group filters (Sundry Debtors, ...)
+- mst_ledger(name, _company)             ledger name joins from trn_*
+- <derived>(guid)                        voucher joins, cascade delete
+- <derived>(_ledger / _item)             incremental cascade delete
+- <table>(_voucher_id / _ledger_id)      integer report joins (surrogate_keys)
+- key_dictionary(kind, company, key)     surrogate id lookup during assignment
+"""
+
+from typing import List, NamedTuple, Tuple
+
+from .schema_catalog import SchemaCatalog
+
+
+class IndexSpec(NamedTuple):
+    """Single secondary index definition"""
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+
+
+# Derived transaction tables keyed by parent voucher guid
+DERIVED_GUID_TABLES = [
+    "trn_accounting",
+    "trn_inventory",
+    "trn_cost_centre",
+    "trn_cost_category_centre",
+    "trn_cost_inventory_category_centre",
+    "trn_bill",
+    "trn_bank",
+    "trn_batch",
+    "trn_inventory_accounting",
+    "trn_employee",
+    "trn_payhead",
+    "trn_attendance",
+]
+
+# Derived master tables and the parent reference used by cascade_delete
+DERIVED_REFERENCE_COLUMNS = [
+    ("mst_opening_bill_allocation", "_ledger"),
+    ("trn_closingstock_ledger", "_ledger"),
+    ("mst_gst_effective_rate", "_item"),
+    ("mst_opening_batch_allocation", "_item"),
+    ("mst_stockitem_standard_cost", "_item"),
+    ("mst_stockitem_standard_price", "_item"),
+]
+
+REPORT_INDEXES: List[IndexSpec] = [
+    IndexSpec("idx_trn_accounting_ledger_company", "trn_accounting", ("ledger", "_company")),
+    IndexSpec("idx_trn_bill_ledger_name_type", "trn_bill", ("ledger", "name", "billtype")),
+    IndexSpec("idx_trn_voucher_date_company_type", "trn_voucher", ("date", "_company", "voucher_type")),
+    IndexSpec("idx_mst_ledger_parent_company", "mst_ledger", ("parent", "_company")),
+    IndexSpec("idx_mst_ledger_name_company", "mst_ledger", ("name", "_company")),
+    IndexSpec("idx_mst_opening_bill_ledger_company", "mst_opening_bill_allocation", ("ledger", "_company")),
+]
+
+SURROGATE_KEY_INDEXES: List[IndexSpec] = [
+    IndexSpec("idx_key_dictionary_lookup", "key_dictionary", ("kind", "company_name", "key_value")),
+    IndexSpec("idx_mst_ledger_ledger_id", "mst_ledger", ("_ledger_id",)),
+    IndexSpec("idx_trn_voucher_voucher_id", "trn_voucher", ("_voucher_id",)),
+    IndexSpec("idx_trn_accounting_ledger_id", "trn_accounting", ("_ledger_id",)),
+    IndexSpec("idx_trn_accounting_voucher_id", "trn_accounting", ("_voucher_id",)),
+    IndexSpec("idx_trn_bill_voucher_id", "trn_bill", ("_voucher_id",)),
+    IndexSpec("idx_trn_inventory_voucher_id", "trn_inventory", ("_voucher_id",)),
+]
+
+INDEX_SPECS: List[IndexSpec] = (
+    REPORT_INDEXES
+    + SURROGATE_KEY_INDEXES
+    + [IndexSpec(f"idx_{table}_guid", table, ("guid",)) for table in DERIVED_GUID_TABLES]
+    + [IndexSpec(f"idx_{table}{column}", table, (column,)) for table, column in DERIVED_REFERENCE_COLUMNS]
+)
+
+
+def applicable_indexes(catalog: SchemaCatalog) -> List[IndexSpec]:
+    """Index specs whose table and columns exist in the given schema"""
+    return [
+        spec for spec in INDEX_SPECS
+        if catalog.table_exists(spec.table)
+        and not catalog.missing_columns(spec.table, spec.columns)
+    ]
@@ -0,0 +1,203 @@
+"""
+Ledger Balance Snapshots
+========================
+Monthly running totals of each ledger's movement, for opening balances.
+
+The ledger report's opening balance at a date is the ledger's opening
+balance plus every transaction before that date. Summing them scans the
+ledger's whole history. The sync instead rebuilds, per company, one row
+per ledger and month:
+
+    ledger_balance_snapshot(_company, ledger, month 'YYYY-MM',
+                            amount      movement in the month,
+                            cumulative  movement up to the end of the month,
+                            debit / credit (+ cumulative_*) the same split
+                                        into Dr (negative amounts, as
+                                        positive) and Cr entries)
+
+Movement before a date D is then the cumulative of the last snapshot month
+before D's month (one primary-key lookup) plus the transactions between the
+first of D's month and D (at most one month, read through the voucher
+date index).
+
+balances_before_query() does the same for every ledger of a company at
+once (trial balance, P&L and balance sheet).
+
+Snapshots cover the hot trn_* tables only. Archived financial years add
+their carried-forward totals (fy_archive.py); a date inside an archived
+year falls back to the full sum over hot + archived rows.
+"""
+
+from typing import List, Tuple
+
+LEDGER_SNAPSHOT_TABLE = "ledger_balance_snapshot"
+
+LEDGER_SNAPSHOT_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {LEDGER_SNAPSHOT_TABLE} (
+        _company TEXT NOT NULL DEFAULT '',
+        ledger TEXT NOT NULL,
+        month TEXT NOT NULL,
+        amount REAL DEFAULT 0,
+        cumulative REAL DEFAULT 0,
+        amount_paise INTEGER DEFAULT 0,
+        cumulative_paise INTEGER DEFAULT 0,
+        debit REAL DEFAULT 0,
+        credit REAL DEFAULT 0,
+        cumulative_debit REAL DEFAULT 0,
+        cumulative_credit REAL DEFAULT 0,
+        PRIMARY KEY (_company, ledger, month)
+    )
+"""
+
+LEDGER_SNAPSHOT_INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS idx_ledger_balance_snapshot_ledger ON {LEDGER_SNAPSHOT_TABLE}(ledger, month)",
+]
+
+# Month totals with a running sum per ledger
+_RUNNING = "OVER (PARTITION BY _company, ledger ORDER BY month ROWS UNBOUNDED PRECEDING)"
+
+_REFRESH_SQL = f"""
+    INSERT INTO {LEDGER_SNAPSHOT_TABLE} (
+        _company, ledger, month, amount, cumulative, amount_paise, cumulative_paise,
+        debit, credit, cumulative_debit, cumulative_credit
+    )
+    SELECT
+        _company, ledger, month,
+        amount, SUM(amount) {_RUNNING},
+        amount_paise, SUM(amount_paise) {_RUNNING},
+        debit, credit, SUM(debit) {_RUNNING}, SUM(credit) {_RUNNING}
+    FROM (
+        SELECT a._company, a.ledger, SUBSTR(v.date, 1, 7) AS month,
+               SUM(a.amount) AS amount, {{paise_sum}} AS amount_paise,
+               {{debit_sum}} AS debit, {{credit_sum}} AS credit
+        FROM trn_accounting a
+        JOIN trn_voucher v ON v._voucher_id = a._voucher_id
+        WHERE v.date IS NOT NULL{{company_filter}}
+        GROUP BY a._company, a.ledger, SUBSTR(v.date, 1, 7)
+    ) months
+"""
+
+
+def _split_sums(paise: bool) -> dict:
+    """SUM expressions of the Dr (negative) and Cr (positive) entries, as positive"""
+    if paise:
+        return dict(debit_sum="COALESCE(SUM(a.debit_paise), 0) / 100.0",
+                    credit_sum="COALESCE(SUM(a.credit_paise), 0) / 100.0")
+    return dict(debit_sum="COALESCE(SUM(CASE WHEN a.amount < 0 THEN -a.amount ELSE 0 END), 0)",
+                credit_sum="COALESCE(SUM(CASE WHEN a.amount > 0 THEN a.amount ELSE 0 END), 0)")
+
+
+def refresh_statements(company_name: str = None, paise: bool = False) -> List[Tuple[str, Tuple]]:
+    """DELETE + INSERT statements rebuilding one company's snapshots (all if None)"""
+    sums = dict(paise_sum="SUM(a.amount_paise)" if paise else "0", **_split_sums(paise))
+    if company_name:
+        insert = _REFRESH_SQL.format(company_filter=" AND a._company = ?", **sums)
+        return [
+            (f"DELETE FROM {LEDGER_SNAPSHOT_TABLE} WHERE _company = ?", (company_name,)),
+            (insert, (company_name,)),
+        ]
+    insert = _REFRESH_SQL.format(company_filter="", **sums)
+    return [(f"DELETE FROM {LEDGER_SNAPSHOT_TABLE}", ()), (insert, ())]
+
+
+def movement_before_query(ledger: str, company_name: str, before: str,
+                          paise: bool = False) -> Tuple[str, Tuple]:
+    """Snapshot lookup + tail sum: ledger movement before a date"""
+    cumulative = "SUM(s.cumulative_paise) / 100.0" if paise else "SUM(s.cumulative)"
+    amount = "SUM(a.amount_paise) / 100.0" if paise else "SUM(a.amount)"
+    snapshot_company = " AND s._company = ?" if company_name else ""
+    tail_company = " AND a._company = ?" if company_name else ""
+    month = before[:7]
+
+    query = f"""
+        SELECT
+            COALESCE((
+                SELECT {cumulative} FROM {LEDGER_SNAPSHOT_TABLE} s
+                WHERE s.ledger = ?{snapshot_company}
+                  AND s.month = (
+                      SELECT MAX(p.month) FROM {LEDGER_SNAPSHOT_TABLE} p
+                      WHERE p._company = s._company AND p.ledger = s.ledger AND p.month < ?
+                  )
+            ), 0)
+            + COALESCE((
+                SELECT {amount}
+                FROM trn_voucher v
+                JOIN trn_accounting a ON a._voucher_id = v._voucher_id
+                WHERE v.date >= ? AND v.date < ? AND a.ledger = ?{tail_company}
+            ), 0) AS pre_total
+    """
+    params = [ledger]
+    if company_name:
+        params.append(company_name)
+    params += [month, f"{month}-01", before, ledger]
+    if company_name:
+        params.append(company_name)
+    return query, tuple(params)
+
+
+def full_movement_query(ledger: str, company_name: str, before: str,
+                        paise: bool = False) -> Tuple[str, Tuple]:
+    """Sum over every transaction before a date (no snapshots)"""
+    pre_sum = "COALESCE(SUM(a.amount_paise), 0) / 100.0" if paise else "COALESCE(SUM(a.amount), 0)"
+    query = f"""
+        SELECT {pre_sum} as pre_total
+        FROM trn_accounting a
+        JOIN trn_voucher v ON v._voucher_id = a._voucher_id
+        WHERE a.ledger = ? AND v.date < ?
+    """
+    params = [ledger, before]
+    if company_name:
+        query += " AND a._company = ?"
+        params.append(company_name)
+    return query, tuple(params)
+
+
+def balances_before_query(company_name: str, before: str, paise: bool = False) -> Tuple[str, Tuple]:
+    """Movement (amount, debit, credit) of every ledger of a company before a date.
+
+    Last snapshot month before the date's month per ledger + the tail from
+    the first of the month, summed per ledger.
+    """
+    cumulative = "s.cumulative_paise / 100.0" if paise else "s.cumulative"
+    amount = "SUM(a.amount_paise) / 100.0" if paise else "SUM(a.amount)"
+    sums = _split_sums(paise)
+    month = before[:7]
+
+    query = f"""
+        SELECT ledger, SUM(amount) AS amount, SUM(debit) AS debit, SUM(credit) AS credit
+        FROM (
+            SELECT s.ledger, {cumulative} AS amount,
+                   s.cumulative_debit AS debit, s.cumulative_credit AS credit
+            FROM {LEDGER_SNAPSHOT_TABLE} s
+            JOIN (
+                SELECT ledger, MAX(month) AS month FROM {LEDGER_SNAPSHOT_TABLE}
+                WHERE _company = ? AND month < ?
+                GROUP BY ledger
+            ) last ON last.ledger = s.ledger AND last.month = s.month
+            WHERE s._company = ?
+
+            UNION ALL
+
+            SELECT a.ledger, {amount}, {sums['debit_sum']}, {sums['credit_sum']}
+            FROM trn_voucher v
+            JOIN trn_accounting a ON a._voucher_id = v._voucher_id
+            WHERE v._company = ? AND v.date >= ? AND v.date < ?
+            GROUP BY a.ledger
+        ) movement
+        GROUP BY ledger
+    """
+    return query, (company_name, month, company_name, company_name, f"{month}-01", before)
+
+
+def full_balances_before_query(company_name: str, before: str, paise: bool = False) -> Tuple[str, Tuple]:
+    """Movement of every ledger of a company before a date (no snapshots)"""
+    amount = "COALESCE(SUM(a.amount_paise), 0) / 100.0" if paise else "COALESCE(SUM(a.amount), 0)"
+    sums = _split_sums(paise)
+    query = f"""
+        SELECT a.ledger, {amount} AS amount, {sums['debit_sum']} AS debit, {sums['credit_sum']} AS credit
+        FROM trn_accounting a
+        JOIN trn_voucher v ON v._voucher_id = a._voucher_id
+        WHERE a._company = ? AND v.date < ?
+        GROUP BY a.ledger
+    """
+    return query, (company_name, before)
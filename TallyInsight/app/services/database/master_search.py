@@ -0,0 +1,193 @@
+"""
+Master Search Index
+===================
+Word-prefix search terms for ledgers and stock items, for type-ahead.
+
+`name LIKE '%term%'` scans every master of every company. The sync
+instead stores, per company, one row for every word start of each
+searchable field:
+
+    master_search(_company, kind 'ledger' | 'stock_item', name, parent,
+                  field   name / alias / gstin / mobile
+                  term    normalized text from that word to the end
+                  weight  ranking class, lower first)
+
+"Shree Ganesh Traders" gives the terms 'shree ganesh traders',
+'ganesh traders' and 'traders', so typing "gan" or "ganesh tr" is an
+index range scan on (_company, term):
+
+    term >= 'gan' AND term < 'gao'
+
+Text is normalized to lower-case words separated by single spaces, so
+punctuation and spacing do not matter ("A.K. Stores" matches "a k st").
+GSTIN and mobile numbers are stored whole (mobile as its digits, plus
+the last 10 digits without the country code); a query of digits and
+phone punctuation ("+91 98200-12345") is searched as its digits.
+
+Ranking: a match at the start of the name first, then a later word of
+the name, then the start of an alias / GSTIN / mobile, then a later word
+of an alias; an exact match ranks ahead of a prefix match of its class.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MASTER_SEARCH_TABLE = "master_search"
+
+# Longest stored term; longer queries are cut to match
+MAX_TERM_LENGTH = 64
+
+# kind -> (master table, {searchable text field: columns it is read from, first existing})
+# mst_ledger keeps the GSTIN in `gstn` (database-structure.sql); the inline
+# fallback schema of the adapters names it `gstin`.
+SEARCH_SOURCES = {
+    "ledger": ("mst_ledger", {"alias": ("alias",), "gstin": ("gstn", "gstin"), "mobile": ("mobile",)}),
+    "stock_item": ("mst_stock_item", {"alias": ("alias",)}),
+}
+
+# (field, first word) -> weight; identifiers are matched whole only
+WEIGHTS = {
+    ("name", True): 1,
+    ("name", False): 2,
+    ("alias", True): 3,
+    ("gstin", True): 3,
+    ("mobile", True): 3,
+    ("alias", False): 4,
+}
+
+MASTER_SEARCH_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {MASTER_SEARCH_TABLE} (
+        _company TEXT NOT NULL DEFAULT '',
+        kind TEXT NOT NULL DEFAULT '',
+        name TEXT NOT NULL DEFAULT '',
+        parent TEXT NOT NULL DEFAULT '',
+        field TEXT NOT NULL DEFAULT '',
+        term TEXT NOT NULL DEFAULT '',
+        weight INTEGER DEFAULT 0
+    )
+"""
+
+MASTER_SEARCH_INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS idx_master_search_term ON {MASTER_SEARCH_TABLE}(_company, term)",
+    f"CREATE INDEX IF NOT EXISTS idx_master_search_name ON {MASTER_SEARCH_TABLE}(_company, kind, name)",
+]
+
+_WORD = re.compile(r"\w+")
+
+# Digits with phone punctuation are searched as a number
+_PHONE = re.compile(r"^[\d\s+\-().]*\d[\d\s+\-().]*$")
+
+
+def normalize(text: Any) -> str:
+    """Lower-case words joined by single spaces ('' for empty text)"""
+    return " ".join(_WORD.findall(str(text or "").lower()))
+
+
+def _word_terms(text: str) -> Iterable[Tuple[str, bool]]:
+    """(term from each word to the end, is first word) of a normalized text"""
+    words = text.split(" ")
+    for i in range(len(words)):
+        yield " ".join(words[i:])[:MAX_TERM_LENGTH], i == 0
+
+
+def _field_terms(field: str, value: Any) -> Iterable[Tuple[str, bool]]:
+    if field == "gstin":
+        gstin = "".join(_WORD.findall(str(value or "").lower()))
+        return [(gstin, True)] if gstin else []
+    if field == "mobile":
+        digits = re.sub(r"\D", "", str(value or ""))
+        return [(number, True) for number in {digits, digits[-10:]} if number]
+    terms = []
+    for line in str(value or "").splitlines():
+        text = normalize(line)
+        if text:
+            terms.extend(_word_terms(text))
+    return terms
+
+
+def search_rows(kind: str, master: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Index rows of one master; each term once, at its best weight"""
+    fields = ("name",) + tuple(SEARCH_SOURCES[kind][1])
+    best: Dict[str, Tuple[int, str]] = {}
+    for field in fields:
+        for term, first in _field_terms(field, master.get(field)):
+            weight = WEIGHTS[(field, first)]
+            if term not in best or weight < best[term][0]:
+                best[term] = (weight, field)
+    return [
+        {"kind": kind, "name": master["name"], "parent": master.get("parent") or "",
+         "field": field, "term": term, "weight": weight}
+        for term, (weight, field) in best.items()
+    ]
+
+
+_ROW_COLUMNS = ("_company", "kind", "name", "parent", "field", "term", "weight")
+
+
+def refresh_statements(company_name: str = None,
+                       rows: List[Dict[str, Any]] = ()) -> List[Tuple[str, Any]]:
+    """DELETE + INSERT statements storing one company's terms (all if None);
+    rows: search_rows() output with `_company` added"""
+    if company_name:
+        statements = [(f"DELETE FROM {MASTER_SEARCH_TABLE} WHERE _company = ?", (company_name,))]
+    else:
+        statements = [(f"DELETE FROM {MASTER_SEARCH_TABLE}", ())]
+    if rows:
+        placeholders = ", ".join("?" for _ in _ROW_COLUMNS)
+        statements.append((
+            f"INSERT INTO {MASTER_SEARCH_TABLE} ({', '.join(_ROW_COLUMNS)}) VALUES ({placeholders})",
+            [tuple(row[column] for column in _ROW_COLUMNS) for row in rows]
+        ))
+    return statements
+
+
+def term_range(query: str) -> Optional[Tuple[str, str]]:
+    """(low, high) bounds of the terms starting with a query (None if it has no words)"""
+    if _PHONE.match(str(query or "")):
+        prefix = re.sub(r"\D", "", query)[:MAX_TERM_LENGTH]
+    else:
+        prefix = normalize(query)[:MAX_TERM_LENGTH]
+    if not prefix:
+        return None
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def source_columns(fields: Dict[str, Tuple[str, ...]], columns: Iterable[str]) -> str:
+    """SELECT list of a master table giving each search field under its own name"""
+    existing = set(columns)
+    selected = ["_company", "name", "parent"]
+    for field, candidates in fields.items():
+        column = next((name for name in candidates if name in existing), None)
+        selected.append(f"{column} AS {field}" if column else f"'' AS {field}")
+    return ", ".join(selected)
+
+
+def search_query(kinds: List[str]) -> str:
+    """Ranked matches of one company; params: (exact term, company, low, high, *kinds, limit)"""
+    placeholders = ", ".join("?" for _ in kinds)
+    return (
+        f"SELECT kind, name, parent, MIN(weight * 2 - CASE WHEN term = ? THEN 1 ELSE 0 END) AS score "
+        f"FROM {MASTER_SEARCH_TABLE} "
+        f"WHERE _company = ? AND term >= ? AND term < ? AND kind IN ({placeholders}) "
+        f"GROUP BY kind, name, parent "
+        f"ORDER BY score, name "
+        f"LIMIT ?"
+    )
+
+
+def like_query(kinds: List[str]) -> str:
+    """Name matches of one company before its index is built; params: (company, %q%, ...) per kind, limit"""
+    parts = [
+        f"SELECT '{kind}' AS kind, name, parent FROM {SEARCH_SOURCES[kind][0]} WHERE _company = ? AND name LIKE ?"
+        for kind in kinds
+    ]
+    return f"SELECT kind, name, parent FROM ({' UNION ALL '.join(parts)}) matches ORDER BY name LIMIT ?"
+
+
+def match_condition(kind: str, by_company: bool) -> str:
+    """WHERE condition: `name` is a master with a term in the range; params: (low, high[, company])"""
+    company = " AND _company = ?" if by_company else ""
+    return (
+        f"name IN (SELECT name FROM {MASTER_SEARCH_TABLE} "
+        f"WHERE kind = '{kind}' AND term >= ? AND term < ?{company})"
+    )
@@ -0,0 +1,439 @@
+"""
+MongoDB Query Layer
+===================
+Native query building for the MongoDB adapter.
+
+The report controllers are written against SQL. For MongoDB this module
+provides two things:
+
+1. A translator for the simple single-table statements used across the
+   app (SELECT with AND-ed comparisons, ORDER BY, LIMIT/OFFSET, COUNT /
+   SUM / MIN / MAX, DISTINCT, plus INSERT / UPDATE / DELETE). Every SELECT
+   becomes an aggregation pipeline, so filters, projections, sort, skip
+   and limit run on the server instead of loading whole collections.
+   Joins and GROUP BY are rejected with a clear error.
+
+2. Aggregation pipelines for the report shapes that need joins:
+   outstanding summary, ledger statement and voucher list. Controllers
+   use them when the adapter reports `supports_sql = False`.
+
+Pipelines only use stages supported by both mongod and mongomock
+($match, $lookup with localField/foreignField, $unwind, $group,
+$addFields, $project, $sort, $skip, $limit).
+
+USAGE:
+------
+select = translate_select("SELECT name FROM mst_ledger WHERE _company = ?", ("Demo",))
+docs = await db[select.collection].aggregate(select.pipeline).to_list(length=None)
+"""
+
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from ...utils.constants import ALL_TABLES, MASTER_TABLES
+
+# Collections keyed by guid (one document per Tally object). Derived
+# trn_* collections repeat the parent voucher guid on every row.
+UNIQUE_GUID_COLLECTIONS = set(MASTER_TABLES) | {"trn_voucher"}
+
+
+class MongoIndex(NamedTuple):
+    """Declared index on a collection"""
+    collection: str
+    keys: Tuple[str, ...]
+    unique: bool = False
+
+    @property
+    def name(self) -> str:
+        """Default MongoDB name for an ascending index on keys"""
+        return "_".join(f"{key}_1" for key in self.keys)
+
+
+MONGO_INDEXES: List[MongoIndex] = (
+    [MongoIndex(table, ("guid",), table in UNIQUE_GUID_COLLECTIONS) for table in ALL_TABLES]
+    + [MongoIndex(table, ("_company",)) for table in ALL_TABLES]
+    + [
+        MongoIndex("trn_accounting", ("ledger", "_company")),
+        MongoIndex("trn_bill", ("ledger", "name", "billtype")),
+        MongoIndex("trn_voucher", ("date", "_company", "voucher_type")),
+        MongoIndex("mst_ledger", ("name", "_company")),
+        MongoIndex("mst_ledger", ("parent", "_company")),
+        MongoIndex("mst_opening_bill_allocation", ("ledger", "_company")),
+    ]
+)
+
+
+# ==================== SQL TRANSLATION ====================
+
+class SelectQuery(NamedTuple):
+    """Translated SELECT"""
+    collection: str
+    pipeline: List[Dict[str, Any]]
+    empty_row: Optional[Dict[str, Any]]  # aggregate result when nothing matches
+
+
+class WriteStatement(NamedTuple):
+    """Translated INSERT / UPDATE / DELETE"""
+    operation: str
+    collection: str
+    filter: Dict[str, Any]
+    document: Dict[str, Any]
+
+
+_SELECT = re.compile(
+    r'^\s*SELECT\s+(?P<distinct>DISTINCT\s+)?(?P<columns>.+?)\s+FROM\s+(?P<table>\w+)'
+    r'(?:\s+(?:AS\s+)?(?!WHERE\b|ORDER\b|LIMIT\b)(?P<alias>\w+))?'
+    r'(?:\s+WHERE\s+(?P<where>.+?))?'
+    r'(?:\s+ORDER\s+BY\s+(?P<order>.+?))?'
+    r'(?:\s+LIMIT\s+(?P<limit>\d+)(?:\s+OFFSET\s+(?P<offset>\d+))?)?\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+_DELETE = re.compile(
+    r'^\s*DELETE\s+FROM\s+(?P<table>\w+)(?:\s+WHERE\s+(?P<where>.+?))?\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+_INSERT = re.compile(
+    r'^\s*INSERT\s+INTO\s+(?P<table>\w+)\s*\((?P<columns>[^)]*)\)\s*VALUES\s*\((?P<values>.*)\)\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+_UPDATE = re.compile(
+    r'^\s*UPDATE\s+(?P<table>\w+)\s+SET\s+(?P<assignments>.+?)(?:\s+WHERE\s+(?P<where>.+?))?\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+_CONDITION = re.compile(
+    r'^(?:\w+\.)?(?P<field>\w+)\s*(?:(?P<op>=|!=|<>|<=|>=|<|>)\s*(?P<value>.+)'
+    r'|(?P<not>NOT\s+)?IN\s*\((?P<values>.*)\))$',
+    re.IGNORECASE | re.DOTALL
+)
+_AGGREGATE = re.compile(r'^(?P<func>COUNT|SUM|MIN|MAX)\s*\(\s*(?:\w+\.)?(?P<field>\*|\w+)\s*\)$', re.IGNORECASE)
+_COLUMN = re.compile(r'^(?:\w+\.)?(?P<expr>\*|\w+|\w+\s*\([^)]*\))(?:\s+AS\s+(?P<alias>\w+))?$', re.IGNORECASE)
+_UNSUPPORTED = re.compile(r'\b(JOIN|GROUP\s+BY|HAVING|UNION|CASE|COALESCE)\b', re.IGNORECASE)
+
+_OPERATORS = {'!=': '$ne', '<>': '$ne', '<': '$lt', '<=': '$lte', '>': '$gt', '>=': '$gte'}
+_GROUP_OPERATORS = {'SUM': '$sum', 'MIN': '$min', 'MAX': '$max'}
+
+
+class _Params:
+    """Positional '?' parameter cursor"""
+
+    def __init__(self, params: Tuple):
+        self._params = list(params or ())
+        self._index = 0
+
+    def take(self, token: str) -> Any:
+        token = token.strip()
+        if token == '?':
+            value = self._params[self._index]
+            self._index += 1
+            return value
+        if len(token) >= 2 and token[0] == token[-1] and token[0] in "'\"":
+            return token[1:-1].replace("''", "'")
+        if token.upper() == 'NULL':
+            return None
+        try:
+            return int(token)
+        except ValueError:
+            pass
+        try:
+            return float(token)
+        except ValueError:
+            raise ValueError(f"Unsupported value for MongoDB: {token}")
+
+
+def _split(text: str, separator: str) -> List[str]:
+    """Split on a separator outside quotes and parentheses"""
+    parts, depth, quote, current = [], 0, None, []
+    pattern = re.compile(separator, re.IGNORECASE)
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth == 0:
+            match = pattern.match(text, i)
+            if match:
+                parts.append(''.join(current).strip())
+                current = []
+                i = match.end()
+                continue
+        current.append(char)
+        i += 1
+    parts.append(''.join(current).strip())
+    return [part for part in parts if part]
+
+
+def translate_where(where: Optional[str], params: _Params) -> Dict[str, Any]:
+    """Translate AND-ed comparisons into a MongoDB filter"""
+    if not where:
+        return {}
+    if re.search(r'\bOR\b', where, re.IGNORECASE):
+        raise ValueError("OR conditions are not supported for MongoDB")
+
+    mongo_filter: Dict[str, Any] = {}
+    for condition in _split(where, r'\s+AND\s+'):
+        match = _CONDITION.match(condition.strip())
+        if not match:
+            raise ValueError(f"Unsupported condition for MongoDB: {condition}")
+        field = match.group('field')
+        if match.group('values') is not None:
+            values = [params.take(token) for token in _split(match.group('values'), r',')]
+            clause = {'$nin' if match.group('not') else '$in': values}
+        elif match.group('op') == '=':
+            clause = params.take(match.group('value'))
+        else:
+            clause = {_OPERATORS[match.group('op')]: params.take(match.group('value'))}
+
+        if isinstance(clause, dict) and isinstance(mongo_filter.get(field), dict):
+            mongo_filter[field].update(clause)
+        else:
+            mongo_filter[field] = clause
+    return mongo_filter
+
+
+def translate_select(query: str, params: Tuple = ()) -> SelectQuery:
+    """Translate a single-table SELECT into an aggregation pipeline"""
+    if _UNSUPPORTED.search(query):
+        raise ValueError("Joins and grouped queries are not supported for MongoDB; use aggregate()")
+    match = _SELECT.match(query)
+    if not match:
+        raise ValueError(f"Unsupported query for MongoDB: {query[:100]}")
+
+    bound = _Params(params)
+    pipeline: List[Dict[str, Any]] = []
+    mongo_filter = translate_where(match.group('where'), bound)
+    if mongo_filter:
+        pipeline.append({'$match': mongo_filter})
+
+    columns = []
+    for column in _split(match.group('columns'), r','):
+        column_match = _COLUMN.match(column)
+        if not column_match:
+            raise ValueError(f"Unsupported column for MongoDB: {column}")
+        columns.append((column_match.group('alias') or column_match.group('expr'), column_match.group('expr')))
+
+    aggregates = [(name, _AGGREGATE.match(expr)) for name, expr in columns]
+    if any(agg for _, agg in aggregates):
+        if not all(agg for _, agg in aggregates):
+            raise ValueError("Mixing aggregates and columns requires GROUP BY, not supported for MongoDB")
+        group: Dict[str, Any] = {'_id': None}
+        empty_row: Dict[str, Any] = {}
+        for name, agg in aggregates:
+            func, field = agg.group('func').upper(), agg.group('field')
+            if func == 'COUNT':
+                group[name] = {'$sum': 1} if field == '*' else {
+                    '$sum': {'$cond': [{'$ifNull': [f'${field}', False]}, 1, 0]}
+                }
+                empty_row[name] = 0
+            else:
+                group[name] = {_GROUP_OPERATORS[func]: f'${field}'}
+                empty_row[name] = None
+        pipeline += [{'$group': group}, {'$project': {'_id': 0, **{name: 1 for name in empty_row}}}]
+        return SelectQuery(match.group('table'), pipeline, empty_row)
+
+    select_all = [expr for _, expr in columns] == ['*']
+    if match.group('distinct'):
+        if select_all:
+            raise ValueError("SELECT DISTINCT * is not supported for MongoDB")
+        pipeline += [
+            {'$group': {'_id': {name: f'${expr}' for name, expr in columns}}},
+            {'$replaceRoot': {'newRoot': '$_id'}},
+        ]
+        columns = [(name, name) for name, _ in columns]
+
+    if match.group('order'):
+        sort: Dict[str, int] = {}
+        for item in _split(match.group('order'), r','):
+            parts = item.split()
+            sort[parts[0].split('.')[-1]] = -1 if len(parts) > 1 and parts[1].upper() == 'DESC' else 1
+        pipeline.append({'$sort': sort})
+    if match.group('offset'):
+        pipeline.append({'$skip': int(match.group('offset'))})
+    if match.group('limit'):
+        pipeline.append({'$limit': int(match.group('limit'))})
+
+    project: Dict[str, Any] = {'_id': 0}
+    if not select_all:
+        project.update({name: 1 if name == expr else f'${expr}' for name, expr in columns})
+    pipeline.append({'$project': project})
+    return SelectQuery(match.group('table'), pipeline, None)
+
+
+def translate_write(query: str, params: Tuple = ()) -> WriteStatement:
+    """Translate INSERT / UPDATE / DELETE into a WriteStatement"""
+    bound = _Params(params)
+
+    match = _DELETE.match(query)
+    if match:
+        return WriteStatement('delete', match.group('table'),
+                              translate_where(match.group('where'), bound), {})
+
+    match = _INSERT.match(query)
+    if match:
+        columns = [col.strip().strip('`"') for col in match.group('columns').split(',')]
+        values = [bound.take(token) for token in _split(match.group('values'), r',')]
+        if len(columns) != len(values):
+            raise ValueError("INSERT column and value counts differ")
+        return WriteStatement('insert', match.group('table'), {}, dict(zip(columns, values)))
+
+    match = _UPDATE.match(query)
+    if match:
+        document = {}
+        for assignment in _split(match.group('assignments'), r','):
+            field, _, value = assignment.partition('=')
+            document[field.strip()] = bound.take(value)
+        return WriteStatement('update', match.group('table'),
+                              translate_where(match.group('where'), bound), document)
+
+    raise ValueError(f"Unsupported statement for MongoDB: {query[:100]}")
+
+
+# ==================== REPORT PIPELINES ====================
+
+def outstanding_pipeline(parent_group: str, company: Optional[str] = None) -> List[Dict[str, Any]]:
+    """mst_ledger pipeline: opening, debit, credit, closing per party ledger
+
+    Same figures as the ledger_balance_summary table used on SQL databases.
+    """
+    ledger_match: Dict[str, Any] = {'parent': parent_group}
+    if company:
+        ledger_match['_company'] = company
+
+    return [
+        {'$match': ledger_match},
+        {'$lookup': {'from': 'trn_accounting', 'localField': 'name',
+                     'foreignField': 'ledger', 'as': '_entries'}},
+        {'$addFields': {'_entries': {'$filter': {
+            'input': '$_entries', 'as': 'e', 'cond': {'$eq': ['$$e._company', '$_company']}
+        }}}},
+        {'$unwind': {'path': '$_entries', 'preserveNullAndEmptyArrays': True}},
+        {'$group': {
+            '_id': {'name': '$name', 'company': '$_company'},
+            'opening': {'$first': '$opening_balance'},
+            'debit': {'$sum': {'$cond': [{'$gt': ['$_entries.amount', 0]}, '$_entries.amount', 0]}},
+            'credit': {'$sum': {'$cond': [{'$lt': ['$_entries.amount', 0]}, {'$abs': '$_entries.amount'}, 0]}},
+            '_net': {'$sum': {'$ifNull': ['$_entries.amount', 0]}},
+        }},
+        {'$project': {
+            '_id': 0, 'ledger_name': '$_id.name', 'opening': 1, 'debit': 1, 'credit': 1,
+            'closing': {'$add': [{'$ifNull': ['$opening', 0]}, '$_net']},
+        }},
+        {'$sort': {'ledger_name': 1}},
+    ]
+
+
+def ledger_info_pipeline(ledger: str, company: Optional[str] = None) -> List[Dict[str, Any]]:
+    """mst_ledger pipeline: opening balance, parent and the parent group's is_deemedpositive"""
+    ledger_match: Dict[str, Any] = {'name': ledger}
+    if company:
+        ledger_match['_company'] = company
+    return [
+        {'$match': ledger_match},
+        {'$lookup': {'from': 'mst_group', 'localField': 'parent', 'foreignField': 'name', 'as': '_groups'}},
+        {'$addFields': {'_group': {'$arrayElemAt': [{'$filter': {
+            'input': '$_groups', 'as': 'g', 'cond': {'$eq': ['$$g._company', '$_company']}
+        }}, 0]}}},
+        {'$project': {
+            '_id': 0, 'opening_balance': 1, 'parent': 1,
+            'is_deemed_positive': {'$ifNull': ['$_group.is_deemedpositive', 0]},
+        }},
+    ]
+
+
+def _ledger_entries(ledger: str, company: Optional[str]) -> List[Dict[str, Any]]:
+    """trn_accounting rows of a ledger joined to their voucher header"""
+    entry_match: Dict[str, Any] = {'ledger': ledger}
+    if company:
+        entry_match['_company'] = company
+    return [
+        {'$match': entry_match},
+        {'$lookup': {'from': 'trn_voucher', 'localField': 'guid', 'foreignField': 'guid', 'as': '_voucher'}},
+        {'$unwind': '$_voucher'},
+    ]
+
+
+def _date_range(from_date: Optional[str] = None, to_date: Optional[str] = None,
+                before: Optional[str] = None) -> List[Dict[str, Any]]:
+    """$match on the joined voucher date"""
+    date_filter: Dict[str, Any] = {}
+    if from_date:
+        date_filter['$gte'] = from_date
+    if to_date:
+        date_filter['$lte'] = to_date
+    if before:
+        date_filter['$lt'] = before
+    return [{'$match': {'_voucher.date': date_filter}}] if date_filter else []
+
+
+def ledger_pre_total_pipeline(ledger: str, before_date: str,
+                              company: Optional[str] = None) -> List[Dict[str, Any]]:
+    """trn_accounting pipeline: sum of a ledger's amounts before a date"""
+    return _ledger_entries(ledger, company) + _date_range(before=before_date) + [
+        {'$group': {'_id': None, 'pre_total': {'$sum': '$amount'}}},
+        {'$project': {'_id': 0, 'pre_total': 1}},
+    ]
+
+
+def ledger_transactions_pipeline(ledger: str, is_deemed_positive: bool,
+                                 company: Optional[str] = None,
+                                 from_date: Optional[str] = None,
+                                 to_date: Optional[str] = None) -> List[Dict[str, Any]]:
+    """trn_accounting pipeline: ledger statement rows with debit/credit split"""
+    negative = {'$cond': [{'$lt': ['$amount', 0]}, {'$abs': '$amount'}, 0]}
+    positive = {'$cond': [{'$gt': ['$amount', 0]}, '$amount', 0]}
+    debit, credit = (negative, positive) if is_deemed_positive else (positive, negative)
+
+    return _ledger_entries(ledger, company) + _date_range(from_date, to_date) + [
+        {'$project': {
+            '_id': 0,
+            'date': '$_voucher.date',
+            'voucher_type': '$_voucher.voucher_type',
+            'voucher_no': '$_voucher.voucher_number',
+            'amount': 1,
+            'debit': debit,
+            'credit': credit,
+            'narration': '$_voucher.narration',
+            'particulars': '$_voucher.party_name',
+        }},
+        {'$sort': {'date': 1, 'voucher_no': 1}},
+    ]
+
+
+def voucher_filter(company: Optional[str] = None, voucher_type: Optional[str] = None,
+                   from_date: Optional[str] = None, to_date: Optional[str] = None) -> Dict[str, Any]:
+    """trn_voucher filter for the voucher list"""
+    mongo_filter: Dict[str, Any] = {}
+    if company:
+        mongo_filter['_company'] = company
+    if voucher_type:
+        mongo_filter['voucher_type'] = voucher_type
+    if from_date or to_date:
+        mongo_filter['date'] = {}
+        if from_date:
+            mongo_filter['date']['$gte'] = from_date
+        if to_date:
+            mongo_filter['date']['$lte'] = to_date
+    return mongo_filter
+
+
+def voucher_list_pipeline(mongo_filter: Dict[str, Any], limit: int, offset: int) -> List[Dict[str, Any]]:
+    """trn_voucher page with amount = first debit entry, newest first"""
+    pipeline: List[Dict[str, Any]] = [{'$match': mongo_filter}] if mongo_filter else []
+    return pipeline + [
+        {'$sort': {'date': -1}},
+        {'$skip': offset},
+        {'$limit': limit},
+        # Join after paging so only one page of vouchers is looked up
+        {'$lookup': {'from': 'trn_accounting', 'localField': 'guid', 'foreignField': 'guid', 'as': '_entries'}},
+        {'$addFields': {'_debit': {'$arrayElemAt': [
+            {'$filter': {'input': '$_entries', 'as': 'e', 'cond': {'$lt': ['$$e.amount', 0]}}}, 0
+        ]}}},
+        {'$addFields': {'amount': {'$abs': {'$ifNull': ['$_debit.amount', 0]}}}},
+        {'$project': {'_id': 0, '_entries': 0, '_debit': 0}},
+    ]
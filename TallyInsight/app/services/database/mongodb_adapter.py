@@ -19,14 +19,25 @@ Configuration (config.yaml):
     database:
       type: mongodb
       url: mongodb://localhost:27017/tallydb
+
+QUERIES:
+--------
+SQL passed to fetch_*/execute is translated by mongo_queries (single-table
+SELECT / INSERT / UPDATE / DELETE) and runs as aggregation pipelines, so
+filters, projections, sort, skip and limit execute on the server. Reports
+that need joins use the pipelines in mongo_queries through aggregate().
 """
 
+import re
 from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 from bson import ObjectId
 
 from .base import BaseDatabaseService
+from .mongo_queries import (
+    MONGO_INDEXES, UNIQUE_GUID_COLLECTIONS, translate_select, translate_write
+)
 from ...config import config
 from ...utils.logger import logger
 from ...utils.decorators import timed
@@ -36,6 +47,8 @@ from ...utils.constants import ALL_TABLES, MASTER_TABLES, TRANSACTION_TABLES
 class MongoDBDatabaseService(BaseDatabaseService):
     """MongoDB implementation of database service"""
     
+    supports_sql = False
+    
     def __init__(self):
         self._client: Optional[AsyncIOMotorClient] = None
         self._db = None
@@ -89,42 +102,41 @@ class MongoDBDatabaseService(BaseDatabaseService):
         return self._client is not None
     
     async def execute(self, query: str, params: Tuple = ()) -> int:
-        """Execute a query - MongoDB doesn't use SQL queries"""
-        # This method is for SQL compatibility
-        # For MongoDB, use collection methods directly
-        logger.warning("execute() called on MongoDB - use collection methods instead")
-        return 0
-    
-    async def fetch_all(self, query: str, params: Tuple = ()) -> List[Dict[str, Any]]:
-        """Fetch all documents - for SQL compatibility"""
-        # Parse simple SELECT queries for compatibility
-        # Format: SELECT * FROM collection_name WHERE field = value
-        if not self._db:
+        """Execute a SQL write statement translated to a MongoDB operation"""
+        if self._db is None:
             await self.connect()
         
-        # Simple parser for basic queries
-        query_lower = query.lower()
-        if 'from' in query_lower:
-            parts = query_lower.split('from')
-            if len(parts) > 1:
-                table_part = parts[1].strip().split()[0]
-                collection = self._db[table_part]
-                
-                filter_dict = {}
-                if 'where' in query_lower:
-                    # Very basic WHERE parsing
-                    where_part = query.split('WHERE')[1] if 'WHERE' in query else query.split('where')[1]
-                    if '=' in where_part:
-                        field, value = where_part.split('=')
-                        field = field.strip().replace('?', '').replace('"', '').replace("'", '')
-                        if params:
-                            filter_dict[field] = params[0]
-                
-                cursor = collection.find(filter_dict)
-                docs = await cursor.to_list(length=None)
-                return [self._convert_doc(doc) for doc in docs]
+        statement = query.strip().upper()
+        if statement.startswith(('CREATE', 'ALTER')):
+            # Collections and fields are created on first write
+            return 0
+        drop = re.match(r'^\s*DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?(\w+)', query, re.IGNORECASE)
+        if drop:
+            await self._db.drop_collection(drop.group(1))
+            return 0
         
-        return []
+        try:
+            write = translate_write(query, params)
+            collection = self._db[write.collection]
+            if write.operation == 'delete':
+                result = await collection.delete_many(write.filter)
+                return result.deleted_count
+            if write.operation == 'insert':
+                await collection.insert_one(write.document)
+                return 1
+            result = await collection.update_many(write.filter, {'$set': write.document})
+            return result.modified_count
+        except Exception as e:
+            logger.error(f"Query execution failed: {e}\nQuery: {query[:200]}...")
+            raise
+    
+    async def fetch_all(self, query: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        """Fetch rows for a SQL SELECT translated to an aggregation pipeline"""
+        select = translate_select(query, params)
+        rows = await self.aggregate(select.collection, select.pipeline)
+        if not rows and select.empty_row is not None:
+            return [dict(select.empty_row)]
+        return rows
     
     async def fetch_one(self, query: str, params: Tuple = ()) -> Optional[Dict[str, Any]]:
         """Fetch single document"""
@@ -138,6 +150,39 @@ class MongoDBDatabaseService(BaseDatabaseService):
             return list(result.values())[0]
         return None
     
+    async def aggregate(self, collection_name: str, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run an aggregation pipeline and return converted documents"""
+        if self._db is None:
+            await self.connect()
+        
+        cursor = self._db[collection_name].aggregate(pipeline)
+        docs = await cursor.to_list(length=None)
+        return [self._convert_doc(doc) for doc in docs]
+    
+    async def find(self, collection_name: str, filter_dict: Dict[str, Any] = None,
+                   projection: Dict[str, Any] = None, sort: List[Tuple[str, int]] = None,
+                   skip: int = 0, limit: int = 0) -> List[Dict[str, Any]]:
+        """Find documents with server-side projection, sort, skip and limit"""
+        if self._db is None:
+            await self.connect()
+        
+        cursor = self._db[collection_name].find(filter_dict or {}, projection or {'_id': 0})
+        if sort:
+            cursor = cursor.sort(sort)
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+        docs = await cursor.to_list(length=limit or None)
+        return [self._convert_doc(doc) for doc in docs]
+    
+    async def count(self, collection_name: str, filter_dict: Dict[str, Any] = None) -> int:
+        """Count documents matching a filter"""
+        if self._db is None:
+            await self.connect()
+        
+        return await self._db[collection_name].count_documents(filter_dict or {})
+    
     def _convert_doc(self, doc: Dict) -> Dict:
         """Convert MongoDB document to dict (handle ObjectId)"""
         if doc is None:
@@ -157,7 +202,7 @@ class MongoDBDatabaseService(BaseDatabaseService):
         if not rows:
             return 0
         
-        if not self._db:
+        if self._db is None:
             await self.connect()
         
         if company_name:
@@ -174,8 +219,8 @@ class MongoDBDatabaseService(BaseDatabaseService):
             for i in range(0, len(rows), batch_size):
                 batch = rows[i:i + batch_size]
                 
-                # Check if documents have guid for upsert
-                if batch and 'guid' in batch[0]:
+                # Upsert by guid only where guid identifies one document
+                if batch and 'guid' in batch[0] and table_name in UNIQUE_GUID_COLLECTIONS:
                     from pymongo import UpdateOne
                     operations = [
                         UpdateOne(
@@ -199,7 +244,7 @@ class MongoDBDatabaseService(BaseDatabaseService):
     
     async def truncate_table(self, table_name: str, company_name: str = None) -> None:
         """Delete all documents from a collection"""
-        if not self._db:
+        if self._db is None:
             await self.connect()
         
         collection = self._db[table_name]
@@ -219,7 +264,7 @@ class MongoDBDatabaseService(BaseDatabaseService):
     
     async def get_table_count(self, table_name: str, company_name: str = None) -> int:
         """Get document count for a collection"""
-        if not self._db:
+        if self._db is None:
             await self.connect()
         
         try:
@@ -241,7 +286,7 @@ class MongoDBDatabaseService(BaseDatabaseService):
     
     async def table_exists(self, table_name: str) -> bool:
         """Check if collection exists"""
-        if not self._db:
+        if self._db is None:
             await self.connect()
         
         collections = await self._db.list_collection_names()
@@ -249,7 +294,7 @@ class MongoDBDatabaseService(BaseDatabaseService):
     
     async def get_database_size(self) -> int:
         """Get database size in bytes"""
-        if not self._db:
+        if self._db is None:
             await self.connect()
         
         try:
@@ -265,36 +310,51 @@ class MongoDBDatabaseService(BaseDatabaseService):
     @timed
     async def create_tables(self, incremental: bool = None) -> None:
         """Create collections and indexes"""
-        if not self._db:
+        if self._db is None:
             await self.connect()
         
         try:
-            # Create indexes for master tables
-            for table in MASTER_TABLES:
-                collection = self._db[table]
-                await collection.create_index('guid', unique=True, sparse=True)
-                await collection.create_index('_company')
-                await collection.create_index('name')
-            
-            # Create indexes for transaction tables
-            for table in TRANSACTION_TABLES:
-                collection = self._db[table]
-                if table == 'trn_voucher':
-                    await collection.create_index('guid', unique=True, sparse=True)
-                else:
-                    await collection.create_index('guid')
-                await collection.create_index('_company')
-                await collection.create_index('date')
-            
+            await self.ensure_indexes()
             logger.info("MongoDB indexes created successfully")
             await self.ensure_audit_tables()
         except Exception as e:
             logger.error(f"Failed to create indexes: {e}")
             raise
     
+    async def ensure_indexes(self) -> int:
+        """Create the declared indexes (guid, _company, ledger, report paths)"""
+        if self._db is None:
+            await self.connect()
+        
+        created = 0
+        for index in MONGO_INDEXES:
+            try:
+                options = {'unique': True, 'sparse': True} if index.unique else {}
+                await self._db[index.collection].create_index(
+                    [(key, 1) for key in index.keys], name=index.name, **options
+                )
+                created += 1
+            except Exception as e:
+                logger.warning(f"Could not create index {index.collection}.{index.name}: {e}")
+        
+        logger.debug(f"Ensured {created} MongoDB indexes")
+        return created
+    
+    async def verify_indexes(self) -> List[str]:
+        """Return declared indexes missing from the database"""
+        if self._db is None:
+            await self.connect()
+        
+        missing = []
+        for index in MONGO_INDEXES:
+            existing = await self._db[index.collection].index_information()
+            if index.name not in existing:
+                missing.append(f"{index.collection}.{index.name}")
+        return missing
+    
     async def ensure_audit_tables(self) -> None:
         """Create audit collection with indexes"""
-        if not self._db:
+        if self._db is None:
             await self.connect()
         
         try:
@@ -308,7 +368,7 @@ class MongoDBDatabaseService(BaseDatabaseService):
     
     async def ensure_company_config_table(self) -> None:
         """Ensure company_config collection exists with indexes"""
-        if not self._db:
+        if self._db is None:
             await self.connect()
         
         try:
@@ -336,7 +396,7 @@ class MongoDBDatabaseService(BaseDatabaseService):
                                      last_alter_id_transaction: int = 0, sync_type: str = "full",
                                      books_from: str = "", books_to: str = "", **kwargs) -> None:
         """Update or insert company config document"""
-        if not self._db:
+        if self._db is None:
             await self.connect()
         
         collection = self._db['company_config']
@@ -385,7 +445,7 @@ class MongoDBDatabaseService(BaseDatabaseService):
     
     async def get_company_config(self, company_name: str) -> Optional[Dict[str, Any]]:
         """Get company config by name"""
-        if not self._db:
+        if self._db is None:
             await self.connect()
         
         collection = self._db['company_config']
@@ -394,7 +454,7 @@ class MongoDBDatabaseService(BaseDatabaseService):
     
     async def get_synced_companies(self) -> List[Dict[str, Any]]:
         """Get list of synced companies"""
-        if not self._db:
+        if self._db is None:
             await self.connect()
         
         try:
@@ -408,7 +468,7 @@ class MongoDBDatabaseService(BaseDatabaseService):
     
     async def delete_company_data(self, company_name: str) -> int:
         """Delete all data for a specific company"""
-        if not self._db:
+        if self._db is None:
             await self.connect()
         
         total_deleted = 0
@@ -425,10 +485,57 @@ class MongoDBDatabaseService(BaseDatabaseService):
         collection = self._db['company_config']
         result = await collection.delete_one({'company_name': company_name})
         total_deleted += result.deleted_count
+        await self.clear_table_stats(company_name)
         
         logger.info(f"Deleted company '{company_name}': {total_deleted} total documents")
         return total_deleted
     
+    async def get_table_stats(self, company_name: str = None) -> List[Dict[str, Any]]:
+        """Get stored statistics documents for a company ('' = all companies)"""
+        if self._db is None:
+            await self.connect()
+        
+        cursor = self._db['table_stats'].find(
+            {'company_name': company_name or ''}, {'_id': 0, 'company_name': 0}
+        ).sort('table_name', 1)
+        return await cursor.to_list(length=None)
+    
+    async def save_table_stats(self, company_name: str, stats: List[Dict[str, Any]]) -> None:
+        """Replace stored statistics documents for a company and update the all-company totals"""
+        if self._db is None:
+            await self.connect()
+        
+        collection = self._db['table_stats']
+        await collection.delete_many({'company_name': company_name or ''})
+        if stats:
+            await collection.insert_many([{**row, 'company_name': company_name or ''} for row in stats])
+        if company_name:
+            await self._store_table_totals()
+    
+    async def clear_table_stats(self, company_name: str = None) -> None:
+        """Drop stored statistics of a company; the all-company totals no longer include it"""
+        if self._db is None:
+            await self.connect()
+        
+        await self._db['table_stats'].delete_many({'company_name': company_name or ''})
+        if company_name:
+            await self._store_table_totals()
+    
+    async def _store_table_totals(self) -> None:
+        """Recompute the all-company documents ('') from the company documents"""
+        collection = self._db['table_stats']
+        totals = await collection.aggregate([
+            {'$match': {'company_name': {'$ne': ''}}},
+            {'$group': {'_id': '$table_name', 'row_count': {'$sum': '$row_count'},
+                        'bytes_estimate': {'$sum': '$bytes_estimate'},
+                        'last_sync_at': {'$max': '$last_sync_at'}, 'counted_at': {'$max': '$counted_at'}}},
+        ]).to_list(length=None)
+        await collection.delete_many({'company_name': ''})
+        if totals:
+            await collection.insert_many([
+                {'table_name': row.pop('_id'), 'company_name': '', **row} for row in totals
+            ])
+    
     def get_placeholder(self) -> str:
         """MongoDB doesn't use placeholders"""
         return ''
@@ -0,0 +1,167 @@
+"""
+Monthly Cube
+============
+Accounting entries pre-aggregated by company x month x voucher type x
+ledger, for dashboard trends and top-N charts.
+
+Monthly sales / purchase / receipt trends and top parties scanned
+trn_voucher and trn_accounting on every page load. The sync instead
+rebuilds, per company, one row per (month, voucher_type, ledger):
+
+    monthly_cube(_company, month 'YYYY-MM', voucher_type, ledger,
+                 ledger_group   the ledger's direct parent group
+                 voucher_count  vouchers with entries to the ledger
+                 primary_count  vouchers counted once, under their first
+                                ledger (by name) - sums to the number of
+                                vouchers across ledgers
+                 entry_count    accounting entries
+                 debit / credit Dr (negative amounts, as positive) / Cr totals
+                 amount         net amount)
+
+/api/data/cube rolls the rows up by any of the dimensions; a year of a
+large company is a few thousand rows per voucher type.
+
+Vouchers moved to archive files (fy_archive.py) stay in the cube: the
+archive run stores their cells in archive_monthly_cube and each rebuild
+adds them to the hot cells.
+"""
+
+from typing import List, Tuple
+
+MONTHLY_CUBE_TABLE = "monthly_cube"
+
+ARCHIVED_CUBE_TABLE = "archive_monthly_cube"
+
+# group_by dimension -> cube column
+CUBE_DIMENSIONS = {
+    "month": "c.month",
+    "voucher_type": "c.voucher_type",
+    "ledger": "c.ledger",
+    "ledger_group": "c.ledger_group",
+}
+
+# Additive measures; voucher counts are chosen per query (see primary_count)
+CUBE_MEASURES = ("entry_count", "debit", "credit", "amount")
+
+MONTHLY_CUBE_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {MONTHLY_CUBE_TABLE} (
+        _company TEXT NOT NULL DEFAULT '',
+        month TEXT NOT NULL,
+        voucher_type TEXT NOT NULL DEFAULT '',
+        ledger TEXT NOT NULL DEFAULT '',
+        ledger_group TEXT NOT NULL DEFAULT '',
+        voucher_count INTEGER DEFAULT 0,
+        primary_count INTEGER DEFAULT 0,
+        entry_count INTEGER DEFAULT 0,
+        debit REAL DEFAULT 0,
+        credit REAL DEFAULT 0,
+        amount REAL DEFAULT 0,
+        PRIMARY KEY (_company, month, voucher_type, ledger)
+    )
+"""
+
+# Cells of vouchers moved to archive files, per financial year (fy_archive.py);
+# added to monthly_cube at each rebuild
+ARCHIVED_CUBE_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {ARCHIVED_CUBE_TABLE} (
+        _company TEXT NOT NULL DEFAULT '',
+        fy_year INTEGER NOT NULL,
+        month TEXT NOT NULL,
+        voucher_type TEXT NOT NULL DEFAULT '',
+        ledger TEXT NOT NULL DEFAULT '',
+        ledger_group TEXT NOT NULL DEFAULT '',
+        voucher_count INTEGER DEFAULT 0,
+        primary_count INTEGER DEFAULT 0,
+        entry_count INTEGER DEFAULT 0,
+        debit REAL DEFAULT 0,
+        credit REAL DEFAULT 0,
+        amount REAL DEFAULT 0,
+        PRIMARY KEY (_company, fy_year, month, voucher_type, ledger)
+    )
+"""
+
+MONTHLY_CUBE_INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS idx_monthly_cube_type ON {MONTHLY_CUBE_TABLE}(_company, voucher_type, month)",
+    f"CREATE INDEX IF NOT EXISTS idx_monthly_cube_ledger ON {MONTHLY_CUBE_TABLE}(_company, ledger, month)",
+]
+
+_COLUMNS = ("_company, month, voucher_type, ledger, ledger_group, "
+            "voucher_count, primary_count, entry_count, debit, credit, amount")
+
+# One aggregation per cell; each voucher's first ledger carries its primary count.
+# {schema} qualifies the trn_* tables (archive files).
+_CUBE_SQL = """
+    SELECT
+        a._company AS _company, SUBSTR(v.date, 1, 7) AS month, COALESCE(v.voucher_type, '') AS voucher_type,
+        a.ledger AS ledger, COALESCE(MAX(l.parent), '') AS ledger_group,
+        COUNT(DISTINCT a._voucher_id) AS voucher_count,
+        COUNT(DISTINCT CASE WHEN a.ledger = f.first_ledger THEN a._voucher_id END) AS primary_count,
+        COUNT(*) AS entry_count,
+        {debit_sum} AS debit, {credit_sum} AS credit, {amount_sum} AS amount
+    FROM {schema}trn_accounting a
+    JOIN {schema}trn_voucher v ON v._voucher_id = a._voucher_id
+    JOIN (
+        SELECT _voucher_id, MIN(ledger) AS first_ledger
+        FROM {schema}trn_accounting
+        WHERE _voucher_id IS NOT NULL{first_filter}
+        GROUP BY _voucher_id
+    ) f ON f._voucher_id = a._voucher_id
+    LEFT JOIN mst_ledger l ON l._company = a._company AND l.name = a.ledger
+    WHERE v.date IS NOT NULL{company_filter}
+    GROUP BY a._company, SUBSTR(v.date, 1, 7), v.voucher_type, a.ledger
+"""
+
+
+def _cube_sql(schema: str, by_company: bool, paise: bool) -> str:
+    if paise:
+        sums = dict(debit_sum="COALESCE(SUM(a.debit_paise), 0) / 100.0",
+                    credit_sum="COALESCE(SUM(a.credit_paise), 0) / 100.0",
+                    amount_sum="COALESCE(SUM(a.amount_paise), 0) / 100.0")
+    else:
+        sums = dict(debit_sum="COALESCE(SUM(CASE WHEN a.amount < 0 THEN -a.amount ELSE 0 END), 0)",
+                    credit_sum="COALESCE(SUM(CASE WHEN a.amount > 0 THEN a.amount ELSE 0 END), 0)",
+                    amount_sum="COALESCE(SUM(a.amount), 0)")
+    if by_company:
+        return _CUBE_SQL.format(schema=schema, first_filter=" AND _company = ?",
+                                company_filter=" AND a._company = ?", **sums)
+    return _CUBE_SQL.format(schema=schema, first_filter="", company_filter="", **sums)
+
+
+def refresh_statements(company_name: str = None, paise: bool = False,
+                       archived: bool = False) -> List[Tuple[str, Tuple]]:
+    """DELETE + INSERT statements rebuilding one company's cube rows (all if None).
+    
+    With `archived`, the cells of archived vouchers are added in (SQLite only).
+    """
+    company_filter = " WHERE _company = ?" if company_name else ""
+    params = (company_name,) if company_name else ()
+    statements = [
+        (f"DELETE FROM {MONTHLY_CUBE_TABLE}{company_filter}", params),
+        (f"INSERT INTO {MONTHLY_CUBE_TABLE} ({_COLUMNS}) {_cube_sql('', bool(company_name), paise)}", params * 2),
+    ]
+    if archived:
+        # Vouchers are either hot or archived, so every measure adds up
+        statements.append((
+            f"INSERT INTO {MONTHLY_CUBE_TABLE} ({_COLUMNS}) "
+            f"SELECT {_COLUMNS} FROM {ARCHIVED_CUBE_TABLE}{company_filter or ' WHERE 1'} "
+            f"ON CONFLICT (_company, month, voucher_type, ledger) DO UPDATE SET "
+            f"voucher_count = voucher_count + excluded.voucher_count, "
+            f"primary_count = primary_count + excluded.primary_count, "
+            f"entry_count = entry_count + excluded.entry_count, "
+            f"debit = debit + excluded.debit, credit = credit + excluded.credit, "
+            f"amount = amount + excluded.amount",
+            params
+        ))
+    return statements
+
+
+def archive_statements(schema: str, company_name: str, year: int,
+                       paise: bool = False) -> List[Tuple[str, Tuple]]:
+    """Statements storing the cells of a company's vouchers archived for a year
+    (`schema`: the attached archive file, e.g. 'archive.')"""
+    return [
+        (f"DELETE FROM {ARCHIVED_CUBE_TABLE} WHERE _company = ? AND fy_year = ?", (company_name, year)),
+        (f"INSERT INTO {ARCHIVED_CUBE_TABLE} (fy_year, {_COLUMNS}) "
+         f"SELECT ?, {_COLUMNS} FROM ({_cube_sql(schema, True, paise)}) archived",
+         (year, company_name, company_name)),
+    ]
@@ -14,13 +14,27 @@ Configuration (config.yaml):
       database: tallydb
       username: root
       password: password
+      bulk_load_method: load_data   # insert (default) | load_data
+
+BULK LOADING:
+-------------
+- insert:    multi-row INSERT ... ON DUPLICATE KEY UPDATE statements,
+             each sized to just under the server's max_allowed_packet
+- load_data: rows are written to a temp TSV file and loaded with
+             LOAD DATA LOCAL INFILE ... REPLACE (full syncs; the server
+             must allow local_infile)
 """
 
+import os
+import tempfile
 import aiomysql
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from .base import BaseDatabaseService
+from .schema_catalog import SchemaCatalog
+from .index_spec import applicable_indexes
+from .surrogate_keys import KEY_DICTIONARY_TABLE, KEYED_TABLES, id_columns
 from ...config import config
 from ...utils.logger import logger
 from ...utils.decorators import timed
@@ -39,6 +53,9 @@ class MySQLDatabaseService(BaseDatabaseService):
         self.database = getattr(db_config, 'database', 'tallydb')
         self.username = getattr(db_config, 'username', 'root')
         self.password = getattr(db_config, 'password', '')
+        self.bulk_load_method = getattr(db_config, 'bulk_load_method', 'insert')
+        self._catalog = SchemaCatalog()
+        self._max_packet: Optional[int] = None
     
     async def connect(self) -> None:
         """Open database connection pool"""
@@ -53,7 +70,8 @@ class MySQLDatabaseService(BaseDatabaseService):
                     minsize=2,
                     maxsize=10,
                     charset='utf8mb4',
-                    autocommit=True
+                    autocommit=True,
+                    local_infile=self.bulk_load_method == 'load_data'
                 )
                 logger.info(f"Connected to MySQL: {self.host}/{self.database}")
             except Exception as e:
@@ -69,6 +87,7 @@ class MySQLDatabaseService(BaseDatabaseService):
             except:
                 pass
             self._pool = None
+            self._max_packet = None
             logger.info("MySQL connection closed")
     
     async def is_connected(self) -> bool:
@@ -87,11 +106,51 @@ class MySQLDatabaseService(BaseDatabaseService):
             async with self._pool.acquire() as conn:
                 async with conn.cursor() as cursor:
                     await cursor.execute(query, params)
+                    if SchemaCatalog.is_ddl(query):
+                        self._catalog.invalidate()
                     return cursor.rowcount
         except Exception as e:
             logger.error(f"Query execution failed: {e}\nQuery: {query[:200]}...")
             raise
     
+    async def execute_insert(self, query: str, params: Tuple = ()) -> int:
+        """Execute an INSERT and return the new AUTO_INCREMENT id"""
+        if not self._pool:
+            await self.connect()
+        
+        query = query.replace('?', '%s')
+        try:
+            async with self._pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(query, params)
+                    return cursor.lastrowid or 0
+        except Exception as e:
+            logger.error(f"Insert failed: {e}\nQuery: {query[:200]}...")
+            raise
+    
+    async def execute_transaction(self, statements: List[Tuple[str, Any]]) -> None:
+        """Run write statements in one transaction on one pooled connection"""
+        if not self._pool:
+            await self.connect()
+        
+        query = ""
+        async with self._pool.acquire() as conn:
+            # The pool autocommits; BEGIN holds the commit until all statements ran
+            await conn.begin()
+            try:
+                async with conn.cursor() as cursor:
+                    for query, params in statements:
+                        query = query.replace('?', '%s')
+                        if isinstance(params, list):
+                            await cursor.executemany(query, params)
+                        else:
+                            await cursor.execute(query, params)
+                await conn.commit()
+            except Exception as e:
+                await conn.rollback()
+                logger.error(f"Transaction failed: {e}\nQuery: {query[:200]}...")
+                raise
+    
     async def fetch_all(self, query: str, params: Tuple = ()) -> List[Dict[str, Any]]:
         """Fetch all rows from query"""
         if not self._pool:
@@ -109,6 +168,23 @@ class MySQLDatabaseService(BaseDatabaseService):
             logger.error(f"Fetch failed: {e}")
             raise
     
+    async def fetch_chunks(self, query: str, params: Tuple = (),
+                           chunk_size: int = 5000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield rows in chunks from an unbuffered (server-side) cursor"""
+        if not self._pool:
+            await self.connect()
+        
+        query = query.replace('?', '%s')
+        
+        async with self._pool.acquire() as conn:
+            async with conn.cursor(aiomysql.SSDictCursor) as cursor:
+                await cursor.execute(query, params)
+                while True:
+                    rows = await cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield list(rows)
+    
     async def fetch_one(self, query: str, params: Tuple = ()) -> Optional[Dict[str, Any]]:
         """Fetch single row from query"""
         if not self._pool:
@@ -160,28 +236,13 @@ class MySQLDatabaseService(BaseDatabaseService):
         columns = list(rows[0].keys())
         await self._ensure_columns_exist(table_name, columns)
         
-        column_names = ', '.join([f'`{col}`' for col in columns])
-        placeholders = ', '.join(['%s' for _ in columns])
-        
-        # Use INSERT ... ON DUPLICATE KEY UPDATE for upsert
-        has_guid = 'guid' in columns
-        if has_guid:
-            update_clause = ', '.join([f'`{col}` = VALUES(`{col}`)' for col in columns if col != 'guid'])
-            query = f"INSERT INTO `{table_name}` ({column_names}) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE {update_clause}"
-        else:
-            query = f"INSERT INTO `{table_name}` ({column_names}) VALUES ({placeholders})"
-        
         try:
             async with self._pool.acquire() as conn:
                 async with conn.cursor() as cursor:
-                    total_inserted = 0
-                    batch_size = config.sync.batch_size
-                    
-                    for i in range(0, len(rows), batch_size):
-                        batch = rows[i:i + batch_size]
-                        records = [tuple(row.get(col) for col in columns) for row in batch]
-                        await cursor.executemany(query, records)
-                        total_inserted += len(batch)
+                    if self.bulk_load_method == 'load_data':
+                        total_inserted = await self._load_data_insert(cursor, table_name, columns, rows)
+                    else:
+                        total_inserted = await self._multi_row_insert(conn, cursor, table_name, columns, rows)
                     
                     logger.debug(f"Inserted {total_inserted} rows into {table_name}")
                     return total_inserted
@@ -189,6 +250,83 @@ class MySQLDatabaseService(BaseDatabaseService):
             logger.error(f"Bulk insert failed for {table_name}: {e}")
             raise
     
+    async def _multi_row_insert(self, conn: aiomysql.Connection, cursor: aiomysql.Cursor,
+                                table_name: str, columns: List[str],
+                                rows: List[Dict[str, Any]]) -> int:
+        """Upsert rows with multi-row INSERT statements sized to max_allowed_packet"""
+        column_names = ', '.join([f'`{col}`' for col in columns])
+        prefix = f"INSERT INTO `{table_name}` ({column_names}) VALUES "
+        
+        # Use INSERT ... ON DUPLICATE KEY UPDATE for upsert
+        suffix = ''
+        update_clause = ', '.join([f'`{col}` = VALUES(`{col}`)' for col in columns if col != 'guid'])
+        if 'guid' in columns and update_clause:
+            suffix = f" ON DUPLICATE KEY UPDATE {update_clause}"
+        
+        # Leave headroom for the packet header and protocol overhead
+        max_packet = await self._get_max_packet(cursor)
+        budget = max_packet - len(prefix.encode('utf-8')) - len(suffix.encode('utf-8')) - 1024
+        
+        total_inserted = 0
+        values: List[str] = []
+        size = 0
+        for row in rows:
+            literal = '(' + ', '.join(conn.escape(row.get(col)) for col in columns) + ')'
+            literal_size = len(literal.encode('utf-8')) + 1
+            if values and size + literal_size > budget:
+                await cursor.execute(prefix + ','.join(values) + suffix)
+                total_inserted += len(values)
+                values, size = [], 0
+            values.append(literal)
+            size += literal_size
+        
+        if values:
+            await cursor.execute(prefix + ','.join(values) + suffix)
+            total_inserted += len(values)
+        return total_inserted
+    
+    async def _load_data_insert(self, cursor: aiomysql.Cursor, table_name: str,
+                                columns: List[str], rows: List[Dict[str, Any]]) -> int:
+        """Load rows through a temp TSV file with LOAD DATA LOCAL INFILE"""
+        column_names = ', '.join([f'`{col}`' for col in columns])
+        
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='\n',
+                                         suffix='.tsv', delete=False) as tsv:
+            for row in rows:
+                tsv.write('\t'.join(self._tsv_value(row.get(col)) for col in columns) + '\n')
+            path = tsv.name
+        
+        try:
+            # REPLACE gives the same last-row-wins result as ON DUPLICATE KEY UPDATE
+            await cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE `{table_name}` "
+                f"CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+                f"LINES TERMINATED BY '\\n' ({column_names})",
+                (path,)
+            )
+            return len(rows)
+        finally:
+            os.remove(path)
+    
+    @staticmethod
+    def _tsv_value(value: Any) -> str:
+        """Format a value for LOAD DATA (backslash escapes, \\N for NULL)"""
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return '1' if value else '0'
+        return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+    
+    async def _get_max_packet(self, cursor: aiomysql.Cursor) -> int:
+        """Server max_allowed_packet, read once per connection pool"""
+        if self._max_packet is None:
+            await cursor.execute("SELECT @@max_allowed_packet")
+            row = await cursor.fetchone()
+            self._max_packet = int(row[0]) if row else 4 * 1024 * 1024
+        return self._max_packet
+    
     async def truncate_table(self, table_name: str, company_name: str = None) -> None:
         """Delete all rows from a table"""
         if company_name:
@@ -233,13 +371,22 @@ class MySQLDatabaseService(BaseDatabaseService):
             counts[table] = await self.get_table_count(table, company_name)
         return counts
     
+    async def _estimate_table_bytes(self, table_name: str, row_count: int,
+                                    company_name: str = None) -> int:
+        """Data plus index length from information_schema, scaled to the company's rows"""
+        if not row_count:
+            return 0
+        table_bytes = await self.fetch_scalar(
+            "SELECT data_length + index_length FROM information_schema.tables "
+            "WHERE table_schema = ? AND table_name = ?",
+            (self.database, table_name)
+        ) or 0
+        return await self._company_share(table_name, int(table_bytes), row_count, company_name)
+    
     async def table_exists(self, table_name: str) -> bool:
         """Check if table exists"""
-        result = await self.fetch_scalar(
-            "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = ? AND table_name = ?",
-            (self.database, table_name)
-        )
-        return result > 0
+        catalog = await self._get_catalog()
+        return catalog.table_exists(table_name)
     
     async def get_database_size(self) -> int:
         """Get database size in bytes"""
@@ -257,29 +404,37 @@ class MySQLDatabaseService(BaseDatabaseService):
         """Create all required tables"""
         await self.create_tables()
     
+    async def _get_catalog(self) -> SchemaCatalog:
+        """Get schema catalog, loading it with a single query if needed"""
+        if not self._catalog.is_loaded:
+            rows = await self.fetch_all(
+                """SELECT table_name AS table_name, column_name AS column_name
+                   FROM information_schema.columns WHERE table_schema = ?""",
+                (self.database,)
+            )
+            self._catalog.load((row['table_name'], row['column_name']) for row in rows)
+        return self._catalog
+    
     async def _has_column(self, table_name: str, column_name: str) -> bool:
         """Check if column exists in table"""
-        result = await self.fetch_scalar(
-            """SELECT COUNT(*) FROM information_schema.columns 
-               WHERE table_schema = ? AND table_name = ? AND column_name = ?""",
-            (self.database, table_name, column_name)
-        )
-        return result > 0
+        catalog = await self._get_catalog()
+        return catalog.has_column(table_name, column_name)
     
     async def _ensure_columns_exist(self, table_name: str, columns: List[str]) -> None:
         """Auto-add missing columns to table"""
-        if not self._pool:
-            await self.connect()
+        catalog = await self._get_catalog()
         
-        for col in columns:
-            if not await self._has_column(table_name, col):
-                try:
-                    await self.execute(
-                        f"ALTER TABLE `{table_name}` ADD COLUMN `{col}` TEXT DEFAULT ''"
-                    )
-                    logger.debug(f"Added column '{col}' to table '{table_name}'")
-                except Exception as e:
-                    logger.warning(f"Could not add column {col}: {e}")
+        for col in catalog.missing_columns(table_name, columns):
+            try:
+                async with self._pool.acquire() as conn:
+                    async with conn.cursor() as cursor:
+                        await cursor.execute(
+                            f"ALTER TABLE `{table_name}` ADD COLUMN `{col}` TEXT DEFAULT ''"
+                        )
+                catalog.add_columns(table_name, [col])
+                logger.debug(f"Added column '{col}' to table '{table_name}'")
+            except Exception as e:
+                logger.warning(f"Could not add column {col}: {e}")
     
     @timed
     async def create_tables(self, incremental: bool = None) -> None:
@@ -300,9 +455,12 @@ class MySQLDatabaseService(BaseDatabaseService):
                             except Exception as e:
                                 logger.debug(f"Statement skipped: {e}")
             
+            self._catalog.invalidate()
             logger.info("Database tables created successfully")
             await self._ensure_company_column_exists()
+            await self.ensure_surrogate_key_schema()
             await self.ensure_audit_tables()
+            await self.ensure_indexes()
         except Exception as e:
             logger.error(f"Failed to create tables: {e}")
             raise
@@ -318,6 +476,80 @@ class MySQLDatabaseService(BaseDatabaseService):
                 except:
                     pass
     
+    async def ensure_surrogate_key_schema(self) -> None:
+        """Create key_dictionary and the integer id columns"""
+        async with self._pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS `{KEY_DICTIONARY_TABLE}` (
+                        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                        kind VARCHAR(16) NOT NULL,
+                        company_name VARCHAR(256) NOT NULL DEFAULT '',
+                        key_value TEXT NOT NULL
+                    )
+                """)
+        self._catalog.invalidate()
+        
+        for table in KEYED_TABLES:
+            if not await self.table_exists(table):
+                continue
+            for column in id_columns(table):
+                if not await self._has_column(table, column):
+                    await self.execute(f"ALTER TABLE `{table}` ADD COLUMN `{column}` BIGINT")
+    
+    async def _get_existing_indexes(self) -> set:
+        """Get names of indexes in the current schema"""
+        rows = await self.fetch_all(
+            """SELECT DISTINCT index_name AS index_name FROM information_schema.statistics
+               WHERE table_schema = ?""",
+            (self.database,)
+        )
+        return {row['index_name'] for row in rows}
+    
+    async def _get_text_columns(self, table_name: str) -> set:
+        """Get names of TEXT/BLOB columns in a table"""
+        rows = await self.fetch_all(
+            """SELECT column_name AS column_name FROM information_schema.columns
+               WHERE table_schema = ? AND table_name = ?
+               AND data_type IN ('tinytext', 'text', 'mediumtext', 'longtext')""",
+            (self.database, table_name)
+        )
+        return {row['column_name'] for row in rows}
+    
+    async def ensure_indexes(self) -> int:
+        """Create secondary indexes from the index specification"""
+        catalog = await self._get_catalog()
+        existing = await self._get_existing_indexes()
+        created = 0
+        
+        for spec in applicable_indexes(catalog):
+            if spec.name in existing:
+                continue
+            # Auto-added columns are TEXT, which MySQL can only index by prefix
+            text_columns = await self._get_text_columns(spec.table)
+            column_list = ', '.join(
+                f"`{col}`(191)" if col in text_columns else f"`{col}`"
+                for col in spec.columns
+            )
+            try:
+                async with self._pool.acquire() as conn:
+                    async with conn.cursor() as cursor:
+                        await cursor.execute(
+                            f"CREATE INDEX `{spec.name}` ON `{spec.table}` ({column_list})"
+                        )
+                created += 1
+            except Exception as e:
+                logger.warning(f"Could not create index {spec.name}: {e}")
+        
+        logger.debug(f"Created {created} secondary indexes")
+        return created
+    
+    async def verify_indexes(self) -> List[str]:
+        """Return names of specified indexes missing from the database"""
+        catalog = await self._get_catalog()
+        existing = await self._get_existing_indexes()
+        return [spec.name for spec in applicable_indexes(catalog) if spec.name not in existing]
+    
     async def ensure_audit_tables(self) -> None:
         """Create audit trail tables"""
         audit_sql = """
@@ -376,6 +608,17 @@ class MySQLDatabaseService(BaseDatabaseService):
                     guid VARCHAR(100) PRIMARY KEY
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
             """)
+            await self.execute("""
+                CREATE TABLE IF NOT EXISTS table_stats (
+                    table_name VARCHAR(100) NOT NULL,
+                    company_name VARCHAR(256) NOT NULL DEFAULT '',
+                    row_count BIGINT DEFAULT 0,
+                    bytes_estimate BIGINT DEFAULT 0,
+                    last_sync_at VARCHAR(40),
+                    counted_at VARCHAR(40),
+                    PRIMARY KEY (table_name, company_name)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """)
         except Exception as e:
             logger.warning(f"Could not ensure company_config table: {e}")
     
@@ -384,20 +627,16 @@ class MySQLDatabaseService(BaseDatabaseService):
         if not self._pool:
             await self.connect()
         
+        catalog = await self._get_catalog()
         added_count = 0
         for table in ALL_TABLES:
             try:
-                async with self._pool.acquire() as conn:
-                    async with conn.cursor() as cur:
-                        # Check if column exists
-                        await cur.execute(f"""
-                            SELECT COUNT(*) FROM information_schema.columns 
-                            WHERE table_schema = DATABASE() AND table_name = '{table}' AND column_name = 'alterid'
-                        """)
-                        result = await cur.fetchone()
-                        if result[0] == 0:
+                if catalog.table_exists(table) and not catalog.has_column(table, 'alterid'):
+                    async with self._pool.acquire() as conn:
+                        async with conn.cursor() as cur:
                             await cur.execute(f"ALTER TABLE `{table}` ADD COLUMN alterid INT DEFAULT 0")
-                            added_count += 1
+                    catalog.add_columns(table, ['alterid'])
+                    added_count += 1
             except Exception as e:
                 logger.debug(f"Could not add alterid to {table}: {e}")
         
@@ -496,6 +735,9 @@ class MySQLDatabaseService(BaseDatabaseService):
             (company_name,)
         )
         total_deleted += 1
+        await self.clear_table_stats(company_name)
+        await self.clear_surrogate_keys(company_name)
+        await self.clear_derived_tables(company_name)
         
         logger.info(f"Deleted company '{company_name}': {total_deleted} total rows")
         return total_deleted
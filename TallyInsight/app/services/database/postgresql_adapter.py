@@ -14,13 +14,24 @@ Configuration (config.yaml):
       database: tallydb
       username: postgres
       password: password
+      bulk_load_method: copy    # insert (default) | copy
+
+BULK LOADING:
+-------------
+- insert: executemany with a per-row INSERT ... ON CONFLICT upsert
+- copy:   COPY batches into a temp staging table (copy_records_to_table),
+          then merge with a single INSERT ... SELECT ... ON CONFLICT.
+          Much faster for large trn_* loads.
 """
 
 import asyncpg
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from .base import BaseDatabaseService
+from .schema_catalog import SchemaCatalog
+from .index_spec import applicable_indexes
+from .surrogate_keys import KEY_DICTIONARY_TABLE, KEYED_TABLES, id_columns
 from ...config import config
 from ...utils.logger import logger
 from ...utils.decorators import timed
@@ -40,6 +51,8 @@ class PostgreSQLDatabaseService(BaseDatabaseService):
         self.username = getattr(db_config, 'username', 'postgres')
         self.password = getattr(db_config, 'password', '')
         self.url = getattr(db_config, 'url', None)
+        self.bulk_load_method = getattr(db_config, 'bulk_load_method', 'insert')
+        self._catalog = SchemaCatalog()
     
     async def connect(self) -> None:
         """Open database connection pool"""
@@ -87,6 +100,8 @@ class PostgreSQLDatabaseService(BaseDatabaseService):
         try:
             async with self._pool.acquire() as conn:
                 result = await conn.execute(query, *params)
+                if SchemaCatalog.is_ddl(query):
+                    self._catalog.invalidate()
                 # Parse "DELETE 5" or "UPDATE 3" to get count
                 if result:
                     parts = result.split()
@@ -97,6 +112,38 @@ class PostgreSQLDatabaseService(BaseDatabaseService):
             logger.error(f"Query execution failed: {e}\nQuery: {query[:200]}...")
             raise
     
+    async def execute_insert(self, query: str, params: Tuple = ()) -> int:
+        """Execute an INSERT and return the new row's id (RETURNING id)"""
+        if not self._pool:
+            await self.connect()
+        
+        query = self._convert_placeholders(f"{query.strip()} RETURNING id")
+        try:
+            async with self._pool.acquire() as conn:
+                return await conn.fetchval(query, *params) or 0
+        except Exception as e:
+            logger.error(f"Insert failed: {e}\nQuery: {query[:200]}...")
+            raise
+    
+    async def execute_transaction(self, statements: List[Tuple[str, Any]]) -> None:
+        """Run write statements in one transaction on one pooled connection"""
+        if not self._pool:
+            await self.connect()
+        
+        query = ""
+        try:
+            async with self._pool.acquire() as conn:
+                async with conn.transaction():
+                    for query, params in statements:
+                        query = self._convert_placeholders(query)
+                        if isinstance(params, list):
+                            await conn.executemany(query, params)
+                        else:
+                            await conn.execute(query, *params)
+        except Exception as e:
+            logger.error(f"Transaction failed: {e}\nQuery: {query[:200]}...")
+            raise
+    
     async def fetch_all(self, query: str, params: Tuple = ()) -> List[Dict[str, Any]]:
         """Fetch all rows from query"""
         if not self._pool:
@@ -112,6 +159,24 @@ class PostgreSQLDatabaseService(BaseDatabaseService):
             logger.error(f"Fetch failed: {e}")
             raise
     
+    async def fetch_chunks(self, query: str, params: Tuple = (),
+                           chunk_size: int = 5000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield rows in chunks from a server-side cursor"""
+        if not self._pool:
+            await self.connect()
+        
+        query = self._convert_placeholders(query)
+        
+        async with self._pool.acquire() as conn:
+            # asyncpg cursors only live inside a transaction
+            async with conn.transaction():
+                cursor = await conn.cursor(query, *params)
+                while True:
+                    rows = await cursor.fetch(chunk_size)
+                    if not rows:
+                        break
+                    yield [dict(row) for row in rows]
+    
     async def fetch_one(self, query: str, params: Tuple = ()) -> Optional[Dict[str, Any]]:
         """Fetch single row from query"""
         if not self._pool:
@@ -172,22 +237,25 @@ class PostgreSQLDatabaseService(BaseDatabaseService):
         columns = list(rows[0].keys())
         await self._ensure_columns_exist(table_name, columns)
         
+        if self.bulk_load_method == 'copy':
+            return await self._copy_insert(table_name, columns, rows)
+        
         # Build INSERT with ON CONFLICT for upsert
         column_names = ', '.join([f'"{col}"' for col in columns])
         placeholders = ', '.join([f'${i+1}' for i in range(len(columns))])
         
-        # Check if table has guid as primary key
-        has_guid = 'guid' in columns
-        if has_guid:
-            query = f'''
-                INSERT INTO "{table_name}" ({column_names}) VALUES ({placeholders})
-                ON CONFLICT (guid) DO UPDATE SET {', '.join([f'"{col}" = EXCLUDED."{col}"' for col in columns if col != 'guid'])}
-            '''
-        else:
-            query = f'INSERT INTO "{table_name}" ({column_names}) VALUES ({placeholders})'
-        
         try:
             async with self._pool.acquire() as conn:
+                # Upsert only where guid is unique (derived trn_* tables repeat guid)
+                _, guid_unique = await self._get_load_metadata(conn, table_name)
+                if 'guid' in columns and guid_unique:
+                    query = f'''
+                        INSERT INTO "{table_name}" ({column_names}) VALUES ({placeholders})
+                        {self._on_conflict_guid(columns)}
+                    '''
+                else:
+                    query = f'INSERT INTO "{table_name}" ({column_names}) VALUES ({placeholders})'
+                
                 total_inserted = 0
                 batch_size = config.sync.batch_size
                 
@@ -203,6 +271,95 @@ class PostgreSQLDatabaseService(BaseDatabaseService):
             logger.error(f"Bulk insert failed for {table_name}: {e}")
             raise
     
+    async def _copy_insert(self, table_name: str, columns: List[str],
+                           rows: List[Dict[str, Any]]) -> int:
+        """Load rows with COPY into a temp staging table, then merge in one statement"""
+        stage = f"_stage_{table_name}"
+        column_names = ', '.join([f'"{col}"' for col in columns])
+        batch_size = config.sync.batch_size
+        
+        try:
+            async with self._pool.acquire() as conn:
+                column_types, guid_unique = await self._get_load_metadata(conn, table_name)
+                
+                async with conn.transaction():
+                    # Temp tables are unlogged; text columns let COPY accept any parsed value
+                    stage_columns = ', '.join([f'"{col}" TEXT' for col in columns])
+                    await conn.execute(
+                        f'CREATE TEMP TABLE "{stage}" ({stage_columns}, _stage_seq BIGINT) ON COMMIT DROP'
+                    )
+                    
+                    for i in range(0, len(rows), batch_size):
+                        records = [
+                            tuple(None if row.get(col) is None else str(row.get(col)) for col in columns)
+                            + (i + offset,)
+                            for offset, row in enumerate(rows[i:i + batch_size])
+                        ]
+                        await conn.copy_records_to_table(
+                            stage, records=records, columns=columns + ['_stage_seq']
+                        )
+                    
+                    select_list = ', '.join([
+                        self._stage_cast(col, column_types.get(col, 'text')) for col in columns
+                    ])
+                    if 'guid' in columns and guid_unique:
+                        # Last row wins for repeated guids, as with row-by-row upsert
+                        await conn.execute(f'''
+                            INSERT INTO "{table_name}" ({column_names})
+                            SELECT DISTINCT ON (guid) {select_list} FROM "{stage}"
+                            ORDER BY guid, _stage_seq DESC
+                            {self._on_conflict_guid(columns)}
+                        ''')
+                    else:
+                        await conn.execute(f'''
+                            INSERT INTO "{table_name}" ({column_names})
+                            SELECT {select_list} FROM "{stage}" ORDER BY _stage_seq
+                        ''')
+                
+                logger.debug(f"Copied {len(rows)} rows into {table_name}")
+                return len(rows)
+        except Exception as e:
+            logger.error(f"COPY bulk insert failed for {table_name}: {e}")
+            raise
+    
+    async def _get_load_metadata(self, conn: asyncpg.Connection,
+                                 table_name: str) -> Tuple[Dict[str, str], bool]:
+        """Column types of a table and whether guid has a unique index"""
+        type_rows = await conn.fetch(
+            """SELECT attname, format_type(atttypid, atttypmod) AS column_type
+               FROM pg_attribute
+               WHERE attrelid = to_regclass($1) AND attnum > 0 AND NOT attisdropped""",
+            table_name
+        )
+        guid_unique = await conn.fetchval(
+            """SELECT EXISTS (
+                   SELECT 1 FROM pg_index i
+                   JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+                   WHERE i.indrelid = to_regclass($1) AND i.indisunique
+                     AND i.indnatts = 1 AND a.attname = 'guid'
+               )""",
+            table_name
+        )
+        return {row['attname']: row['column_type'] for row in type_rows}, bool(guid_unique)
+    
+    @staticmethod
+    def _stage_cast(column: str, column_type: str) -> str:
+        """Convert a text staging column back to the target column type"""
+        if column_type == 'text' or column_type.startswith(('character', 'varchar')):
+            return f'"{column}"'
+        if column_type in ('smallint', 'integer', 'bigint'):
+            # Parsed numbers arrive as floats ("5.0")
+            return f'CAST(CAST(NULLIF("{column}", \'\') AS numeric) AS {column_type})'
+        return f'CAST(NULLIF("{column}", \'\') AS {column_type})'
+    
+    @staticmethod
+    def _on_conflict_guid(columns: List[str]) -> str:
+        """ON CONFLICT clause replacing existing rows with the same guid"""
+        assignments = ', '.join([f'"{col}" = EXCLUDED."{col}"' for col in columns if col != 'guid'])
+        if not assignments:
+            return 'ON CONFLICT (guid) DO NOTHING'
+        return f'ON CONFLICT (guid) DO UPDATE SET {assignments}'
+    
     async def truncate_table(self, table_name: str, company_name: str = None) -> None:
         """Delete all rows from a table"""
         if company_name:
@@ -247,13 +404,20 @@ class PostgreSQLDatabaseService(BaseDatabaseService):
             counts[table] = await self.get_table_count(table, company_name)
         return counts
     
+    async def _estimate_table_bytes(self, table_name: str, row_count: int,
+                                    company_name: str = None) -> int:
+        """Table plus index size from pg_total_relation_size, scaled to the company's rows"""
+        if not row_count:
+            return 0
+        table_bytes = await self.fetch_scalar(
+            "SELECT pg_total_relation_size(to_regclass(?))", (table_name,)
+        ) or 0
+        return await self._company_share(table_name, table_bytes, row_count, company_name)
+    
     async def table_exists(self, table_name: str) -> bool:
         """Check if table exists"""
-        result = await self.fetch_scalar(
-            "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?",
-            (table_name,)
-        )
-        return result > 0
+        catalog = await self._get_catalog()
+        return catalog.table_exists(table_name)
     
     async def get_database_size(self) -> int:
         """Get database size in bytes"""
@@ -269,30 +433,38 @@ class PostgreSQLDatabaseService(BaseDatabaseService):
         """Create all required tables"""
         await self.create_tables()
     
+    async def _get_catalog(self) -> SchemaCatalog:
+        """Get schema catalog, loading it with a single query if needed"""
+        if not self._catalog.is_loaded:
+            if not self._pool:
+                await self.connect()
+            async with self._pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """SELECT table_name, column_name FROM information_schema.columns 
+                       WHERE table_schema = current_schema()"""
+                )
+            self._catalog.load((row['table_name'], row['column_name']) for row in rows)
+        return self._catalog
+    
     async def _has_column(self, table_name: str, column_name: str) -> bool:
         """Check if column exists in table"""
-        result = await self.fetch_scalar(
-            """SELECT COUNT(*) FROM information_schema.columns 
-               WHERE table_name = ? AND column_name = ?""",
-            (table_name, column_name)
-        )
-        return result > 0
+        catalog = await self._get_catalog()
+        return catalog.has_column(table_name, column_name)
     
     async def _ensure_columns_exist(self, table_name: str, columns: List[str]) -> None:
         """Auto-add missing columns to table"""
-        if not self._pool:
-            await self.connect()
+        catalog = await self._get_catalog()
         
-        for col in columns:
-            if not await self._has_column(table_name, col):
-                try:
-                    async with self._pool.acquire() as conn:
-                        await conn.execute(
-                            f'ALTER TABLE "{table_name}" ADD COLUMN "{col}" TEXT DEFAULT \'\''
-                        )
-                    logger.debug(f"Added column '{col}' to table '{table_name}'")
-                except Exception as e:
-                    logger.warning(f"Could not add column {col}: {e}")
+        for col in catalog.missing_columns(table_name, columns):
+            try:
+                async with self._pool.acquire() as conn:
+                    await conn.execute(
+                        f'ALTER TABLE "{table_name}" ADD COLUMN "{col}" TEXT DEFAULT \'\''
+                    )
+                catalog.add_columns(table_name, [col])
+                logger.debug(f"Added column '{col}' to table '{table_name}'")
+            except Exception as e:
+                logger.warning(f"Could not add column {col}: {e}")
     
     @timed
     async def create_tables(self, incremental: bool = None) -> None:
@@ -312,9 +484,12 @@ class PostgreSQLDatabaseService(BaseDatabaseService):
                         except Exception as e:
                             logger.debug(f"Statement skipped: {e}")
             
+            self._catalog.invalidate()
             logger.info("Database tables created successfully")
             await self._ensure_company_column_exists()
+            await self.ensure_surrogate_key_schema()
             await self.ensure_audit_tables()
+            await self.ensure_indexes()
         except Exception as e:
             logger.error(f"Failed to create tables: {e}")
             raise
@@ -328,9 +503,56 @@ class PostgreSQLDatabaseService(BaseDatabaseService):
                         await conn.execute(
                             f'ALTER TABLE "{table}" ADD COLUMN "_company" TEXT DEFAULT \'\''
                         )
+                    self._catalog.add_columns(table, ['_company'])
                 except:
                     pass
     
+    async def ensure_surrogate_key_schema(self) -> None:
+        """Create key_dictionary and the integer id columns"""
+        async with self._pool.acquire() as conn:
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {KEY_DICTIONARY_TABLE} (
+                    id BIGSERIAL PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    company_name TEXT NOT NULL DEFAULT '',
+                    key_value TEXT NOT NULL
+                )
+            """)
+            for table in KEYED_TABLES:
+                if not await self.table_exists(table):
+                    continue
+                for column in id_columns(table):
+                    await conn.execute(f'ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS "{column}" BIGINT')
+        self._catalog.invalidate()
+    
+    async def ensure_indexes(self) -> int:
+        """Create secondary indexes from the index specification"""
+        catalog = await self._get_catalog()
+        created = 0
+        
+        for spec in applicable_indexes(catalog):
+            column_list = ', '.join(f'"{col}"' for col in spec.columns)
+            try:
+                async with self._pool.acquire() as conn:
+                    await conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS "{spec.name}" ON "{spec.table}" ({column_list})'
+                    )
+                created += 1
+            except Exception as e:
+                logger.warning(f"Could not create index {spec.name}: {e}")
+        
+        logger.debug(f"Ensured {created} secondary indexes")
+        return created
+    
+    async def verify_indexes(self) -> List[str]:
+        """Return names of specified indexes missing from the database"""
+        catalog = await self._get_catalog()
+        rows = await self.fetch_all(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()"
+        )
+        existing = {row['indexname'] for row in rows}
+        return [spec.name for spec in applicable_indexes(catalog) if spec.name not in existing]
+    
     async def ensure_audit_tables(self) -> None:
         """Create audit trail tables"""
         audit_sql = """
@@ -355,6 +577,7 @@ class PostgreSQLDatabaseService(BaseDatabaseService):
         try:
             async with self._pool.acquire() as conn:
                 await conn.execute(audit_sql)
+            self._catalog.invalidate()
         except Exception as e:
             logger.warning(f"Could not create audit_log: {e}")
     
@@ -391,6 +614,18 @@ class PostgreSQLDatabaseService(BaseDatabaseService):
                         guid TEXT PRIMARY KEY
                     )
                 """)
+                await conn.execute("""
+                    CREATE TABLE IF NOT EXISTS table_stats (
+                        table_name TEXT NOT NULL,
+                        company_name TEXT NOT NULL DEFAULT '',
+                        row_count BIGINT DEFAULT 0,
+                        bytes_estimate BIGINT DEFAULT 0,
+                        last_sync_at TEXT,
+                        counted_at TEXT,
+                        PRIMARY KEY (table_name, company_name)
+                    )
+                """)
+            self._catalog.invalidate()
         except Exception as e:
             logger.warning(f"Could not ensure company_config table: {e}")
     
@@ -399,18 +634,15 @@ class PostgreSQLDatabaseService(BaseDatabaseService):
         if not self._pool:
             await self.connect()
         
+        catalog = await self._get_catalog()
         added_count = 0
         for table in ALL_TABLES:
             try:
-                async with self._pool.acquire() as conn:
-                    # Check if column exists
-                    result = await conn.fetchval(f"""
-                        SELECT COUNT(*) FROM information_schema.columns 
-                        WHERE table_name = '{table}' AND column_name = 'alterid'
-                    """)
-                    if result == 0:
+                if catalog.table_exists(table) and not catalog.has_column(table, 'alterid'):
+                    async with self._pool.acquire() as conn:
                         await conn.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS alterid INTEGER DEFAULT 0")
-                        added_count += 1
+                    catalog.add_columns(table, ['alterid'])
+                    added_count += 1
             except Exception as e:
                 logger.debug(f"Could not add alterid to {table}: {e}")
         
@@ -510,6 +742,9 @@ class PostgreSQLDatabaseService(BaseDatabaseService):
             (company_name,)
         )
         total_deleted += 1
+        await self.clear_table_stats(company_name)
+        await self.clear_surrogate_keys(company_name)
+        await self.clear_derived_tables(company_name)
         
         logger.info(f"Deleted company '{company_name}': {total_deleted} total rows")
         return total_deleted
@@ -0,0 +1,87 @@
+"""
+Schema Catalog
+==============
+In-process cache of table -> column names for the database adapters.
+
+The adapters need to know whether a table or column exists on hot paths
+(bulk_insert, truncate_table, table counts). Instead of running
+PRAGMA table_info / information_schema queries on every call, each adapter
+loads the whole catalog with a single query and answers those checks from
+this dictionary.
+
+The catalog is invalidated whenever DDL runs through the adapter
+(CREATE / ALTER / DROP) and patched in place when the adapter itself adds
+columns, so it never goes stale for changes made by this process.
+
+USAGE:
+------
+catalog = SchemaCatalog()
+if not catalog.is_loaded:
+    catalog.load(rows)          # rows = [(table_name, column_name), ...]
+catalog.has_column("trn_bill", "_company")
+catalog.invalidate()
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_DDL_PATTERN = re.compile(r'^\s*(CREATE|ALTER|DROP|RENAME)\b', re.IGNORECASE)
+
+
+class SchemaCatalog:
+    """Cached table/column metadata for one database"""
+
+    def __init__(self):
+        self._tables: Optional[Dict[str, Set[str]]] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """True when the catalog holds a snapshot of the schema"""
+        return self._tables is not None
+
+    def load(self, rows: Iterable[Tuple[str, str]]) -> None:
+        """Replace catalog contents from (table_name, column_name) rows"""
+        tables: Dict[str, Set[str]] = {}
+        for table_name, column_name in rows:
+            columns = tables.setdefault(table_name.lower(), set())
+            if column_name:
+                columns.add(column_name.lower())
+        self._tables = tables
+
+    def invalidate(self) -> None:
+        """Drop the cached snapshot; next lookup reloads from the database"""
+        self._tables = None
+
+    def table_exists(self, table_name: str) -> bool:
+        """Check table existence against the cached snapshot"""
+        return self._tables is not None and table_name.lower() in self._tables
+
+    def has_column(self, table_name: str, column_name: str) -> bool:
+        """Check column existence against the cached snapshot"""
+        if self._tables is None:
+            return False
+        return column_name.lower() in self._tables.get(table_name.lower(), ())
+
+    def get_columns(self, table_name: str) -> Set[str]:
+        """Get cached column names for a table (empty if unknown)"""
+        if self._tables is None:
+            return set()
+        return set(self._tables.get(table_name.lower(), ()))
+
+    def missing_columns(self, table_name: str, columns: Iterable[str]) -> List[str]:
+        """Return the columns from the list that the table does not have"""
+        existing = self._tables.get(table_name.lower(), set()) if self._tables else set()
+        return [col for col in columns if col.lower() not in existing]
+
+    def add_columns(self, table_name: str, columns: Iterable[str]) -> None:
+        """Record columns added by the adapter without a full reload"""
+        if self._tables is None:
+            return
+        self._tables.setdefault(table_name.lower(), set()).update(
+            col.lower() for col in columns
+        )
+
+    @staticmethod
+    def is_ddl(query: str) -> bool:
+        """True when the statement changes the schema"""
+        return bool(_DDL_PATTERN.match(query))
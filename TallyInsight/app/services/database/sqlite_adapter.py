@@ -5,82 +5,373 @@ SQLite implementation of the database service.
 
 This is the default database adapter that provides all functionality
 using SQLite with aiosqlite for async operations.
+
+CONNECTIONS:
+------------
+- One writer connection: execute, bulk_insert, DDL (used by sync)
+- N read-only reader connections (database.read_pool_size, default 4):
+  fetch_all / fetch_one / fetch_scalar, acquired per query
+
+With WAL journaling readers see the last committed state and never wait
+for sync writes. Connections stay open for the application lifetime;
+disconnect() is only called on shutdown or before the file is replaced.
+
+Both kinds apply the PRAGMA profile from sqlite_profiles.py. Full sync
+switches the writer to the bulk-load profile (begin/end_bulk_load) and a
+scheduled job calls run_maintenance() while no sync is running.
+
+Closed financial years can be moved to per-year archive files
+(fy_archive.py); fetch_all_archived() opens a dedicated connection with
+the needed archives attached.
 """
 
+import asyncio
+import shutil
+import time
 import aiosqlite
+from contextlib import asynccontextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from .base import BaseDatabaseService
+from .schema_catalog import SchemaCatalog
+from .index_spec import applicable_indexes
+from . import monthly_cube, voucher_totals
+from .surrogate_keys import KEY_DICTIONARY_TABLE, KEYED_TABLES, id_columns
+from .amount_storage import PAISE_COLUMNS, backfill_statements, paise_columns
+from .sqlite_profiles import (
+    BULK_LOAD_PRAGMAS, DEFAULT_PROFILE, DEFAULT_WAL_AUTOCHECKPOINT, pragma_statements, resolve_profile
+)
+from .fy_archive import (
+    ARCHIVE_BALANCE_TABLE, ARCHIVE_REGISTRY_TABLE, ARCHIVE_TABLES, MAX_ATTACHED_ARCHIVES, ROW_ID_TABLES,
+    archivable_years, archive_file_path, company_archive_dir, financial_year_range, overlapping_years
+)
+from .company_routing import (
+    COMPANY_SCHEMA, company_file_path, company_scope, get_active_company, qualify_ddl
+)
 from ...config import config
 from ...utils.logger import logger
 from ...utils.decorators import timed
 from ...utils.constants import ALL_TABLES, MASTER_TABLES, TRANSACTION_TABLES
 
 
+# Share of free pages that makes maintenance VACUUM a file without auto-vacuum
+VACUUM_FREE_RATIO = 0.25
+
+
 class SQLiteDatabaseService(BaseDatabaseService):
     """SQLite implementation of database service"""
     
+    supports_archives = True
+    
+    # database-structure.sql tables have no id column; archived views keep
+    # the rowid of ROW_ID_TABLES
+    row_id_column = "rowid"
+    
     def __init__(self):
         self.db_path = getattr(config.database, 'path', './tally.db')
-        self._connection: Optional[aiosqlite.Connection] = None
-        self._initialized = False
+        self.read_pool_size = getattr(config.database, 'read_pool_size', 4)
+        self.per_company_files = getattr(config.database, 'per_company_files', False)
+        self.company_idle_timeout = getattr(config.database, 'company_idle_timeout', 600)
+        self.paise_amounts = getattr(config.database, 'amount_storage', 'real') == 'paise'
+        self.page_size = getattr(config.database, 'page_size', 4096)
+        try:
+            self.pragmas = resolve_profile(getattr(config.database, 'sqlite_profile', DEFAULT_PROFILE),
+                                           getattr(config.database, 'sqlite_pragmas', {}))
+        except ValueError as e:
+            logger.warning(f"{e}; using the {DEFAULT_PROFILE} profile")
+            self.pragmas = resolve_profile(DEFAULT_PROFILE)
+        self._bulk_routes: set = set()
+        # Connections and schema catalogs per route ('' = single database / catalog only)
+        self._writers: Dict[str, aiosqlite.Connection] = {}
+        self._reader_pools: Dict[str, asyncio.Queue] = {}
+        self._reader_connections: Dict[str, List[aiosqlite.Connection]] = {}
+        self._catalogs: Dict[str, SchemaCatalog] = {}
+        # Route key -> time.monotonic() of its last use (idle company routes are closed)
+        self._route_used: Dict[str, float] = {}
+        # Bumped by DDL; pooled readers reload their schema when behind
+        self._schema_generation = 0
+        self._reader_generations: Dict[aiosqlite.Connection, int] = {}
+        self._writer_lock = asyncio.Lock()
+        self._reader_lock = asyncio.Lock()
+    
+    def _route_key(self) -> str:
+        """Company file the current call is routed to ('' = no company file)"""
+        if not self.per_company_files:
+            return ''
+        return get_active_company() or config.tally.company or ''
     
-    async def _get_connection(self) -> aiosqlite.Connection:
-        """Get or create database connection"""
-        if self._connection is None:
+    @property
+    def _catalog(self) -> SchemaCatalog:
+        """Schema catalog of the current route"""
+        return self._catalogs.setdefault(self._route_key(), SchemaCatalog())
+    
+    @property
+    def _connection(self) -> Optional[aiosqlite.Connection]:
+        """Writer connection of the current route, if open"""
+        return self._writers.get(self._route_key())
+    
+    async def _get_connection(self, key: Optional[str] = None) -> aiosqlite.Connection:
+        """Get or create the writer connection for a route"""
+        if key is None:
+            key = self._route_key()
+        self._route_used[key] = time.monotonic()
+        
+        conn = self._writers.get(key)
+        if conn is not None:
+            return conn
+        
+        await self._close_idle_routes()
+        async with self._writer_lock:
+            conn = self._writers.get(key)
+            if conn is not None:
+                return conn
+            
             db_file = Path(self.db_path)
             db_file.parent.mkdir(parents=True, exist_ok=True)
+            new_file = not db_file.exists() or db_file.stat().st_size == 0
             
-            self._connection = await aiosqlite.connect(
+            conn = await aiosqlite.connect(
                 self.db_path,
                 timeout=30.0
             )
-            self._connection.row_factory = aiosqlite.Row
+            conn.row_factory = aiosqlite.Row
             
-            if not self._initialized:
-                await self._connection.execute("PRAGMA journal_mode=WAL")
-                await self._connection.execute("PRAGMA busy_timeout=30000")
-                await self._connection.execute("PRAGMA synchronous=NORMAL")
-                await self._connection.execute("PRAGMA cache_size=-64000")
-                await self._connection.execute("PRAGMA temp_store=MEMORY")
-                self._initialized = True
+            # page_size / auto_vacuum only take effect before the first table exists
+            if new_file:
+                await self._init_new_file(conn, "main")
+            # journal_mode is persistent; the rest are per-connection settings
+            await conn.execute("PRAGMA journal_mode=WAL")
+            await conn.execute("PRAGMA busy_timeout=30000")
+            
+            schemas = ["main"]
+            if key:
+                company_file = company_file_path(key)
+                company_file.parent.mkdir(parents=True, exist_ok=True)
+                new_company_file = not company_file.exists()
+                await conn.execute(f"ATTACH DATABASE ? AS {COMPANY_SCHEMA}", (str(company_file),))
+                if new_company_file:
+                    await self._init_new_file(conn, COMPANY_SCHEMA)
+                await conn.execute(f"PRAGMA {COMPANY_SCHEMA}.journal_mode=WAL")
+                schemas.append(COMPANY_SCHEMA)
+                logger.info(f"Connected to SQLite database: {self.db_path} + {company_file} ({key})")
+            else:
+                logger.info(f"Connected to SQLite database: {self.db_path}")
             
-            logger.info(f"Connected to SQLite database: {self.db_path}")
+            for statement in pragma_statements(self.pragmas, schemas):
+                await conn.execute(statement)
+            
+            self._writers[key] = conn
+            return conn
+    
+    async def _open_readers(self, key: str) -> asyncio.Queue:
+        """Open the pool of read-only reader connections for a route"""
+        # Writer first: it creates the files and switches them to WAL
+        await self._get_connection(key)
+        
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        company_uri = f"{company_file_path(key).resolve().as_uri()}?mode=ro" if key else None
+        readers: asyncio.Queue = asyncio.Queue()
+        connections = []
+        for _ in range(self.read_pool_size):
+            conn = await aiosqlite.connect(uri, uri=True, timeout=30.0)
+            conn.row_factory = aiosqlite.Row
+            await conn.execute("PRAGMA busy_timeout=30000")
+            await conn.execute("PRAGMA query_only=1")
+            schemas = ["main"]
+            if company_uri:
+                await conn.execute(f"ATTACH DATABASE ? AS {COMPANY_SCHEMA}", (company_uri,))
+                schemas.append(COMPANY_SCHEMA)
+            for statement in pragma_statements(self.pragmas, schemas, writer=False):
+                await conn.execute(statement)
+            connections.append(conn)
+            self._reader_generations[conn] = self._schema_generation
+            readers.put_nowait(conn)
         
-        return self._connection
+        self._reader_connections[key] = connections
+        self._reader_pools[key] = readers
+        logger.info(f"Opened {self.read_pool_size} read-only SQLite connections{f' ({key})' if key else ''}")
+        return readers
+    
+    @asynccontextmanager
+    async def _read_connection(self):
+        """Acquire a reader connection (falls back to the writer if pool size is 0)"""
+        if self.read_pool_size <= 0:
+            yield await self._get_connection()
+            return
+        
+        key = self._route_key()
+        if key and not company_file_path(key).exists():
+            # Company never synced: serve from the catalog without creating its file
+            key = ''
+        
+        self._route_used[key] = time.monotonic()
+        readers = self._reader_pools.get(key)
+        if readers is None:
+            async with self._reader_lock:
+                readers = self._reader_pools.get(key)
+                if readers is None:
+                    readers = await self._open_readers(key)
+        
+        conn = await readers.get()
+        try:
+            if self._reader_generations.get(conn, 0) != self._schema_generation:
+                await self._reload_schema(conn, key)
+            yield conn
+        finally:
+            readers.put_nowait(conn)
+    
+    async def _reload_schema(self, conn: aiosqlite.Connection, key: str) -> None:
+        """Make a pooled reader load the schema changed by DDL since its last read.
+        
+        Statements re-prepare when they find the schema changed, but EXPLAIN
+        does not read the database and would plan against the old schema.
+        """
+        for schema in self._route_schemas(key):
+            cursor = await conn.execute(f"SELECT 1 FROM {schema}.sqlite_master LIMIT 1")
+            await cursor.close()
+        self._reader_generations[conn] = self._schema_generation
+    
+    def _schema_changed(self) -> None:
+        """DDL ran: drop the cached catalog and have pooled readers reload the schema"""
+        self._catalog.invalidate()
+        self._schema_generation += 1
+    
+    async def _init_new_file(self, conn: aiosqlite.Connection, schema: str) -> None:
+        """Page size and incremental auto-vacuum for a freshly created file"""
+        await conn.execute(f"PRAGMA {schema}.page_size={int(self.page_size)}")
+        await conn.execute(f"PRAGMA {schema}.auto_vacuum=INCREMENTAL")
+    
+    def _route_schemas(self, key: str) -> List[str]:
+        """Schemas open on a route's writer"""
+        return ["main", COMPANY_SCHEMA] if key else ["main"]
+    
+    async def _close_idle_routes(self) -> List[str]:
+        """Close company routes unused for company_idle_timeout seconds.
+        
+        Each open route holds a writer, a reader pool and a schema catalog;
+        a server that has answered for many companies would keep them all.
+        Busy routes (bulk load, open transaction, reader in use) stay open.
+        """
+        if not self.per_company_files or self.company_idle_timeout <= 0:
+            return []
+        
+        now = time.monotonic()
+        closed = []
+        for key in set(self._writers) | set(self._reader_pools) | set(self._catalogs):
+            if not key or now - self._route_used.get(key, 0) < self.company_idle_timeout:
+                continue
+            writer = self._writers.get(key)
+            readers = self._reader_pools.get(key)
+            if (key in self._bulk_routes or (writer is not None and writer.in_transaction) or
+                    (readers is not None and readers.qsize() < len(self._reader_connections.get(key, [])))):
+                continue
+            await self._close_route(key)
+            closed.append(key)
+        if closed:
+            logger.info(f"Closed idle company routes: {', '.join(sorted(closed))}")
+        return closed
+    
+    async def _close_route(self, key: str) -> None:
+        """Close writer and reader connections of one route"""
+        self._bulk_routes.discard(key)
+        self._route_used.pop(key, None)
+        self._reader_pools.pop(key, None)
+        connections = self._reader_connections.pop(key, [])
+        writer = self._writers.pop(key, None)
+        if writer is not None:
+            connections.append(writer)
+        self._catalogs.pop(key, None)
+        
+        for conn in connections:
+            self._reader_generations.pop(conn, None)
+            try:
+                await conn.close()
+            except:
+                pass
+    
+    def _route_ddl(self, query: str) -> str:
+        """Create company data tables/indexes inside the attached company file"""
+        if self._route_key():
+            return qualify_ddl(query)
+        if self.per_company_files and qualify_ddl(query) != query:
+            # No company to route to: the catalog database only holds CATALOG_TABLES
+            raise ValueError("No company selected: company tables are only created in a company file "
+                             "(sync a company or set tally.company)")
+        return query
     
     async def connect(self) -> None:
         """Open database connection"""
         await self._get_connection()
     
     async def disconnect(self) -> None:
-        """Close database connection"""
-        if self._connection:
-            try:
-                await self._connection.close()
-            except:
-                pass
-            self._connection = None
+        """Close all writer and reader connections"""
+        had_connections = bool(self._writers)
+        for key in list(set(self._writers) | set(self._reader_pools)):
+            await self._close_route(key)
+        if had_connections:
             logger.info("Database connection closed")
     
     async def is_connected(self) -> bool:
         """Check if database is connected"""
-        return self._connection is not None
+        return bool(self._writers)
     
     async def execute(self, query: str, params: Tuple = ()) -> int:
         """Execute a query and return affected rows"""
         conn = await self._get_connection()
+        query = self._route_ddl(query)
         
         try:
             cursor = await conn.execute(query, params)
             await conn.commit()
+            if SchemaCatalog.is_ddl(query):
+                self._schema_changed()
             return cursor.rowcount
         except Exception as e:
             logger.error(f"Query execution failed: {e}\nQuery: {query[:200]}...")
             raise
     
+    async def execute_insert(self, query: str, params: Tuple = ()) -> int:
+        """Execute an INSERT on the writer and return the new rowid"""
+        conn = await self._get_connection()
+        try:
+            cursor = await conn.execute(query, params)
+            await conn.commit()
+            return cursor.lastrowid or 0
+        except Exception as e:
+            logger.error(f"Insert failed: {e}\nQuery: {query[:200]}...")
+            raise
+    
+    async def execute_transaction(self, statements: List[Tuple[str, Any]]) -> None:
+        """Run write statements in one transaction on the routed writer"""
+        await self._run_transaction(await self._get_connection(), statements)
+    
+    async def _run_transaction(self, conn: aiosqlite.Connection, statements: List[Tuple[str, Any]]) -> None:
+        query = ""
+        try:
+            # Explicit: the module only opens one implicitly before INSERT / UPDATE / DELETE
+            if not conn.in_transaction:
+                await conn.execute("BEGIN")
+            for query, params in statements:
+                query = self._route_ddl(query)
+                if isinstance(params, list):
+                    await conn.executemany(query, params)
+                else:
+                    await conn.execute(query, params)
+            await conn.commit()
+        except Exception as e:
+            await conn.rollback()
+            logger.error(f"Transaction failed: {e}\nQuery: {query[:200]}...")
+            raise
+    
+    async def _execute_catalog(self, query: str, params: Tuple = ()) -> int:
+        """Execute a write against the catalog tables without routing to a company file"""
+        conn = await self._get_connection('')
+        cursor = await conn.execute(query, params)
+        await conn.commit()
+        return cursor.rowcount
+    
     async def execute_many(self, query: str, params_list: List[Tuple]) -> int:
         """Execute query with multiple parameter sets"""
         conn = await self._get_connection()
@@ -95,23 +386,73 @@ class SQLiteDatabaseService(BaseDatabaseService):
     
     async def fetch_all(self, query: str, params: Tuple = ()) -> List[Dict[str, Any]]:
         """Fetch all rows from query"""
-        conn = await self._get_connection()
-        
         try:
-            cursor = await conn.execute(query, params)
-            rows = await cursor.fetchall()
+            async with self._read_connection() as conn:
+                cursor = await conn.execute(query, params)
+                rows = await cursor.fetchall()
+                await cursor.close()
             return [dict(row) for row in rows]
         except Exception as e:
             logger.error(f"Fetch failed: {e}")
             raise
     
+    async def fetch_chunks(self, query: str, params: Tuple = (),
+                           chunk_size: int = 5000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield rows in chunks from a dedicated read-only connection.
+        
+        A download can take minutes; it does not hold one of the pooled
+        readers the API needs meanwhile.
+        """
+        key = self._route_key()
+        if key and not company_file_path(key).exists():
+            # Company never synced: serve from the catalog without creating its file
+            key = ''
+        async with self._dedicated_reader(key) as conn:
+            async for chunk in self._cursor_chunks(conn, query, params, chunk_size):
+                yield chunk
+    
+    @asynccontextmanager
+    async def _dedicated_reader(self, key: str) -> AsyncIterator[aiosqlite.Connection]:
+        """Read-only connection outside the reader pool, company file attached when routed"""
+        # Writer first: it creates the files and switches them to WAL
+        await self._get_connection(key)
+        conn = await aiosqlite.connect(f"{Path(self.db_path).resolve().as_uri()}?mode=ro",
+                                       uri=True, timeout=30.0)
+        try:
+            conn.row_factory = aiosqlite.Row
+            # Files opened read-only; no query_only, archived reads create TEMP views
+            await conn.execute("PRAGMA busy_timeout=30000")
+            schemas = ["main"]
+            if key:
+                await conn.execute(f"ATTACH DATABASE ? AS {COMPANY_SCHEMA}",
+                                   (f"{company_file_path(key).resolve().as_uri()}?mode=ro",))
+                schemas.append(COMPANY_SCHEMA)
+            for statement in pragma_statements(self.pragmas, schemas, writer=False):
+                await conn.execute(statement)
+            yield conn
+        finally:
+            await conn.close()
+    
+    @staticmethod
+    async def _cursor_chunks(conn: aiosqlite.Connection, query: str, params: Tuple,
+                             chunk_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        cursor = await conn.execute(query, params)
+        try:
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [dict(row) for row in rows]
+        finally:
+            await cursor.close()
+    
     async def fetch_one(self, query: str, params: Tuple = ()) -> Optional[Dict[str, Any]]:
         """Fetch single row from query"""
-        conn = await self._get_connection()
-        
         try:
-            cursor = await conn.execute(query, params)
-            row = await cursor.fetchone()
+            async with self._read_connection() as conn:
+                cursor = await conn.execute(query, params)
+                row = await cursor.fetchone()
+                await cursor.close()
             return dict(row) if row else None
         except Exception as e:
             logger.error(f"Fetch one failed: {e}")
@@ -124,6 +465,35 @@ class SQLiteDatabaseService(BaseDatabaseService):
             return list(result.values())[0]
         return None
     
+    async def _get_catalog(self) -> SchemaCatalog:
+        """Get schema catalog, loading it with a single query if needed"""
+        catalog = self._catalog
+        if not catalog.is_loaded:
+            async with self._read_connection() as conn:
+                # main plus the attached company file, if any
+                cursor = await conn.execute("SELECT name FROM pragma_database_list WHERE name != 'temp'")
+                schemas = [row[0] for row in await cursor.fetchall()]
+                await cursor.close()
+                tables_sql = " UNION ".join(
+                    f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table'" for schema in schemas
+                )
+                cursor = await conn.execute(
+                    f"SELECT m.name, p.name FROM ({tables_sql}) m "
+                    "LEFT JOIN pragma_table_info(m.name) p"
+                )
+                catalog.load(await cursor.fetchall())
+                await cursor.close()
+        return catalog
+    
+    def _needs_scope(self, company_name: Optional[str]) -> bool:
+        """True when an explicit company must be routed to its own file"""
+        return bool(company_name) and self.per_company_files and get_active_company() != company_name
+    
+    async def _has_column(self, table_name: str, column_name: str) -> bool:
+        """Check if column exists in table"""
+        catalog = await self._get_catalog()
+        return catalog.has_column(table_name, column_name)
+    
     @timed
     async def bulk_insert(self, table_name: str, rows: List[Dict[str, Any]], 
                           company_name: str = None) -> int:
@@ -131,8 +501,11 @@ class SQLiteDatabaseService(BaseDatabaseService):
         if not rows:
             return 0
         
-        if not self._connection:
-            await self.connect()
+        if self._needs_scope(company_name):
+            with company_scope(company_name):
+                return await self.bulk_insert(table_name, rows, company_name)
+        
+        conn = await self._get_connection()
         
         if company_name:
             for row in rows:
@@ -152,14 +525,11 @@ class SQLiteDatabaseService(BaseDatabaseService):
             total_inserted = 0
             
             for i in range(0, len(params_list), batch_size):
-                if not self._connection:
-                    await self.connect()
                 batch = params_list[i:i + batch_size]
-                await self._connection.executemany(query, batch)
+                await conn.executemany(query, batch)
                 total_inserted += len(batch)
             
-            if self._connection:
-                await self._connection.commit()
+            await conn.commit()
             logger.debug(f"Inserted {total_inserted} rows into {table_name}")
             return total_inserted
         except Exception as e:
@@ -168,13 +538,12 @@ class SQLiteDatabaseService(BaseDatabaseService):
     
     async def truncate_table(self, table_name: str, company_name: str = None) -> None:
         """Delete all rows from a table"""
+        if self._needs_scope(company_name):
+            with company_scope(company_name):
+                return await self.truncate_table(table_name, company_name)
+        
         if company_name:
-            conn = await self._get_connection()
-            cursor = await conn.execute(f"PRAGMA table_info({table_name})")
-            columns = await cursor.fetchall()
-            has_company_col = any(col[1] == '_company' for col in columns)
-            
-            if has_company_col:
+            if await self._has_column(table_name, '_company'):
                 await self.execute(f"DELETE FROM {table_name} WHERE _company = ?", (company_name,))
             else:
                 await self.execute(f"DELETE FROM {table_name}")
@@ -185,6 +554,10 @@ class SQLiteDatabaseService(BaseDatabaseService):
         """Truncate all tables"""
         # Support both parameter names for backward compatibility
         company_filter = company_name or company
+        if company_filter and self.per_company_files:
+            await self._reset_company_file(company_filter)
+            return
+        
         for table in ALL_TABLES:
             try:
                 await self.truncate_table(table, company_filter)
@@ -193,31 +566,24 @@ class SQLiteDatabaseService(BaseDatabaseService):
     
     async def get_table_count(self, table_name: str, company_name: str = None) -> int:
         """Get row count for a table"""
+        if self._needs_scope(company_name):
+            with company_scope(company_name):
+                return await self.get_table_count(table_name, company_name)
+        
         try:
-            conn = await self._get_connection()
-            cursor = await conn.execute(
-                "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=?",
-                (table_name,)
-            )
-            row = await cursor.fetchone()
-            if not row or row[0] == 0:
+            if not await self.table_exists(table_name):
                 return 0
             
-            if company_name:
-                cursor = await conn.execute(f"PRAGMA table_info({table_name})")
-                columns = await cursor.fetchall()
-                if any(col[1] == '_company' for col in columns):
-                    cursor = await conn.execute(
-                        f"SELECT COUNT(*) FROM {table_name} WHERE _company = ?",
-                        (company_name,)
-                    )
-                else:
-                    cursor = await conn.execute(f"SELECT COUNT(*) FROM {table_name}")
+            # A company file only holds that company's rows
+            if company_name and not self.per_company_files and await self._has_column(table_name, '_company'):
+                result = await self.fetch_scalar(
+                    f"SELECT COUNT(*) FROM {table_name} WHERE _company = ?",
+                    (company_name,)
+                )
             else:
-                cursor = await conn.execute(f"SELECT COUNT(*) FROM {table_name}")
+                result = await self.fetch_scalar(f"SELECT COUNT(*) FROM {table_name}")
             
-            row = await cursor.fetchone()
-            return row[0] if row else 0
+            return result or 0
         except:
             return 0
     
@@ -228,21 +594,417 @@ class SQLiteDatabaseService(BaseDatabaseService):
             counts[table] = await self.get_table_count(table, company_name)
         return counts
     
+    async def _estimate_table_bytes(self, table_name: str, row_count: int,
+                                    company_name: str = None) -> int:
+        """Table plus index pages from dbstat, scaled to the company's rows"""
+        if not row_count:
+            return 0
+        if self._needs_scope(company_name):
+            with company_scope(company_name):
+                return await self._estimate_table_bytes(table_name, row_count, company_name)
+        
+        key = self._route_key()
+        schema = COMPANY_SCHEMA if key and company_file_path(key).exists() else 'main'
+        table_bytes = await self.fetch_scalar(
+            f"SELECT SUM(pgsize) FROM dbstat(?) WHERE name IN "
+            f"(SELECT name FROM {schema}.sqlite_master WHERE tbl_name = ?)",
+            (schema, table_name)
+        ) or 0
+        
+        # A company file only holds that company's rows
+        if schema == COMPANY_SCHEMA:
+            return table_bytes
+        return await self._company_share(table_name, table_bytes, row_count, company_name)
+    
     async def table_exists(self, table_name: str) -> bool:
         """Check if table exists"""
-        result = await self.fetch_scalar(
-            "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=?",
-            (table_name,)
-        )
-        return result > 0
+        catalog = await self._get_catalog()
+        return catalog.table_exists(table_name)
+    
+    async def get_table_columns(self, table_name: str) -> List[str]:
+        """Column names of a table in definition order"""
+        rows = await self.fetch_all("SELECT name FROM pragma_table_info(?) ORDER BY cid", (table_name,))
+        return [row['name'] for row in rows]
     
     async def get_database_size(self) -> int:
-        """Get database file size in bytes"""
+        """Get database file size in bytes (catalog plus routed company file)"""
         try:
-            return Path(self.db_path).stat().st_size
+            size = Path(self.db_path).stat().st_size
+            key = self._route_key()
+            if key and company_file_path(key).exists():
+                size += company_file_path(key).stat().st_size
+            return size
         except:
             return 0
     
+    # ==================== PROFILES / MAINTENANCE ====================
+    
+    async def begin_bulk_load(self) -> None:
+        """Switch the current route's writer to the bulk-load PRAGMAs"""
+        key = self._route_key()
+        conn = await self._get_connection(key)
+        for statement in pragma_statements(BULK_LOAD_PRAGMAS, self._route_schemas(key)):
+            await conn.execute(statement)
+        self._bulk_routes.add(key)
+        logger.debug(f"SQLite bulk-load profile on{f' ({key})' if key else ''}")
+    
+    async def end_bulk_load(self) -> None:
+        """Restore the configured profile, refresh planner statistics and checkpoint the WAL"""
+        key = self._route_key()
+        if key not in self._bulk_routes:
+            return
+        self._bulk_routes.discard(key)
+        conn = self._writers.get(key)
+        if conn is None:
+            return
+        
+        restore = {"wal_autocheckpoint": DEFAULT_WAL_AUTOCHECKPOINT, **self.pragmas}
+        for statement in pragma_statements(restore, self._route_schemas(key)):
+            await conn.execute(statement)
+        await conn.execute("PRAGMA optimize")
+        cursor = await conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        await cursor.close()
+        logger.debug(f"SQLite bulk-load profile off{f' ({key})' if key else ''}")
+    
+    async def run_maintenance(self) -> Dict[str, Any]:
+        """Optimize, reclaim free pages and checkpoint the WAL of every open route.
+        
+        Routes in a bulk load or with an open write transaction are skipped
+        until the next run.
+        """
+        results: Dict[str, Any] = {}
+        for key, conn in list(self._writers.items()):
+            if key in self._bulk_routes or conn.in_transaction:
+                continue
+            route: Dict[str, Any] = {}
+            try:
+                for schema in self._route_schemas(key):
+                    route[schema] = await self._reclaim_free_pages(conn, schema)
+                await conn.execute("PRAGMA optimize")
+                cursor = await conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                busy, log_frames, checkpointed = await cursor.fetchone()
+                await cursor.close()
+                route["wal_checkpoint"] = {"busy": busy, "log_frames": log_frames, "checkpointed": checkpointed}
+            except Exception as e:
+                logger.warning(f"SQLite maintenance failed{f' ({key})' if key else ''}: {e}")
+                route["error"] = str(e)
+            results[key or "main"] = route
+        await self._close_idle_routes()
+        return results
+    
+    async def _reclaim_free_pages(self, conn: aiosqlite.Connection, schema: str) -> Dict[str, int]:
+        """Return free pages of one schema to the file system"""
+        async def pragma(name: str) -> int:
+            cursor = await conn.execute(f"PRAGMA {schema}.{name}")
+            row = await cursor.fetchone()
+            await cursor.close()
+            return row[0] if row else 0
+        
+        free_pages = await pragma("freelist_count")
+        page_count = await pragma("page_count")
+        auto_vacuum = await pragma("auto_vacuum")
+        freed = 0
+        
+        if free_pages and auto_vacuum == 2:
+            # incremental_vacuum frees one page per step and the sqlite3 cursor
+            # stops after the first; executescript steps it to completion
+            await conn.executescript(f"PRAGMA {schema}.incremental_vacuum;")
+            freed = free_pages - await pragma("freelist_count")
+        elif auto_vacuum == 0 and page_count and free_pages > page_count * VACUUM_FREE_RATIO:
+            # File created before incremental auto-vacuum: convert with one full VACUUM
+            await conn.execute(f"PRAGMA {schema}.auto_vacuum=INCREMENTAL")
+            await conn.execute(f"VACUUM {schema}")
+            freed = free_pages - await pragma("freelist_count")
+        
+        return {"free_pages": free_pages, "freed_pages": freed}
+    
+    # ==================== FINANCIAL-YEAR ARCHIVES ====================
+    
+    async def ensure_archive_tables(self) -> None:
+        """Create the archive registry (catalog) and the archived balance table"""
+        conn = await self._get_connection()
+        await conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {ARCHIVE_REGISTRY_TABLE} (
+                company_name TEXT NOT NULL,
+                fy_year INTEGER NOT NULL,
+                fy_start TEXT NOT NULL,
+                fy_end TEXT NOT NULL,
+                path TEXT NOT NULL,
+                voucher_count INTEGER DEFAULT 0,
+                archived_at TEXT,
+                PRIMARY KEY (company_name, fy_year)
+            )
+        """)
+        await conn.execute(self._route_ddl(f"""
+            CREATE TABLE IF NOT EXISTS {ARCHIVE_BALANCE_TABLE} (
+                _company TEXT NOT NULL DEFAULT '',
+                fy_year INTEGER NOT NULL,
+                fy_end TEXT NOT NULL,
+                ledger TEXT NOT NULL,
+                amount REAL DEFAULT 0,
+                debit REAL DEFAULT 0,
+                credit REAL DEFAULT 0,
+                amount_paise INTEGER DEFAULT 0,
+                PRIMARY KEY (_company, fy_year, ledger)
+            )
+        """))
+        await conn.execute(self._route_ddl(voucher_totals.ARCHIVED_TOTALS_DDL))
+        await conn.execute(self._route_ddl(monthly_cube.ARCHIVED_CUBE_DDL))
+        await conn.commit()
+        self._schema_changed()
+    
+    async def archive_closed_years(self, company_name: str, keep_years: int,
+                                   replace: bool = False) -> Dict[int, int]:
+        """Archive every closed financial year older than the last keep_years.
+        
+        Args:
+            company_name: Company to archive
+            keep_years: Financial years that stay hot, current year included
+            replace: Rebuild each year's archive from the hot rows (after a
+                     full sync reloaded the year) instead of merging into it
+        
+        Returns:
+            Vouchers archived per financial year
+        """
+        with company_scope(company_name):
+            first_date = await self.fetch_scalar(
+                "SELECT MIN(date) FROM trn_voucher WHERE _company = ?", (company_name,)
+            )
+            archived = {}
+            for year in archivable_years(first_date, keep_years):
+                # Only rebuild years the full sync reloaded from their first day
+                reloaded = replace and config.tally.from_date <= financial_year_range(year)[0]
+                count = await self.archive_financial_year(company_name, year, reloaded)
+                if count:
+                    archived[year] = count
+        return archived
+    
+    async def archive_financial_year(self, company_name: str, year: int, replace: bool = False) -> int:
+        """Move one financial year's settled vouchers into its archive file
+        
+        Returns:
+            Vouchers moved from the hot tables
+        """
+        fy_start, fy_end = financial_year_range(year)
+        path = archive_file_path(company_name, year)
+        
+        with company_scope(company_name):
+            conn = await self._get_connection()
+            hot = COMPANY_SCHEMA if self._route_key() else "main"
+            
+            await conn.execute("DROP TABLE IF EXISTS temp._archive_guids")
+            await conn.execute("CREATE TEMP TABLE _archive_guids (guid TEXT PRIMARY KEY)")
+            await conn.execute(f"""
+                WITH open_bills AS (
+                    -- Bills with a pending balance, unknown bill type, rows outside the
+                    -- year (a settlement in a later year) or an opening allocation
+                    SELECT b.ledger, b.name FROM {hot}.trn_bill b
+                    LEFT JOIN {hot}.trn_voucher bv ON bv.guid = b.guid AND bv._company = b._company
+                    WHERE b._company = ? AND b.name != ''
+                    GROUP BY b.ledger, b.name
+                    HAVING SUM(CASE WHEN b.billtype IN ('New Ref', 'Agst Ref') THEN 0 ELSE 1 END) > 0
+                        OR ABS(SUM(CASE WHEN b.billtype = 'New Ref' THEN ABS(b.amount) ELSE -ABS(b.amount) END)) > 0.005
+                        OR SUM(CASE WHEN bv.date BETWEEN ? AND ? THEN 0 ELSE 1 END) > 0
+                    UNION
+                    SELECT ledger, name FROM {hot}.mst_opening_bill_allocation
+                    WHERE _company = ? AND name != ''
+                )
+                INSERT INTO temp._archive_guids (guid)
+                SELECT DISTINCT v.guid FROM {hot}.trn_voucher v
+                WHERE v._company = ? AND v.date BETWEEN ? AND ?
+                  AND NOT EXISTS (
+                      SELECT 1 FROM {hot}.trn_bill b
+                      JOIN open_bills o ON o.ledger = b.ledger AND o.name = b.name
+                      WHERE b.guid = v.guid AND b._company = v._company
+                  )
+            """, (company_name, fy_start, fy_end, company_name, company_name, fy_start, fy_end))
+            await conn.commit()
+            
+            cursor = await conn.execute("SELECT COUNT(*) FROM temp._archive_guids")
+            moved = (await cursor.fetchone())[0]
+            await cursor.close()
+            if not moved and not path.exists():
+                await conn.execute("DROP TABLE temp._archive_guids")
+                return 0
+            
+            path.parent.mkdir(parents=True, exist_ok=True)
+            new_file = not path.exists()
+            await conn.execute("ATTACH DATABASE ? AS archive", (str(path),))
+            try:
+                if new_file:
+                    await self._init_new_file(conn, "archive")
+                
+                tables = {}
+                for table in ARCHIVE_TABLES:
+                    columns = await self._schema_columns(conn, hot, table)
+                    if not columns:
+                        continue
+                    await conn.execute(
+                        f"CREATE TABLE IF NOT EXISTS archive.{table} AS SELECT * FROM {hot}.{table} WHERE 0"
+                    )
+                    archived_columns = await self._schema_columns(conn, "archive", table)
+                    for column in columns:
+                        if column not in archived_columns:
+                            await conn.execute(f"ALTER TABLE archive.{table} ADD COLUMN {column}")
+                    await conn.execute(f"CREATE INDEX IF NOT EXISTS archive.idx_{table}_guid ON {table}(guid)")
+                    tables[table] = ", ".join(columns)
+                
+                selected = "guid IN (SELECT guid FROM temp._archive_guids)"
+                # Archived copies of vouchers that are hot again (re-synced or reopened)
+                resynced = (f"guid IN (SELECT guid FROM {hot}.trn_voucher "
+                            f"WHERE _company = ? AND date BETWEEN ? AND ?)")
+                for table, columns in tables.items():
+                    if replace:
+                        await conn.execute(f"DELETE FROM archive.{table} WHERE _company = ?", (company_name,))
+                    else:
+                        await conn.execute(f"DELETE FROM archive.{table} WHERE _company = ? AND {resynced}",
+                                           (company_name, company_name, fy_start, fy_end))
+                    await conn.execute(
+                        f"INSERT INTO archive.{table} ({columns}) SELECT {columns} FROM {hot}.{table} "
+                        f"WHERE _company = ? AND {selected}", (company_name,)
+                    )
+                    await conn.execute(f"DELETE FROM {hot}.{table} WHERE _company = ? AND {selected}",
+                                       (company_name,))
+                
+                # Carry-forward totals over everything archived for the year
+                await conn.execute(
+                    f"DELETE FROM {ARCHIVE_BALANCE_TABLE} WHERE _company = ? AND fy_year = ?",
+                    (company_name, year)
+                )
+                await conn.execute(f"""
+                    INSERT INTO {ARCHIVE_BALANCE_TABLE}
+                        (_company, fy_year, fy_end, ledger, amount, debit, credit, amount_paise)
+                    SELECT ?, ?, ?, ledger,
+                        COALESCE(SUM(amount), 0),
+                        COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0),
+                        COALESCE(SUM(CASE WHEN amount < 0 THEN ABS(amount) ELSE 0 END), 0),
+                        COALESCE(SUM(CAST(ROUND(amount * 100) AS INTEGER)), 0)
+                    FROM archive.trn_accounting
+                    WHERE _company = ?
+                    GROUP BY ledger
+                """, (company_name, year, fy_end, company_name))
+                # Voucher list totals and cube cells of the archived vouchers
+                for module in (voucher_totals, monthly_cube):
+                    for query, params in module.archive_statements("archive.", company_name, year,
+                                                                   self.paise_amounts):
+                        await conn.execute(query, params)
+                
+                cursor = await conn.execute(
+                    "SELECT COUNT(*) FROM archive.trn_voucher WHERE _company = ?", (company_name,)
+                )
+                voucher_count = (await cursor.fetchone())[0]
+                await cursor.close()
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+            finally:
+                await conn.execute("DETACH DATABASE archive")
+                await conn.execute("DROP TABLE IF EXISTS temp._archive_guids")
+        
+        await self._execute_catalog(
+            f"INSERT OR REPLACE INTO {ARCHIVE_REGISTRY_TABLE} "
+            "(company_name, fy_year, fy_start, fy_end, path, voucher_count, archived_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (company_name, year, fy_start, fy_end, str(path), voucher_count, datetime.now().isoformat())
+        )
+        
+        if moved:
+            # Archive files are written once per sync and read rarely: keep them compact
+            async with aiosqlite.connect(str(path)) as archive:
+                await archive.execute("VACUUM")
+            logger.info(f"Archived FY {year}-{str(year + 1)[2:]} of '{company_name}': "
+                        f"{moved} vouchers moved, {voucher_count} in archive")
+        return moved
+    
+    async def _schema_columns(self, conn: aiosqlite.Connection, schema: str, table_name: str) -> List[str]:
+        """Column names of a table in one attached schema"""
+        cursor = await conn.execute("SELECT name FROM pragma_table_info(?, ?) ORDER BY cid", (table_name, schema))
+        rows = await cursor.fetchall()
+        await cursor.close()
+        return [row[0] for row in rows]
+    
+    async def get_archived_years(self, company_name: str) -> List[int]:
+        """Financial years of a company held in archive files"""
+        if not await self.table_exists(ARCHIVE_REGISTRY_TABLE):
+            return []
+        company_name = company_name or get_active_company() or config.tally.company or ''
+        rows = await self.fetch_all(
+            f"SELECT fy_year FROM {ARCHIVE_REGISTRY_TABLE} WHERE company_name = ? ORDER BY fy_year",
+            (company_name,)
+        )
+        return [row['fy_year'] for row in rows]
+    
+    async def fetch_all_archived(self, query: str, params: Tuple = (), from_date: str = None,
+                                 to_date: str = None, company_name: str = None) -> List[Dict[str, Any]]:
+        """Fetch rows including archived years that overlap [from_date, to_date].
+        
+        The needed year files are attached to a dedicated read connection and
+        each trn_* table is shadowed by a TEMP view over hot and archived rows,
+        so the query text runs unchanged. Without overlapping archives the
+        query goes to the normal reader pool.
+        """
+        rows = []
+        async for chunk in self.fetch_chunks_archived(query, params, from_date, to_date, company_name,
+                                                      chunk_size=config.api.export_chunk_size):
+            rows.extend(chunk)
+        return rows
+    
+    async def fetch_chunks_archived(self, query: str, params: Tuple = (), from_date: str = None,
+                                    to_date: str = None, company_name: str = None,
+                                    chunk_size: int = 5000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """fetch_chunks() including archived years that overlap [from_date, to_date]"""
+        company = company_name or get_active_company() or config.tally.company or ''
+        years = overlapping_years(await self.get_archived_years(company), from_date, to_date)
+        if not years:
+            async for chunk in self.fetch_chunks(query, params, chunk_size):
+                yield chunk
+            return
+        if len(years) > MAX_ATTACHED_ARCHIVES:
+            raise ValueError(f"Date range spans {len(years)} archived financial years "
+                             f"(at most {MAX_ATTACHED_ARCHIVES} per query)")
+        
+        with company_scope(company):
+            key = self._route_key()
+        async with self._dedicated_reader(key) as conn:
+            try:
+                hot = COMPANY_SCHEMA if key else "main"
+                for year in years:
+                    await conn.execute(f"ATTACH DATABASE ? AS fy_{year}",
+                                       (f"{archive_file_path(company, year).resolve().as_uri()}?mode=ro",))
+                
+                for table in ARCHIVE_TABLES:
+                    columns = await self._schema_columns(conn, hot, table)
+                    if not columns:
+                        continue
+                    row_id = "rowid AS rowid, " if table in ROW_ID_TABLES else ""
+                    parts = [f"SELECT {row_id}{', '.join(columns)} FROM {hot}.{table}"]
+                    for year in years:
+                        archived_columns = await self._schema_columns(conn, f"fy_{year}", table)
+                        if archived_columns:
+                            select = ", ".join(c if c in archived_columns else f"NULL AS {c}" for c in columns)
+                            parts.append(f"SELECT {row_id}{select} FROM fy_{year}.{table}")
+                    await conn.execute(f"CREATE TEMP VIEW {table} AS {' UNION ALL '.join(parts)}")
+                
+                async for chunk in self._cursor_chunks(conn, query, params, chunk_size):
+                    yield chunk
+            except Exception as e:
+                logger.error(f"Archived fetch failed: {e}")
+                raise
+    
+    async def _drop_archives(self, company_name: str) -> None:
+        """Remove a company's archive files and registry entries"""
+        shutil.rmtree(company_archive_dir(company_name), ignore_errors=True)
+        if await self.table_exists(ARCHIVE_REGISTRY_TABLE):
+            await self._execute_catalog(
+                f"DELETE FROM {ARCHIVE_REGISTRY_TABLE} WHERE company_name = ?", (company_name,)
+            )
+        if not self.per_company_files:
+            for table in (ARCHIVE_BALANCE_TABLE, voucher_totals.ARCHIVED_TOTALS_TABLE,
+                          monthly_cube.ARCHIVED_CUBE_TABLE):
+                if await self.table_exists(table):
+                    await self.execute(f"DELETE FROM {table} WHERE _company = ?", (company_name,))
+    
     async def initialize_schema(self) -> None:
         """Create all required tables"""
         await self.create_tables()
@@ -265,12 +1027,17 @@ class SQLiteDatabaseService(BaseDatabaseService):
             statements = [s.strip() for s in schema_sql.split(';') if s.strip()]
             for stmt in statements:
                 if stmt.strip():
-                    await conn.execute(stmt)
+                    await conn.execute(self._route_ddl(stmt))
             await conn.commit()
+            self._schema_changed()
             logger.info("Database tables created successfully")
             
             await self._ensure_company_column_exists()
+            await self.ensure_surrogate_key_schema()
+            await self.ensure_paise_columns()
+            await self.ensure_archive_tables()
             await self.ensure_audit_tables()
+            await self.ensure_indexes()
         except Exception as e:
             logger.error(f"Failed to create tables: {e}")
             raise
@@ -278,33 +1045,70 @@ class SQLiteDatabaseService(BaseDatabaseService):
     async def _ensure_company_column_exists(self) -> None:
         """Add _company column to all tables"""
         conn = await self._get_connection()
+        catalog = await self._get_catalog()
         
         for table in ALL_TABLES:
             try:
-                cursor = await conn.execute(f"PRAGMA table_info({table})")
-                columns = await cursor.fetchall()
-                column_names = [col[1] for col in columns]
-                
-                if "_company" not in column_names:
+                if catalog.table_exists(table) and not catalog.has_column(table, "_company"):
                     await conn.execute(f"ALTER TABLE {table} ADD COLUMN _company TEXT DEFAULT ''")
+                    catalog.add_columns(table, ["_company"])
             except Exception as e:
                 logger.debug(f"Could not add _company to {table}: {e}")
         
         await conn.commit()
     
+    async def ensure_surrogate_key_schema(self) -> None:
+        """Create key_dictionary and the integer id columns"""
+        conn = await self._get_connection()
+        await conn.execute(self._route_ddl(f"""
+            CREATE TABLE IF NOT EXISTS {KEY_DICTIONARY_TABLE} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                company_name TEXT NOT NULL DEFAULT '',
+                key_value TEXT NOT NULL
+            )
+        """))
+        self._schema_changed()
+        catalog = await self._get_catalog()
+        
+        for table in KEYED_TABLES:
+            if not catalog.table_exists(table):
+                continue
+            for column in catalog.missing_columns(table, id_columns(table)):
+                await conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER")
+                catalog.add_columns(table, [column])
+        
+        await conn.commit()
+    
+    async def ensure_paise_columns(self) -> None:
+        """Create integer paise columns and fill them for rows loaded without them"""
+        if not self.paise_amounts:
+            return
+        conn = await self._get_connection()
+        catalog = await self._get_catalog()
+        
+        for table in PAISE_COLUMNS:
+            if not catalog.table_exists(table):
+                continue
+            for column in catalog.missing_columns(table, paise_columns(table)):
+                await conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER")
+                catalog.add_columns(table, [column])
+            for statement in backfill_statements(table):
+                await conn.execute(statement)
+        
+        await conn.commit()
+    
     async def ensure_alterid_column_exists(self) -> None:
         """Add alterid column to all tables for incremental sync support"""
         conn = await self._get_connection()
+        catalog = await self._get_catalog()
         added_count = 0
         
         for table in ALL_TABLES:
             try:
-                cursor = await conn.execute(f"PRAGMA table_info({table})")
-                columns = await cursor.fetchall()
-                column_names = [col[1] for col in columns]
-                
-                if "alterid" not in column_names:
+                if catalog.table_exists(table) and not catalog.has_column(table, "alterid"):
                     await conn.execute(f"ALTER TABLE {table} ADD COLUMN alterid INTEGER DEFAULT 0")
+                    catalog.add_columns(table, ["alterid"])
                     added_count += 1
                     logger.debug(f"Added alterid column to {table}")
             except Exception as e:
@@ -316,21 +1120,55 @@ class SQLiteDatabaseService(BaseDatabaseService):
     
     async def _ensure_columns_exist(self, table_name: str, columns: List[str]) -> None:
         """Auto-add missing columns to table"""
-        conn = await self._get_connection()
+        catalog = await self._get_catalog()
+        missing = catalog.missing_columns(table_name, columns)
+        if not missing:
+            return
         
+        conn = await self._get_connection()
         try:
-            cursor = await conn.execute(f"PRAGMA table_info({table_name})")
-            existing_columns = await cursor.fetchall()
-            existing_column_names = [col[1] for col in existing_columns]
-            
-            for col in columns:
-                if col not in existing_column_names:
-                    await conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {col} TEXT DEFAULT ''")
+            for col in missing:
+                await conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {col} TEXT DEFAULT ''")
+                catalog.add_columns(table_name, [col])
             
             await conn.commit()
+            self._schema_generation += 1
         except Exception as e:
             logger.warning(f"Could not ensure columns for {table_name}: {e}")
     
+    async def ensure_indexes(self) -> int:
+        """Create secondary indexes from the index specification"""
+        conn = await self._get_connection()
+        catalog = await self._get_catalog()
+        created = 0
+        
+        for spec in applicable_indexes(catalog):
+            try:
+                await conn.execute(self._route_ddl(
+                    f"CREATE INDEX IF NOT EXISTS {spec.name} ON {spec.table}({', '.join(spec.columns)})"
+                ))
+                created += 1
+            except Exception as e:
+                logger.warning(f"Could not create index {spec.name}: {e}")
+        
+        await conn.commit()
+        self._schema_changed()
+        logger.debug(f"Ensured {created} secondary indexes")
+        return created
+    
+    async def verify_indexes(self) -> List[str]:
+        """Return names of specified indexes missing from the database"""
+        catalog = await self._get_catalog()
+        async with self._read_connection() as conn:
+            cursor = await conn.execute("SELECT name FROM pragma_database_list WHERE name != 'temp'")
+            schemas = [row[0] for row in await cursor.fetchall()]
+            cursor = await conn.execute(" UNION ".join(
+                f"SELECT name FROM {schema}.sqlite_master WHERE type = 'index'" for schema in schemas
+            ))
+            existing = {row[0] for row in await cursor.fetchall()}
+            await cursor.close()
+        return [spec.name for spec in applicable_indexes(catalog) if spec.name not in existing]
+    
     async def ensure_audit_tables(self) -> None:
         """Create audit trail tables"""
         conn = await self._get_connection()
@@ -391,6 +1229,7 @@ class SQLiteDatabaseService(BaseDatabaseService):
             """)
             
             await conn.commit()
+            self._schema_changed()
         except Exception as e:
             logger.error(f"Failed to create audit tables: {e}")
     
@@ -438,8 +1277,21 @@ class SQLiteDatabaseService(BaseDatabaseService):
                 )
             ''')
             
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS table_stats (
+                    table_name TEXT NOT NULL,
+                    company_name TEXT NOT NULL DEFAULT '',
+                    row_count INTEGER DEFAULT 0,
+                    bytes_estimate INTEGER DEFAULT 0,
+                    last_sync_at TEXT,
+                    counted_at TEXT,
+                    PRIMARY KEY (table_name, company_name)
+                )
+            ''')
+            
             await conn.execute('CREATE INDEX IF NOT EXISTS idx_company_config_name ON company_config(company_name)')
             await conn.commit()
+            self._schema_changed()
         except Exception as e:
             logger.warning(f"Could not ensure company_config table: {e}")
     
@@ -507,27 +1359,49 @@ class SQLiteDatabaseService(BaseDatabaseService):
             logger.error(f"Failed to get synced companies: {e}")
             return []
     
+    async def _reset_company_file(self, company_name: str) -> None:
+        """Replace a company's database file with an empty one (full resync)"""
+        with company_scope(company_name):
+            await self._close_route(company_name)
+            self._remove_company_file(company_name)
+            await self.create_tables()
+        logger.info(f"Reset database file for company: {company_name}")
+    
+    def _remove_company_file(self, company_name: str) -> None:
+        """Delete a company's database file and its WAL/SHM side files"""
+        company_file = company_file_path(company_name)
+        for path in (company_file, Path(f"{company_file}-wal"), Path(f"{company_file}-shm")):
+            if path.exists():
+                path.unlink()
+    
     async def delete_company_data(self, company_name: str) -> int:
         """Delete all data for a specific company"""
+        if self.per_company_files:
+            counts = await self.get_all_table_counts(company_name)
+            await self._close_route(company_name)
+            self._remove_company_file(company_name)
+            await self._execute_catalog(
+                "DELETE FROM company_config WHERE company_name = ?",
+                (company_name,)
+            )
+            await self._run_transaction(
+                await self._get_connection(''), self._table_stats_statements(company_name, [])
+            )
+            await self._drop_archives(company_name)
+            total_deleted = sum(counts.values()) + 1
+            logger.info(f"Deleted company file for '{company_name}': {total_deleted} total rows")
+            return total_deleted
+        
         conn = await self._get_connection()
         total_deleted = 0
         
         try:
             for table in ALL_TABLES:
                 try:
-                    cursor = await conn.execute(
-                        "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=?",
-                        (table,)
-                    )
-                    row = await cursor.fetchone()
-                    if not row or row[0] == 0:
+                    if not await self.table_exists(table):
                         continue
                     
-                    cursor = await conn.execute(f"PRAGMA table_info({table})")
-                    columns = await cursor.fetchall()
-                    column_names = [col[1] for col in columns]
-                    
-                    if "_company" in column_names:
+                    if await self._has_column(table, "_company"):
                         cursor = await conn.execute(
                             f"SELECT COUNT(*) FROM {table} WHERE _company = ?",
                             (company_name,)
@@ -550,6 +1424,10 @@ class SQLiteDatabaseService(BaseDatabaseService):
             total_deleted += 1
             
             await conn.commit()
+            await self.clear_table_stats(company_name)
+            await self.clear_surrogate_keys(company_name)
+            await self.clear_derived_tables(company_name)
+            await self._drop_archives(company_name)
             logger.info(f"Deleted company '{company_name}': {total_deleted} total rows")
             return total_deleted
             
@@ -0,0 +1,97 @@
+"""
+SQLite Profiles
+===============
+Named PRAGMA profiles for the SQLite adapter.
+
+The writer and reader connections apply the configured profile when they
+open. `database.sqlite_pragmas` overrides individual settings of the
+profile. Full sync switches the writer to BULK_LOAD_PRAGMAS for the data
+load and restores the profile afterwards.
+
+PROFILES:
+---------
+- balanced     64 MB page cache, 256 MB mmap (default)
+- read_heavy   256 MB page cache, 1 GB mmap, for large report workloads
+- low_memory   8 MB page cache, no mmap, temp tables on disk
+
+New database files are created with `database.page_size` and
+auto_vacuum=INCREMENTAL so the maintenance job can return free pages to
+the file system after deletes and resyncs.
+
+Configuration (config.yaml):
+    database:
+      sqlite_profile: read_heavy
+      sqlite_pragmas:
+        mmap_size: 0
+      page_size: 8192
+      maintenance_interval: 30     # minutes, 0 = off
+"""
+
+from typing import Any, Dict, List, Optional
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "balanced": {
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "synchronous": "NORMAL",
+    },
+    "read_heavy": {
+        "cache_size": -256000,
+        "mmap_size": 1073741824,
+        "temp_store": "MEMORY",
+        "synchronous": "NORMAL",
+    },
+    "low_memory": {
+        "cache_size": -8000,
+        "mmap_size": 0,
+        "temp_store": "FILE",
+        "synchronous": "NORMAL",
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+
+# Writer settings while a full sync loads data. A crash mid-load can lose
+# the last transactions, which the full sync rewrites anyway.
+BULK_LOAD_PRAGMAS: Dict[str, Any] = {
+    "synchronous": "OFF",
+    "cache_size": -512000,
+    "wal_autocheckpoint": 10000,
+}
+
+# wal_autocheckpoint default, restored after bulk load
+DEFAULT_WAL_AUTOCHECKPOINT = 1000
+
+# PRAGMAs that apply to one schema and must be repeated for attached files
+PER_SCHEMA_PRAGMAS = {"cache_size", "mmap_size", "synchronous"}
+
+# Settings only meaningful on the writer
+WRITER_ONLY_PRAGMAS = {"synchronous", "wal_autocheckpoint"}
+
+_ALLOWED = {"cache_size", "mmap_size", "temp_store", "synchronous", "wal_autocheckpoint"}
+
+
+def resolve_profile(name: str, overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """PRAGMA settings of a named profile with per-setting overrides applied"""
+    if name not in PROFILES:
+        raise ValueError(f"Unknown SQLite profile '{name}' (expected one of: {', '.join(PROFILES)})")
+    pragmas = dict(PROFILES[name])
+    for key, value in (overrides or {}).items():
+        if key not in _ALLOWED:
+            raise ValueError(f"Unsupported SQLite PRAGMA override: {key}")
+        pragmas[key] = value
+    return pragmas
+
+
+def pragma_statements(pragmas: Dict[str, Any], schemas: List[str], writer: bool = True) -> List[str]:
+    """PRAGMA statements for a connection with the given attached schemas"""
+    statements = []
+    for key, value in pragmas.items():
+        if not writer and key in WRITER_ONLY_PRAGMAS:
+            continue
+        if key in PER_SCHEMA_PRAGMAS:
+            statements += [f"PRAGMA {schema}.{key}={value}" for schema in schemas]
+        else:
+            statements.append(f"PRAGMA {key}={value}")
+    return statements
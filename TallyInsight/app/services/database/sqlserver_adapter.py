@@ -25,6 +25,7 @@ import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
 from .base import BaseDatabaseService
+from .surrogate_keys import KEY_DICTIONARY_TABLE, KEYED_TABLES, id_columns
 from ...config import config
 from ...utils.logger import logger
 from ...utils.decorators import timed
@@ -114,6 +115,48 @@ class SQLServerDatabaseService(BaseDatabaseService):
             logger.error(f"Query execution failed: {e}\nQuery: {query[:200]}...")
             raise
     
+    async def execute_insert(self, query: str, params: Tuple = ()) -> int:
+        """Execute an INSERT and return the new IDENTITY value"""
+        if not self._connection:
+            await self.connect()
+        
+        def _insert():
+            cursor = self._connection.cursor()
+            cursor.execute(f"SET NOCOUNT ON; {query.strip()}; SELECT CAST(SCOPE_IDENTITY() AS INT)", params)
+            row = cursor.fetchone()
+            self._connection.commit()
+            return row[0] if row and row[0] is not None else 0
+        
+        try:
+            return await self._run_sync(_insert)
+        except Exception as e:
+            logger.error(f"Insert failed: {e}\nQuery: {query[:200]}...")
+            raise
+    
+    async def execute_transaction(self, statements: List[Tuple[str, Any]]) -> None:
+        """Run write statements in one transaction (the connection does not autocommit)"""
+        if not self._connection:
+            await self.connect()
+        
+        def _execute():
+            cursor = self._connection.cursor()
+            try:
+                for query, params in statements:
+                    if isinstance(params, list):
+                        cursor.executemany(query, params)
+                    else:
+                        cursor.execute(query, params)
+                self._connection.commit()
+            except Exception:
+                self._connection.rollback()
+                raise
+        
+        try:
+            await self._run_sync(_execute)
+        except Exception as e:
+            logger.error(f"Transaction failed: {e}")
+            raise
+    
     async def fetch_all(self, query: str, params: Tuple = ()) -> List[Dict[str, Any]]:
         """Fetch all rows from query"""
         if not self._connection:
@@ -317,6 +360,7 @@ class SQLServerDatabaseService(BaseDatabaseService):
             await self._run_sync(_create)
             logger.info("Database tables created successfully")
             await self._ensure_company_column_exists()
+            await self.ensure_surrogate_key_schema()
             await self.ensure_audit_tables()
         except Exception as e:
             logger.error(f"Failed to create tables: {e}")
@@ -333,6 +377,25 @@ class SQLServerDatabaseService(BaseDatabaseService):
                 except:
                     pass
     
+    async def ensure_surrogate_key_schema(self) -> None:
+        """Create key_dictionary and the integer id columns"""
+        await self.execute(f"""
+        IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = '{KEY_DICTIONARY_TABLE}')
+        CREATE TABLE {KEY_DICTIONARY_TABLE} (
+            id BIGINT IDENTITY(1,1) PRIMARY KEY,
+            kind NVARCHAR(16) NOT NULL,
+            company_name NVARCHAR(256) NOT NULL DEFAULT '',
+            key_value NVARCHAR(1024) NOT NULL
+        )
+        """)
+        
+        for table in KEYED_TABLES:
+            if not await self.table_exists(table):
+                continue
+            for column in id_columns(table):
+                if not await self._has_column(table, column):
+                    await self.execute(f"ALTER TABLE [{table}] ADD [{column}] BIGINT")
+    
     async def ensure_audit_tables(self) -> None:
         """Create audit trail tables"""
         audit_sql = """
@@ -392,6 +455,18 @@ class SQLServerDatabaseService(BaseDatabaseService):
                 IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = '_delete')
                 CREATE TABLE _delete (guid NVARCHAR(100) PRIMARY KEY)
             """)
+            await self.execute("""
+                IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'table_stats')
+                CREATE TABLE table_stats (
+                    table_name NVARCHAR(100) NOT NULL,
+                    company_name NVARCHAR(256) NOT NULL DEFAULT '',
+                    row_count BIGINT DEFAULT 0,
+                    bytes_estimate BIGINT DEFAULT 0,
+                    last_sync_at NVARCHAR(40),
+                    counted_at NVARCHAR(40),
+                    PRIMARY KEY (table_name, company_name)
+                )
+            """)
         except Exception as e:
             logger.warning(f"Could not ensure company_config table: {e}")
     
@@ -511,6 +586,9 @@ class SQLServerDatabaseService(BaseDatabaseService):
             (company_name,)
         )
         total_deleted += 1
+        await self.clear_table_stats(company_name)
+        await self.clear_surrogate_keys(company_name)
+        await self.clear_derived_tables(company_name)
         
         logger.info(f"Deleted company '{company_name}': {total_deleted} total rows")
         return total_deleted
@@ -0,0 +1,65 @@
+"""
+Surrogate Keys
+==============
+Integer ids for the text keys that transaction tables repeat on every row.
+
+Tally references ledgers and stock items by name and vouchers by guid, so
+trn_accounting / trn_bill / trn_inventory rows carry those strings and
+every report joins on them. After each sync the adapter assigns integer
+ids from a per-database dictionary table and stores them next to the text
+keys:
+
+    key_dictionary(id, kind, company_name, key_value)
+
+    mst_ledger.name        -> _ledger_id      trn_accounting.ledger -> _ledger_id
+    mst_stock_item.name    -> _item_id        trn_bill.ledger       -> _ledger_id
+    trn_voucher.guid       -> _voucher_id     trn_inventory.item    -> _item_id
+    <table>._company       -> _company_id     trn_*.guid            -> _voucher_id
+
+Ids are allocated once per (kind, company, key) and never reused, so a
+row keeps its id across incremental syncs. Transaction rows are only
+filled where the id is still NULL (new or re-imported rows); master rows
+are re-resolved on every run because ledger and item names can change.
+
+The text columns stay in place: exports, filters by name and the Tally
+schema still use them. Report joins use the integer columns, so a row
+without its ids drops out of the reports: the sync assigns them before it
+marks itself completed and fails when assignment fails.
+"""
+
+from typing import List, NamedTuple
+
+KEY_DICTIONARY_TABLE = "key_dictionary"
+
+
+class KeyReference(NamedTuple):
+    """Text key column resolved to an integer id column"""
+    table: str
+    column: str
+    kind: str
+    id_column: str
+    refresh: bool = False  # re-resolve every row, not only unassigned ones
+
+
+# Tables that carry surrogate id columns
+KEYED_TABLES = ["mst_ledger", "mst_stock_item", "trn_voucher", "trn_accounting", "trn_bill", "trn_inventory"]
+
+KEY_REFERENCES: List[KeyReference] = (
+    [
+        KeyReference("mst_ledger", "name", "ledger", "_ledger_id", refresh=True),
+        KeyReference("mst_stock_item", "name", "item", "_item_id", refresh=True),
+        KeyReference("trn_voucher", "guid", "voucher", "_voucher_id"),
+        KeyReference("trn_accounting", "guid", "voucher", "_voucher_id"),
+        KeyReference("trn_accounting", "ledger", "ledger", "_ledger_id"),
+        KeyReference("trn_bill", "guid", "voucher", "_voucher_id"),
+        KeyReference("trn_bill", "ledger", "ledger", "_ledger_id"),
+        KeyReference("trn_inventory", "guid", "voucher", "_voucher_id"),
+        KeyReference("trn_inventory", "item", "item", "_item_id"),
+    ]
+    + [KeyReference(table, "_company", "company", "_company_id") for table in KEYED_TABLES]
+)
+
+
+def id_columns(table_name: str) -> List[str]:
+    """Integer id columns a table carries"""
+    return [ref.id_column for ref in KEY_REFERENCES if ref.table == table_name]
@@ -0,0 +1,126 @@
+"""
+Voucher Totals
+==============
+Per-voucher totals of the accounting entries, for the voucher list.
+
+/vouchers showed each voucher's amount through a correlated subquery on
+trn_accounting per returned row, so it could neither filter nor sort by
+amount. The sync instead rebuilds, per company, one row per voucher:
+
+    voucher_totals(_voucher_id, _company,
+                   debit_total   sum of debit entries (negative amounts, as positive)
+                   credit_total  sum of credit entries
+                   party_amount  entries of the voucher's party ledger (NULL if none)
+                   amount        party_amount, else debit_total - the list amount
+                   line_count    accounting entries)
+
+The list joins it on _voucher_id, which surrogate_keys.py keeps stable
+across incremental syncs. Vouchers moved to archive files (fy_archive.py)
+keep their totals: the archive run stores them in archive_voucher_totals
+and each rebuild adds them back.
+"""
+
+from typing import List, Tuple
+
+VOUCHER_TOTALS_TABLE = "voucher_totals"
+
+# Totals of vouchers moved to archive files, per financial year (fy_archive.py);
+# merged into voucher_totals at each rebuild
+ARCHIVED_TOTALS_TABLE = "archive_voucher_totals"
+
+VOUCHER_TOTALS_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {VOUCHER_TOTALS_TABLE} (
+        _voucher_id INTEGER PRIMARY KEY,
+        _company TEXT NOT NULL DEFAULT '',
+        debit_total REAL DEFAULT 0,
+        credit_total REAL DEFAULT 0,
+        party_amount REAL,
+        amount REAL DEFAULT 0,
+        line_count INTEGER DEFAULT 0
+    )
+"""
+
+ARCHIVED_TOTALS_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {ARCHIVED_TOTALS_TABLE} (
+        _voucher_id INTEGER PRIMARY KEY,
+        _company TEXT NOT NULL DEFAULT '',
+        fy_year INTEGER NOT NULL,
+        debit_total REAL DEFAULT 0,
+        credit_total REAL DEFAULT 0,
+        party_amount REAL,
+        amount REAL DEFAULT 0,
+        line_count INTEGER DEFAULT 0
+    )
+"""
+
+VOUCHER_TOTALS_INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS idx_voucher_totals_amount ON {VOUCHER_TOTALS_TABLE}(_company, amount)",
+]
+
+_COLUMNS = "_voucher_id, _company, debit_total, credit_total, party_amount, amount, line_count"
+
+# One aggregation per voucher; paise columns give exact sums when present.
+# {schema} qualifies the trn_* tables (archive files).
+_TOTALS_SQL = """
+    SELECT
+        _voucher_id, _company, debit_total, credit_total, party_amount,
+        COALESCE(party_amount, debit_total) AS amount, line_count
+    FROM (
+        SELECT
+            v._voucher_id, v._company,
+            {debit_sum} AS debit_total,
+            {credit_sum} AS credit_total,
+            ABS(SUM(CASE WHEN a.ledger = v.party_name THEN {amount} END)) AS party_amount,
+            COUNT(*) AS line_count
+        FROM {schema}trn_voucher v
+        JOIN {schema}trn_accounting a ON a._voucher_id = v._voucher_id
+        WHERE v._voucher_id IS NOT NULL{company_filter}
+        GROUP BY v._voucher_id, v._company
+    ) totals
+"""
+
+
+def _totals_sql(schema: str, company_filter: str, paise: bool) -> str:
+    if paise:
+        sums = dict(debit_sum="COALESCE(SUM(a.debit_paise), 0) / 100.0",
+                    credit_sum="COALESCE(SUM(a.credit_paise), 0) / 100.0",
+                    amount="a.amount_paise / 100.0")
+    else:
+        sums = dict(debit_sum="COALESCE(SUM(CASE WHEN a.amount < 0 THEN -a.amount ELSE 0 END), 0)",
+                    credit_sum="COALESCE(SUM(CASE WHEN a.amount > 0 THEN a.amount ELSE 0 END), 0)",
+                    amount="a.amount")
+    return _TOTALS_SQL.format(schema=schema, company_filter=company_filter, **sums)
+
+
+def refresh_statements(company_name: str = None, paise: bool = False,
+                       archived: bool = False) -> List[Tuple[str, Tuple]]:
+    """DELETE + INSERT statements rebuilding one company's voucher totals (all if None).
+    
+    With `archived`, the totals of archived vouchers are added back (SQLite only).
+    """
+    company_filter = " AND v._company = ?" if company_name else ""
+    params = (company_name,) if company_name else ()
+    statements = [
+        (f"DELETE FROM {VOUCHER_TOTALS_TABLE}{' WHERE _company = ?' if company_name else ''}", params),
+        (f"INSERT INTO {VOUCHER_TOTALS_TABLE} ({_COLUMNS}) {_totals_sql('', company_filter, paise)}", params),
+    ]
+    if archived:
+        # A voucher synced again after archiving is hot: its hot totals win
+        statements.append((
+            f"INSERT OR IGNORE INTO {VOUCHER_TOTALS_TABLE} ({_COLUMNS}) "
+            f"SELECT {_COLUMNS} FROM {ARCHIVED_TOTALS_TABLE}{' WHERE _company = ?' if company_name else ''}",
+            params
+        ))
+    return statements
+
+
+def archive_statements(schema: str, company_name: str, year: int,
+                       paise: bool = False) -> List[Tuple[str, Tuple]]:
+    """Statements storing the totals of a company's vouchers archived for a year
+    (`schema`: the attached archive file, e.g. 'archive.')"""
+    totals = _totals_sql(schema, " AND v._company = ?", paise)
+    return [
+        (f"DELETE FROM {ARCHIVED_TOTALS_TABLE} WHERE _company = ? AND fy_year = ?", (company_name, year)),
+        (f"INSERT OR REPLACE INTO {ARCHIVED_TOTALS_TABLE} (fy_year, {_COLUMNS}) "
+         f"SELECT ?, {_COLUMNS} FROM ({totals}) archived", (year, company_name)),
+    ]
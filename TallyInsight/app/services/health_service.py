@@ -71,6 +71,7 @@ class HealthService:
             size = await database_service.get_database_size()
             counts = await database_service.get_all_table_counts()
             total_rows = sum(counts.values())
+            missing_indexes = await database_service.verify_indexes()
             # Don't disconnect - sync may be using the connection
             
             return {
@@ -78,6 +79,7 @@ class HealthService:
                 'path': config.database.path,
                 'size_bytes': size,
                 'total_rows': total_rows,
+                'missing_indexes': missing_indexes,
                 'message': 'Connected'
             }
         except Exception as e:
@@ -0,0 +1,173 @@
+"""
+Response Cache Module
+Caches report responses until the company's data changes.
+
+Report data only changes when a sync completes, so GET responses of the
+report routers are kept in memory under
+
+    (path, normalized query params, company, data version)
+
+The data version combines an in-process generation, bumped by the sync
+service when a company's sync finishes (and when a company is deleted),
+with the company's last_sync_at / sync_count from company_config, so a
+sync run by another worker process changes the key as well. Requests
+without a company use the version of all companies. The date is part of
+the version too: reports default to "as of today".
+
+The ETag of a response is derived from its key: a client sending it back
+in If-None-Match gets 304 Not Modified while the data is unchanged, even
+after the entry itself was evicted.
+
+Entries are evicted least recently used first once the stored bodies
+exceed the size limit. Only 200 JSON responses are stored.
+
+Routers opt in with APIRouter(route_class=CachedRoute). Configuration
+(config.yaml):
+    api:
+      response_cache: true
+      response_cache_mb: 64
+"""
+
+import hashlib
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from ..config import config
+from ..utils.logger import logger
+from .database_service import database_service
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of report responses keyed by data version"""
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = max_bytes if max_bytes is not None else config.api.response_cache_mb * 1024 * 1024
+        self._entries: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+        self._bytes = 0
+        self._generations: Dict[str, int] = {}
+        self._generation = 0  # any change
+        self._resets = 0  # changes to all companies
+        self.hits = self.misses = self.not_modified = self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return config.api.response_cache and self.max_bytes > 0
+
+    def bump(self, company: Optional[str] = None) -> None:
+        """Mark a company's data as changed (all companies if None)"""
+        self._generation += 1
+        if company:
+            self._generations[company] = self._generations.get(company, 0) + 1
+        else:
+            self._resets += 1
+
+    async def data_version(self, company: Optional[str]) -> str:
+        """Current data version of a company ('' / None = all companies)"""
+        await database_service.connect()
+        today = date.today().isoformat()
+        if company:
+            row = await database_service.get_company_config(company) or {}
+            stamp = f"{row.get('last_sync_at')}/{row.get('sync_count')}"
+            return f"{today}:{self._resets}.{self._generations.get(company, 0)}:{stamp}"
+        stamp = ",".join(f"{row.get('company_name')}/{row.get('last_sync_at')}/{row.get('sync_count')}"
+                         for row in await database_service.get_synced_companies())
+        return f"{today}:{self._generation}:{stamp}"
+
+    @staticmethod
+    def make_key(path: str, params: Any, company: Optional[str], version: str) -> str:
+        """Cache key; parameter order and empty parameters do not matter"""
+        items = sorted((name, value) for name, value in params.multi_items() if value != "")
+        query = "&".join(f"{name}={value}" for name, value in items)
+        return f"{path}?{query}|{company or ''}|{version}"
+
+    @staticmethod
+    def etag(key: str) -> str:
+        return f'"{hashlib.sha1(key.encode("utf-8")).hexdigest()}"'
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, body: bytes, media_type: str) -> None:
+        if len(body) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key)[0])
+        self._entries[key] = (body, media_type)
+        self._bytes += len(body)
+        while self._bytes > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit / miss metrics and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+        }
+
+    async def respond(self, request: Request, handler: Callable) -> Response:
+        """Serve a GET request from the cache, or run the handler and store its response"""
+        company = request.query_params.get("company") or None
+        try:
+            version = await self.data_version(company)
+        except Exception as e:
+            logger.debug(f"Response cache bypassed, no data version: {e}")
+            return await handler(request)
+
+        key = self.make_key(request.url.path, request.query_params, company, version)
+        etag = self.etag(key)
+        if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+            self.not_modified += 1
+            return Response(status_code=304, headers={"ETag": etag})
+
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            body, media_type = entry
+            return Response(content=body, media_type=media_type, headers={"ETag": etag, "X-Cache": "HIT"})
+
+        self.misses += 1
+        response = await handler(request)
+        body = getattr(response, "body", None)
+        if response.status_code == 200 and body is not None and response.media_type == "application/json":
+            self.put(key, body, response.media_type)
+            response.headers["ETag"] = etag
+            response.headers["X-Cache"] = "MISS"
+        return response
+
+
+response_cache = ResponseCache()
+
+
+class CachedRoute(APIRoute):
+    """Route class serving GET responses through response_cache"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def cached_handler(request: Request) -> Response:
+            if request.method != "GET" or not response_cache.enabled:
+                return await handler(request)
+            return await response_cache.respond(request, handler)
+
+        return cached_handler
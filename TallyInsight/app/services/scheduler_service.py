@@ -1,6 +1,7 @@
 """
 Scheduler Service Module
-Handles scheduled sync operations using APScheduler
+Handles scheduled sync operations and idle-time database maintenance
+using APScheduler
 """
 
 import asyncio
@@ -8,7 +9,9 @@ from datetime import datetime
 from typing import Dict, Optional
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
+from ..utils.constants import SyncStatus
 from ..utils.logger import logger
 
 
@@ -122,6 +125,39 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"Scheduled sync failed: {e}")
     
+    def start_maintenance(self, interval_minutes: int):
+        """Run database maintenance every interval_minutes while no sync is running"""
+        if interval_minutes <= 0:
+            return
+        if not self.scheduler:
+            self.start()
+        
+        self.scheduler.add_job(
+            self.run_maintenance,
+            trigger=IntervalTrigger(minutes=interval_minutes),
+            id="db_maintenance",
+            name="Database Maintenance",
+            replace_existing=True
+        )
+        logger.info(f"Database maintenance job added: every {interval_minutes} min")
+    
+    async def run_maintenance(self) -> Dict:
+        """Execute database maintenance unless a sync is in progress"""
+        from .sync_service import sync_service
+        from .database_service import database_service
+        
+        if sync_service.status == SyncStatus.RUNNING:
+            logger.debug("Database maintenance skipped: sync in progress")
+            return {"status": "skipped", "message": "Sync in progress"}
+        
+        try:
+            result = await database_service.run_maintenance()
+            logger.info(f"Database maintenance completed: {result}")
+            return {"status": "success", "result": result}
+        except Exception as e:
+            logger.error(f"Database maintenance failed: {e}")
+            return {"status": "error", "message": str(e)}
+    
     def run_now(self) -> Dict:
         """Trigger immediate sync based on schedule config"""
         asyncio.create_task(self._run_scheduled_sync())
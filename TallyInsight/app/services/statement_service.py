@@ -0,0 +1,245 @@
+"""
+Statement Service Module
+Trial balance, profit & loss and balance sheet for any date range.
+
+Balances come from database_service.get_ledger_balances_before(): the
+monthly ledger snapshots plus a tail of at most one month, so a full year
+costs three set-based queries however many vouchers it holds. Ledgers are
+rolled up to every group above them through group_closure, and classified
+by their primary group (is_revenue, is_deemedpositive, affects_gross_profit).
+
+Signs follow Tally: a negative amount is Dr, a positive amount is Cr.
+Period debit / credit totals are positive.
+
+Revenue ledgers (income / expense) start from zero each financial year;
+what they held at the start of the year is carried in a single
+"Profit & Loss A/c" line, as Tally's own trial balance does.
+
+Stock valuation (opening / closing stock of the trading account) is not
+part of these statements.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Tuple
+
+from .database_service import database_service
+from .database.fy_archive import financial_year, financial_year_range
+from .database.group_closure import GROUP_CLOSURE_TABLE
+
+PROFIT_AND_LOSS_LEDGER = "Profit & Loss A/c"
+
+_LEDGERS_QUERY = """
+    SELECT l.name, l.parent, l.is_revenue, COALESCE(l.opening_balance, 0) AS opening_balance
+    FROM mst_ledger l
+    WHERE l._company = ?
+"""
+
+_GROUPS_QUERY = """
+    SELECT name, parent, is_revenue, is_deemedpositive, affects_gross_profit
+    FROM mst_group
+    WHERE _company = ?
+"""
+
+_CLOSURE_QUERY = f"""
+    SELECT ancestor, descendant, depth FROM {GROUP_CLOSURE_TABLE}
+    WHERE _company = ? AND kind = 'group'
+"""
+
+_FIELDS = ("opening", "debit", "credit", "closing")
+
+
+def _round(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Round amounts to paise and add the closing Dr / Cr split"""
+    for field in _FIELDS:
+        row[field] = round(row[field], 2)
+    row["closing_debit"] = -row["closing"] if row["closing"] < 0 else 0
+    row["closing_credit"] = row["closing"] if row["closing"] > 0 else 0
+    return row
+
+
+def _is_zero(row: Dict[str, Any]) -> bool:
+    return all(abs(row[field]) < 0.005 for field in _FIELDS)
+
+
+def day_after(day: str) -> str:
+    """YYYY-MM-DD of the next day (raises ValueError on a malformed date)"""
+    return (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+
+
+class StatementService:
+    """Builds financial statements of one company from the SQL database"""
+
+    async def _tree(self, company: str) -> Tuple[Dict[str, List[Tuple[str, int]]], Dict[str, Dict]]:
+        """Ancestors (name, depth) of each group, deepest last; group flags by name"""
+        groups = {g["name"]: g for g in await database_service.fetch_all(_GROUPS_QUERY, (company,))}
+        ancestors: Dict[str, List[Tuple[str, int]]] = {}
+        if await database_service.table_exists(GROUP_CLOSURE_TABLE):
+            for row in await database_service.fetch_all(_CLOSURE_QUERY, (company,)):
+                ancestors.setdefault(row["descendant"], []).append((row["ancestor"], row["depth"]))
+        for pairs in ancestors.values():
+            pairs.sort(key=lambda pair: pair[1])
+        return ancestors, groups
+
+    async def ledger_balances(self, company: str, from_date: str, to_date: str) -> Dict[str, Any]:
+        """Opening, period debit / credit and closing of every ledger.
+
+        Returns:
+            {"ledgers": [...], "profit_and_loss_opening": float,
+             "ancestors": {...}, "groups": {...}}
+        """
+        fy_start = financial_year_range(financial_year(from_date))[0]
+        before_from = await database_service.get_ledger_balances_before(company, from_date)
+        at_end = await database_service.get_ledger_balances_before(company, day_after(to_date))
+        at_fy_start = (before_from if fy_start == from_date
+                       else await database_service.get_ledger_balances_before(company, fy_start))
+        ancestors, groups = await self._tree(company)
+
+        masters = {l["name"]: l for l in await database_service.fetch_all(_LEDGERS_QUERY, (company,))}
+        empty = {"amount": 0.0, "debit": 0.0, "credit": 0.0}
+        ledgers, carried = [], 0.0
+        for name in sorted(set(masters) | set(at_end)):
+            master = masters.get(name) or {"parent": "", "is_revenue": None, "opening_balance": 0}
+            chain = ancestors.get(master["parent"]) or ([(master["parent"], 0)] if master["parent"] else [])
+            primary = chain[-1][0] if chain else ""
+            primary_flags = groups.get(primary, {})
+            is_revenue = master["is_revenue"]
+            if is_revenue is None:
+                is_revenue = primary_flags.get("is_revenue")
+
+            start, end = before_from.get(name, empty), at_end.get(name, empty)
+            row = {
+                "name": name,
+                "parent": master["parent"],
+                "primary_group": primary,
+                "is_revenue": bool(is_revenue),
+                "affects_gross_profit": bool(primary_flags.get("affects_gross_profit")),
+                "is_deemedpositive": bool(primary_flags.get("is_deemedpositive")),
+                "opening": (master["opening_balance"] or 0) + start["amount"],
+                "debit": end["debit"] - start["debit"],
+                "credit": end["credit"] - start["credit"],
+                "closing": (master["opening_balance"] or 0) + end["amount"],
+            }
+            if row["is_revenue"]:
+                # Earlier years' income / expense sits in the P&L A/c
+                brought = (master["opening_balance"] or 0) + at_fy_start.get(name, empty)["amount"]
+                row["opening"] -= brought
+                row["closing"] -= brought
+                carried += brought
+            ledgers.append(row)
+
+        return {"ledgers": ledgers, "profit_and_loss_opening": carried,
+                "ancestors": ancestors, "groups": groups}
+
+    def _rollup(self, ledgers: List[Dict], ancestors: Dict[str, List[Tuple[str, int]]],
+                groups: Dict[str, Dict]) -> List[Dict[str, Any]]:
+        """Group rows (every group above a ledger) in tree order"""
+        totals: Dict[str, Dict[str, Any]] = {}
+        for ledger in ledgers:
+            chain = ancestors.get(ledger["parent"]) or ([(ledger["parent"], 0)] if ledger["parent"] else [])
+            for ancestor, _ in chain:
+                if ancestor not in totals:
+                    path = [name for name, _ in reversed(ancestors.get(ancestor) or [(ancestor, 0)])]
+                    totals[ancestor] = {
+                        "name": ancestor,
+                        "parent": groups.get(ancestor, {}).get("parent", ""),
+                        "level": len(path) - 1,
+                        "path": path,
+                        **{field: 0.0 for field in _FIELDS},
+                    }
+                for field in _FIELDS:
+                    totals[ancestor][field] += ledger[field]
+        rows = sorted(totals.values(), key=lambda row: row["path"])
+        for row in rows:
+            del row["path"]
+        return [_round(row) for row in rows if not _is_zero(row)]
+
+    async def trial_balance(self, company: str, from_date: str, to_date: str,
+                            include_ledgers: bool = True) -> Dict[str, Any]:
+        """Group (and ledger) balances with Dr / Cr closing totals"""
+        data = await self.ledger_balances(company, from_date, to_date)
+        ledgers = [row for row in data["ledgers"] if not _is_zero(row)]
+        carried = round(data["profit_and_loss_opening"], 2)
+
+        total_debit = sum(-row["closing"] for row in ledgers if row["closing"] < 0)
+        total_credit = sum(row["closing"] for row in ledgers if row["closing"] > 0)
+        total_debit += -carried if carried < 0 else 0
+        total_credit += carried if carried > 0 else 0
+
+        result = {
+            "company": company,
+            "from_date": from_date,
+            "to_date": to_date,
+            "groups": self._rollup(ledgers, data["ancestors"], data["groups"]),
+            "profit_and_loss": _round({"name": PROFIT_AND_LOSS_LEDGER,
+                                       **{field: carried if field in ("opening", "closing") else 0.0
+                                          for field in _FIELDS}}),
+            "total_debit": round(total_debit, 2),
+            "total_credit": round(total_credit, 2),
+            "difference": round(total_debit - total_credit, 2),
+            "period_debit": round(sum(row["debit"] for row in ledgers), 2),
+            "period_credit": round(sum(row["credit"] for row in ledgers), 2),
+        }
+        if include_ledgers:
+            result["ledgers"] = [_round(dict(row)) for row in ledgers]
+        return result
+
+    async def profit_and_loss(self, company: str, from_date: str, to_date: str) -> Dict[str, Any]:
+        """Income and expense groups of a period; gross and net profit"""
+        data = await self.ledger_balances(company, from_date, to_date)
+        revenue = [row for row in data["ledgers"] if row["is_revenue"] and not _is_zero(row)]
+        for row in revenue:
+            row["amount"] = row["closing"] - row["opening"]
+
+        # Positive = profit (net Cr), negative = loss
+        gross_profit = sum(row["amount"] for row in revenue if row["affects_gross_profit"])
+        net_profit = sum(row["amount"] for row in revenue)
+
+        groups = self._rollup(revenue, data["ancestors"], data["groups"])
+        for group in groups:
+            group["amount"] = round(group["closing"] - group["opening"], 2)
+            flags = data["groups"].get(group["name"], {})
+            group["affects_gross_profit"] = bool(flags.get("affects_gross_profit"))
+
+        return {
+            "company": company,
+            "from_date": from_date,
+            "to_date": to_date,
+            "income": [g for g in groups if g["level"] == 0 and g["amount"] > 0],
+            "expenses": [g for g in groups if g["level"] == 0 and g["amount"] <= 0],
+            "groups": groups,
+            "gross_profit": round(gross_profit, 2),
+            "net_profit": round(net_profit, 2),
+        }
+
+    async def balance_sheet(self, company: str, as_on_date: str) -> Dict[str, Any]:
+        """Closing balances of the capital / asset / liability groups"""
+        from_date = financial_year_range(financial_year(as_on_date))[0]
+        data = await self.ledger_balances(company, from_date, as_on_date)
+        ledgers = [row for row in data["ledgers"] if not row["is_revenue"] and not _is_zero(row)]
+        profit = round(data["profit_and_loss_opening"]
+                       + sum(row["closing"] for row in data["ledgers"] if row["is_revenue"]), 2)
+
+        groups = [g for g in self._rollup(ledgers, data["ancestors"], data["groups"]) if g["level"] == 0]
+        assets, liabilities = [], []
+        for group in groups:
+            # Assets are shown Dr-positive, liabilities Cr-positive
+            if data["groups"].get(group["name"], {}).get("is_deemedpositive"):
+                assets.append(dict(group, amount=round(-group["closing"], 2)))
+            else:
+                liabilities.append(dict(group, amount=round(group["closing"], 2)))
+
+        total_assets = round(sum(g["amount"] for g in assets), 2)
+        total_liabilities = round(sum(g["amount"] for g in liabilities) + profit, 2)
+        return {
+            "company": company,
+            "as_on_date": as_on_date,
+            "liabilities": liabilities,
+            "assets": assets,
+            "profit_and_loss": profit,
+            "total_liabilities": total_liabilities,
+            "total_assets": total_assets,
+            "difference": round(total_assets - total_liabilities, 2),
+        }
+
+
+statement_service = StatementService()
@@ -65,6 +65,11 @@ from ..utils.constants import SyncStatus, MASTER_TABLES, TRANSACTION_TABLES
 from ..utils.helpers import parse_tally_date, parse_tally_amount, parse_tally_boolean
 from .tally_service import tally_service
 from .database_service import database_service
+from .database.company_routing import set_active_company, reset_active_company
+from .database.amount_storage import add_paise_values
+from .database.derived_tables import DERIVED_TABLES
+from .analytics_service import analytics_service
+from .response_cache import response_cache
 from .xml_builder import xml_builder
 from .audit_service import audit_service
 
@@ -147,6 +152,9 @@ class SyncService:
         logger.info(f"Starting full sync for company: {self.current_company or 'Default'}")
         logger.info(f"Config: company={config.tally.company}, from={config.tally.from_date}, to={config.tally.to_date}")
         
+        # Route database calls to this company's file (per-company storage)
+        company_token = set_active_company(self.current_company)
+        
         try:
             # Connect to database
             await database_service.connect()
@@ -189,6 +197,9 @@ class SyncService:
             logger.info("Syncing company details...")
             await self._sync_company_details()
             
+            # Load-optimized database settings until the data is in
+            await database_service.begin_bulk_load()
+            
             # Sync master data
             logger.info(f"Syncing master data... (parallel={parallel})")
             self._save_sync_state("full", "master_data", self.rows_processed)
@@ -203,6 +214,7 @@ class SyncService:
             logger.info(f"Syncing transaction data... (parallel={parallel})")
             self._save_sync_state("full", "transaction_data", self.rows_processed)
             await self._sync_transaction_data(parallel=parallel)
+            await database_service.end_bulk_load()
             
             if self._cancel_requested:
                 self.status = SyncStatus.CANCELLED
@@ -210,6 +222,10 @@ class SyncService:
                 self._clear_sync_state()
                 return self.get_status()
             
+            # Assign integer ids used by report joins; rows without them drop
+            # out of every report, so a failure fails the sync
+            await self._assign_surrogate_keys()
+            
             self.status = SyncStatus.COMPLETED
             self.completed_at = datetime.now()
             self.progress = 100
@@ -220,8 +236,17 @@ class SyncService:
             # Update sync history - completed
             await self._update_sync_history(sync_history_id, "completed")
             
-            # Refresh ledger balance summary table for fast outstanding queries
-            await self._refresh_ledger_balance_summary()
+            # Move closed financial years to the archive files
+            await self._archive_closed_years(replace=True)
+            
+            # Rebuild ledger_balance_summary and the derived report tables
+            await self.refresh_report_tables(self.current_company)
+            
+            # Store row counts for the dashboard
+            await self._refresh_table_stats()
+            
+            # Export the Parquet mirror used by heavy reports
+            await self._refresh_analytics_mirror()
             
             # Clear sync state on success
             self._clear_sync_state()
@@ -237,7 +262,13 @@ class SyncService:
             logger.error(f"Sync failed: {e}")
             return self.get_status()
         finally:
-            await database_service.disconnect()
+            try:
+                await database_service.end_bulk_load()
+            except Exception as e:
+                logger.warning(f"Failed to restore database settings: {e}")
+            # Cached report responses of this company are stale now
+            response_cache.bump(self.current_company)
+            reset_active_company(company_token)
     
     @timed
     async def incremental_sync(self, company: str = "", from_date: str = "", to_date: str = "") -> Dict[str, Any]:
@@ -281,6 +312,9 @@ class SyncService:
         # Start audit session
         audit_service.start_session("incremental", self.current_company)
         
+        # Route database calls to this company's file (per-company storage)
+        company_token = set_active_company(self.current_company)
+        
         try:
             # Reload config for incremental mode
             xml_builder.reload_config(incremental=True)
@@ -361,6 +395,10 @@ class SyncService:
                 await self._update_sync_history(sync_history_id, "cancelled")
                 return self.get_status()
             
+            # Assign integer ids used by report joins; rows without them drop
+            # out of every report, so a failure fails the sync
+            await self._assign_surrogate_keys()
+            
             self.status = SyncStatus.COMPLETED
             self.completed_at = datetime.now()
             self.progress = 100
@@ -371,8 +409,17 @@ class SyncService:
             # Update sync history - completed
             await self._update_sync_history(sync_history_id, "completed")
             
-            # Refresh ledger balance summary table for fast outstanding queries
-            await self._refresh_ledger_balance_summary()
+            # Move closed financial years to the archive files
+            await self._archive_closed_years()
+            
+            # Rebuild ledger_balance_summary and the derived report tables
+            await self.refresh_report_tables(self.current_company)
+            
+            # Store row counts for the dashboard
+            await self._refresh_table_stats()
+            
+            # Export the Parquet mirror used by heavy reports
+            await self._refresh_analytics_mirror()
             
             logger.info(f"Incremental sync completed. Total rows: {self.rows_processed}")
             return self.get_status()
@@ -387,7 +434,9 @@ class SyncService:
         finally:
             # End audit session
             audit_service.end_session()
-            await database_service.disconnect()
+            # Cached report responses of this company are stale now
+            response_cache.bump(self.current_company)
+            reset_active_company(company_token)
     
     async def _get_last_alterid(self) -> int:
         """Get last sync alterid from company_config table for current company"""
@@ -993,6 +1042,8 @@ class SyncService:
             # Parse response - extract field names from config
             field_names = [f.get("name", "") for f in fields]
             rows = self._parse_xml_response(response, field_names, fields)
+            if database_service.paise_amounts:
+                add_paise_values(table_name, rows)
             
             logger.debug(f"{table_name}: Parsed {len(rows)} rows")
             
@@ -1031,6 +1082,8 @@ class SyncService:
             # Parse response - extract field names from config
             field_names = [f.get("name", "") for f in fields]
             rows = self._parse_xml_response(response, field_names, fields)
+            if database_service.paise_amounts:
+                add_paise_values(table_name, rows)
             
             logger.debug(f"{table_name} ({from_date} to {to_date}): Parsed {len(rows)} rows")
             
@@ -1332,11 +1385,10 @@ class SyncService:
                 INSERT INTO sync_history (sync_type, status, started_at, rows_processed, company_name)
                 VALUES (?, ?, ?, 0, ?)
             """
-            await database_service.execute(query, (sync_type, status, self.started_at.isoformat(), self.current_company))
-            
-            # Get last inserted ID
-            result = await database_service.fetch_one("SELECT last_insert_rowid() as id")
-            return result.get("id", 0) if result else 0
+            # Id of this insert on the writer (MAX(id) could be another sync's row)
+            return await database_service.execute_insert(
+                query, (sync_type, status, self.started_at.isoformat(), self.current_company)
+            )
         except Exception as e:
             logger.warning(f"Failed to save sync history: {e}")
             return 0
@@ -1496,6 +1548,46 @@ class SyncService:
         except Exception as e:
             logger.warning(f"Failed to update config table: {e}")
     
+    async def _assign_surrogate_keys(self):
+        """Allocate integer ledger / item / voucher / company ids for new rows (raises on failure)"""
+        try:
+            entries = await database_service.assign_surrogate_keys(self.current_company)
+        except Exception as e:
+            raise RuntimeError(f"Failed to assign surrogate keys: {e}") from e
+        logger.info(f"Surrogate keys assigned ({entries} dictionary entries)")
+    
+    async def _archive_closed_years(self, replace: bool = False):
+        """Archive closed financial years beyond database.archive_keep_years"""
+        keep_years = getattr(config.database, 'archive_keep_years', 0)
+        if keep_years <= 0 or not database_service.supports_archives:
+            return
+        try:
+            archived = await database_service.archive_closed_years(self.current_company, keep_years, replace)
+            if archived:
+                logger.info(f"Archived financial years: {archived}")
+        except Exception as e:
+            logger.warning(f"Failed to archive closed financial years: {e}")
+    
+    async def refresh_report_tables(self, company: str):
+        """Rebuild what reports read after a company's rows changed (sync, archival)
+        
+        ledger_balance_summary, then each derived report table in order (group
+        tree pairs, bill balances, ledger snapshots, voucher totals, monthly
+        cube, master search terms); cached responses of the company go stale.
+        """
+        await self._refresh_ledger_balance_summary()
+        await self._refresh_derived_tables(company)
+        response_cache.bump(company)
+    
+    async def _refresh_derived_tables(self, company: str):
+        """Rebuild a company's rows of each derived report table, in order"""
+        for table_name in DERIVED_TABLES:
+            try:
+                rows = await database_service.refresh_derived_table(table_name, company)
+                logger.info(f"{table_name} refreshed: {rows} rows")
+            except Exception as e:
+                logger.warning(f"Failed to refresh {table_name}: {e}")
+    
     async def _refresh_ledger_balance_summary(self):
         """Refresh ledger balance summary table for fast outstanding queries"""
         try:
@@ -1506,19 +1598,47 @@ class SyncService:
                 "DROP TABLE IF EXISTS ledger_balance_summary"
             )
             
-            await database_service.execute("""
+            # Movement of archived financial years (fy_archive.py), one row per ledger
+            archived_join = ""
+            archived = {"debit": "", "credit": "", "amount": "", "amount_paise": ""}
+            if database_service.supports_archives:
+                archived_join = """
+                LEFT JOIN (
+                    SELECT _company, ledger, SUM(debit) as debit, SUM(credit) as credit,
+                           SUM(amount) as amount, SUM(amount_paise) as amount_paise
+                    FROM archive_ledger_balance GROUP BY _company, ledger
+                ) ab ON ab._company = l._company AND ab.ledger = l.name 
+                """
+                archived = {column: f" + COALESCE(MAX(ab.{column}), 0)" for column in archived}
+            
+            if database_service.paise_amounts:
+                # Integer sums, converted once; summary debit is the positive side
+                # (Tally's credit_paise), matching the REAL query below
+                totals = f"""
+                    l.opening_balance_paise / 100.0 as opening_balance, 
+                    COALESCE(SUM(a.credit_paise), 0) / 100.0{archived['debit']} as debit, 
+                    COALESCE(SUM(a.debit_paise), 0) / 100.0{archived['credit']} as credit, 
+                    (l.opening_balance_paise + COALESCE(SUM(a.amount_paise), 0){archived['amount_paise']}) / 100.0 as closing 
+                """
+            else:
+                totals = f"""
+                    l.opening_balance, 
+                    COALESCE(SUM(CASE WHEN a.amount > 0 THEN a.amount ELSE 0 END), 0){archived['debit']} as debit, 
+                    COALESCE(SUM(CASE WHEN a.amount < 0 THEN ABS(a.amount) ELSE 0 END), 0){archived['credit']} as credit, 
+                    l.opening_balance + COALESCE(SUM(a.amount), 0){archived['amount']} as closing 
+                """
+            
+            await database_service.execute(f"""
                 CREATE TABLE ledger_balance_summary AS 
                 SELECT 
                     l.name as ledger_name, 
                     l.parent, 
                     l._company, 
-                    l.opening_balance, 
-                    COALESCE(SUM(CASE WHEN a.amount > 0 THEN a.amount ELSE 0 END), 0) as debit, 
-                    COALESCE(SUM(CASE WHEN a.amount < 0 THEN ABS(a.amount) ELSE 0 END), 0) as credit, 
-                    l.opening_balance + COALESCE(SUM(a.amount), 0) as closing 
+                    {totals}
                 FROM mst_ledger l 
-                LEFT JOIN trn_accounting a ON l.name = a.ledger AND l._company = a._company 
-                GROUP BY l.name, l._company
+                LEFT JOIN trn_accounting a ON a._ledger_id = l._ledger_id 
+                {archived_join}
+                GROUP BY l._ledger_id, l.name, l._company
             """)
             
             # Create indexes for fast queries
@@ -1533,6 +1653,24 @@ class SyncService:
         except Exception as e:
             logger.warning(f"Failed to refresh ledger_balance_summary: {e}")
     
+    async def _refresh_table_stats(self):
+        """Recount synced company's tables into table_stats (served by /counts)"""
+        try:
+            completed_at = (self.completed_at or datetime.now()).isoformat()
+            await database_service.refresh_table_stats(self.current_company, last_sync_at=completed_at)
+            logger.info("table_stats refreshed successfully")
+        except Exception as e:
+            logger.warning(f"Failed to refresh table_stats: {e}")
+    
+    async def _refresh_analytics_mirror(self):
+        """Export the synced company to the Parquet analytics mirror (if enabled)"""
+        if not analytics_service.enabled:
+            return
+        try:
+            await analytics_service.export_company(self.current_company)
+        except Exception as e:
+            logger.warning(f"Failed to export analytics mirror: {e}")
+    
     async def _sync_company_details(self) -> None:
         """Sync company details from Tally to mst_company table
         
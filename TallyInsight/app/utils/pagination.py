@@ -0,0 +1,195 @@
+"""
+Pagination Helpers
+Keyset (cursor) pagination shared by the list endpoints.
+
+A page is requested with `limit` and either `cursor` (the `next_cursor` of
+the previous page) or the older `offset`. With a cursor the query seeks
+past the last row's sort key instead of skipping `offset` rows, so deep
+pages cost the same as the first one.
+
+The sort key must be unique - end it with a unique column such as guid or
+id. The first page gets the total row count (and optional column sums)
+from window functions in the same query. The values travel inside the
+cursor, so later pages run a single query without totals.
+
+Usage:
+    paginator = KeysetPaginator([SortKey("date", "v.date", desc=True),
+                                 SortKey("guid", "v.guid", desc=True)], limit, cursor)
+    keyset, keyset_params = paginator.condition()
+    query = f"SELECT v.*{paginator.window_columns()} FROM trn_voucher v WHERE ..."
+    page = await paginator.fetch(database_service, query, params)
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Window columns added to the first page and removed from the rows
+TOTAL_COLUMN = "_page_total"
+SUM_PREFIX = "_page_sum_"
+
+
+class CursorError(ValueError):
+    """Malformed or mismatched pagination cursor"""
+
+
+def _literal(value: Any) -> str:
+    """SQL literal for a NULL stand-in value"""
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+@dataclass
+class SortKey:
+    """One column of a keyset sort order"""
+    column: str                 # Column name in the result rows
+    expression: str = ""        # SQL expression (default: column)
+    desc: bool = False
+    null_value: Any = None      # Sorts in place of NULL so keys compare with = / < / >
+
+    @property
+    def sql(self) -> str:
+        expression = self.expression or self.column
+        if self.null_value is None:
+            return expression
+        return f"COALESCE({expression}, {_literal(self.null_value)})"
+
+    def value(self, row: Dict[str, Any]) -> Any:
+        """Key value of a result row"""
+        value = row.get(self.column)
+        return self.null_value if value is None else value
+
+
+@dataclass
+class Page:
+    """One page of rows with totals and the cursor of the next page"""
+    rows: List[Dict[str, Any]]
+    total: int
+    totals: Dict[str, Any] = field(default_factory=dict)
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """Opaque URL-safe cursor token"""
+    raw = json.dumps(state, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Cursor state; raises CursorError for a malformed token"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise CursorError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(state, dict):
+        raise CursorError(f"Invalid cursor: {cursor}")
+    return state
+
+
+class KeysetPaginator:
+    """Builds the keyset predicate, ORDER BY and LIMIT of a list query"""
+
+    def __init__(self, keys: List[SortKey], limit: int, cursor: Optional[str] = None,
+                 offset: int = 0, sums: Optional[Dict[str, str]] = None,
+                 total: Optional[int] = None):
+        """
+        Args:
+            keys: Unique sort order
+            limit: Rows per page
+            cursor: next_cursor of the previous page (takes precedence over offset)
+            offset: Rows to skip when no cursor is given
+            sums: Column sums returned with the total {name: SQL expression}
+            total: Row count known from maintained statistics (skips COUNT)
+        """
+        self.keys = keys
+        self.limit = limit
+        self.sums = sums or {}
+
+        state = decode_cursor(cursor) if cursor else {}
+        self.after: Optional[List[Any]] = state.get("after")
+        if cursor and (not isinstance(self.after, list) or len(self.after) != len(keys)):
+            raise CursorError(f"Invalid cursor: {cursor}")
+        self.offset = 0 if self.after is not None else offset
+        self.total: Optional[int] = state.get("total", total)
+        self.totals: Optional[Dict[str, Any]] = state.get("totals") if self.sums else {}
+
+    @property
+    def needs_totals(self) -> bool:
+        """True when the query must compute count / sums itself"""
+        return self.total is None or self.totals is None
+
+    def condition(self) -> Tuple[str, List[Any]]:
+        """Predicate selecting rows after the cursor ('' on the first page)"""
+        if self.after is None:
+            return "", []
+
+        # Range on the leading key (index seek) + exact tie-breaking on the rest
+        first = self.keys[0]
+        clauses = [f"{first.sql} {'<=' if first.desc else '>='} ?"]
+        params = [self.after[0]]
+        alternatives = []
+        for i, key in enumerate(self.keys):
+            parts = []
+            for previous, value in zip(self.keys[:i], self.after[:i]):
+                parts.append(f"{previous.sql} = ?")
+                params.append(value)
+            parts.append(f"{key.sql} {'<' if key.desc else '>'} ?")
+            params.append(self.after[i])
+            alternatives.append("(" + " AND ".join(parts) + ")")
+        clauses.append("(" + " OR ".join(alternatives) + ")")
+        return "(" + " AND ".join(clauses) + ")", params
+
+    def order_by(self) -> str:
+        """ORDER BY list of the sort key"""
+        return ", ".join(f"{key.sql} {'DESC' if key.desc else 'ASC'}" for key in self.keys)
+
+    def window_columns(self) -> str:
+        """Select-list suffix with the total count / sums (first page only)"""
+        if not self.needs_totals:
+            return ""
+        columns = [f"COUNT(*) OVER () AS {TOTAL_COLUMN}"]
+        columns += [f"SUM({expression}) OVER () AS {SUM_PREFIX}{name}"
+                    for name, expression in self.sums.items()]
+        return ", " + ", ".join(columns)
+
+    async def fetch(self, db, query: str, params: List[Any] = ()) -> Page:
+        """Run a page query and build the Page.
+
+        Args:
+            db: Database service
+            query: SELECT (with window_columns()) ... WHERE (with condition());
+                ORDER BY and LIMIT are appended here
+            params: Query parameters
+        """
+        query = f"{query} ORDER BY {self.order_by()} LIMIT ? OFFSET ?"
+        rows = await db.fetch_all(query, tuple(params) + (self.limit + 1, self.offset))
+
+        has_next = len(rows) > self.limit
+        rows = [dict(row) for row in rows[:self.limit]]
+
+        if self.needs_totals:
+            first = rows[0] if rows else None
+            if first is None and self.offset:
+                # Offset past the last row: the first row carries the totals
+                head = await db.fetch_all(query, tuple(params) + (1, 0))
+                first = head[0] if head else None
+            first = first or {}
+            self.total = first.get(TOTAL_COLUMN) or 0
+            self.totals = {name: first.get(SUM_PREFIX + name) or 0 for name in self.sums}
+            for row in rows:
+                row.pop(TOTAL_COLUMN, None)
+                for name in self.sums:
+                    row.pop(SUM_PREFIX + name, None)
+
+        next_cursor = None
+        if has_next:
+            next_cursor = encode_cursor({
+                "after": [key.value(rows[-1]) for key in self.keys],
+                "total": self.total,
+                "totals": self.totals or None,
+            })
+        return Page(rows=rows, total=self.total, totals=self.totals or {}, next_cursor=next_cursor)
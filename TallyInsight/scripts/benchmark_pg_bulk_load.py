@@ -0,0 +1,103 @@
+"""
+Benchmark PostgreSQL Bulk Load Methods
+Compares the executemany upsert path with the COPY + merge path of
+PostgreSQLDatabaseService.bulk_insert on synthetic trn_accounting and
+mst_ledger rows.
+
+Requires a reachable PostgreSQL configured in config.yaml (database.type
+postgresql). The benchmark tables are created and dropped by the script.
+
+Usage:
+    python scripts/benchmark_pg_bulk_load.py --rows 200000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.database.postgresql_adapter import PostgreSQLDatabaseService
+
+TABLES = {
+    "bench_trn_accounting": """
+        CREATE TABLE bench_trn_accounting (
+            id SERIAL PRIMARY KEY,
+            guid TEXT NOT NULL,
+            ledger TEXT NOT NULL DEFAULT '',
+            amount DECIMAL(18,2) NOT NULL DEFAULT 0,
+            amount_forex DECIMAL(18,2) NOT NULL DEFAULT 0,
+            currency TEXT NOT NULL DEFAULT '',
+            is_party_ledger INTEGER NOT NULL DEFAULT 0,
+            _company TEXT DEFAULT ''
+        )
+    """,
+    "bench_mst_ledger": """
+        CREATE TABLE bench_mst_ledger (
+            guid TEXT PRIMARY KEY,
+            name TEXT NOT NULL DEFAULT '',
+            parent TEXT NOT NULL DEFAULT '',
+            opening_balance DECIMAL(18,2) NOT NULL DEFAULT 0,
+            _company TEXT DEFAULT ''
+        )
+    """,
+}
+
+
+def make_rows(table: str, count: int):
+    """Synthetic rows shaped like parsed Tally output"""
+    if table == "bench_trn_accounting":
+        return [{
+            "guid": str(uuid.UUID(int=i // 2)),
+            "ledger": f"Ledger {i % 500}",
+            "amount": round((i % 1000) * 1.25 - 600, 2),
+            "amount_forex": 0.0,
+            "currency": "INR",
+            "is_party_ledger": i % 2,
+        } for i in range(count)]
+    return [{
+        "guid": str(uuid.UUID(int=i)),
+        "name": f"Ledger {i}",
+        "parent": "Sundry Debtors",
+        "opening_balance": float(i % 1000),
+    } for i in range(count)]
+
+
+async def run_method(service: PostgreSQLDatabaseService, method: str, table: str, rows) -> float:
+    """Load rows into a fresh table and return elapsed seconds"""
+    await service.execute(f"DROP TABLE IF EXISTS {table}")
+    await service.execute(TABLES[table])
+    service.bulk_load_method = method
+
+    started = time.perf_counter()
+    await service.bulk_insert(table, [dict(row) for row in rows], "Benchmark Co")
+    elapsed = time.perf_counter() - started
+
+    count = await service.fetch_scalar(f"SELECT COUNT(*) FROM {table}")
+    print(f"  {method:<7} {elapsed:8.2f}s  {len(rows) / elapsed:10.0f} rows/s  ({count} rows in table)")
+    return elapsed
+
+
+async def main(row_count: int):
+    service = PostgreSQLDatabaseService()
+    await service.connect()
+    try:
+        for table in TABLES:
+            rows = make_rows(table, row_count)
+            print(f"{table}: {row_count} rows")
+            insert_time = await run_method(service, "insert", table, rows)
+            copy_time = await run_method(service, "copy", table, rows)
+            print(f"  speedup {insert_time / copy_time:.1f}x")
+            await service.execute(f"DROP TABLE IF EXISTS {table}")
+    finally:
+        await service.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PostgreSQL bulk load methods")
+    parser.add_argument("--rows", type=int, default=100000, help="Rows per table")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows))
@@ -0,0 +1,3 @@
+"""
+Test Package
+"""
@@ -0,0 +1,69 @@
+"""
+Amount Storage Tests
+Checks integer paise conversion and the paise columns written by the
+SQLite adapter when `database.amount_storage` is `paise`.
+
+Usage:
+    pytest tests/test_amount_storage.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+from app.services.database.amount_storage import add_paise_values, to_paise
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """SQLite service in paise storage mode"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    service.paise_amounts = True
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    yield service
+    await service.disconnect()
+
+
+class TestAmountStorage:
+    """Test cases for integer paise amounts"""
+
+    def test_to_paise(self):
+        """Parsed float and string amounts convert exactly"""
+        assert to_paise(0.1) == 10
+        assert to_paise(-1234567.89) == -123456789
+        assert to_paise("1.005") == 101
+        assert to_paise(None) == 0
+
+    def test_debit_credit_split(self):
+        """Negative amounts are debits, positive amounts credits"""
+        rows = [{"amount": -10.5}, {"amount": 2.25}]
+        add_paise_values("trn_accounting", rows)
+        assert [(r["debit_paise"], r["credit_paise"]) for r in rows] == [(1050, 0), (0, 225)]
+
+    @pytest.mark.asyncio
+    async def test_integer_sum_is_exact(self, db):
+        """Sums over paise columns have no float drift"""
+        rows = [{"guid": f"v{i}", "ledger": "Cash", "amount": 0.1} for i in range(10)]
+        add_paise_values("trn_accounting", rows)
+        await db.bulk_insert("trn_accounting", rows, "Demo")
+
+        assert await db.fetch_scalar("SELECT SUM(amount) FROM trn_accounting") != 1.0
+        assert await db.fetch_scalar("SELECT typeof(SUM(credit_paise)) FROM trn_accounting") == "integer"
+        assert await db.fetch_scalar("SELECT SUM(amount_paise) / 100.0 FROM trn_accounting") == 1.0
+
+    @pytest.mark.asyncio
+    async def test_backfill_existing_rows(self, db):
+        """Rows loaded without paise values are filled from the REAL columns"""
+        await db.bulk_insert("trn_bill", [{"guid": "v1", "ledger": "Party", "amount": -99.99}], "Demo")
+        await db.ensure_paise_columns()
+        row = await db.fetch_one("SELECT amount_paise, debit_paise, credit_paise FROM trn_bill")
+        assert (row["amount_paise"], row["debit_paise"], row["credit_paise"]) == (-9999, 9999, 0)
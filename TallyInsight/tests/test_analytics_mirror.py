@@ -0,0 +1,100 @@
+"""
+Analytics Mirror Tests
+Checks the SQLite -> DuckDB rewrite of report SQL and, when duckdb is
+installed, that rewritten expressions return the SQLite results.
+
+Usage:
+    pytest tests/test_analytics_mirror.py -v
+"""
+
+import csv
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.services import analytics_service as analytics_module
+from app.services.analytics_service import analytics_service, to_duckdb_sql, _duckdb_type
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+
+
+class TestDuckDBRewrite:
+    """Test cases for to_duckdb_sql"""
+
+    def test_due_date_and_overdue_days(self):
+        """Nested date() / julianday() with a day modifier are rewritten"""
+        sql = ("CAST(julianday('2024-05-01') - julianday(date(MIN(bill_date), "
+               "'+' || MAX(bill_credit_period) || ' days')) AS INTEGER)")
+        assert to_duckdb_sql(sql) == (
+            "CAST(julian(CAST('2024-05-01' AS DATE)) - julian(CAST(CAST(CAST(MIN(bill_date) AS DATE) "
+            "+ CAST(MAX(bill_credit_period) AS INTEGER) AS VARCHAR) AS DATE)) AS INTEGER)"
+        )
+
+    def test_now_and_group_concat(self):
+        """'now' becomes current_date; GROUP_CONCAT becomes STRING_AGG"""
+        assert to_duckdb_sql("julianday('now')") == "julian(current_date)"
+        assert to_duckdb_sql("date('now')") == "CAST(current_date AS VARCHAR)"
+        assert to_duckdb_sql("GROUP_CONCAT(DISTINCT source)") == "STRING_AGG(DISTINCT source, ',')"
+
+    def test_columns_and_literals_untouched(self):
+        """Columns named date and function names inside strings are kept"""
+        sql = "SELECT v.date, bill_date FROM trn_voucher v WHERE v.narration = 'date(x)'"
+        assert to_duckdb_sql(sql) == sql
+
+    def test_unsupported_modifier_raises(self):
+        """Modifiers without a DuckDB rewrite fail so the query falls back"""
+        with pytest.raises(ValueError):
+            to_duckdb_sql("date(v.date, 'start of month')")
+
+    def test_column_types(self):
+        """Parquet column types follow the values SQLite returned"""
+        assert _duckdb_type([1, None, 2]) == "BIGINT"
+        assert _duckdb_type([1, 2.5]) == "DOUBLE"
+        assert _duckdb_type(["001", 1]) == "VARCHAR"
+        assert _duckdb_type([None]) == "VARCHAR"
+
+
+class TestDuckDBResults:
+    """Rewritten expressions give the SQLite results on DuckDB"""
+
+    def test_matches_sqlite(self):
+        duckdb = pytest.importorskip("duckdb")
+        sql = ("SELECT date('2024-03-25', '+' || 10 || ' days') AS due_date, "
+               "CAST(julianday('2024-05-01') - julianday('2024-03-25') AS INTEGER) AS overdue_days")
+        expected = sqlite3.connect(":memory:").execute(sql).fetchone()
+        assert duckdb.connect().execute(to_duckdb_sql(sql)).fetchone() == expected
+
+
+class TestMirrorStaging:
+    """The export stages each table chunk by chunk"""
+
+    @pytest.mark.asyncio
+    async def test_stage_csv(self, tmp_path, monkeypatch):
+        """All of the company's rows in chunks; types from every chunk"""
+        monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+        service = SQLiteDatabaseService()
+        service.db_path = str(tmp_path / "tally.db")
+        await service.ensure_company_config_table()
+        await service.create_tables(incremental=False)
+        monkeypatch.setattr(analytics_module, "database_service", service)
+        try:
+            await service.bulk_insert("mst_ledger", [
+                {"guid": f"l{i}", "name": f"Ledger {i}", "parent": "Sundry Debtors",
+                 "opening_balance": 2.5 if i == 4 else i}
+                for i in range(5)
+            ], "Alpha")
+            await service.bulk_insert("mst_ledger", [{"guid": "b1", "name": "Other"}], "Beta")
+
+            path = tmp_path / "mst_ledger.csv"
+            count, types = await analytics_service.stage_csv("mst_ledger", "Alpha", path, chunk_size=2)
+            assert count == 5
+            assert types["opening_balance"] == "DOUBLE"
+            with open(path, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+            assert [row["name"] for row in rows] == [f"Ledger {i}" for i in range(5)]
+        finally:
+            await service.disconnect()
@@ -0,0 +1,146 @@
+"""
+Bill Outstanding Tests
+Checks the per-bill balances materialized for the bill-wise outstanding
+reports (billwise, ledgerwise and ledger-billwise columns).
+
+Usage:
+    pytest tests/test_bill_outstanding.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+
+BILL_QUERY = "SELECT * FROM bill_outstanding WHERE _company = ? AND party_name = ? AND bill_no = ?"
+
+
+async def load_bills(service, company):
+    """Debtor with an opening bill and a part-paid invoice; creditor with an opening bill"""
+    await service.bulk_insert("mst_group", [
+        {"guid": f"{company}-g1", "name": "Sundry Debtors", "parent": "Current Assets"},
+        {"guid": f"{company}-g2", "name": "Sundry Creditors", "parent": "Current Liabilities"},
+    ], company)
+    await service.refresh_derived_table("group_closure", company)
+    await service.bulk_insert("mst_ledger", [
+        {"guid": f"{company}-l1", "name": "Party A", "parent": "Sundry Debtors", "opening_balance": 0},
+        {"guid": f"{company}-l2", "name": "Supplier B", "parent": "Sundry Creditors", "opening_balance": 0},
+    ], company)
+    await service.bulk_insert("mst_opening_bill_allocation", [
+        {"ledger": "Party A", "name": "OB-1", "bill_date": "2024-03-01",
+         "bill_credit_period": 0, "opening_balance": 100},
+        {"ledger": "Supplier B", "name": "OB-2", "bill_date": "2024-03-05",
+         "bill_credit_period": 10, "opening_balance": 70},
+    ], company)
+    await service.bulk_insert("trn_voucher", [
+        {"guid": f"{company}-v1", "date": "2024-04-10", "voucher_type": "Sales", "party_name": "Party A",
+         "place_of_supply": ""},
+        {"guid": f"{company}-v2", "date": "2024-05-01", "voucher_type": "Receipt", "party_name": "Party A",
+         "place_of_supply": ""},
+    ], company)
+    await service.bulk_insert("trn_bill", [
+        {"guid": f"{company}-v1", "ledger": "Party A", "name": "INV-1", "billtype": "New Ref",
+         "amount": -500, "bill_credit_period": "45 Days", "alterid": 1},
+        {"guid": f"{company}-v2", "ledger": "Party A", "name": "INV-1", "billtype": "Agst Ref",
+         "amount": 200, "bill_credit_period": 0, "alterid": 2},
+        {"guid": f"{company}-v2", "ledger": "Party A", "name": "INV-1", "billtype": "Agst Ref",
+         "amount": 200, "bill_credit_period": 0, "alterid": 1},
+    ], company)
+    await service.assign_surrogate_keys(company)
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """SQLite service with two companies' bills and a built bill_outstanding"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    await load_bills(service, "Alpha")
+    await load_bills(service, "Beta")
+    await service.refresh_derived_table("bill_outstanding", "Alpha")
+    yield service
+    await service.disconnect()
+
+
+class TestBillOutstanding:
+    """Test cases for the bill_outstanding rebuild"""
+
+    @pytest.mark.asyncio
+    async def test_billwise_columns(self, db):
+        """New Ref billed, both Agst Ref rows paid; no credit period = 1 day;
+        creditor opening reversed"""
+        bill = await db.fetch_one(BILL_QUERY, ("Alpha", "Party A", "INV-1"))
+        assert (bill["billed"], bill["paid"], bill["pending"]) == (500, 400, 100)
+        assert bill["source"] == "Sales,Receipt"
+
+        opening = await db.fetch_one(BILL_QUERY, ("Alpha", "Party A", "OB-1"))
+        assert opening["due_date"] == "2024-03-02"
+
+        opening = await db.fetch_one(BILL_QUERY, ("Alpha", "Supplier B", "OB-2"))
+        assert opening["pending"] == -70
+        assert opening["due_date"] == "2024-03-15"
+
+    @pytest.mark.asyncio
+    async def test_ledgerwise_drops_duplicate_alterids(self, db):
+        """Identical Agst Ref rows count once for the net balance"""
+        bill = await db.fetch_one(BILL_QUERY, ("Alpha", "Party A", "INV-1"))
+        assert bill["net_pending"] == -300
+
+        opening = await db.fetch_one(BILL_QUERY, ("Alpha", "Supplier B", "OB-2"))
+        assert (opening["net_pending"], opening["net_due_date"]) == (70, "2024-03-15")
+
+    @pytest.mark.asyncio
+    async def test_ledger_billwise_due_date(self, db):
+        """'45 Days' credit periods give bill date + 45 days"""
+        bill = await db.fetch_one(BILL_QUERY, ("Alpha", "Party A", "INV-1"))
+        assert bill["credit_period_raw"] == "45 Days"
+        assert bill["ledger_due_date"] == "2024-05-25"
+        assert (bill["opening_amount"], bill["ledger_pending"]) == (500, 100)
+
+    @pytest.mark.asyncio
+    async def test_refresh_is_per_company(self, db):
+        """Only the refreshed company is rebuilt; rebuilding again adds no rows"""
+        assert await db.fetch_scalar(
+            "SELECT COUNT(*) FROM bill_outstanding WHERE _company = 'Beta'"
+        ) == 0
+        assert await db.refresh_derived_table("bill_outstanding", "Beta") == 3
+        assert await db.refresh_derived_table("bill_outstanding", "Alpha") == 3
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM bill_outstanding") == 6
+
+    @pytest.mark.asyncio
+    async def test_delete_company_clears_rows(self, db):
+        """Deleting a company removes its bills"""
+        await db.delete_company_data("Alpha")
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM bill_outstanding") == 0
+
+    @pytest.mark.asyncio
+    async def test_full_sync_schema(self, tmp_path, monkeypatch):
+        """A fully synced company has no trn_bill.alterid; the refresh adds it"""
+        monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+        service = SQLiteDatabaseService()
+        service.db_path = str(tmp_path / "full.db")
+        await service.ensure_company_config_table()
+        await service.create_tables(incremental=False)
+        try:
+            assert "alterid" not in await service.get_table_columns("trn_bill")
+            await service.bulk_insert("trn_voucher", [
+                {"guid": "v1", "date": "2024-04-10", "voucher_type": "Sales", "party_name": "Party A",
+                 "place_of_supply": ""},
+            ], "Alpha")
+            await service.bulk_insert("trn_bill", [
+                {"guid": "v1", "ledger": "Party A", "name": "INV-1", "billtype": "New Ref", "amount": -500},
+            ], "Alpha")
+            await service.assign_surrogate_keys("Alpha")
+            assert await service.refresh_derived_table("bill_outstanding", "Alpha") == 1
+            bill = await service.fetch_one(BILL_QUERY, ("Alpha", "Party A", "INV-1"))
+            assert (bill["pending"], bill["net_pending"]) == (500, -500)
+        finally:
+            await service.disconnect()
@@ -0,0 +1,166 @@
+"""
+Per-Company Storage Tests
+Checks routing of the SQLite adapter to one database file per company.
+
+Usage:
+    pytest tests/test_company_routing.py -v
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.config import config
+from app.controllers import protected_controller, voucher_controller
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+from app.services.database.company_routing import (
+    company_file_path, company_scope, qualify_ddl
+)
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """SQLite service in per-company mode with two synced companies"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    monkeypatch.setattr(config.database, "path", str(tmp_path / "tally.db"))
+    monkeypatch.setattr(config.database, "company_dir", str(tmp_path / "companies"))
+    monkeypatch.setattr(config.tally, "company", "")
+
+    service = SQLiteDatabaseService()
+    service.per_company_files = True
+    await service.ensure_company_config_table()
+    for company, ledgers in (("Alpha Traders", ["Cash", "Bank"]), ("Beta & Sons", ["Cash"])):
+        with company_scope(company):
+            await service.create_tables(incremental=False)
+            rows = [{"guid": f"{company}-{name}", "name": name, "parent": "Cash-in-Hand"} for name in ledgers]
+            await service.bulk_insert("mst_ledger", rows, company)
+            await service.update_company_config(company)
+    yield service
+    await service.disconnect()
+
+
+class TestCompanyRouting:
+    """Test cases for per-company database files"""
+
+    def test_qualify_ddl(self):
+        """Company tables and indexes move to the company schema, catalog tables stay"""
+        assert qualify_ddl("CREATE TABLE IF NOT EXISTS mst_ledger (guid TEXT)") == \
+            "CREATE TABLE IF NOT EXISTS company.mst_ledger (guid TEXT)"
+        assert qualify_ddl("CREATE INDEX IF NOT EXISTS idx_a ON trn_bill(guid)") == \
+            "CREATE INDEX IF NOT EXISTS company.idx_a ON trn_bill(guid)"
+        assert qualify_ddl("-- note\nCREATE TABLE sync_history (id INTEGER)") == \
+            "-- note\nCREATE TABLE sync_history (id INTEGER)"
+        assert qualify_ddl("CREATE TABLE company.mst_group (guid TEXT)") == \
+            "CREATE TABLE company.mst_group (guid TEXT)"
+        assert qualify_ddl("DELETE FROM mst_ledger") == "DELETE FROM mst_ledger"
+
+    def test_company_file_names_are_distinct(self):
+        """Names that slug the same still get different files"""
+        assert company_file_path("A&B") != company_file_path("A B")
+
+    @pytest.mark.asyncio
+    async def test_each_company_has_its_own_file(self, db):
+        """Rows land in the routed company's file only"""
+        assert company_file_path("Alpha Traders").exists()
+        assert company_file_path("Beta & Sons").exists()
+        assert await db.get_table_count("mst_ledger", "Alpha Traders") == 2
+        assert await db.get_table_count("mst_ledger", "Beta & Sons") == 1
+
+    @pytest.mark.asyncio
+    async def test_indexes_created_in_company_file(self, db):
+        """The index pack is applied inside each company file"""
+        with company_scope("Alpha Traders"):
+            assert await db.verify_indexes() == []
+
+    @pytest.mark.asyncio
+    async def test_reports_route_by_active_company(self, db):
+        """Unqualified report SQL reads the active company's tables"""
+        with company_scope("Beta & Sons"):
+            rows = await db.fetch_all("SELECT name, _company FROM mst_ledger")
+        assert rows == [{"name": "Cash", "_company": "Beta & Sons"}]
+
+    @pytest.mark.asyncio
+    async def test_catalog_shared_across_companies(self, db):
+        """company_config lives in the catalog database"""
+        with company_scope("Alpha Traders"):
+            companies = await db.get_synced_companies()
+        assert [c["company_name"] for c in companies] == ["Alpha Traders", "Beta & Sons"]
+
+    @pytest.mark.asyncio
+    async def test_table_stats_count_company_file(self, db):
+        """Statistics are counted from the company file and stored in the catalog"""
+        counts = await db.refresh_table_stats("Alpha Traders")
+        assert counts["mst_ledger"] == 2
+        stats = {row["table_name"]: row for row in await db.get_table_stats("Alpha Traders")}
+        assert stats["mst_ledger"]["bytes_estimate"] > 0
+
+    @pytest.mark.asyncio
+    async def test_unsynced_company_does_not_create_file(self, db):
+        """Reads for an unknown company do not create a database file"""
+        assert await db.get_table_count("mst_ledger", "Unknown Co") == 0
+        assert not company_file_path("Unknown Co").exists()
+
+    @pytest.mark.asyncio
+    async def test_resync_resets_company_file(self, db):
+        """Full-sync truncate replaces only that company's file"""
+        await db.truncate_all_tables(company="Alpha Traders")
+        assert await db.get_table_count("mst_ledger", "Alpha Traders") == 0
+        assert await db.get_table_count("mst_ledger", "Beta & Sons") == 1
+
+    @pytest.mark.asyncio
+    async def test_delete_company_removes_file(self, db):
+        """Deleting a company drops its file and catalog row"""
+        deleted = await db.delete_company_data("Alpha Traders")
+        assert deleted == 3
+        assert not company_file_path("Alpha Traders").exists()
+        companies = await db.get_synced_companies()
+        assert [c["company_name"] for c in companies] == ["Beta & Sons"]
+
+    @pytest.mark.asyncio
+    async def test_no_company_tables_in_catalog(self, db):
+        """Without a company to route to, company tables are refused, not created in the catalog"""
+        with pytest.raises(ValueError):
+            await db.create_tables(incremental=False)
+        with company_scope(""):
+            assert not await db.fetch_scalar(
+                "SELECT COUNT(*) FROM main.sqlite_master WHERE name = 'mst_ledger'"
+            )
+
+    @pytest.mark.asyncio
+    async def test_idle_routes_closed(self, db):
+        """Connections of a company unused for the idle timeout are closed when another opens"""
+        with company_scope("Alpha Traders"):
+            await db.fetch_all("SELECT 1")
+        assert "Alpha Traders" in db._writers and "Alpha Traders" in db._reader_pools
+        
+        db._route_used["Alpha Traders"] -= db.company_idle_timeout + 1
+        await db._close_route("Beta & Sons")
+        with company_scope("Beta & Sons"):
+            await db.fetch_all("SELECT 1")
+        assert "Alpha Traders" not in db._writers and "Alpha Traders" not in db._reader_pools
+        
+        with company_scope("Alpha Traders"):
+            assert await db.get_table_count("mst_ledger", "Alpha Traders") == 2
+    
+    @pytest.mark.asyncio
+    async def test_body_and_path_company_routed(self, db, monkeypatch):
+        """Companies named in a POST body or the URL path read their own file"""
+        monkeypatch.setattr(voucher_controller, "database_service", db)
+        monkeypatch.setattr(protected_controller, "database_service", db)
+        await db.bulk_insert("trn_voucher", [
+            {"guid": "b1", "date": "2024-04-01", "voucher_type": "Sales", "party_name": "", "place_of_supply": ""}
+        ], "Beta & Sons")
+        
+        request = voucher_controller.VoucherDetailsRequest(guids=["b1"], company="Beta & Sons")
+        result = await voucher_controller.get_voucher_details_batch(request)
+        assert list(result["vouchers"]) == ["b1"] and result["missing"] == []
+        
+        user = SimpleNamespace(id=1, email="admin@example.com")
+        summary = await protected_controller.get_company_summary("Beta & Sons", token="", current_user=user)
+        assert summary["summary"] == {"ledgers": 1, "vouchers": 1, "stock_items": 0}
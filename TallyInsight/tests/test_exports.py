@@ -0,0 +1,202 @@
+"""
+Export Tests
+Checks the chunked cursor reads, the CSV / NDJSON / XLSX writers and the
+voucher and ledger report export endpoints.
+
+Usage:
+    pytest tests/test_exports.py -v
+"""
+
+import io
+import json
+import os
+import sys
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.controllers import ledger_controller, voucher_controller
+from app.services import export_service as export_module
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+from app.services.export_service import export_service
+
+SHEET_NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+# guid suffix, date, voucher type, [(ledger, amount)]
+VOUCHERS = [
+    ("s1", "2024-04-02", "Sales", [("Party A", -118), ("Sales", 118)]),
+    ("r1", "2024-04-10", "Receipt", [("Party A", 100), ("Cash", -100)]),
+    ("s2", "2024-05-05", "Sales", [("Party A", -50.5), ("Sales", 50.5)]),
+]
+
+
+async def load_vouchers(service, company):
+    """Party A (Sundry Debtors, opening 10) with two sales and a receipt"""
+    await service.bulk_insert("mst_group", [
+        {"guid": f"{company}-g1", "name": "Sundry Debtors", "parent": "Current Assets", "is_deemedpositive": 1},
+    ], company)
+    await service.bulk_insert("mst_ledger", [
+        {"guid": f"{company}-l1", "name": "Party A", "parent": "Sundry Debtors", "opening_balance": 10},
+    ], company)
+    await service.bulk_insert("trn_voucher", [
+        {"guid": f"{company}-{guid}", "date": day, "voucher_type": vtype, "voucher_number": guid,
+         "party_name": entries[0][0], "place_of_supply": "", "narration": f"Narration, \"{guid}\""}
+        for guid, day, vtype, entries in VOUCHERS
+    ], company)
+    await service.bulk_insert("trn_accounting", [
+        {"guid": f"{company}-{guid}", "ledger": ledger, "amount": amount}
+        for guid, _, _, entries in VOUCHERS for ledger, amount in entries
+    ], company)
+    await service.assign_surrogate_keys(company)
+    await service.refresh_derived_table("voucher_totals", company)
+    await service.refresh_derived_table("ledger_balance_snapshot", company)
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """Controllers bound to a SQLite service with Alpha's vouchers; chunks of 2 rows"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    await load_vouchers(service, "Alpha")
+    monkeypatch.setattr(voucher_controller, "database_service", service)
+    monkeypatch.setattr(ledger_controller, "database_service", service)
+    monkeypatch.setattr(export_module.config.api, "export_chunk_size", 2)
+    yield service
+    await service.disconnect()
+
+
+async def chunks_of(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def read(response) -> bytes:
+    return b"".join([part async for part in response.body_iterator])
+
+
+def sheet_rows(data: bytes, sheet: int = 1):
+    """Cell values per row of an XLSX worksheet"""
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    root = ET.fromstring(archive.read(f"xl/worksheets/sheet{sheet}.xml"))
+    rows = []
+    for row in root.iter(f"{{{SHEET_NS['s']}}}row"):
+        rows.append([cell.findtext("s:v", namespaces=SHEET_NS) or cell.findtext("s:is/s:t", namespaces=SHEET_NS)
+                     for cell in row])
+    return rows
+
+
+class TestExports:
+    """Test cases for fetch_chunks, export_service and the export endpoints"""
+
+    @pytest.mark.asyncio
+    async def test_fetch_chunks(self, db):
+        """Rows arrive in chunks of the requested size"""
+        chunks = [chunk async for chunk in db.fetch_chunks("SELECT guid FROM trn_accounting ORDER BY guid", (), 4)]
+        assert [len(chunk) for chunk in chunks] == [4, 2]
+
+    @pytest.mark.asyncio
+    async def test_fetch_chunks_leaves_reader_pool(self, db):
+        """A download in progress reads on its own connection, not a pooled reader"""
+        await db.fetch_all("SELECT 1")
+        chunks = db.fetch_chunks("SELECT guid FROM trn_accounting ORDER BY guid", (), 2)
+        assert len(await chunks.__anext__()) == 2
+        assert all(pool.qsize() == db.read_pool_size for pool in db._reader_pools.values())
+        await chunks.aclose()
+
+    @pytest.mark.asyncio
+    async def test_xlsx_workbook(self, monkeypatch):
+        """Valid workbook; numbers stay numbers; rows past the limit go to a new sheet"""
+        monkeypatch.setattr(export_module, "XLSX_MAX_ROWS", 3)
+        rows = chunks_of([{"a": 1, "b": "x < y & z"}, {"a": 2.5, "b": None}], [{"a": 3, "b": "\x01ok"}])
+        data = b"".join([part async for part in export_service.stream(rows, "xlsx", ["a", "b"], "Day/Book")])
+
+        archive = zipfile.ZipFile(io.BytesIO(data))
+        workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+        assert [sheet.get("name") for sheet in workbook.iter(f"{{{SHEET_NS['s']}}}sheet")] == \
+            ["Day_Book", "Day_Book (2)"]
+        assert sheet_rows(data, 1) == [["a", "b"], ["1", "x < y & z"], ["2.5"]]
+        assert sheet_rows(data, 2) == [["a", "b"], ["3", "ok"]]
+
+    @pytest.mark.asyncio
+    async def test_voucher_export_csv(self, db):
+        """Oldest first, filters applied, quoting handled by the CSV writer"""
+        response = await voucher_controller.export_vouchers(fmt="csv", voucher_type="Sales", from_date=None,
+                                                            to_date=None, company="Alpha")
+        assert response.headers["content-disposition"] == "attachment; filename=Vouchers_Alpha_all_dates.csv"
+        lines = (await read(response)).decode("utf-8-sig").splitlines()
+        assert lines[0] == ",".join(voucher_controller.EXPORT_COLUMNS)
+        assert [line.split(",")[2] for line in lines[1:]] == ["s1", "s2"]
+        assert '"Narration, ""s1"""' in lines[1]
+
+    @pytest.mark.asyncio
+    async def test_ledger_export_running_balance(self, db):
+        """Opening row, running balance across chunks, closing row with totals"""
+        response = await ledger_controller.export_ledger_report(ledger="Party A", company="Alpha",
+                                                                from_date="2024-04-05", to_date=None,
+                                                                fmt="ndjson")
+        rows = [json.loads(line) for line in (await read(response)).decode("utf-8").splitlines()]
+        assert [(r["particulars"], r["debit"], r["credit"], r["balance"]) for r in rows] == [
+            ("Opening Balance", None, None, -108),
+            ("Party A", 0, 100, -8),
+            ("Party A", 50.5, 0, -58.5),
+            ("Closing Balance", 50.5, 100, -58.5),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_ledger_export_matches_report(self, db):
+        """Export and /ledger-report share opening balance, rows and totals"""
+        report = await ledger_controller.get_ledger_report(ledger="Party A", company="Alpha",
+                                                           from_date="2024-04-05", to_date=None,
+                                                           limit=None, cursor=None)
+        response = await ledger_controller.export_ledger_report(ledger="Party A", company="Alpha",
+                                                                from_date="2024-04-05", to_date=None,
+                                                                fmt="ndjson")
+        rows = [json.loads(line) for line in (await read(response)).decode("utf-8").splitlines()]
+        assert rows[0]["balance"] == report["opening_balance"]
+        assert [row["balance"] for row in rows[1:-1]] == [t["balance"] for t in report["transactions"]]
+        assert (rows[-1]["debit"], rows[-1]["credit"], rows[-1]["balance"]) == \
+            (report["total_debit"], report["total_credit"], report["closing_balance"])
+
+    @pytest.mark.asyncio
+    async def test_ledger_report_pages(self, db):
+        """Keyset pages of one row each give the unpaged report, even with a ledger
+        twice in one voucher"""
+        await db.bulk_insert("trn_accounting", [
+            {"guid": "Alpha-s2", "ledger": "Party A", "amount": -50.5},
+            {"guid": "Alpha-s2", "ledger": "Sales", "amount": 50.5},
+        ], "Alpha")
+        await db.assign_surrogate_keys("Alpha")
+        params = dict(ledger="Party A", company="Alpha", from_date="2024-04-01", to_date=None)
+        report = await ledger_controller.get_ledger_report(**params, limit=None, cursor=None)
+        
+        rows, cursor = [], None
+        while True:
+            page = await ledger_controller.get_ledger_report(**params, limit=1, cursor=cursor)
+            assert page["closing_balance"] == report["closing_balance"]
+            rows.extend(page["transactions"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert len(rows) == 4
+        assert rows == report["transactions"]
+    
+    @pytest.mark.asyncio
+    async def test_export_errors(self, db):
+        """Unknown format is 400, unknown ledger 404"""
+        with pytest.raises(HTTPException) as error:
+            await voucher_controller.export_vouchers(fmt="pdf", voucher_type=None, from_date=None,
+                                                     to_date=None, company="Alpha")
+        assert error.value.status_code == 400
+        with pytest.raises(HTTPException) as error:
+            await ledger_controller.export_ledger_report(ledger="Nobody", company="Alpha", from_date=None,
+                                                         to_date=None, fmt="csv")
+        assert error.value.status_code == 404
@@ -0,0 +1,236 @@
+"""
+Financial-Year Archive Tests
+Checks that closed years move to archive files, open bills stay hot and
+archived rows are still reachable through fetch_all_archived and the
+carried-forward ledger balances.
+
+Usage:
+    pytest tests/test_fy_archive.py -v
+"""
+
+import os
+import sys
+from datetime import date
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app import main
+from app.config import config
+from app.controllers import ledger_controller, outstanding_controller, voucher_controller
+from app.services import database_service as database_module, sync_service as sync_module
+from app.services.database.fy_archive import (
+    archivable_years, financial_year, financial_year_range, overlapping_years
+)
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+
+COMPANY = "Alpha"
+
+PARTY_TOTAL_QUERY = (
+    "SELECT COALESCE(SUM(a.amount), 0) AS total FROM trn_accounting a "
+    "JOIN trn_voucher v ON v.guid = a.guid WHERE a.ledger = 'Party A' AND v.date < ?"
+)
+
+
+async def load_vouchers(service):
+    """FY 2019: a settled bill and an open bill; current year: one sale and
+    the receipt settling a 2019 bill"""
+    await service.bulk_insert("mst_group", [
+        {"guid": "g1", "name": "Sundry Debtors", "parent": "Current Assets"},
+    ], COMPANY)
+    await service.bulk_insert("mst_ledger", [
+        {"guid": "l1", "name": "Party A", "parent": "Sundry Debtors", "opening_balance": 0},
+        {"guid": "l2", "name": "Sales", "parent": "Sales Accounts", "opening_balance": 0},
+    ], COMPANY)
+    vouchers = [
+        ("v1", "2019-05-01", "Sales", -100, [("INV-1", "New Ref", -100)]),
+        ("v2", "2019-06-01", "Receipt", 100, [("INV-1", "Agst Ref", 100)]),
+        ("v3", "2019-07-01", "Sales", -50, [("INV-2", "New Ref", -50)]),
+        ("v4", "2019-08-01", "Sales", -20, []),
+        ("v5", date.today().isoformat(), "Sales", -30, []),
+        ("v6", "2019-09-01", "Sales", -40, [("INV-3", "New Ref", -40)]),
+        ("v7", date.today().isoformat(), "Receipt", 40, [("INV-3", "Agst Ref", 40)]),
+    ]
+    for guid, day, voucher_type, amount, bills in vouchers:
+        await service.bulk_insert("trn_voucher", [
+            {"guid": guid, "date": day, "voucher_type": voucher_type, "party_name": "Party A",
+             "place_of_supply": ""},
+        ], COMPANY)
+        await service.bulk_insert("trn_accounting", [
+            {"guid": guid, "ledger": "Party A", "amount": amount},
+            {"guid": guid, "ledger": "Sales", "amount": -amount},
+        ], COMPANY)
+        if bills:
+            await service.bulk_insert("trn_bill", [
+                {"guid": guid, "ledger": "Party A", "name": name, "billtype": billtype, "amount": value}
+                for name, billtype, value in bills
+            ], COMPANY)
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """SQLite service with one closed financial year and the current one"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    monkeypatch.setattr(config.database, "archive_dir", str(tmp_path / "archive"))
+    monkeypatch.setattr(config.tally, "from_date", "2019-04-01")
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    await load_vouchers(service)
+    yield service
+    await service.disconnect()
+
+
+class TestFinancialYears:
+    """Test cases for financial-year helpers"""
+
+    def test_financial_year_boundaries(self):
+        """April starts the year; January-March belong to the previous one"""
+        assert financial_year("2019-04-01") == 2019
+        assert financial_year("2020-03-31") == 2019
+
+    def test_archivable_years(self):
+        """Years older than the kept ones; nothing when archival is off"""
+        today = date(2026, 10, 19)
+        assert archivable_years("2019-05-01", 2, today) == [2019, 2020, 2021, 2022, 2023, 2024]
+        assert archivable_years("2019-05-01", 0, today) == []
+
+    def test_overlapping_years(self):
+        """Open bounds include every year"""
+        assert overlapping_years([2019, 2020], "2020-04-01", None) == [2020]
+        assert overlapping_years([2019, 2020], None, None) == [2019, 2020]
+
+
+class TestArchive:
+    """Test cases for moving closed years out of the hot tables"""
+
+    @pytest.mark.asyncio
+    async def test_settled_vouchers_archived_open_bills_stay(self, db):
+        """Settled and bill-less vouchers move; open bills and bills settled in a
+        later year stay hot"""
+        await db.assign_surrogate_keys(COMPANY)
+        await db.refresh_derived_table("bill_outstanding", COMPANY)
+        before = await db.fetch_all("SELECT bill_no, pending FROM bill_outstanding ORDER BY bill_no")
+
+        archived = await db.archive_closed_years(COMPANY, keep_years=1)
+        assert archived == {2019: 3}
+        hot = await db.fetch_all("SELECT guid FROM trn_voucher ORDER BY guid")
+        assert [row["guid"] for row in hot] == ["v3", "v5", "v6", "v7"]
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM trn_accounting") == 8
+        assert await db.get_archived_years(COMPANY) == [2019]
+
+        await db.refresh_derived_table("bill_outstanding", COMPANY)
+        after = await db.fetch_all("SELECT bill_no, pending FROM bill_outstanding ORDER BY bill_no")
+        assert [row for row in before if row["bill_no"] != "INV-1"] == after
+
+    @pytest.mark.asyncio
+    async def test_archived_rows_reachable(self, db):
+        """Date ranges reaching the archive union it in; totals are unchanged"""
+        before = await db.fetch_scalar(PARTY_TOTAL_QUERY, ("2030-01-01",))
+        await db.archive_closed_years(COMPANY, keep_years=1)
+
+        rows = await db.fetch_all_archived(PARTY_TOTAL_QUERY, ("2030-01-01",), company_name=COMPANY)
+        assert rows[0]["total"] == before
+        assert await db.fetch_scalar(PARTY_TOTAL_QUERY, ("2030-01-01",)) == -80
+
+        # Opening at the current year: hot rows plus the carried-forward total
+        year_start = financial_year_range(financial_year(date.today().isoformat()))[0]
+        hot = await db.fetch_scalar(PARTY_TOTAL_QUERY, (year_start,))
+        carried = await db.get_archived_balance("Party A", COMPANY, year_start)
+        assert hot + carried == -110
+
+    @pytest.mark.asyncio
+    async def test_reports_read_archived_years(self, db, monkeypatch):
+        """Voucher list, details, voucher totals, cube and ageing keep archived vouchers"""
+        monkeypatch.setattr(voucher_controller, "database_service", db)
+        monkeypatch.setattr(outstanding_controller, "database_service", db)
+        await db.assign_surrogate_keys(COMPANY)
+        await db.refresh_derived_table("group_closure", COMPANY)
+        await db.archive_closed_years(COMPANY, keep_years=1)
+        await db.refresh_derived_table("voucher_totals", COMPANY)
+        await db.refresh_derived_table("monthly_cube", COMPANY)
+
+        page = await voucher_controller.get_vouchers(
+            voucher_type=None, from_date="2019-04-01", to_date="2020-03-31", company=COMPANY,
+            min_amount=None, max_amount=None, sort="date", limit=100, offset=0, cursor=None
+        )
+        assert [(row["guid"], row["amount"]) for row in page["data"]] == [
+            ("v6", 40), ("v4", 20), ("v3", 50), ("v2", 100), ("v1", 100)
+        ]
+        assert page["total"] == 5
+
+        details = await voucher_controller.get_voucher_details("v1", company=COMPANY)
+        assert [bill["name"] for bill in details["bills"]] == ["INV-1"]
+
+        cube = await db.fetch_all(
+            "SELECT month, voucher_count, amount FROM monthly_cube "
+            "WHERE ledger = 'Party A' AND month < '2020-04' ORDER BY month"
+        )
+        assert [(row["month"], row["voucher_count"], row["amount"]) for row in cube] == [
+            ("2019-05", 1, -100), ("2019-06", 1, 100), ("2019-07", 1, -50), ("2019-08", 1, -20),
+            ("2019-09", 1, -40),
+        ]
+
+        ageing = await outstanding_controller.get_ageing_analysis(
+            type="receivable", company=COMPANY, as_of="2019-05-15", buckets="30,60,90", group_by="party"
+        )
+        assert ageing["totals"]["total"] == 100
+
+    @pytest.mark.asyncio
+    async def test_rerun_is_idempotent(self, db):
+        """A second run moves nothing and leaves no duplicate archived rows"""
+        await db.archive_closed_years(COMPANY, keep_years=1)
+        assert await db.archive_closed_years(COMPANY, keep_years=1) == {}
+        rows = await db.fetch_all_archived(
+            "SELECT COUNT(*) AS n FROM trn_voucher", (), "2019-04-01", "2020-03-31", COMPANY
+        )
+        assert rows[0]["n"] == 7
+
+    @pytest.mark.asyncio
+    async def test_delete_company_removes_archives(self, db):
+        """Deleting a company drops its archive files and carried balances"""
+        await db.archive_closed_years(COMPANY, keep_years=1)
+        await db.delete_company_data(COMPANY)
+        assert await db.get_archived_years(COMPANY) == []
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM archive_ledger_balance") == 0
+    
+    @pytest.mark.asyncio
+    async def test_archive_endpoint_refreshes_reports(self, db, monkeypatch):
+        """/api/archives/run rebuilds the snapshots, so archived years are not counted twice"""
+        monkeypatch.setattr(database_module, "database_service", db)
+        monkeypatch.setattr(sync_module, "database_service", db)
+        await db.assign_surrogate_keys(COMPANY)
+        await db.refresh_derived_table("ledger_balance_snapshot", COMPANY)
+        year_start = financial_year_range(financial_year(date.today().isoformat()))[0]
+        assert await db.get_ledger_movement_before("Party A", COMPANY, year_start) == -110
+        
+        result = await main.run_archival({"company": COMPANY, "keep_years": 1})
+        assert result["archived"] == {2019: 3}
+        assert await db.get_ledger_movement_before("Party A", COMPANY, year_start) == -110
+        summary = await db.fetch_scalar(
+            "SELECT closing FROM ledger_balance_summary WHERE ledger_name = 'Party A'"
+        )
+        assert summary == -100
+    
+    @pytest.mark.asyncio
+    async def test_ledger_report_pages_archived_years(self, db, monkeypatch):
+        """Keyset pages of the ledger report read archived entries in order"""
+        monkeypatch.setattr(ledger_controller, "database_service", db)
+        await db.assign_surrogate_keys(COMPANY)
+        await db.archive_closed_years(COMPANY, keep_years=1)
+        params = dict(ledger="Party A", company=COMPANY, from_date="2019-04-01", to_date="2020-03-31")
+        report = await ledger_controller.get_ledger_report(**params, limit=None, cursor=None)
+        
+        rows, cursor = [], None
+        while True:
+            page = await ledger_controller.get_ledger_report(**params, limit=2, cursor=cursor)
+            rows.extend(page["transactions"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert [row["date"] for row in rows] == ["2019-05-01", "2019-06-01", "2019-07-01", "2019-08-01", "2019-09-01"]
+        assert rows == report["transactions"]
@@ -0,0 +1,117 @@
+"""
+Group Closure Tests
+Checks the ancestor / descendant pairs rebuilt at sync for the group,
+stock group and cost centre trees, and the "under group X" filter.
+
+Usage:
+    pytest tests/test_group_closure.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.services.database.group_closure import under_condition
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+
+PAIRS_QUERY = ("SELECT ancestor, depth FROM group_closure "
+               "WHERE _company = ? AND kind = ? AND descendant = ? ORDER BY depth")
+
+
+async def load_masters(service, company):
+    """Sundry Debtors > Export Debtors > EU Debtors, a parent cycle, stock groups, cost centres"""
+    await service.bulk_insert("mst_group", [
+        {"guid": f"{company}-g1", "name": "Current Assets", "parent": ""},
+        {"guid": f"{company}-g2", "name": "Sundry Debtors", "parent": "Current Assets"},
+        {"guid": f"{company}-g3", "name": "Export Debtors", "parent": "Sundry Debtors"},
+        {"guid": f"{company}-g4", "name": "EU Debtors", "parent": "Export Debtors"},
+        {"guid": f"{company}-g5", "name": "Loop A", "parent": "Loop B"},
+        {"guid": f"{company}-g6", "name": "Loop B", "parent": "Loop A"},
+    ], company)
+    await service.bulk_insert("mst_ledger", [
+        {"guid": f"{company}-l1", "name": "Local Party", "parent": "Sundry Debtors"},
+        {"guid": f"{company}-l2", "name": "Berlin Party", "parent": "EU Debtors"},
+        {"guid": f"{company}-l3", "name": "Cash", "parent": "Current Assets"},
+    ], company)
+    await service.bulk_insert("mst_stock_group", [
+        {"guid": f"{company}-s1", "name": "Finished Goods", "parent": ""},
+        {"guid": f"{company}-s2", "name": "Shirts", "parent": "Finished Goods"},
+    ], company)
+    await service.bulk_insert("mst_cost_centre", [
+        {"guid": f"{company}-c1", "name": "Head Office", "parent": ""},
+        {"guid": f"{company}-c2", "name": "Sales Team", "parent": "Head Office"},
+    ], company)
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """SQLite service with two companies' masters and Alpha's closure"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    await load_masters(service, "Alpha")
+    await load_masters(service, "Beta")
+    await service.refresh_derived_table("group_closure", "Alpha")
+    yield service
+    await service.disconnect()
+
+
+class TestGroupClosure:
+    """Test cases for the group_closure rebuild and under_condition"""
+
+    @pytest.mark.asyncio
+    async def test_ancestors_with_depth(self, db):
+        """Every ancestor up to the root, the group itself at depth 0"""
+        rows = await db.fetch_all(PAIRS_QUERY, ("Alpha", "group", "EU Debtors"))
+        assert [(r["ancestor"], r["depth"]) for r in rows] == [
+            ("EU Debtors", 0), ("Export Debtors", 1), ("Sundry Debtors", 2), ("Current Assets", 3),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_parent_cycle_terminates(self, db):
+        """A parent cycle yields both groups once each"""
+        rows = await db.fetch_all(PAIRS_QUERY, ("Alpha", "group", "Loop A"))
+        assert [(r["ancestor"], r["depth"]) for r in rows] == [("Loop A", 0), ("Loop B", 1)]
+
+    @pytest.mark.asyncio
+    async def test_stock_groups_and_cost_centres(self, db):
+        """The other trees are stored under their own kind"""
+        rows = await db.fetch_all(PAIRS_QUERY, ("Alpha", "stock_group", "Shirts"))
+        assert [r["ancestor"] for r in rows] == ["Shirts", "Finished Goods"]
+        rows = await db.fetch_all(PAIRS_QUERY, ("Alpha", "cost_centre", "Sales Team"))
+        assert [r["ancestor"] for r in rows] == ["Sales Team", "Head Office"]
+
+    @pytest.mark.asyncio
+    async def test_ledgers_under_group(self, db):
+        """Ledgers in sub-groups are found; other companies are not"""
+        condition = under_condition("group", "l.parent", "l._company")
+        rows = await db.fetch_all(
+            f"SELECT l.name, l._company FROM mst_ledger l WHERE {condition} ORDER BY l.name",
+            ("Sundry Debtors",)
+        )
+        assert [(r["name"], r["_company"]) for r in rows] == [
+            ("Berlin Party", "Alpha"), ("Local Party", "Alpha"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_refresh_is_per_company(self, db):
+        """Only the refreshed company is rebuilt; rebuilding again adds no rows"""
+        assert await db.fetch_scalar(
+            "SELECT COUNT(*) FROM group_closure WHERE _company = 'Beta'"
+        ) == 0
+        beta = await db.refresh_derived_table("group_closure", "Beta")
+        assert await db.refresh_derived_table("group_closure", "Alpha") == beta
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM group_closure") == 2 * beta
+
+    @pytest.mark.asyncio
+    async def test_delete_company_clears_rows(self, db):
+        """Deleting a company removes its pairs"""
+        await db.delete_company_data("Alpha")
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM group_closure") == 0
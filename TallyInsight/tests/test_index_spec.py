@@ -0,0 +1,101 @@
+"""
+Index Specification Tests
+Checks that the declarative index pack is applied by the SQLite adapter
+and that the key report queries use it (EXPLAIN QUERY PLAN).
+
+Usage:
+    pytest tests/test_index_spec.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+from app.services.database.index_spec import INDEX_SPECS, DERIVED_GUID_TABLES
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """SQLite service on a temp file, created from config/database-structure.sql"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    yield service
+    await service.disconnect()
+
+
+async def explain(db, query, params=()):
+    """Return EXPLAIN QUERY PLAN details joined into one string"""
+    rows = await db.fetch_all(f"EXPLAIN QUERY PLAN {query}", params)
+    return " | ".join(row["detail"] for row in rows)
+
+
+class TestIndexSpec:
+    """Test cases for the index pack"""
+
+    def test_index_names_unique(self):
+        """Every spec has a distinct index name"""
+        names = [spec.name for spec in INDEX_SPECS]
+        assert len(names) == len(set(names))
+
+    def test_derived_tables_have_guid_index(self):
+        """Every derived transaction table is indexed on guid"""
+        indexed = {spec.table for spec in INDEX_SPECS if spec.columns == ("guid",)}
+        assert set(DERIVED_GUID_TABLES) <= indexed
+
+    @pytest.mark.asyncio
+    async def test_indexes_applied(self, db):
+        """create_tables applies every applicable index"""
+        assert await db.verify_indexes() == []
+
+    @pytest.mark.asyncio
+    async def test_ledger_report_uses_ledger_index(self, db):
+        """Ledger report seeks trn_accounting by ledger and company"""
+        plan = await explain(db, """
+            SELECT v.date, a.amount
+            FROM trn_accounting a
+            JOIN trn_voucher v ON a.guid = v.guid
+            WHERE a.ledger = ? AND a._company = ? AND v.date >= ?
+        """, ("Cash", "Demo", "2024-04-01"))
+        assert "idx_trn_accounting_ledger_company" in plan
+
+    @pytest.mark.asyncio
+    async def test_billwise_uses_bill_index(self, db):
+        """Bill-wise outstanding seeks trn_bill by ledger and bill name"""
+        plan = await explain(db, """
+            SELECT SUM(amount) FROM trn_bill
+            WHERE ledger = ? AND name = ? AND billtype = ?
+        """, ("Party A", "INV-1", "Agst Ref"))
+        assert "idx_trn_bill_ledger_name_type" in plan
+
+    @pytest.mark.asyncio
+    async def test_party_ledgers_use_parent_index(self, db):
+        """Outstanding party filter seeks mst_ledger by parent group"""
+        plan = await explain(db, """
+            SELECT name FROM mst_ledger
+            WHERE parent IN ('Sundry Debtors', 'Sundry Creditors') AND _company = ?
+        """, ("Demo",))
+        assert "idx_mst_ledger_parent_company" in plan
+
+    @pytest.mark.asyncio
+    async def test_voucher_list_uses_date_index(self, db):
+        """Voucher list range-scans trn_voucher by date"""
+        plan = await explain(db, """
+            SELECT guid FROM trn_voucher
+            WHERE date BETWEEN ? AND ? AND _company = ?
+        """, ("2024-04-01", "2025-03-31", "Demo"))
+        assert "idx_trn_voucher_date_company_type" in plan
+
+    @pytest.mark.asyncio
+    async def test_cascade_delete_uses_guid_index(self, db):
+        """Incremental cascade delete seeks derived rows by guid"""
+        plan = await explain(db, "DELETE FROM trn_bill WHERE guid IN (SELECT guid FROM _delete)")
+        assert "idx_trn_bill_guid" in plan
@@ -0,0 +1,108 @@
+"""
+Ledger Snapshot Tests
+Checks that opening balances from the monthly ledger_balance_snapshot rows
+match the full sum over every earlier transaction.
+
+Usage:
+    pytest tests/test_ledger_snapshots.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.services.database import ledger_snapshots
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+
+# (date, amount) of the Cash ledger's entries, three months with gaps
+ENTRIES = [
+    ("2024-04-01", -100), ("2024-04-15", 40), ("2024-04-30", -25.5),
+    ("2024-06-10", 300), ("2024-06-30", -10), ("2024-07-01", 7.25),
+]
+
+
+async def load_entries(service, company, scale=1):
+    """One voucher per entry, all posted to Cash"""
+    await service.bulk_insert("trn_voucher", [
+        {"guid": f"{company}-v{i}", "date": date, "voucher_type": "Journal",
+         "party_name": "", "place_of_supply": ""}
+        for i, (date, _) in enumerate(ENTRIES)
+    ], company)
+    await service.bulk_insert("trn_accounting", [
+        {"guid": f"{company}-v{i}", "ledger": "Cash", "amount": amount * scale}
+        for i, (_, amount) in enumerate(ENTRIES)
+    ], company)
+    await service.assign_surrogate_keys(company)
+
+
+async def full_sum(service, company, before):
+    query, params = ledger_snapshots.full_movement_query("Cash", company, before)
+    return await service.fetch_scalar(query, params)
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """SQLite service with two companies' Cash entries and Alpha's snapshots"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    await load_entries(service, "Alpha")
+    await load_entries(service, "Beta", scale=2)
+    await service.refresh_derived_table("ledger_balance_snapshot", "Alpha")
+    yield service
+    await service.disconnect()
+
+
+class TestLedgerSnapshots:
+    """Test cases for the ledger_balance_snapshot rebuild / get_ledger_movement_before"""
+
+    @pytest.mark.asyncio
+    async def test_month_rows(self, db):
+        """One row per month with movement, cumulative carried across the gap"""
+        rows = await db.fetch_all(
+            "SELECT month, amount, cumulative FROM ledger_balance_snapshot "
+            "WHERE _company = 'Alpha' ORDER BY month"
+        )
+        assert [(r["month"], r["amount"], r["cumulative"]) for r in rows] == [
+            ("2024-04", -85.5, -85.5), ("2024-06", 290, 204.5), ("2024-07", 7.25, 211.75),
+        ]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("before", [
+        "2024-03-01", "2024-04-01", "2024-04-15", "2024-05-01", "2024-05-20",
+        "2024-06-30", "2024-07-01", "2024-07-02", "2025-01-01",
+    ])
+    async def test_matches_full_sum(self, db, before):
+        """Snapshot + tail equals the full sum at month boundaries and mid-month"""
+        assert await db.get_ledger_movement_before("Cash", "Alpha", before) == \
+            pytest.approx(await full_sum(db, "Alpha", before))
+
+    @pytest.mark.asyncio
+    async def test_all_companies(self, db):
+        """Without a company every company's snapshots are added up"""
+        await db.refresh_derived_table("ledger_balance_snapshot", "Beta")
+        assert await db.get_ledger_movement_before("Cash", None, "2024-06-20") == \
+            pytest.approx(await full_sum(db, None, "2024-06-20"))
+
+    @pytest.mark.asyncio
+    async def test_refresh_is_per_company(self, db):
+        """Only the refreshed company is rebuilt; rebuilding again adds no rows"""
+        assert await db.fetch_scalar(
+            "SELECT COUNT(*) FROM ledger_balance_snapshot WHERE _company = 'Beta'"
+        ) == 0
+        await db.refresh_derived_table("ledger_balance_snapshot", "Beta")
+        await db.refresh_derived_table("ledger_balance_snapshot", "Alpha")
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM ledger_balance_snapshot") == 6
+
+    @pytest.mark.asyncio
+    async def test_delete_company_clears_rows(self, db):
+        """Deleting a company removes its snapshots"""
+        await db.delete_company_data("Alpha")
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM ledger_balance_snapshot") == 0
@@ -0,0 +1,127 @@
+"""
+Master Search Tests
+Checks the word-prefix search terms rebuilt at sync, the ranked /search
+type-ahead and the indexed `search` filter of /ledgers and /stock-items.
+
+Usage:
+    pytest tests/test_master_search.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.controllers import master_controller
+from app.services.database.master_search import normalize, search_rows, term_range
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+
+
+async def load_masters(service, company):
+    await service.bulk_insert("mst_ledger", [
+        {"guid": f"{company}-l1", "name": "Shree Ganesh Traders", "parent": "Sundry Debtors",
+         "alias": "SGT", "gstn": "27AABCS1234F1Z5", "mobile": "+91 98200 12345"},
+        {"guid": f"{company}-l2", "name": "Ganesh", "parent": "Sundry Creditors"},
+        {"guid": f"{company}-l3", "name": "A.K. Stores", "parent": "Sundry Debtors", "alias": "Ganesh Stores"},
+        {"guid": f"{company}-l4", "name": "Cash", "parent": "Cash-in-Hand"},
+    ], company)
+    await service.bulk_insert("mst_stock_item", [
+        {"guid": f"{company}-s1", "name": "Ganesh Idol 12in", "parent": "Idols", "alias": ""},
+        {"guid": f"{company}-s2", "name": "Brass Lamp", "parent": "Lamps", "alias": "Diya"},
+    ], company)
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """Controller bound to a SQLite service with two companies and Alpha's index"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    await load_masters(service, "Alpha")
+    await load_masters(service, "Beta")
+    await service.refresh_derived_table("master_search", "Alpha")
+    monkeypatch.setattr(master_controller, "database_service", service)
+    yield service
+    await service.disconnect()
+
+
+async def search(q, **kwargs):
+    params = dict(q=q, company="Alpha", kinds="ledger,stock_item", limit=20)
+    params.update(kwargs)
+    return await master_controller.search_masters(**params)
+
+
+class TestMasterSearch:
+    """Test cases for master_search and /search"""
+
+    def test_terms(self):
+        """Every word start of name and alias; identifiers whole"""
+        assert normalize("  A.K.   Stores ") == "a k stores"
+        assert term_range("Gan") == ("gan", "gao")
+        assert term_range(" .. ") is None
+        assert term_range("+91 98200-1")[0] == "91982001"
+        rows = search_rows("ledger", {"name": "Shree Ganesh Traders", "alias": "SGT",
+                                      "gstin": "27AABCS1234F1Z5", "mobile": "+91 98200 12345"})
+        assert {(row["field"], row["term"]) for row in rows} == {
+            ("name", "shree ganesh traders"), ("name", "ganesh traders"), ("name", "traders"),
+            ("alias", "sgt"), ("gstin", "27aabcs1234f1z5"),
+            ("mobile", "919820012345"), ("mobile", "9820012345"),
+        }
+
+    @pytest.mark.asyncio
+    async def test_ranked_type_ahead(self, db):
+        """Exact name, name start, later word, then alias"""
+        result = await search("ganesh")
+        assert [(r["kind"], r["name"]) for r in result["data"]] == [
+            ("ledger", "Ganesh"), ("stock_item", "Ganesh Idol 12in"),
+            ("ledger", "Shree Ganesh Traders"), ("ledger", "A.K. Stores"),
+        ]
+        result = await search("ganesh tr", kinds="ledger")
+        assert [r["name"] for r in result["data"]] == ["Shree Ganesh Traders"]
+
+    @pytest.mark.asyncio
+    async def test_identifiers(self, db):
+        """GSTIN (mst_ledger.gstn), mobile with or without country code, alias"""
+        assert "gstin" not in await db.get_table_columns("mst_ledger")
+        for q in ("27AABCS", "98200 12345", "+91-9820012345", "sgt"):
+            assert [r["name"] for r in (await search(q))["data"]] == ["Shree Ganesh Traders"], q
+        assert [r["name"] for r in (await search("diya"))["data"]] == ["Brass Lamp"]
+
+    @pytest.mark.asyncio
+    async def test_per_company_and_validation(self, db):
+        """A company without terms matches names by substring; unknown kinds are rejected"""
+        result = await search("ganesh", company="Beta")
+        assert [r["name"] for r in result["data"]] == ["Ganesh", "Ganesh Idol 12in", "Shree Ganesh Traders"]
+        result = await master_controller.get_ledgers(company="Beta", parent=None, under=None, search="ganesh",
+                                                     limit=100, offset=0, cursor=None)
+        assert result["ledgers"] == ["Ganesh", "Shree Ganesh Traders"]
+        
+        await db.refresh_derived_table("master_search", "Beta")
+        result = await search("ganesh", company="Beta")
+        assert "A.K. Stores" in [r["name"] for r in result["data"]]
+        with pytest.raises(HTTPException) as error:
+            await search("ganesh", kinds="group")
+        assert error.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_list_search_uses_index(self, db):
+        """/ledgers and /stock-items search match aliases through the index"""
+        result = await master_controller.get_ledgers(company="Alpha", parent=None, under=None, search="ganesh",
+                                                     limit=100, offset=0, cursor=None)
+        assert result["ledgers"] == ["A.K. Stores", "Ganesh", "Shree Ganesh Traders"]
+        result = await master_controller.get_stock_items(company="Alpha", parent=None, under=None, search="diya",
+                                                         limit=100, offset=0, cursor=None)
+        assert [row["name"] for row in result["data"]] == ["Brass Lamp"]
+
+    @pytest.mark.asyncio
+    async def test_delete_company_clears_rows(self, db):
+        """Deleting a company removes its search terms"""
+        await db.delete_company_data("Alpha")
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM master_search") == 0
@@ -0,0 +1,153 @@
+"""
+MongoDB Query Layer Tests
+Checks SQL-to-pipeline translation and the report pipelines used when the
+MongoDB adapter is active (run against mongomock).
+
+Usage:
+    pytest tests/test_mongo_queries.py -v
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.services.database.mongo_queries import (
+    MONGO_INDEXES, translate_select, translate_write, outstanding_pipeline,
+    ledger_info_pipeline, ledger_pre_total_pipeline, ledger_transactions_pipeline,
+    voucher_filter, voucher_list_pipeline
+)
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def db():
+    """mongomock database with two companies of sample data"""
+    database = mongomock.MongoClient().db
+    database.mst_group.insert_many([
+        {"guid": "g1", "name": "Sundry Debtors", "is_deemedpositive": 1, "_company": "Demo"},
+    ])
+    database.mst_ledger.insert_many([
+        {"guid": "l1", "name": "Party A", "parent": "Sundry Debtors", "opening_balance": -100, "_company": "Demo"},
+        {"guid": "l2", "name": "Party B", "parent": "Sundry Debtors", "opening_balance": 0, "_company": "Demo"},
+        {"guid": "l3", "name": "Party A", "parent": "Sundry Debtors", "opening_balance": -999, "_company": "Other"},
+    ])
+    database.trn_voucher.insert_many([
+        {"guid": "v1", "date": "2024-04-01", "voucher_type": "Sales", "voucher_number": "1",
+         "narration": "", "party_name": "Party A", "_company": "Demo"},
+        {"guid": "v2", "date": "2024-05-01", "voucher_type": "Receipt", "voucher_number": "2",
+         "narration": "", "party_name": "Party A", "_company": "Demo"},
+        {"guid": "v3", "date": "2024-05-01", "voucher_type": "Sales", "voucher_number": "1",
+         "narration": "", "party_name": "Party A", "_company": "Other"},
+    ])
+    database.trn_accounting.insert_many([
+        {"guid": "v1", "ledger": "Party A", "amount": -500, "_company": "Demo"},
+        {"guid": "v1", "ledger": "Sales", "amount": 500, "_company": "Demo"},
+        {"guid": "v2", "ledger": "Party A", "amount": 200, "_company": "Demo"},
+        {"guid": "v2", "ledger": "Cash", "amount": -200, "_company": "Demo"},
+        {"guid": "v3", "ledger": "Party A", "amount": -50, "_company": "Other"},
+    ])
+    return database
+
+
+def run(db, collection, pipeline):
+    return list(db[collection].aggregate(pipeline))
+
+
+class TestTranslation:
+    """Test cases for the SQL subset translator"""
+
+    def test_select_filter_sort_page(self, db):
+        """WHERE, ORDER BY and LIMIT/OFFSET become $match/$sort/$skip/$limit"""
+        select = translate_select(
+            "SELECT name, opening_balance AS ob FROM mst_ledger WHERE _company = ? "
+            "ORDER BY name DESC LIMIT 1 OFFSET 1", ("Demo",)
+        )
+        assert select.collection == "mst_ledger"
+        assert [stage_name for stage in select.pipeline for stage_name in stage] == \
+            ["$match", "$sort", "$skip", "$limit", "$project"]
+        assert run(db, select.collection, select.pipeline) == [{"name": "Party A", "ob": -100}]
+
+    def test_in_and_range(self):
+        """IN lists and range comparisons on one field are merged"""
+        select = translate_select(
+            "SELECT * FROM trn_voucher WHERE voucher_type IN ('Sales', ?) AND date >= ? AND date <= ?",
+            ("Receipt", "2024-04-01", "2024-04-30")
+        )
+        assert select.pipeline[0]["$match"] == {
+            "voucher_type": {"$in": ["Sales", "Receipt"]},
+            "date": {"$gte": "2024-04-01", "$lte": "2024-04-30"},
+        }
+
+    def test_aggregates_and_empty_row(self, db):
+        """COUNT/SUM run as $group; empty_row covers no matches"""
+        select = translate_select("SELECT COUNT(*) AS n, SUM(amount) AS total FROM trn_accounting "
+                                  "WHERE _company = ?", ("Demo",))
+        assert run(db, select.collection, select.pipeline) == [{"n": 4, "total": 0}]
+        # mongod returns no document from $group over an empty input
+        select = translate_select("SELECT COUNT(*) FROM trn_accounting WHERE _company = ?", ("None",))
+        assert select.empty_row == {"COUNT(*)": 0}
+
+    def test_distinct(self, db):
+        """DISTINCT groups on the selected columns"""
+        select = translate_select("SELECT DISTINCT name FROM mst_ledger ORDER BY name")
+        assert run(db, select.collection, select.pipeline) == [{"name": "Party A"}, {"name": "Party B"}]
+
+    def test_joins_rejected(self):
+        """Joined and grouped SQL raise instead of loading whole collections"""
+        with pytest.raises(ValueError):
+            translate_select("SELECT a.ledger FROM trn_accounting a JOIN trn_voucher v ON a.guid = v.guid")
+        with pytest.raises(ValueError):
+            translate_select("SELECT ledger, SUM(amount) FROM trn_accounting GROUP BY ledger")
+        with pytest.raises(ValueError):
+            translate_select("SELECT * FROM mst_ledger WHERE name = ? OR parent = ?", ("a", "b"))
+
+    def test_writes(self):
+        """INSERT / UPDATE / DELETE become write statements"""
+        insert = translate_write("INSERT INTO company_config (company_name, alter_id) VALUES (?, 0)", ("Demo",))
+        assert insert.document == {"company_name": "Demo", "alter_id": 0}
+        update = translate_write("UPDATE company_config SET alter_id = ? WHERE company_name = ?", (5, "Demo"))
+        assert (update.document, update.filter) == ({"alter_id": 5}, {"company_name": "Demo"})
+        delete = translate_write("DELETE FROM trn_bill WHERE _company = ?", ("Demo",))
+        assert (delete.operation, delete.filter) == ("delete", {"_company": "Demo"})
+
+    def test_index_names_unique(self):
+        """Declared indexes do not collide on one collection"""
+        keys = [(index.collection, index.name) for index in MONGO_INDEXES]
+        assert len(keys) == len(set(keys))
+
+
+class TestReportPipelines:
+    """Test cases for the report aggregation pipelines"""
+
+    def test_outstanding(self, db):
+        """Outstanding sums party entries of the same company only"""
+        rows = run(db, "mst_ledger", outstanding_pipeline("Sundry Debtors", "Demo"))
+        assert rows == [
+            {"ledger_name": "Party A", "opening": -100, "debit": 200, "credit": 500, "closing": -400},
+            {"ledger_name": "Party B", "opening": 0, "debit": 0, "credit": 0, "closing": 0},
+        ]
+
+    def test_ledger_report(self, db):
+        """Ledger info, pre-period total and statement rows"""
+        info = run(db, "mst_ledger", ledger_info_pipeline("Party A", "Demo"))
+        assert info == [{"opening_balance": -100, "parent": "Sundry Debtors", "is_deemed_positive": 1}]
+
+        pre = run(db, "trn_accounting", ledger_pre_total_pipeline("Party A", "2024-05-01", "Demo"))
+        assert pre == [{"pre_total": -500}]
+
+        rows = run(db, "trn_accounting", ledger_transactions_pipeline(
+            "Party A", True, "Demo", "2024-04-01", "2024-05-31"
+        ))
+        assert [(r["voucher_no"], r["debit"], r["credit"]) for r in rows] == [("1", 500, 0), ("2", 0, 200)]
+
+    def test_voucher_list(self, db):
+        """Voucher page is filtered, sorted newest first and carries the debit amount"""
+        mongo_filter = voucher_filter("Demo", from_date="2024-04-01", to_date="2024-12-31")
+        rows = run(db, "trn_voucher", voucher_list_pipeline(mongo_filter, 1, 0))
+        assert [(r["guid"], r["amount"]) for r in rows] == [("v2", 200)]
+        assert db.trn_voucher.count_documents(mongo_filter) == 2
@@ -0,0 +1,121 @@
+"""
+Monthly Cube Tests
+Checks the month x voucher type x ledger totals rebuilt at sync and the
+/cube roll-ups served from them.
+
+Usage:
+    pytest tests/test_monthly_cube.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.controllers import dashboard_controller
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+
+CELL_QUERY = "SELECT * FROM monthly_cube WHERE _company = ? AND month = ? AND voucher_type = ? AND ledger = ?"
+
+# guid suffix, date, voucher type, [(ledger, amount)]
+VOUCHERS = [
+    ("s1", "2024-04-02", "Sales", [("Party A", -118), ("Sales", 100), ("GST", 18)]),
+    ("s2", "2024-04-20", "Sales", [("Party B", -59), ("Sales", 50), ("GST", 9)]),
+    ("r1", "2024-05-05", "Receipt", [("Party A", 118), ("Cash", -118)]),
+]
+
+
+async def load_vouchers(service, company):
+    """Two sales in April (parties in Sundry Debtors and a sub-group), a receipt in May"""
+    await service.bulk_insert("mst_group", [
+        {"guid": f"{company}-g1", "name": "Sundry Debtors", "parent": "Current Assets"},
+        {"guid": f"{company}-g2", "name": "Export Debtors", "parent": "Sundry Debtors"},
+    ], company)
+    await service.bulk_insert("mst_ledger", [
+        {"guid": f"{company}-l1", "name": "Party A", "parent": "Sundry Debtors"},
+        {"guid": f"{company}-l2", "name": "Party B", "parent": "Export Debtors"},
+        {"guid": f"{company}-l3", "name": "Sales", "parent": "Sales Accounts"},
+    ], company)
+    await service.bulk_insert("trn_voucher", [
+        {"guid": f"{company}-{guid}", "date": day, "voucher_type": vtype, "party_name": entries[0][0],
+         "place_of_supply": ""}
+        for guid, day, vtype, entries in VOUCHERS
+    ], company)
+    await service.bulk_insert("trn_accounting", [
+        {"guid": f"{company}-{guid}", "ledger": ledger, "amount": amount}
+        for guid, _, _, entries in VOUCHERS for ledger, amount in entries
+    ], company)
+    await service.assign_surrogate_keys(company)
+    await service.refresh_derived_table("group_closure", company)
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """Controller bound to a SQLite service with two companies and Alpha's cube"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    await load_vouchers(service, "Alpha")
+    await load_vouchers(service, "Beta")
+    await service.refresh_derived_table("monthly_cube", "Alpha")
+    monkeypatch.setattr(dashboard_controller, "database_service", service)
+    yield service
+    await service.disconnect()
+
+
+async def cube(**kwargs):
+    params = dict(company="Alpha", group_by="month", from_date=None, to_date=None, voucher_type=None,
+                  ledger=None, group=None, order_by=None, limit=None)
+    params.update(kwargs)
+    return await dashboard_controller.get_cube(**params)
+
+
+class TestMonthlyCube:
+    """Test cases for the monthly_cube rebuild and /cube"""
+
+    @pytest.mark.asyncio
+    async def test_cell_totals(self, db):
+        """Vouchers, entries, Dr / Cr totals and the ledger's group per cell"""
+        cell = await db.fetch_one(CELL_QUERY, ("Alpha", "2024-04", "Sales", "Sales"))
+        assert (cell["voucher_count"], cell["entry_count"]) == (2, 2)
+        assert (cell["debit"], cell["credit"], cell["amount"]) == (0, 150, 150)
+        assert cell["ledger_group"] == "Sales Accounts"
+        cell = await db.fetch_one(CELL_QUERY, ("Alpha", "2024-05", "Receipt", "Cash"))
+        assert (cell["debit"], cell["ledger_group"]) == (118, "")
+
+    @pytest.mark.asyncio
+    async def test_monthly_trend(self, db):
+        """Vouchers are counted once per month and type across their ledgers"""
+        result = await cube(group_by="month,voucher_type")
+        assert [(r["month"], r["voucher_type"], r["voucher_count"], r["entry_count"]) for r in result["data"]] == [
+            ("2024-04", "Sales", 2, 6), ("2024-05", "Receipt", 1, 2),
+        ]
+        result = await cube(group_by="", from_date="2024-05-01", voucher_type="Sales,Receipt")
+        assert (result["data"][0]["voucher_count"], result["data"][0]["debit"]) == (1, 118)
+
+    @pytest.mark.asyncio
+    async def test_top_parties_under_group(self, db):
+        """Ledgers in sub-groups count; largest debit first"""
+        result = await cube(group_by="ledger", group="Sundry Debtors", order_by="debit")
+        assert [(r["ledger"], r["debit"]) for r in result["data"]] == [("Party A", 118), ("Party B", 59)]
+        result = await cube(group_by="ledger", group="Sundry Debtors", order_by="debit", limit=1)
+        assert result["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_refresh_is_per_company(self, db):
+        """Only the refreshed company is rebuilt; rebuilding again adds no rows"""
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM monthly_cube WHERE _company = 'Beta'") == 0
+        assert await db.refresh_derived_table("monthly_cube", "Beta") == await db.refresh_derived_table("monthly_cube", "Alpha") == 6
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM monthly_cube") == 12
+
+    @pytest.mark.asyncio
+    async def test_delete_company_clears_rows(self, db):
+        """Deleting a company removes its cube rows"""
+        await db.delete_company_data("Alpha")
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM monthly_cube") == 0
@@ -0,0 +1,123 @@
+"""
+Outstanding Ageing Tests
+Checks the SQL-side ageing report: caller bucket bounds, the as-of date,
+grouping by party or group, and company scoping of the ledger join.
+
+Usage:
+    pytest tests/test_outstanding_ageing.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.controllers import outstanding_controller
+from app.services import analytics_service as analytics_module
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+
+# party, bill, date, billtype, amount
+BILLS = [
+    ("Party A", "INV-1", "2024-03-01", "New Ref", -100),
+    ("Party A", "INV-2", "2024-01-10", "New Ref", -200),
+    ("Party A", "INV-2", "2024-04-10", "Agst Ref", 200),
+    ("Party B", "INV-3", "2024-03-25", "New Ref", -50),
+    ("Party B", "INV-4", "2024-04-05", "New Ref", -70),
+]
+
+
+async def load_bills(service, company, parties_group="Export Debtors"):
+    """Party A in Sundry Debtors, Party B in its sub-group; one voucher per bill row"""
+    await service.bulk_insert("mst_group", [
+        {"guid": f"{company}-g1", "name": "Sundry Debtors", "parent": "Current Assets"},
+        {"guid": f"{company}-g2", "name": "Export Debtors", "parent": "Sundry Debtors"},
+    ], company)
+    await service.refresh_derived_table("group_closure", company)
+    await service.bulk_insert("mst_ledger", [
+        {"guid": f"{company}-l1", "name": "Party A", "parent": "Sundry Debtors"},
+        {"guid": f"{company}-l2", "name": "Party B", "parent": parties_group},
+    ], company)
+    await service.bulk_insert("trn_voucher", [
+        {"guid": f"{company}-v{i}", "date": day, "voucher_type": "Sales", "party_name": party,
+         "place_of_supply": ""}
+        for i, (party, _, day, _, _) in enumerate(BILLS)
+    ], company)
+    await service.bulk_insert("trn_bill", [
+        {"guid": f"{company}-v{i}", "ledger": party, "name": bill, "billtype": billtype, "amount": amount,
+         "alterid": 1}
+        for i, (party, bill, _, billtype, amount) in enumerate(BILLS)
+    ], company)
+    await service.assign_surrogate_keys(company)
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """Controller bound to a SQLite service; Beta files Party B outside the debtors"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    await load_bills(service, "Alpha")
+    await load_bills(service, "Beta", parties_group="Suspense")
+    monkeypatch.setattr(outstanding_controller, "database_service", service)
+    monkeypatch.setattr(analytics_module, "database_service", service)
+    yield service
+    await service.disconnect()
+
+
+async def ageing(**kwargs):
+    params = dict(type="receivable", company=None, as_of=None,
+                  buckets=outstanding_controller.DEFAULT_AGEING_BUCKETS, group_by="party")
+    params.update(kwargs)
+    return await outstanding_controller.get_ageing_analysis(**params)
+
+
+class TestOutstandingAgeing:
+    """Test cases for /outstanding/ageing"""
+
+    @pytest.mark.asyncio
+    async def test_as_of_date(self, db):
+        """Bills after as_of are ignored; a payment after as_of leaves the bill open"""
+        report = await ageing(company="Alpha", as_of="2024-03-31")
+        rows = {row["party_name"]: row for row in report["data"]}
+        assert report["buckets"] == ["days_0_30", "days_30_60", "days_60_90", "days_90_plus"]
+        assert (rows["Party A"]["days_0_30"], rows["Party A"]["days_60_90"]) == (100, 200)
+        assert (rows["Party B"]["days_0_30"], rows["Party B"]["total"]) == (50, 50)
+        assert report["totals"]["total"] == 350
+
+        report = await ageing(company="Alpha", as_of="2024-04-30")
+        rows = {row["party_name"]: row for row in report["data"]}
+        assert rows["Party A"]["total"] == 100
+        assert rows["Party B"]["bill_count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_custom_buckets_by_group(self, db):
+        """Caller bounds name the columns; rows per ledger group"""
+        report = await ageing(company="Alpha", as_of="2024-03-31", buckets="15,45", group_by="group")
+        assert report["buckets"] == ["days_0_15", "days_15_45", "days_45_plus"]
+        rows = {row["group_name"]: row for row in report["data"]}
+        assert rows["Sundry Debtors"]["days_15_45"] == 100
+        assert rows["Sundry Debtors"]["days_45_plus"] == 200
+        assert rows["Export Debtors"]["days_0_15"] == 50
+
+    @pytest.mark.asyncio
+    async def test_ledger_join_is_per_company(self, db):
+        """A party under the debtors in one company only counts there"""
+        report = await ageing(as_of="2024-03-31")
+        rows = {row["party_name"]: row for row in report["data"]}
+        assert rows["Party B"]["total"] == 50
+        assert rows["Party A"]["total"] == 600
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("buckets", ["", "30,x", "60,30", "0,30"])
+    async def test_invalid_buckets(self, db, buckets):
+        """Malformed bounds are a 400"""
+        with pytest.raises(HTTPException) as error:
+            await ageing(buckets=buckets)
+        assert error.value.status_code == 400
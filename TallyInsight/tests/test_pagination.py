@@ -0,0 +1,121 @@
+"""
+Keyset Pagination Tests
+Checks cursor encoding, the keyset predicate and that paging by cursor
+returns the same rows and totals as paging by offset.
+
+Usage:
+    pytest tests/test_pagination.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+from app.utils.pagination import (
+    CursorError, KeysetPaginator, SortKey, decode_cursor, encode_cursor
+)
+
+ORDER = [SortKey("opening_balance", desc=True), SortKey("name")]
+SUMS = {"opening": "opening_balance"}
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """SQLite service with 23 ledgers, several sharing an opening balance"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    await service.bulk_insert("mst_ledger", [
+        {"guid": f"l{i}", "name": f"Ledger {i:02d}", "parent": "Sundry Debtors",
+         "opening_balance": (i % 4) * 100}
+        for i in range(23)
+    ], "Alpha")
+    yield service
+    await service.disconnect()
+
+
+async def fetch_page(db, limit, cursor=None, offset=0):
+    paginator = KeysetPaginator(ORDER, limit, cursor, offset, sums=SUMS)
+    query = f"SELECT name, opening_balance{paginator.window_columns()} FROM mst_ledger WHERE _company = ?"
+    params = ["Alpha"]
+    keyset, keyset_params = paginator.condition()
+    if keyset:
+        query += f" AND {keyset}"
+        params.extend(keyset_params)
+    return await paginator.fetch(db, query, params)
+
+
+class TestCursor:
+    """Test cases for cursor tokens and the keyset predicate"""
+
+    def test_round_trip(self):
+        state = {"after": ["2024-04-01", "g1"], "total": 5, "totals": None}
+        assert decode_cursor(encode_cursor(state)) == state
+
+    def test_invalid_cursor(self):
+        with pytest.raises(CursorError):
+            decode_cursor("not-a-cursor")
+        with pytest.raises(CursorError):
+            KeysetPaginator(ORDER, 10, encode_cursor({"after": [1]}))
+
+    def test_condition(self):
+        """Leading-key range plus tie-breaking on the following keys"""
+        paginator = KeysetPaginator(ORDER, 10, encode_cursor({"after": [200, "Ledger 06"]}))
+        sql, params = paginator.condition()
+        assert sql == ("(opening_balance <= ? AND ((opening_balance < ?) OR "
+                       "(opening_balance = ? AND name > ?)))")
+        assert params == [200, 200, 200, "Ledger 06"]
+        assert paginator.order_by() == "opening_balance DESC, name ASC"
+
+    def test_null_value(self):
+        key = SortKey("due_date", null_value="9999-12-31")
+        assert key.sql == "COALESCE(due_date, '9999-12-31')"
+        assert key.value({"due_date": None}) == "9999-12-31"
+
+
+class TestPaging:
+    """Test cases for KeysetPaginator.fetch"""
+
+    @pytest.mark.asyncio
+    async def test_cursor_pages_match_offset_pages(self, db):
+        """Walking by cursor returns every row once, in offset order"""
+        by_offset = []
+        for offset in range(0, 23, 5):
+            by_offset += (await fetch_page(db, 5, offset=offset)).rows
+
+        by_cursor, cursor = [], None
+        while True:
+            page = await fetch_page(db, 5, cursor)
+            by_cursor += page.rows
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        assert by_cursor == by_offset
+        assert len(by_cursor) == 23
+
+    @pytest.mark.asyncio
+    async def test_totals_carried_in_cursor(self, db):
+        """First-page window totals come back on later pages"""
+        first = await fetch_page(db, 5)
+        assert (first.total, first.totals) == (23, {"opening": 3300})
+        assert "_page_total" not in first.rows[0]
+
+        second = await fetch_page(db, 5, first.next_cursor)
+        assert (second.total, second.totals) == (23, {"opening": 3300})
+
+    @pytest.mark.asyncio
+    async def test_offset_past_end(self, db):
+        """An empty page past the end still reports the totals"""
+        page = await fetch_page(db, 5, offset=100)
+        assert page.rows == []
+        assert page.total == 23
+        assert page.next_cursor is None
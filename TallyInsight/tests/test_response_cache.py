@@ -0,0 +1,140 @@
+"""
+Response Cache Tests
+Checks that report responses are served from the cache until the data
+version changes, ETag / If-None-Match handling and LRU eviction.
+
+Usage:
+    pytest tests/test_response_cache.py -v
+"""
+
+import os
+import sys
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app import main
+from app.config import config
+from app.services import database_service as database_module, response_cache as cache_module
+from app.services.response_cache import CachedRoute, ResponseCache
+
+
+class SyncedCompanies:
+    """company_config rows the data version is read from"""
+
+    def __init__(self):
+        self.rows = {"Alpha": {"company_name": "Alpha", "last_sync_at": "t1", "sync_count": 1}}
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    async def get_company_config(self, company_name):
+        return self.rows.get(company_name)
+
+    async def get_synced_companies(self):
+        return list(self.rows.values())
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """App with one cached report route counting its executions"""
+    cache = ResponseCache(max_bytes=1024)
+    companies = SyncedCompanies()
+    monkeypatch.setattr(cache_module, "response_cache", cache)
+    monkeypatch.setattr(cache_module, "database_service", companies)
+
+    router = APIRouter(route_class=CachedRoute)
+    calls = []
+
+    @router.get("/report")
+    async def report(company: str = None, size: int = 10, tag: str = ""):
+        calls.append(company)
+        return {"company": company, "data": "x" * size}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.state.cache, app.state.companies, app.state.calls = cache, companies, calls
+    return app
+
+
+def client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+class TestResponseCache:
+    """Test cases for ResponseCache / CachedRoute"""
+
+    @pytest.mark.asyncio
+    async def test_hit_until_data_changes(self, app):
+        """Same params in any order hit; a bump or a new sync misses"""
+        async with client(app) as http:
+            first = await http.get("/report", params={"company": "Alpha", "size": 5})
+            again = await http.get("/report?size=5&tag=&company=Alpha")
+            assert (first.headers["X-Cache"], again.headers["X-Cache"]) == ("MISS", "HIT")
+            assert again.json() == first.json()
+            assert len(app.state.calls) == 1
+
+            app.state.cache.bump("Alpha")
+            assert (await http.get("/report", params={"company": "Alpha", "size": 5})).headers["X-Cache"] == "MISS"
+
+            app.state.companies.rows["Alpha"]["sync_count"] = 2
+            assert (await http.get("/report", params={"company": "Alpha", "size": 5})).headers["X-Cache"] == "MISS"
+        assert app.state.cache.stats()["hits"] == 1
+        assert app.state.cache.stats()["misses"] == 3
+
+    @pytest.mark.asyncio
+    async def test_bump_all_companies(self, app):
+        """A bump without a company invalidates every company"""
+        async with client(app) as http:
+            await http.get("/report", params={"company": "Alpha"})
+            app.state.cache.bump()
+            assert (await http.get("/report", params={"company": "Alpha"})).headers["X-Cache"] == "MISS"
+
+    @pytest.mark.asyncio
+    async def test_if_none_match(self, app):
+        """A current ETag gets 304 without running the report, even after eviction"""
+        async with client(app) as http:
+            etag = (await http.get("/report", params={"company": "Alpha"})).headers["ETag"]
+            app.state.cache.clear()
+            response = await http.get("/report", params={"company": "Alpha"}, headers={"If-None-Match": etag})
+            assert response.status_code == 304
+            assert len(app.state.calls) == 1
+
+            app.state.cache.bump("Alpha")
+            response = await http.get("/report", params={"company": "Alpha"}, headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["ETag"] != etag
+
+    @pytest.mark.asyncio
+    async def test_restore_invalidates(self, app, tmp_path, monkeypatch):
+        """Restoring a backup replaces every company's data"""
+        monkeypatch.setattr(database_module, "database_service", app.state.companies)
+        monkeypatch.setattr(config.database, "path", str(tmp_path / "tally.db"))
+        (tmp_path / "backups").mkdir()
+        (tmp_path / "backups" / "old.db").write_bytes(b"")
+        async with client(app) as http:
+            await http.get("/report", params={"company": "Alpha"})
+            assert (await main.restore_backup({"filename": "old.db"}))["status"] == "success"
+            assert (await http.get("/report", params={"company": "Alpha"})).headers["X-Cache"] == "MISS"
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, app):
+        """Least recently used bodies go first once the size limit is passed"""
+        async with client(app) as http:
+            for tag in ("a", "b", "c"):
+                await http.get("/report", params={"company": "Alpha", "size": 300, "tag": tag})
+            await http.get("/report", params={"company": "Alpha", "size": 300, "tag": "a"})
+            await http.get("/report", params={"company": "Alpha", "size": 300, "tag": "d"})
+
+            stats = app.state.cache.stats()
+            assert stats["evictions"] == 1
+            assert stats["bytes"] <= stats["max_bytes"]
+            assert (await http.get("/report", params={"company": "Alpha", "size": 300, "tag": "a"})).headers["X-Cache"] == "HIT"
+            assert (await http.get("/report", params={"company": "Alpha", "size": 300, "tag": "b"})).headers["X-Cache"] == "MISS"
@@ -0,0 +1,114 @@
+"""
+Schema Catalog Tests
+Checks the cached table / column metadata and that the SQLite adapter
+keeps it current when DDL runs through it.
+
+Usage:
+    pytest tests/test_schema_catalog.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.services.database.schema_catalog import SchemaCatalog
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+
+
+@pytest.fixture
+def catalog():
+    """Catalog loaded with two tables, one of them without columns"""
+    catalog = SchemaCatalog()
+    catalog.load([("mst_ledger", "guid"), ("MST_LEDGER", "Name"), ("trn_bill", None)])
+    return catalog
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    """SQLite service with one table"""
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.execute("CREATE TABLE t (guid TEXT)")
+    yield service
+    await service.disconnect()
+
+
+class TestSchemaCatalog:
+    """Test cases for SchemaCatalog"""
+
+    def test_load(self, catalog):
+        """Names are matched case-insensitively; tables without columns still exist"""
+        assert catalog.is_loaded
+        assert catalog.table_exists("mst_ledger") and catalog.table_exists("trn_bill")
+        assert catalog.has_column("Mst_Ledger", "NAME")
+        assert catalog.get_columns("mst_ledger") == {"guid", "name"}
+        assert catalog.get_columns("trn_bill") == set()
+        assert not catalog.table_exists("trn_voucher")
+
+    def test_missing_columns(self, catalog):
+        """Missing columns keep the caller's spelling and order"""
+        assert catalog.missing_columns("mst_ledger", ["GUID", "_company", "parent"]) == ["_company", "parent"]
+        assert catalog.missing_columns("trn_voucher", ["guid"]) == ["guid"]
+
+    def test_add_columns(self, catalog):
+        """Added columns are recorded in place; nothing is recorded before a load"""
+        catalog.add_columns("mst_ledger", ["_Company"])
+        catalog.add_columns("trn_voucher", ["guid"])
+        assert catalog.has_column("mst_ledger", "_company")
+        assert catalog.has_column("trn_voucher", "guid")
+
+        empty = SchemaCatalog()
+        empty.add_columns("mst_ledger", ["guid"])
+        assert not empty.is_loaded
+
+    def test_invalidate(self, catalog):
+        """An invalidated catalog answers nothing until it is loaded again"""
+        catalog.invalidate()
+        assert not catalog.is_loaded
+        assert not catalog.table_exists("mst_ledger")
+        assert catalog.missing_columns("mst_ledger", ["guid"]) == ["guid"]
+
+    def test_is_ddl(self):
+        """Schema changes are recognized; reads and writes are not"""
+        assert SchemaCatalog.is_ddl("  create table x (a)")
+        assert SchemaCatalog.is_ddl("ALTER TABLE x ADD COLUMN b")
+        assert SchemaCatalog.is_ddl("DROP INDEX idx")
+        assert not SchemaCatalog.is_ddl("SELECT * FROM created")
+        assert not SchemaCatalog.is_ddl("INSERT INTO x VALUES (1)")
+
+    @pytest.mark.asyncio
+    async def test_adapter_loads_catalog(self, db):
+        """The adapter loads the catalog once and answers from it"""
+        assert await db.table_exists("t")
+        catalog = await db._get_catalog()
+        assert catalog.is_loaded
+        assert await db._has_column("t", "guid")
+        assert not await db.table_exists("missing")
+
+    @pytest.mark.asyncio
+    async def test_ddl_through_execute_invalidates(self, db):
+        """CREATE / ALTER / DROP run through execute() are seen by the next lookup"""
+        assert not await db.table_exists("u")
+        await db.execute("CREATE TABLE u (guid TEXT)")
+        assert await db.table_exists("u")
+
+        assert not await db._has_column("u", "amount")
+        await db.execute("ALTER TABLE u ADD COLUMN amount REAL")
+        assert await db._has_column("u", "amount")
+
+        await db.execute("DROP TABLE u")
+        assert not await db.table_exists("u")
+
+    @pytest.mark.asyncio
+    async def test_added_columns_patch_catalog(self, db):
+        """Columns the adapter adds itself are recorded without a reload"""
+        await db._ensure_columns_exist("t", ["guid", "narration"])
+        catalog = await db._get_catalog()
+        assert catalog.is_loaded
+        assert catalog.has_column("t", "narration")
+        assert await db.get_table_columns("t") == ["guid", "narration"]
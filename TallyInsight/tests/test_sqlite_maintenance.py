@@ -0,0 +1,131 @@
+"""
+SQLite Profile and Maintenance Tests
+Checks PRAGMA profiles, the full-sync bulk-load switch and idle-time
+maintenance of the SQLite adapter.
+
+Usage:
+    pytest tests/test_sqlite_maintenance.py -v
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+from app.services.database.sqlite_profiles import resolve_profile
+
+
+def make_service(path):
+    service = SQLiteDatabaseService()
+    service.db_path = str(path)
+    service.read_pool_size = 1
+    return service
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    """SQLite service on a new file with 8 KB pages"""
+    service = make_service(tmp_path / "tally.db")
+    service.page_size = 8192
+    service.pragmas = resolve_profile("read_heavy", {"mmap_size": 0})
+    yield service
+    await service.disconnect()
+
+
+async def pragma(conn, name):
+    cursor = await conn.execute(f"PRAGMA {name}")
+    row = await cursor.fetchone()
+    await cursor.close()
+    return row[0]
+
+
+async def fill_and_delete(service, rows=2000):
+    """Create a table, fill it and delete everything, leaving free pages"""
+    await service.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    conn = await service._get_connection()
+    await conn.executemany("INSERT INTO t (v) VALUES (?)", [("x" * 500,) for _ in range(rows)])
+    await conn.commit()
+    await service.execute("DELETE FROM t")
+
+
+class TestSQLiteProfiles:
+    """Test cases for PRAGMA profiles"""
+
+    def test_unknown_profile_rejected(self):
+        """Unknown profile names and PRAGMA overrides raise"""
+        with pytest.raises(ValueError):
+            resolve_profile("turbo")
+        with pytest.raises(ValueError):
+            resolve_profile("balanced", {"journal_mode": "OFF"})
+
+    @pytest.mark.asyncio
+    async def test_new_file_settings(self, db):
+        """New files get the configured page size and incremental auto-vacuum"""
+        conn = await db._get_connection()
+        assert await pragma(conn, "page_size") == 8192
+        assert await pragma(conn, "auto_vacuum") == 2
+
+    @pytest.mark.asyncio
+    async def test_profile_applied_to_writer_and_readers(self, db):
+        """Writer and readers use the profile cache size; overrides win"""
+        conn = await db._get_connection()
+        assert await pragma(conn, "cache_size") == -256000
+        assert await pragma(conn, "mmap_size") == 0
+        await db.fetch_all("SELECT 1")
+        reader = db._reader_connections[''][0]
+        assert await pragma(reader, "cache_size") == -256000
+
+    @pytest.mark.asyncio
+    async def test_bulk_load_switch(self, db):
+        """Bulk load turns synchronous off and end_bulk_load restores it"""
+        conn = await db._get_connection()
+        await db.begin_bulk_load()
+        assert await pragma(conn, "synchronous") == 0
+        await db.end_bulk_load()
+        assert await pragma(conn, "synchronous") == 1
+        await db.end_bulk_load()  # idempotent
+
+
+class TestSQLiteMaintenance:
+    """Test cases for run_maintenance"""
+
+    @pytest.mark.asyncio
+    async def test_incremental_vacuum_frees_pages(self, db):
+        """Free pages left by deletes are returned to the file system"""
+        await fill_and_delete(db)
+        conn = await db._get_connection()
+        assert await pragma(conn, "freelist_count") > 0
+
+        result = await db.run_maintenance()
+        assert result["main"]["main"]["freed_pages"] > 0
+        assert await pragma(conn, "freelist_count") == 0
+
+    @pytest.mark.asyncio
+    async def test_legacy_file_converted(self, tmp_path):
+        """Files without auto-vacuum are converted by one VACUUM when mostly free"""
+        path = tmp_path / "legacy.db"
+        sqlite3.connect(path).execute("PRAGMA user_version=1").connection.close()
+        service = make_service(path)
+        try:
+            await fill_and_delete(service)
+            conn = await service._get_connection()
+            assert await pragma(conn, "auto_vacuum") == 0
+
+            await service.run_maintenance()
+            assert await pragma(conn, "auto_vacuum") == 2
+            assert await pragma(conn, "freelist_count") == 0
+        finally:
+            await service.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_skipped_during_bulk_load(self, db):
+        """Routes in a bulk load are left alone"""
+        await db.begin_bulk_load()
+        assert await db.run_maintenance() == {}
+        await db.end_bulk_load()
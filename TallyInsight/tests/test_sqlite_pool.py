@@ -0,0 +1,83 @@
+"""
+SQLite Connection Pool Tests
+Checks the one-writer / N-reader connection layout of the SQLite adapter.
+
+Usage:
+    pytest tests/test_sqlite_pool.py -v
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    """SQLite service with a small reader pool"""
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    service.read_pool_size = 2
+    await service.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    await service.execute("INSERT INTO t (v) VALUES ('committed')")
+    yield service
+    await service.disconnect()
+
+
+class TestSQLitePool:
+    """Test cases for reader/writer connections"""
+
+    @pytest.mark.asyncio
+    async def test_reads_use_reader_connections(self, db):
+        """Reads go through the read-only pool, not the writer"""
+        assert await db.fetch_scalar("SELECT v FROM t") == "committed"
+        assert len(db._reader_connections['']) == 2
+        assert db._connection not in db._reader_connections['']
+
+    @pytest.mark.asyncio
+    async def test_reader_is_read_only(self, db):
+        """Writes through a reader connection are rejected"""
+        with pytest.raises(Exception):
+            await db.fetch_all("INSERT INTO t (v) VALUES ('x')")
+
+    @pytest.mark.asyncio
+    async def test_reads_do_not_wait_for_open_write(self, db):
+        """An uncommitted writer transaction does not block or leak into reads"""
+        writer = await db._get_connection()
+        await writer.execute("BEGIN IMMEDIATE")
+        await writer.execute("INSERT INTO t (v) VALUES ('pending')")
+
+        rows = await asyncio.wait_for(db.fetch_all("SELECT v FROM t"), timeout=2)
+        assert [row["v"] for row in rows] == ["committed"]
+
+        await writer.commit()
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM t") == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_reads(self, db):
+        """More concurrent reads than readers queue for a free connection"""
+        results = await asyncio.gather(*[db.fetch_scalar("SELECT COUNT(*) FROM t") for _ in range(10)])
+        assert results == [1] * 10
+
+    @pytest.mark.asyncio
+    async def test_disconnect_closes_pool(self, db):
+        """disconnect closes writer and readers; next read reopens them"""
+        await db.fetch_all("SELECT * FROM t")
+        await db.disconnect()
+        assert db._reader_connections == {}
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM t") == 1
+    
+    @pytest.mark.asyncio
+    async def test_execute_insert_returns_own_id(self, db):
+        """execute_insert returns the id of its own row, not the highest id"""
+        await db.execute("INSERT INTO t (id, v) VALUES (50, 'later')")
+        row_id = await db.execute_insert("INSERT INTO t (id, v) VALUES (7, 'mine')")
+        assert row_id == 7
+        assert await db.fetch_scalar("SELECT v FROM t WHERE id = ?", (row_id,)) == "mine"
@@ -0,0 +1,173 @@
+"""
+Financial Statement Tests
+Checks trial balance, profit & loss and balance sheet built from the ledger
+snapshots and the group closure.
+
+Usage:
+    pytest tests/test_statements.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.config import config
+from app.controllers import statement_controller
+from app.services import statement_service as statement_module
+from app.services.database import ledger_snapshots
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+from app.services.statement_service import statement_service
+
+# name, parent, is_revenue, is_deemedpositive, affects_gross_profit
+GROUPS = [
+    ("Capital Account", "", 0, 0, 0),
+    ("Current Assets", "", 0, 1, 0),
+    ("Sundry Debtors", "Current Assets", 0, 1, 0),
+    ("Export Debtors", "Sundry Debtors", 0, 1, 0),
+    ("Bank Accounts", "Current Assets", 0, 1, 0),
+    ("Sales Accounts", "", 1, 0, 1),
+    ("Indirect Expenses", "", 1, 1, 0),
+]
+
+# name, parent, opening balance (negative = Dr)
+LEDGERS = [
+    ("Capital", "Capital Account", 1000),
+    ("Bank", "Bank Accounts", -1000),
+    ("Party A", "Sundry Debtors", 0),
+    ("Party B", "Export Debtors", 0),
+    ("Sales", "Sales Accounts", 0),
+    ("Rent", "Indirect Expenses", 0),
+]
+
+# date, [(ledger, amount)]
+VOUCHERS = [
+    ("2023-06-10", [("Party A", -500), ("Sales", 500)]),
+    ("2023-07-01", [("Rent", -100), ("Bank", 100)]),
+    ("2024-04-15", [("Party B", -300), ("Sales", 300)]),
+    ("2024-05-20", [("Party A", 500), ("Bank", -500)]),
+    ("2024-06-30", [("Rent", -50), ("Bank", 50)]),
+]
+
+
+async def load_books(service, company):
+    """Two financial years of a small company"""
+    await service.bulk_insert("mst_group", [
+        {"guid": f"{company}-g{i}", "name": name, "parent": parent, "is_revenue": revenue,
+         "is_deemedpositive": deemed, "affects_gross_profit": gross}
+        for i, (name, parent, revenue, deemed, gross) in enumerate(GROUPS)
+    ], company)
+    revenue_groups = {name for name, _, revenue, _, _ in GROUPS if revenue}
+    await service.bulk_insert("mst_ledger", [
+        {"guid": f"{company}-l{i}", "name": name, "parent": parent, "opening_balance": opening,
+         "is_revenue": int(parent in revenue_groups)}
+        for i, (name, parent, opening) in enumerate(LEDGERS)
+    ], company)
+    await service.bulk_insert("trn_voucher", [
+        {"guid": f"{company}-v{i}", "date": day, "voucher_type": "Journal",
+         "party_name": "", "place_of_supply": ""}
+        for i, (day, _) in enumerate(VOUCHERS)
+    ], company)
+    await service.bulk_insert("trn_accounting", [
+        {"guid": f"{company}-v{i}", "ledger": ledger, "amount": amount}
+        for i, (_, entries) in enumerate(VOUCHERS) for ledger, amount in entries
+    ], company)
+    await service.assign_surrogate_keys(company)
+    await service.refresh_derived_table("group_closure", company)
+    await service.refresh_derived_table("ledger_balance_snapshot", company)
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """Statement service bound to a SQLite service with two companies' books"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    await load_books(service, "Alpha")
+    await load_books(service, "Beta")
+    monkeypatch.setattr(statement_module, "database_service", service)
+    monkeypatch.setattr(statement_controller, "database_service", service)
+    yield service
+    await service.disconnect()
+
+
+class TestStatements:
+    """Test cases for statement_service"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("before", ["2023-04-01", "2023-06-15", "2024-05-01", "2024-05-21", "2025-01-01"])
+    async def test_balances_match_full_sum(self, db, before):
+        """Snapshot-based balances of all ledgers equal the full sums"""
+        query, params = ledger_snapshots.full_balances_before_query("Alpha", before)
+        full = {row["ledger"]: row for row in await db.fetch_all(query, params)}
+        balances = await db.get_ledger_balances_before("Alpha", before)
+        assert set(balances) == set(full)
+        for ledger, row in full.items():
+            assert balances[ledger] == {key: pytest.approx(row[key]) for key in ("amount", "debit", "credit")}
+
+    @pytest.mark.asyncio
+    async def test_trial_balance_tallies(self, db):
+        """Closing Dr equals Cr; the prior year's profit is one P&L A/c line"""
+        tb = await statement_service.trial_balance("Alpha", "2024-04-01", "2025-03-31")
+        assert tb["total_debit"] == tb["total_credit"] == 1700
+        assert tb["difference"] == 0
+        assert tb["profit_and_loss"]["opening"] == 400
+        ledgers = {row["name"]: row for row in tb["ledgers"]}
+        assert ledgers["Sales"]["opening"] == 0 and ledgers["Sales"]["closing"] == 300
+        assert (ledgers["Bank"]["opening"], ledgers["Bank"]["closing"]) == (-900, -1350)
+        assert (ledgers["Bank"]["debit"], ledgers["Bank"]["credit"]) == (500, 50)
+
+    @pytest.mark.asyncio
+    async def test_groups_roll_up_the_tree(self, db):
+        """Sub-group ledgers count in every group above them, in tree order"""
+        tb = await statement_service.trial_balance("Alpha", "2024-04-01", "2024-12-31", include_ledgers=False)
+        groups = {row["name"]: row for row in tb["groups"]}
+        assert "ledgers" not in tb
+        assert groups["Export Debtors"]["closing"] == -300
+        assert groups["Sundry Debtors"]["closing"] == -300
+        assert groups["Current Assets"]["closing"] == -1650
+        assert (groups["Current Assets"]["level"], groups["Export Debtors"]["level"]) == (0, 2)
+        names = [row["name"] for row in tb["groups"]]
+        assert names.index("Current Assets") < names.index("Sundry Debtors") < names.index("Export Debtors")
+
+    @pytest.mark.asyncio
+    async def test_profit_and_loss(self, db):
+        """Period movement of revenue groups; gross and net profit"""
+        pl = await statement_service.profit_and_loss("Alpha", "2024-04-01", "2025-03-31")
+        assert (pl["gross_profit"], pl["net_profit"]) == (300, 250)
+        assert [g["name"] for g in pl["income"]] == ["Sales Accounts"]
+        assert [(g["name"], g["amount"]) for g in pl["expenses"]] == [("Indirect Expenses", -50)]
+
+        # Mid-year period: only its own movement
+        pl = await statement_service.profit_and_loss("Alpha", "2024-05-01", "2024-06-30")
+        assert (pl["gross_profit"], pl["net_profit"]) == (0, -50)
+
+    @pytest.mark.asyncio
+    async def test_balance_sheet(self, db):
+        """Assets equal capital plus accumulated profit"""
+        bs = await statement_service.balance_sheet("Alpha", "2024-06-30")
+        assert bs["profit_and_loss"] == 650
+        assert [(g["name"], g["amount"]) for g in bs["assets"]] == [("Current Assets", 1650)]
+        assert [(g["name"], g["amount"]) for g in bs["liabilities"]] == [("Capital Account", 1000)]
+        assert bs["total_assets"] == bs["total_liabilities"] == 1650
+        assert bs["difference"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_company_defaults_to_config(self, db, monkeypatch):
+        """Endpoints without a company use tally.company (TallyBridge may omit it)"""
+        monkeypatch.setattr(config.tally, "company", "Alpha")
+        tb = await statement_controller.get_trial_balance(company=None, from_date="2024-04-01", to_date="2025-03-31",
+                                                          as_on_date=None, ledgers=False)
+        assert tb["total_debit"] == tb["total_credit"] == 1700
+        
+        monkeypatch.setattr(config.tally, "company", "")
+        with pytest.raises(HTTPException) as error:
+            await statement_controller.get_balance_sheet(company=None, as_on_date="2024-06-30")
+        assert error.value.status_code == 400
@@ -0,0 +1,116 @@
+"""
+Surrogate Key Tests
+Checks integer id assignment for ledger / item / voucher / company keys
+and that report joins on the id columns match the text-key joins.
+
+Usage:
+    pytest tests/test_surrogate_keys.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+
+
+async def load_company(service, company, prefix):
+    """One ledger with a sales voucher posted to it"""
+    await service.bulk_insert("mst_ledger", [
+        {"guid": f"{prefix}-l1", "name": "Party A", "parent": "Sundry Debtors"},
+        {"guid": f"{prefix}-l2", "name": "Sales", "parent": "Sales Accounts"},
+    ], company)
+    await service.bulk_insert("trn_voucher", [
+        {"guid": f"{prefix}-v1", "date": "2024-04-01", "voucher_type": "Sales",
+         "party_name": "Party A", "place_of_supply": ""},
+    ], company)
+    await service.bulk_insert("trn_accounting", [
+        {"guid": f"{prefix}-v1", "ledger": "Party A", "amount": -100},
+        {"guid": f"{prefix}-v1", "ledger": "Sales", "amount": 100},
+    ], company)
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """SQLite service with the same ledger names in two companies"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    await load_company(service, "Alpha", "a")
+    await load_company(service, "Beta", "b")
+    yield service
+    await service.disconnect()
+
+
+class TestSurrogateKeys:
+    """Test cases for surrogate key assignment"""
+
+    @pytest.mark.asyncio
+    async def test_ids_assigned_per_company(self, db):
+        """Same ledger name in two companies gets two ids; references match masters"""
+        await db.assign_surrogate_keys()
+        rows = await db.fetch_all(
+            "SELECT l._company, l._ledger_id, a._ledger_id AS ref_id FROM mst_ledger l "
+            "JOIN trn_accounting a ON a.ledger = l.name AND a._company = l._company "
+            "WHERE l.name = 'Party A'"
+        )
+        assert len(rows) == 2
+        assert all(row["_ledger_id"] == row["ref_id"] for row in rows)
+        assert rows[0]["_ledger_id"] != rows[1]["_ledger_id"]
+
+        companies = await db.fetch_all("SELECT DISTINCT _company, _company_id FROM trn_voucher")
+        assert len({row["_company_id"] for row in companies}) == 2
+
+    @pytest.mark.asyncio
+    async def test_integer_join_matches_text_join(self, db):
+        """Voucher join on _voucher_id returns the same rows as the guid join"""
+        await db.assign_surrogate_keys()
+        by_id = await db.fetch_all(
+            "SELECT v.guid, a.ledger FROM trn_accounting a "
+            "JOIN trn_voucher v ON v._voucher_id = a._voucher_id ORDER BY v.guid, a.ledger"
+        )
+        by_guid = await db.fetch_all(
+            "SELECT v.guid, a.ledger FROM trn_accounting a "
+            "JOIN trn_voucher v ON v.guid = a.guid ORDER BY v.guid, a.ledger"
+        )
+        assert by_id == by_guid and len(by_id) == 4
+
+    @pytest.mark.asyncio
+    async def test_ids_stable_across_reimport(self, db):
+        """Re-imported rows get their previous id; new keys get new ids"""
+        await db.assign_surrogate_keys("Alpha")
+        before = await db.fetch_scalar("SELECT _voucher_id FROM trn_voucher WHERE guid = 'a-v1'")
+
+        await db.execute("DELETE FROM trn_accounting WHERE guid = 'a-v1'")
+        await db.bulk_insert("trn_voucher", [
+            {"guid": "a-v1", "date": "2024-04-02", "voucher_type": "Sales",
+             "party_name": "Party A", "place_of_supply": ""},
+            {"guid": "a-v2", "date": "2024-04-03", "voucher_type": "Sales",
+             "party_name": "Party A", "place_of_supply": ""},
+        ], "Alpha")
+        await db.assign_surrogate_keys("Alpha")
+
+        ids = await db.fetch_all("SELECT guid, _voucher_id FROM trn_voucher WHERE _company = 'Alpha' ORDER BY guid")
+        assert ids[0]["_voucher_id"] == before
+        assert ids[1]["_voucher_id"] not in (None, before)
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM trn_voucher WHERE _voucher_id IS NULL "
+                                     "AND _company = 'Beta'") == 1
+
+    @pytest.mark.asyncio
+    async def test_delete_company_clears_dictionary(self, db):
+        """Deleting a company drops its dictionary entries"""
+        await db.assign_surrogate_keys()
+        await db.delete_company_data("Alpha")
+        assert await db.fetch_scalar(
+            "SELECT COUNT(*) FROM key_dictionary WHERE company_name = 'Alpha'"
+        ) == 0
+        assert await db.fetch_scalar(
+            "SELECT COUNT(*) FROM key_dictionary WHERE company_name = 'Beta'"
+        ) > 0
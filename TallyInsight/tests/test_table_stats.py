@@ -0,0 +1,90 @@
+"""
+Table Statistics Tests
+Checks the table_stats row counts maintained for the dashboard.
+
+Usage:
+    pytest tests/test_table_stats.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """SQLite service with ledgers for two companies"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    await service.bulk_insert("mst_ledger", [
+        {"guid": "a1", "name": "Cash"}, {"guid": "a2", "name": "Bank"}
+    ], "Alpha")
+    await service.bulk_insert("mst_ledger", [{"guid": "b1", "name": "Cash"}], "Beta")
+    yield service
+    await service.disconnect()
+
+
+class TestTableStats:
+    """Test cases for table_stats"""
+
+    @pytest.mark.asyncio
+    async def test_refresh_stores_exact_counts(self, db):
+        """Recount stores per-company rows with a size estimate"""
+        counts = await db.refresh_table_stats("Alpha", last_sync_at="2026-01-01T00:00:00")
+        assert counts["mst_ledger"] == 2
+
+        stats = {row["table_name"]: row for row in await db.get_table_stats("Alpha")}
+        assert stats["mst_ledger"]["row_count"] == 2
+        assert stats["mst_ledger"]["bytes_estimate"] > 0
+        assert stats["mst_ledger"]["last_sync_at"] == "2026-01-01T00:00:00"
+        assert stats["trn_voucher"]["bytes_estimate"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cached_counts_served_from_stats(self, db):
+        """Counts come from table_stats until the next recount; a miss never counts"""
+        assert await db.get_cached_table_counts("Alpha") == {}
+        assert await db.get_table_stats("Alpha") == []
+
+        await db.refresh_table_stats("Alpha")
+        await db.bulk_insert("mst_ledger", [{"guid": "a3", "name": "Sales"}], "Alpha")
+        assert (await db.get_cached_table_counts("Alpha"))["mst_ledger"] == 2
+
+        await db.refresh_table_stats("Alpha")
+        assert (await db.get_cached_table_counts("Alpha"))["mst_ledger"] == 3
+
+    @pytest.mark.asyncio
+    async def test_manual_recount_keeps_last_sync(self, db):
+        """An on-demand recount does not overwrite the last sync time"""
+        await db.refresh_table_stats("Alpha", last_sync_at="2026-01-01T00:00:00")
+        await db.refresh_table_stats("Alpha")
+        stats = await db.get_table_stats("Alpha")
+        assert {row["last_sync_at"] for row in stats} == {"2026-01-01T00:00:00"}
+
+    @pytest.mark.asyncio
+    async def test_company_refresh_updates_totals(self, db):
+        """Each company save keeps the all-company totals as the sum of the companies"""
+        await db.refresh_table_stats("Alpha")
+        assert (await db.get_cached_table_counts())["mst_ledger"] == 2
+        await db.bulk_insert("mst_ledger", [{"guid": "b2", "name": "Bank"}], "Beta")
+        await db.refresh_table_stats("Beta")
+        assert (await db.get_cached_table_counts())["mst_ledger"] == 4
+
+        await db.delete_company_data("Beta")
+        assert (await db.get_cached_table_counts())["mst_ledger"] == 2
+
+    @pytest.mark.asyncio
+    async def test_delete_company_clears_stats(self, db):
+        """Deleting a company removes its statistics"""
+        await db.refresh_table_stats("Alpha")
+        await db.delete_company_data("Alpha")
+        assert await db.get_table_stats("Alpha") == []
@@ -0,0 +1,82 @@
+"""
+Voucher Details Tests
+Checks that the batch voucher-details lookup returns the same sections as
+the single-voucher endpoint, in one query per section.
+
+Usage:
+    pytest tests/test_voucher_details.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.controllers import voucher_controller
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """Controller bound to a SQLite service with a sale and a receipt"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    await service.bulk_insert("trn_voucher", [
+        {"guid": "s1", "date": "2024-04-01", "voucher_type": "Sales", "party_name": "Party A",
+         "place_of_supply": ""},
+        {"guid": "r1", "date": "2024-04-05", "voucher_type": "Receipt", "party_name": "Party A",
+         "place_of_supply": ""},
+    ], "Alpha")
+    await service.bulk_insert("trn_accounting", [
+        {"guid": "s1", "ledger": "Party A", "amount": -118},
+        {"guid": "s1", "ledger": "Sales", "amount": 118},
+        {"guid": "r1", "ledger": "Party A", "amount": 118},
+        {"guid": "r1", "ledger": "Cash", "amount": -118},
+    ], "Alpha")
+    await service.bulk_insert("trn_bill", [
+        {"guid": "s1", "ledger": "Party A", "name": "INV-1", "amount": -118, "billtype": "New Ref"},
+    ], "Alpha")
+    monkeypatch.setattr(voucher_controller, "database_service", service)
+    yield service
+    await service.disconnect()
+
+
+class TestVoucherDetails:
+    """Test cases for the voucher details endpoints"""
+
+    @pytest.mark.asyncio
+    async def test_batch_matches_single(self, db):
+        """Each batch entry equals the single-voucher response"""
+        batch = await voucher_controller.get_voucher_details_batch(
+            voucher_controller.VoucherDetailsRequest(guids=["s1", "r1", "missing", "s1"])
+        )
+        assert batch["missing"] == ["missing"]
+        assert set(batch["vouchers"]) == {"s1", "r1"}
+        for guid in ("s1", "r1"):
+            assert batch["vouchers"][guid] == await voucher_controller.get_voucher_details(guid)
+
+    @pytest.mark.asyncio
+    async def test_sections_grouped_by_voucher(self, db, monkeypatch):
+        """Rows land under their own voucher; totals per voucher"""
+        monkeypatch.setattr(voucher_controller, "DETAILS_CHUNK_SIZE", 1)
+        details = await voucher_controller._fetch_voucher_details(["s1", "r1"])
+        assert [e["ledger"] for e in details["s1"]["entries"]] == ["Party A", "Sales"]
+        assert [b["name"] for b in details["s1"]["bills"]] == ["INV-1"]
+        assert details["r1"]["bills"] == []
+        assert (details["s1"]["total_dr"], details["s1"]["total_cr"]) == (118, 118)
+
+    @pytest.mark.asyncio
+    async def test_company_filters_rows(self, db):
+        """A guid of another company's rows is not returned for a named company"""
+        request = voucher_controller.VoucherDetailsRequest(guids=["s1"], company="Beta")
+        batch = await voucher_controller.get_voucher_details_batch(request)
+        assert (batch["vouchers"], batch["missing"]) == ({}, ["s1"])
+        details = await voucher_controller._fetch_voucher_details(["s1"], "Alpha")
+        assert len(details["s1"]["entries"]) == 2
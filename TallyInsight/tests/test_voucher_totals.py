@@ -0,0 +1,134 @@
+"""
+Voucher Totals Tests
+Checks the per-voucher totals rebuilt at sync for the voucher list and
+paging the list by amount.
+
+Usage:
+    pytest tests/test_voucher_totals.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.controllers.voucher_controller import VOUCHER_AMOUNT_ORDER
+from app.services.database import voucher_totals
+from app.services.database.sqlite_adapter import SQLiteDatabaseService
+from app.utils.pagination import KeysetPaginator
+
+TOTALS_QUERY = "SELECT * FROM voucher_totals WHERE _voucher_id = (SELECT _voucher_id FROM trn_voucher WHERE guid = ?)"
+
+
+async def load_vouchers(service, company):
+    """A sale to Party A, a two-debit journal and 10 receipts of growing amounts"""
+    vouchers = [
+        {"guid": f"{company}-s", "date": "2024-04-01", "voucher_type": "Sales", "party_name": "Party A"},
+        {"guid": f"{company}-j", "date": "2024-04-02", "voucher_type": "Journal", "party_name": ""},
+    ]
+    entries = [
+        {"guid": f"{company}-s", "ledger": "Party A", "amount": -118},
+        {"guid": f"{company}-s", "ledger": "Sales", "amount": 100},
+        {"guid": f"{company}-s", "ledger": "GST", "amount": 18},
+        {"guid": f"{company}-j", "ledger": "Rent", "amount": -30},
+        {"guid": f"{company}-j", "ledger": "Power", "amount": -20},
+        {"guid": f"{company}-j", "ledger": "Cash", "amount": 50},
+    ]
+    for i in range(10):
+        vouchers.append({"guid": f"{company}-r{i}", "date": "2024-05-01", "voucher_type": "Receipt",
+                         "party_name": "Party A"})
+        entries += [
+            {"guid": f"{company}-r{i}", "ledger": "Party A", "amount": 10 * (i % 5)},
+            {"guid": f"{company}-r{i}", "ledger": "Cash", "amount": -10 * (i % 5)},
+        ]
+    await service.bulk_insert("trn_voucher", [dict(v, place_of_supply="") for v in vouchers], company)
+    await service.bulk_insert("trn_accounting", entries, company)
+    await service.assign_surrogate_keys(company)
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path, monkeypatch):
+    """SQLite service with two companies' vouchers and Alpha's totals"""
+    monkeypatch.chdir(os.path.join(ROOT_DIR, "config"))
+    service = SQLiteDatabaseService()
+    service.db_path = str(tmp_path / "tally.db")
+    await service.ensure_company_config_table()
+    await service.create_tables(incremental=False)
+    await load_vouchers(service, "Alpha")
+    await load_vouchers(service, "Beta")
+    await service.refresh_derived_table("voucher_totals", "Alpha")
+    yield service
+    await service.disconnect()
+
+
+class TestVoucherTotals:
+    """Test cases for the voucher_totals rebuild"""
+
+    @pytest.mark.asyncio
+    async def test_party_voucher(self, db):
+        """Debit / credit totals, line count and the party ledger's amount"""
+        totals = await db.fetch_one(TOTALS_QUERY, ("Alpha-s",))
+        assert (totals["debit_total"], totals["credit_total"], totals["line_count"]) == (118, 118, 3)
+        assert totals["party_amount"] == totals["amount"] == 118
+
+    @pytest.mark.asyncio
+    async def test_without_party_uses_debit_total(self, db):
+        """A voucher without party entries shows its total debit"""
+        totals = await db.fetch_one(TOTALS_QUERY, ("Alpha-j",))
+        assert totals["party_amount"] is None
+        assert totals["amount"] == 50
+
+    @pytest.mark.asyncio
+    async def test_refresh_is_per_company(self, db):
+        """Only the refreshed company is rebuilt; rebuilding again adds no rows"""
+        assert await db.fetch_scalar(
+            "SELECT COUNT(*) FROM voucher_totals WHERE _company = 'Beta'"
+        ) == 0
+        assert await db.refresh_derived_table("voucher_totals", "Beta") == 12
+        assert await db.refresh_derived_table("voucher_totals", "Alpha") == 12
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM voucher_totals") == 24
+
+    @pytest.mark.asyncio
+    async def test_failed_rebuild_keeps_rows(self, db, monkeypatch):
+        """DELETE and INSERT commit together: a failing rebuild leaves the old totals"""
+        statements = voucher_totals.refresh_statements
+        monkeypatch.setattr(voucher_totals, "refresh_statements", lambda *args: statements(*args) + [
+            ("INSERT INTO voucher_totals (_voucher_id) VALUES (NULL, 1)", ()),
+        ])
+        with pytest.raises(Exception):
+            await db.refresh_derived_table("voucher_totals", "Alpha")
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM voucher_totals WHERE _company = 'Alpha'") == 12
+
+    @pytest.mark.asyncio
+    async def test_delete_company_clears_rows(self, db):
+        """Deleting a company removes its totals"""
+        await db.delete_company_data("Alpha")
+        assert await db.fetch_scalar("SELECT COUNT(*) FROM voucher_totals") == 0
+
+    @pytest.mark.asyncio
+    async def test_page_by_amount(self, db):
+        """Cursor pages sorted by amount return every voucher once, largest first"""
+        rows, cursor = [], None
+        while True:
+            paginator = KeysetPaginator(VOUCHER_AMOUNT_ORDER, 5, cursor)
+            query = (f"SELECT v.guid, COALESCE(t.amount, 0) as amount{paginator.window_columns()} "
+                     "FROM trn_voucher v LEFT JOIN voucher_totals t ON t._voucher_id = v._voucher_id "
+                     "WHERE v._company = ?")
+            params = ["Alpha"]
+            keyset, keyset_params = paginator.condition()
+            if keyset:
+                query += f" AND {keyset}"
+                params.extend(keyset_params)
+            page = await paginator.fetch(db, query, params)
+            rows += page.rows
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        assert len({row["guid"] for row in rows}) == len(rows) == 12
+        assert [row["amount"] for row in rows] == sorted((row["amount"] for row in rows), reverse=True)
+        assert rows[0]["guid"] == "Alpha-s"